@@ -0,0 +1,31 @@
+"""Add indexes backing cheap data-version ETags
+
+The primitives derive ETags from max(company_cache.computed_at),
+max(company_metrics.updated_at) and max(bond_pricing.fetched_at) so that
+conditional requests can return 304 before running the search queries.
+These indexes turn each max() into a single index probe.
+
+Revision ID: 028_add_data_version_indexes
+Revises: 027_add_knowledge_chunks
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '028_add_data_version_indexes'
+down_revision = '027_add_knowledge_chunks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_bond_pricing_fetched_at', 'bond_pricing', ['fetched_at'])
+    op.create_index('idx_cache_computed_at', 'company_cache', ['computed_at'])
+    op.create_index('idx_metrics_updated_at', 'company_metrics', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('idx_metrics_updated_at', table_name='company_metrics')
+    op.drop_index('idx_cache_computed_at', table_name='company_cache')
+    op.drop_index('idx_bond_pricing_fetched_at', table_name='bond_pricing')
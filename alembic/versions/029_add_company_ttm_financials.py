@@ -0,0 +1,167 @@
+"""Add materialized trailing-twelve-month financials
+
+company_ttm_financials holds one TTM rollup per company so that
+/v1/financials?period=TTM is a single indexed read instead of two queries
+per company. The rollup is computed set-wise by
+refresh_company_ttm_financials(company_ids) with window functions over
+company_financials, and statement-level triggers call it for the companies
+each INSERT/UPDATE/DELETE touched, so raw-SQL writers stay covered too.
+
+Revision ID: 029_add_company_ttm_financials
+Revises: 028_add_data_version_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '029_add_company_ttm_financials'
+down_revision = '028_add_data_version_indexes'
+branch_labels = None
+depends_on = None
+
+
+FLOW_COLUMNS = [
+    'revenue', 'ebitda', 'operating_income', 'net_income', 'interest_expense',
+    'depreciation_amortization', 'operating_cash_flow', 'capex',
+]
+BALANCE_COLUMNS = [
+    'cash_and_equivalents', 'total_assets', 'total_debt', 'total_liabilities',
+    'stockholders_equity',
+]
+
+
+def _refresh_function_sql() -> str:
+    # Window w orders each company's quarters newest first; t4 is the latest
+    # quarter plus the 3 before it. Row 1 of each partition carries the rollup.
+    window_sums = ",\n                    ".join(
+        f"SUM(f.{c}) OVER t4 AS ttm_{c}" for c in FLOW_COLUMNS
+    )
+    flow_values = ",\n                ".join(
+        f"CASE WHEN r.filing_type = '10-K' THEN r.{c} ELSE r.ttm_{c}::bigint END" for c in FLOW_COLUMNS
+    )
+    balance_values = ", ".join(f"r.{c}" for c in BALANCE_COLUMNS)
+    columns = ", ".join(FLOW_COLUMNS + BALANCE_COLUMNS)
+    updates = ",\n                ".join(
+        f"{c} = EXCLUDED.{c}"
+        for c in [
+            'fiscal_year', 'fiscal_quarter', 'period_end_date', 'ttm_source',
+            'ttm_quarters', 'quarter_ids', *FLOW_COLUMNS, *BALANCE_COLUMNS,
+            'source_filing', 'computed_at',
+        ]
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION refresh_company_ttm_financials(company_ids uuid[])
+        RETURNS void AS $$
+        BEGIN
+            -- Companies whose last financials row is gone lose their rollup
+            DELETE FROM company_ttm_financials t
+            WHERE (company_ids IS NULL OR t.company_id = ANY(company_ids))
+              AND NOT EXISTS (
+                  SELECT 1 FROM company_financials f WHERE f.company_id = t.company_id
+              );
+
+            INSERT INTO company_ttm_financials (
+                company_id, fiscal_year, fiscal_quarter, period_end_date,
+                ttm_source, ttm_quarters, quarter_ids, {columns},
+                source_filing, computed_at
+            )
+            SELECT
+                r.company_id, r.fiscal_year, r.fiscal_quarter, r.period_end_date,
+                CASE WHEN r.filing_type = '10-K' THEN '10-K' ELSE r.window_size || '_quarters' END,
+                CASE WHEN r.filing_type = '10-K' THEN NULL ELSE r.window_size END,
+                r.window_ids,
+                {flow_values},
+                {balance_values},
+                r.source_filing, now()
+            FROM (
+                SELECT
+                    f.*,
+                    ROW_NUMBER() OVER w AS rn,
+                    COUNT(*) OVER t4 AS window_size,
+                    ARRAY_AGG(f.id) OVER t4 AS window_ids,
+                    {window_sums}
+                FROM company_financials f
+                WHERE company_ids IS NULL OR f.company_id = ANY(company_ids)
+                WINDOW w AS (
+                           PARTITION BY f.company_id
+                           ORDER BY f.period_end_date DESC, f.fiscal_year DESC, f.fiscal_quarter DESC
+                       ),
+                       t4 AS (w ROWS BETWEEN CURRENT ROW AND 3 FOLLOWING)
+            ) r
+            WHERE r.rn = 1
+            ON CONFLICT (company_id) DO UPDATE SET
+                {updates};
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade():
+    op.create_table(
+        'company_ttm_financials',
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('fiscal_year', sa.Integer(), nullable=False),
+        sa.Column('fiscal_quarter', sa.Integer(), nullable=False),
+        sa.Column('period_end_date', sa.Date(), nullable=False),
+        sa.Column('ttm_source', sa.String(20), nullable=False),
+        sa.Column('ttm_quarters', sa.Integer(), nullable=True),
+        sa.Column('quarter_ids', postgresql.ARRAY(postgresql.UUID(as_uuid=True)), nullable=False),
+        *[sa.Column(c, sa.BigInteger(), nullable=True) for c in FLOW_COLUMNS + BALANCE_COLUMNS],
+        sa.Column('source_filing', sa.String(500), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    op.execute(_refresh_function_sql())
+
+    # Transition tables give each statement's touched rows; they can't be
+    # shared across events, so there is one trigger per operation
+    op.execute("""
+        CREATE OR REPLACE FUNCTION company_financials_refresh_ttm()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_company_ttm_financials(ARRAY(SELECT DISTINCT company_id FROM new_rows));
+            ELSIF TG_OP = 'UPDATE' THEN
+                PERFORM refresh_company_ttm_financials(ARRAY(
+                    SELECT company_id FROM old_rows UNION SELECT company_id FROM new_rows
+                ));
+            ELSE
+                PERFORM refresh_company_ttm_financials(ARRAY(SELECT DISTINCT company_id FROM old_rows));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER company_financials_ttm_insert
+        AFTER INSERT ON company_financials
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION company_financials_refresh_ttm();
+    """)
+    op.execute("""
+        CREATE TRIGGER company_financials_ttm_update
+        AFTER UPDATE ON company_financials
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION company_financials_refresh_ttm();
+    """)
+    op.execute("""
+        CREATE TRIGGER company_financials_ttm_delete
+        AFTER DELETE ON company_financials
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION company_financials_refresh_ttm();
+    """)
+
+    # Backfill every company in one pass
+    op.execute("SELECT refresh_company_ttm_financials(NULL)")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS company_financials_ttm_delete ON company_financials")
+    op.execute("DROP TRIGGER IF EXISTS company_financials_ttm_update ON company_financials")
+    op.execute("DROP TRIGGER IF EXISTS company_financials_ttm_insert ON company_financials")
+    op.execute("DROP FUNCTION IF EXISTS company_financials_refresh_ttm()")
+    op.execute("DROP FUNCTION IF EXISTS refresh_company_ttm_financials(uuid[])")
+    op.drop_table('company_ttm_financials')
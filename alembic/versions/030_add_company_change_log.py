@@ -0,0 +1,56 @@
+"""Add append-only company change log
+
+company_change_events records debt/entity additions and removals, metric
+deltas and pricing moves as they are observed by cache refreshes, snapshots
+and pricing runs. company_change_state holds the last observed state per
+company that new observations are diffed against.
+
+/v1/companies/{ticker}/changes reads idx_change_events_company_time and the
+universe-wide /v1/changes feed reads idx_change_events_time, instead of
+re-diffing snapshots on every request.
+
+Revision ID: 030_add_company_change_log
+Revises: 029_add_company_ttm_financials
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '030_add_company_change_log'
+down_revision = '029_add_company_ttm_financials'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'company_change_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('event_type', sa.String(30), nullable=False),
+        sa.Column('subject', sa.String(100), nullable=True),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('idx_change_events_company_time', 'company_change_events', ['company_id', 'occurred_at'])
+    op.create_index('idx_change_events_time', 'company_change_events', ['occurred_at', 'id'])
+
+    op.create_table(
+        'company_change_state',
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('state', postgresql.JSONB(), nullable=False),
+        sa.Column('tracking_since', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('observed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('company_change_state')
+    op.drop_index('idx_change_events_time', table_name='company_change_events')
+    op.drop_index('idx_change_events_company_time', table_name='company_change_events')
+    op.drop_table('company_change_events')
@@ -0,0 +1,67 @@
+"""Add document_passages for passage-level document search
+
+Each document section is split into overlapping ~1,500 character passages
+with their own tsvector and offsets into the section. /v1/documents/search
+ranks passages and returns the best passage per section, instead of ranking
+and headlining whole sections (up to 100k characters).
+
+Passages are written by app/services/passage_index.py when sections are
+stored; existing sections are backfilled by 037_backfill_document_passages.
+
+Revision ID: 031_add_document_passages
+Revises: 030_add_company_change_log
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '031_add_document_passages'
+down_revision = '030_add_company_change_log'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'document_passages',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('document_section_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('document_sections.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('company_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('passage_index', sa.Integer(), nullable=False),
+        sa.Column('start_offset', sa.Integer(), nullable=False),
+        sa.Column('end_offset', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('search_vector', postgresql.TSVECTOR()),
+        sa.Column('indexed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('idx_document_passages_search_vector', 'document_passages', ['search_vector'], postgresql_using='gin')
+    op.create_index('idx_document_passages_section', 'document_passages', ['document_section_id', 'passage_index'], unique=True)
+    op.create_index('idx_document_passages_company', 'document_passages', ['company_id'])
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION document_passages_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', COALESCE(NEW.content, ''));
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER document_passages_search_vector_trigger
+        BEFORE INSERT OR UPDATE ON document_passages
+        FOR EACH ROW
+        EXECUTE FUNCTION document_passages_search_vector_update();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS document_passages_search_vector_trigger ON document_passages")
+    op.execute("DROP FUNCTION IF EXISTS document_passages_search_vector_update()")
+    op.drop_index('idx_document_passages_company', table_name='document_passages')
+    op.drop_index('idx_document_passages_section', table_name='document_passages')
+    op.drop_index('idx_document_passages_search_vector', table_name='document_passages')
+    op.drop_table('document_passages')
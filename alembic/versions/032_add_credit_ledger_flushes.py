@@ -0,0 +1,37 @@
+"""Add credit_ledger_flushes for the Redis credit ledger
+
+Pay-as-you-go deductions are taken from a Redis balance and flushed to
+user_credits in batches. Each applied batch is recorded here in the same
+transaction as the user_credits update, so a flush retried after a crash
+can tell whether it already landed.
+
+Revision ID: 032_add_credit_ledger_flushes
+Revises: 031_add_document_passages
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '032_add_credit_ledger_flushes'
+down_revision = '031_add_document_passages'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'credit_ledger_flushes',
+        sa.Column('batch_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('flushed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_credit_ledger_flushes_user', 'credit_ledger_flushes', ['user_id', 'flushed_at'])
+
+
+def downgrade():
+    op.drop_index('ix_credit_ledger_flushes_user', table_name='credit_ledger_flushes')
+    op.drop_table('credit_ledger_flushes')
@@ -0,0 +1,28 @@
+"""Add dirty_sources to company_cache for incremental rebuilds
+
+Writes to a company's entities, debt instruments, guarantees, financials or
+company row record the changed source in dirty_sources, and the filing
+refresh cache step rebuilds only the response sections that depend on it.
+
+Revision ID: 033_add_company_cache_dirty_sources
+Revises: 032_add_credit_ledger_flushes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '033_add_company_cache_dirty_sources'
+down_revision = '032_add_credit_ledger_flushes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('company_cache', sa.Column('dirty_sources', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('company_cache', 'dirty_sources')
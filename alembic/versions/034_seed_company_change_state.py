@@ -0,0 +1,82 @@
+"""Seed company_change_state baselines for existing companies
+
+030 created the change log empty, so every company answered /changes with
+NO_CHANGE_LOG until its next refresh recorded a baseline. This records the
+current entities, active debt, metrics and pricing of every company as its
+baseline in one pass, in the same shape as change_log.build_state, so the
+log starts at deploy time. Companies already tracked keep their baseline.
+
+Revision ID: 034_seed_company_change_state
+Revises: 033_add_company_cache_dirty_sources
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '034_seed_company_change_state'
+down_revision = '033_add_company_cache_dirty_sources'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        INSERT INTO company_change_state (company_id, state)
+        SELECT
+            c.id,
+            jsonb_build_object(
+                'debt', COALESCE((
+                    SELECT jsonb_object_agg(d.id::text, jsonb_build_object(
+                        'name', d.name,
+                        'cusip', d.cusip,
+                        'instrument_type', d.instrument_type,
+                        'seniority', d.seniority,
+                        'principal', d.principal,
+                        'interest_rate', d.interest_rate,
+                        'maturity_date', d.maturity_date,
+                        'issue_date', d.issue_date
+                    ))
+                    FROM debt_instruments d
+                    WHERE d.company_id = c.id AND d.is_active
+                ), '{}'::jsonb),
+                'entities', COALESCE((
+                    SELECT jsonb_object_agg(e.id::text, jsonb_build_object(
+                        'name', e.name,
+                        'entity_type', e.entity_type,
+                        'is_guarantor', e.is_guarantor,
+                        'jurisdiction', e.jurisdiction
+                    ))
+                    FROM entities e
+                    WHERE e.company_id = c.id
+                ), '{}'::jsonb),
+                'metrics', (
+                    SELECT jsonb_build_object(
+                        'total_debt', m.total_debt,
+                        'leverage_ratio', NULLIF(m.leverage_ratio, 0)::float8,
+                        'subordination_risk', m.subordination_risk
+                    )
+                    FROM company_metrics m
+                    WHERE m.company_id = c.id
+                ),
+                'pricing', COALESCE((
+                    SELECT jsonb_object_agg(d.id::text, jsonb_build_object(
+                        'name', d.name,
+                        'cusip', COALESCE(p.cusip, d.cusip),
+                        'ytm_bps', p.ytm_bps,
+                        'price', NULLIF(p.last_price, 0)::float8
+                    ))
+                    FROM bond_pricing p
+                    JOIN debt_instruments d ON d.id = p.debt_instrument_id
+                    WHERE d.company_id = c.id AND d.is_active AND p.ytm_bps IS NOT NULL
+                ), '{}'::jsonb)
+            )
+        FROM companies c
+        ON CONFLICT (company_id) DO NOTHING
+    """)
+
+
+def downgrade():
+    # Seeded and refresh-recorded baselines are indistinguishable; leave them
+    pass
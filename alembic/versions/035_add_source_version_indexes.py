@@ -0,0 +1,34 @@
+"""Add indexes backing per-endpoint data-version stamps
+
+/v1/covenants, /v1/collateral, /v1/financials and /v1/bonds add their own
+source tables to the ETag stamps (see 028): max(covenants.updated_at),
+max(collateral.updated_at), max(company_ttm_financials.computed_at) and
+max(debt_instruments.updated_at). These indexes turn each max() into a
+single index probe.
+
+Revision ID: 035_add_source_version_indexes
+Revises: 034_seed_company_change_state
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '035_add_source_version_indexes'
+down_revision = '034_seed_company_change_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_covenants_updated_at', 'covenants', ['updated_at'])
+    op.create_index('ix_collateral_updated_at', 'collateral', ['updated_at'])
+    op.create_index('idx_ttm_financials_computed_at', 'company_ttm_financials', ['computed_at'])
+    op.create_index('idx_debt_updated_at', 'debt_instruments', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('idx_debt_updated_at', table_name='debt_instruments')
+    op.drop_index('idx_ttm_financials_computed_at', table_name='company_ttm_financials')
+    op.drop_index('ix_collateral_updated_at', table_name='collateral')
+    op.drop_index('idx_covenants_updated_at', table_name='covenants')
@@ -0,0 +1,74 @@
+"""Order the change feed by a commit-ordered sequence
+
+company_change_events.occurred_at defaulted to now(), the transaction start
+time. Events written inside long refresh transactions became visible after
+commit with timestamps older than rows a /v1/changes poller had already
+passed, and the (occurred_at, id) keyset skipped them for good.
+
+A deferred constraint trigger now stamps each event at commit: it takes a
+transaction-level advisory lock (held until the commit completes, so stamps
+are handed out in commit order), assigns seq from company_change_events_seq
+and resets occurred_at to clock_timestamp(). The feed pages on seq.
+Existing rows get seq in (occurred_at, id) order.
+
+Revision ID: 036_add_change_event_seq
+Revises: 035_add_source_version_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '036_add_change_event_seq'
+down_revision = '035_add_source_version_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE SEQUENCE company_change_events_seq")
+    op.add_column('company_change_events', sa.Column('seq', sa.BigInteger(), nullable=True))
+    op.execute("""
+        UPDATE company_change_events e
+        SET seq = o.n
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY occurred_at, id) AS n
+            FROM company_change_events
+        ) o
+        WHERE e.id = o.id
+    """)
+    op.execute("""
+        SELECT setval('company_change_events_seq', COALESCE(MAX(seq), 0) + 1, false)
+        FROM company_change_events
+    """)
+    op.create_index('idx_change_events_seq', 'company_change_events', ['seq'], unique=True)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION company_change_events_stamp()
+        RETURNS trigger AS $$
+        BEGIN
+            -- Held until commit: the next writer's stamps wait for this commit
+            PERFORM pg_advisory_xact_lock(hashtext('company_change_events_seq'));
+            UPDATE company_change_events
+            SET seq = nextval('company_change_events_seq'),
+                occurred_at = clock_timestamp()
+            WHERE id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER company_change_events_stamp
+        AFTER INSERT ON company_change_events
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION company_change_events_stamp();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS company_change_events_stamp ON company_change_events")
+    op.execute("DROP FUNCTION IF EXISTS company_change_events_stamp()")
+    op.drop_index('idx_change_events_seq', table_name='company_change_events')
+    op.drop_column('company_change_events', 'seq')
+    op.execute("DROP SEQUENCE IF EXISTS company_change_events_seq")
@@ -0,0 +1,73 @@
+"""Backfill document_passages for existing sections
+
+031 created document_passages empty, and document search reads only
+passages, so every search returned nothing until
+scripts/build_passage_index.py had been run. This splits every section that
+has no passages yet with the same splitter the write path uses
+(app.services.passage_index.split_passages), walking sections by id in
+batches so only one batch of section content is held in memory.
+
+Revision ID: 037_backfill_document_passages
+Revises: 036_add_change_event_seq
+Create Date: 2026-10-16
+
+"""
+from uuid import UUID, uuid4
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.passage_index import split_passages
+
+# revision identifiers, used by Alembic.
+revision = '037_backfill_document_passages'
+down_revision = '036_add_change_event_seq'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200  # sections per round trip
+
+
+def upgrade():
+    bind = op.get_bind()
+    select_batch = sa.text("""
+        SELECT ds.id, ds.company_id, ds.content
+        FROM document_sections ds
+        WHERE ds.id > :last_id
+          AND NOT EXISTS (SELECT 1 FROM document_passages p WHERE p.document_section_id = ds.id)
+        ORDER BY ds.id
+        LIMIT :batch_size
+    """)
+    insert_passages = sa.text("""
+        INSERT INTO document_passages
+            (id, document_section_id, company_id, passage_index, start_offset, end_offset, content)
+        VALUES
+            (:id, :document_section_id, :company_id, :passage_index, :start_offset, :end_offset, :content)
+    """)
+
+    last_id = UUID(int=0)
+    while True:
+        sections = bind.execute(select_batch, {"last_id": last_id, "batch_size": BATCH_SIZE}).fetchall()
+        if not sections:
+            break
+        last_id = sections[-1].id
+        rows = [
+            {
+                "id": uuid4(),
+                "document_section_id": section.id,
+                "company_id": section.company_id,
+                "passage_index": index,
+                "start_offset": start,
+                "end_offset": end,
+                "content": section.content[start:end],
+            }
+            for section in sections
+            for index, (start, end) in enumerate(split_passages(section.content or ""))
+        ]
+        if rows:
+            bind.execute(insert_passages, rows)
+
+
+def downgrade():
+    # Passages are derived data; the write path keeps producing them
+    pass
@@ -23,7 +23,7 @@ from app.core.auth import (
     generate_api_key,
     hash_api_key,
     get_api_key_prefix,
-    require_auth,
+    require_user,
     create_user_credits,
     TIER_CREDITS,
     TIER_RATE_LIMITS,
@@ -38,6 +38,7 @@ from app.core.billing import (
     handle_invoice_paid,
     handle_credit_purchase,
 )
+from app.core.credit_ledger import unflushed_credit_usage
 from app.core.database import get_db
 from app.core.posthog import capture_event as posthog_capture, identify_user as posthog_identify
 from app.models import User, UserCredits
@@ -168,7 +169,7 @@ async def signup(
 
 @router.get("/me", response_model=UserInfoResponse)
 async def get_me(
-    user: User = Depends(require_auth),
+    user: User = Depends(require_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get current user info and credit balance."""
@@ -176,6 +177,8 @@ async def get_me(
         select(UserCredits).where(UserCredits.user_id == user.id)
     )
     credits = credits_result.scalar_one_or_none()
+    # Deductions still in the Redis ledger haven't reached user_credits
+    unflushed = await unflushed_credit_usage(user.id) if credits else 0
 
     return UserInfoResponse(
         user_id=str(user.id),
@@ -183,7 +186,7 @@ async def get_me(
         tier=user.tier,
         api_key_prefix=user.api_key_prefix,
         is_active=user.is_active,
-        credits_remaining=float(credits.credits_remaining) if credits else 0,
+        credits_remaining=float(credits.credits_remaining - unflushed) if credits else 0,
         credits_monthly_limit=credits.credits_monthly_limit if credits else TIER_CREDITS["free"],
         billing_cycle_start=credits.billing_cycle_start if credits else date.today(),
     )
@@ -197,7 +200,7 @@ async def get_me(
 @router.post("/upgrade", response_model=UpgradeResponse)
 async def upgrade_to_pro(
     request: UpgradeRequest,
-    user: User = Depends(require_auth),
+    user: User = Depends(require_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -234,7 +237,7 @@ async def upgrade_to_pro(
 
 @router.post("/portal", response_model=PortalResponse)
 async def billing_portal(
-    user: User = Depends(require_auth),
+    user: User = Depends(require_user),
 ):
     """
     Create a Stripe Customer Portal session to manage subscription.
@@ -0,0 +1,683 @@
+"""
+Bond resolution index for GET /v1/bonds/resolve.
+
+Resolution maps trader-style descriptions ("RIG 8% 2027", partial CUSIPs,
+ISINs) to instruments. Instead of turning the text into ILIKE filters, all
+active instruments are held in an in-memory index with postings keyed by:
+
+- company ticker
+- coupon bucket (25bp wide)
+- maturity year
+- normalized name tokens (instrument, issuer and company names)
+
+plus sorted CUSIP/ISIN lists for prefix lookups. Guarantor counts are
+precomputed at build time.
+
+A query is parsed once into a ResolveQuery. Hard constraints (explicit
+params including identifier prefixes, a recognised ticker, and coupon/year
+in exact mode) narrow the candidate set through the postings. Everything
+parsed from the free text, including CUSIP-shaped prefixes, is then scored
+per candidate and combined into a ranked confidence.
+
+The index is rebuilt when the universe-wide entity graph version changes
+(bumped on any instrument or guarantee write) and is checked at most every
+RECHECK_SECONDS. Without Redis it is rebuilt every MAX_AGE_SECONDS.
+"""
+
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+import structlog
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.core.cache import get_entity_graph_version
+from app.core.database import async_session_maker
+from app.models import Company, DebtInstrument, Entity, Guarantee
+
+logger = structlog.get_logger()
+
+# How often to compare the index against the Redis version
+RECHECK_SECONDS = 5
+
+# Rebuild interval when no version is available (Redis not configured)
+MAX_AGE_SECONDS = 300
+
+COUPON_BUCKET_BPS = 25
+
+# Coupon tolerance: explicit `coupon` param vs. a coupon parsed from text
+PARAM_COUPON_TOLERANCE_BPS = 50
+TEXT_COUPON_TOLERANCE_BPS = 25
+
+MIN_YEAR, MAX_YEAR = 2020, 2060
+
+# Component weights for fuzzy confidence; only components present in the query count
+WEIGHTS = {"ticker": 0.35, "coupon": 0.25, "maturity": 0.25, "name": 0.15, "cusip_prefix": 0.35}
+
+# Fuzzy matches never claim the certainty of an identifier hit
+MAX_FUZZY_CONFIDENCE = 0.95
+
+NAME_STOPWORDS = {"due", "of", "the", "and", "notes", "note", "bond", "bonds", "pct"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PCT_RE = re.compile(r"(\d+\.?\d*)\s*%")
+_TRADER_COUPON_RE = re.compile(r"\b(\d{1,2}(?:\.\d+)?)s\b", re.IGNORECASE)
+_YEAR_RE = re.compile(r"(?:due\s+)?(\d{4})")
+_SHORT_YEAR_RE = re.compile(r"'(\d{2})\b|\b\d{1,2}/\d{1,2}/(\d{2}|\d{4})\b")
+# Maturity dates written as 15JAN27, JAN27 or 15JAN2027
+_MONTH_DATE_RE = re.compile(
+    r"^(?:\d{1,2})?(?:JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)(\d{2}|\d{4})$"
+)
+# Bare trader coupon: "CHTR 4.75 '30"
+_BARE_COUPON_RE = re.compile(r"^\d{1,2}\.\d{1,4}$")
+MAX_BARE_COUPON = 20
+
+
+def name_tokens(text: Optional[str]) -> Set[str]:
+    """Lowercase alphanumeric tokens, minus filler words."""
+    if not text:
+        return set()
+    return {t for t in _TOKEN_RE.findall(text.lower()) if t not in NAME_STOPWORDS}
+
+
+def _looks_like_cusip(token: str) -> bool:
+    return len(token) == 9 and token.isalnum() and any(ch.isdigit() for ch in token)
+
+
+def _looks_like_isin(token: str) -> bool:
+    return len(token) == 12 and token[:2].isalpha() and token.isalnum() and any(ch.isdigit() for ch in token)
+
+
+def _month_date_year(token: str) -> Optional[int]:
+    """Year of a DDMMMYY / MMMYY / DDMMMYYYY token, or None."""
+    match = _MONTH_DATE_RE.match(token)
+    if not match:
+        return None
+    digits = match.group(1)
+    return int(digits) + (2000 if len(digits) == 2 else 0)
+
+
+def _looks_like_cusip_prefix(token: str) -> bool:
+    # A 6-character issuer number (mostly digits), optionally plus 1-2 issue
+    # characters, mixing letters and digits; dates like 15JAN27 are not prefixes
+    return (
+        6 <= len(token) <= 8 and token.isalnum()
+        and sum(ch.isdigit() for ch in token[:6]) >= 3
+        and any(ch.isalpha() for ch in token)
+        and _month_date_year(token) is None
+    )
+
+
+# =============================================================================
+# QUERY PARSING
+# =============================================================================
+
+
+@dataclass
+class ResolveQuery:
+    """Parsed resolve request. Hard constraints filter; soft ones only score."""
+
+    cusip: Optional[str] = None  # full CUSIP (exact) ...
+    cusip_prefix: Optional[str] = None  # ... or a partial one
+    isin: Optional[str] = None
+    isin_prefix: Optional[str] = None
+    prefix_is_hard: bool = False  # explicit cusip/isin params filter; free-text prefixes only score
+    ticker: Optional[str] = None
+    ticker_is_hard: bool = False
+    coupon_bps: Optional[int] = None
+    coupon_tolerance_bps: int = TEXT_COUPON_TOLERANCE_BPS
+    coupon_is_hard: bool = False
+    year: Optional[int] = None
+    year_is_hard: bool = False
+    tokens: Set[str] = field(default_factory=set)
+
+    @property
+    def is_identifier(self) -> bool:
+        return bool(self.cusip or self.isin)
+
+    @property
+    def is_empty(self) -> bool:
+        return not any([
+            self.cusip, self.cusip_prefix, self.isin, self.isin_prefix,
+            self.ticker, self.coupon_bps is not None, self.year, self.tokens,
+        ])
+
+
+def parse_resolve_query(
+    q: Optional[str] = None,
+    cusip: Optional[str] = None,
+    isin: Optional[str] = None,
+    ticker: Optional[str] = None,
+    coupon: Optional[float] = None,
+    maturity_year: Optional[int] = None,
+    match_mode: str = "fuzzy",
+    known_tickers: Optional[Set[str]] = None,
+) -> ResolveQuery:
+    """
+    Parse resolve params and free text.
+
+    Follows the original resolve rules: an explicit cusip/isin wins; the
+    first word of `q` is a ticker candidate if it is short and not numeric;
+    "8%"/"8.5%" is a coupon; a 2020-2060 year (optionally after "due") is
+    the maturity. Additionally recognises CUSIP/ISIN-shaped tokens, trader
+    coupons ("8.5s", or a bare "4.75" after a ticker or name), 'YY years,
+    mm/dd/yy and 15JAN27-style dates. With known_tickers, a first word that
+    is not a covered ticker is treated as a name token.
+    """
+    exact = match_mode == "exact"
+    parsed = ResolveQuery()
+
+    if cusip:
+        cusip = cusip.strip().upper()
+        if len(cusip) == 9:
+            parsed.cusip = cusip
+        else:
+            parsed.cusip_prefix = cusip
+            parsed.prefix_is_hard = True
+        return parsed
+    if isin:
+        isin = isin.strip().upper()
+        if len(isin) == 12:
+            parsed.isin = isin
+        else:
+            parsed.isin_prefix = isin
+            parsed.prefix_is_hard = True
+        return parsed
+
+    if ticker:
+        parsed.ticker = ticker.strip().upper()
+        parsed.ticker_is_hard = True
+    if coupon is not None:
+        parsed.coupon_bps = int(round(coupon * 100))
+        parsed.coupon_tolerance_bps = 0 if exact else PARAM_COUPON_TOLERANCE_BPS
+        parsed.coupon_is_hard = True
+    if maturity_year is not None:
+        parsed.year = maturity_year
+        parsed.year_is_hard = True
+
+    if not q:
+        return parsed
+
+    words = q.upper().split()
+    consumed: Set[str] = set()
+    date_year: Optional[int] = None
+
+    for word in words:
+        token = word.strip(",;()")
+        if _month_date_year(token) is not None:
+            date_year = date_year or _month_date_year(token)
+            consumed.add(word)
+        elif _looks_like_isin(token):
+            parsed.isin = parsed.isin or token
+            consumed.add(word)
+        elif _looks_like_cusip(token):
+            parsed.cusip = parsed.cusip or token
+            consumed.add(word)
+        elif _looks_like_cusip_prefix(token) and not parsed.cusip_prefix:
+            parsed.cusip_prefix = token
+            consumed.add(word)
+    if parsed.is_identifier:
+        return parsed
+
+    first = words[0] if words else ""
+    if first and len(first) <= 5 and not first.replace(".", "").isdigit() and "%" not in first:
+        if known_tickers is None or first in known_tickers:
+            if not parsed.ticker:
+                parsed.ticker = first
+                parsed.ticker_is_hard = known_tickers is not None
+            consumed.add(first)
+
+    if parsed.coupon_bps is None:
+        pct_match = _PCT_RE.search(q) or _TRADER_COUPON_RE.search(q)
+        if pct_match:
+            parsed.coupon_bps = int(round(float(pct_match.group(1)) * 100))
+            parsed.coupon_tolerance_bps = 0 if exact else TEXT_COUPON_TOLERANCE_BPS
+            parsed.coupon_is_hard = exact
+
+    if parsed.year is None:
+        year = None
+        for year_match in _YEAR_RE.finditer(q):
+            candidate = int(year_match.group(1))
+            if MIN_YEAR <= candidate <= MAX_YEAR:
+                year = candidate
+                break
+        if year is None and date_year and MIN_YEAR <= date_year <= MAX_YEAR:
+            year = date_year
+        if year is None:
+            short = _SHORT_YEAR_RE.search(q)
+            if short:
+                digits = short.group(1) or short.group(2)
+                year = int(digits) + (2000 if len(digits) == 2 else 0)
+                if not MIN_YEAR <= year <= MAX_YEAR:
+                    year = None
+        if year is not None:
+            parsed.year = year
+            parsed.year_is_hard = exact
+
+    # Whatever is left over is matched against instrument/issuer names
+    leftover = " ".join(w for w in words if w not in consumed)
+    leftover = _TRADER_COUPON_RE.sub(" ", _PCT_RE.sub(" ", leftover))
+    parsed.tokens = {t for t in name_tokens(leftover) if not t.isdigit()}
+
+    # A bare decimal is only a coupon next to something naming the issuer
+    if parsed.coupon_bps is None and (parsed.ticker or parsed.tokens):
+        for word in words:
+            token = word.strip(",;()")
+            if _BARE_COUPON_RE.match(token) and 0 < float(token) <= MAX_BARE_COUPON:
+                parsed.coupon_bps = int(round(float(token) * 100))
+                parsed.coupon_tolerance_bps = TEXT_COUPON_TOLERANCE_BPS
+                break
+    return parsed
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+
+@dataclass
+class ResolveEntry:
+    """One active instrument: the response payload plus the fields scored on."""
+
+    bond: dict
+    ticker: str
+    cusip: Optional[str]
+    isin: Optional[str]
+    interest_rate: Optional[int]
+    year: Optional[int]
+    tokens: Set[str]
+    outstanding: int
+    maturity_ordinal: int
+
+
+def _add(postings: Dict, key, position: int) -> None:
+    postings.setdefault(key, []).append(position)
+
+
+class ResolveIndex:
+    """Postings over active instruments, plus sorted identifier lists for prefix lookups."""
+
+    def __init__(self, entries: List[ResolveEntry], version: Optional[str] = None):
+        self.entries = entries
+        self.version = version
+        self.loaded_at = time.time()
+
+        self.by_ticker: Dict[str, List[int]] = {}
+        self.by_coupon_bucket: Dict[int, List[int]] = {}
+        self.by_year: Dict[int, List[int]] = {}
+        self.by_token: Dict[str, List[int]] = {}
+        self.by_cusip: Dict[str, int] = {}
+        self.by_isin: Dict[str, int] = {}
+
+        for i, e in enumerate(entries):
+            _add(self.by_ticker, e.ticker, i)
+            if e.interest_rate is not None:
+                _add(self.by_coupon_bucket, e.interest_rate // COUPON_BUCKET_BPS, i)
+            if e.year is not None:
+                _add(self.by_year, e.year, i)
+            for token in e.tokens:
+                _add(self.by_token, token, i)
+            if e.cusip:
+                self.by_cusip[e.cusip] = i
+            if e.isin:
+                self.by_isin[e.isin] = i
+
+        self.sorted_cusips: List[Tuple[str, int]] = sorted(self.by_cusip.items())
+        self.sorted_isins: List[Tuple[str, int]] = sorted(self.by_isin.items())
+        self.sorted_tokens: List[str] = sorted(self.by_token)
+        self.tickers: Set[str] = set(self.by_ticker)
+
+    @property
+    def size(self) -> int:
+        return len(self.entries)
+
+    # -------------------------------------------------------------------------
+    # Candidate generation
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _prefix_scan(items: List[Tuple[str, int]], prefix: str) -> Set[int]:
+        out = set()
+        for key, position in items[bisect_left(items, (prefix, -1)):]:
+            if not key.startswith(prefix):
+                break
+            out.add(position)
+        return out
+
+    def _coupon_positions(self, coupon_bps: int, tolerance: int) -> Set[int]:
+        out = set()
+        lo = (coupon_bps - tolerance) // COUPON_BUCKET_BPS
+        hi = (coupon_bps + tolerance) // COUPON_BUCKET_BPS
+        for bucket in range(lo, hi + 1):
+            out.update(self.by_coupon_bucket.get(bucket, ()))
+        return out
+
+    def _token_positions(self, token: str) -> Set[int]:
+        """Postings for a token, or for every indexed token it prefixes (3+ chars)."""
+        out = set(self.by_token.get(token, ()))
+        if len(token) >= 3:
+            start = bisect_left(self.sorted_tokens, token)
+            for indexed in self.sorted_tokens[start:]:
+                if not indexed.startswith(token):
+                    break
+                out.update(self.by_token[indexed])
+        return out
+
+    def candidates(self, query: ResolveQuery) -> Set[int]:
+        """Intersect hard constraints; with none, union the soft postings."""
+        if query.cusip:
+            position = self.by_cusip.get(query.cusip)
+            return {position} if position is not None else set()
+        if query.isin:
+            position = self.by_isin.get(query.isin)
+            return {position} if position is not None else set()
+
+        hard: List[Set[int]] = []
+        if query.prefix_is_hard:
+            if query.cusip_prefix:
+                hard.append(self._prefix_scan(self.sorted_cusips, query.cusip_prefix))
+            if query.isin_prefix:
+                hard.append(self._prefix_scan(self.sorted_isins, query.isin_prefix))
+        if query.ticker and query.ticker_is_hard:
+            hard.append(set(self.by_ticker.get(query.ticker, ())))
+        if query.coupon_bps is not None and query.coupon_is_hard:
+            # Buckets are 25bp wide; trim to the exact tolerance
+            hard.append({
+                i for i in self._coupon_positions(query.coupon_bps, query.coupon_tolerance_bps)
+                if abs(self.entries[i].interest_rate - query.coupon_bps) <= query.coupon_tolerance_bps
+            })
+        if query.year is not None and query.year_is_hard:
+            hard.append(set(self.by_year.get(query.year, ())))
+
+        if hard:
+            hard.sort(key=len)
+            result = hard[0]
+            for postings in hard[1:]:
+                result = result & postings
+            return result
+
+        soft: Set[int] = set()
+        if query.cusip_prefix:
+            soft.update(self._prefix_scan(self.sorted_cusips, query.cusip_prefix))
+        if query.ticker:
+            soft.update(self.by_ticker.get(query.ticker, ()))
+        if query.coupon_bps is not None:
+            soft.update(self._coupon_positions(query.coupon_bps, query.coupon_tolerance_bps))
+        if query.year is not None:
+            soft.update(self.by_year.get(query.year, ()))
+        for token in query.tokens:
+            soft.update(self._token_positions(token))
+        return soft
+
+    # -------------------------------------------------------------------------
+    # Scoring
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def score(entry: ResolveEntry, query: ResolveQuery) -> Tuple[float, List[str]]:
+        """Confidence in [0, 1] and the components that matched."""
+        if query.cusip or query.isin:
+            return 1.0, ["cusip" if query.cusip else "isin"]
+
+        weighted, total, matched = 0.0, 0.0, []
+
+        if query.ticker:
+            total += WEIGHTS["ticker"]
+            if entry.ticker == query.ticker:
+                weighted += WEIGHTS["ticker"]
+                matched.append("ticker")
+
+        if query.coupon_bps is not None:
+            total += WEIGHTS["coupon"]
+            if entry.interest_rate is not None:
+                diff = abs(entry.interest_rate - query.coupon_bps)
+                if diff == 0:
+                    part = 1.0
+                else:
+                    # Linear decay to zero at twice the tolerance
+                    part = max(0.0, 1.0 - diff / (2 * max(query.coupon_tolerance_bps, 1)))
+                if part > 0:
+                    weighted += WEIGHTS["coupon"] * part
+                    matched.append("coupon")
+
+        if query.year is not None:
+            total += WEIGHTS["maturity"]
+            if entry.year is not None:
+                part = {0: 1.0, 1: 0.4}.get(abs(entry.year - query.year), 0.0)
+                if part > 0:
+                    weighted += WEIGHTS["maturity"] * part
+                    matched.append("maturity_year")
+
+        if query.tokens:
+            total += WEIGHTS["name"]
+            hits = sum(
+                1 for t in query.tokens
+                if t in entry.tokens or (len(t) >= 3 and any(x.startswith(t) for x in entry.tokens))
+            )
+            if hits:
+                weighted += WEIGHTS["name"] * hits / len(query.tokens)
+                matched.append("name")
+
+        prefix = query.cusip_prefix or query.isin_prefix
+        if prefix:
+            # Partial identifiers: longer prefixes are stronger evidence
+            identifier_part = 0.5 + 0.45 * min(len(prefix) / (9 if query.cusip_prefix else 12), 1.0)
+            identifier = (entry.cusip if query.cusip_prefix else entry.isin) or ""
+            hit = identifier.startswith(prefix)
+            if total == 0:
+                if not hit:
+                    return 0.0, []
+                return round(identifier_part, 3), ["cusip_prefix" if query.cusip_prefix else "isin_prefix"]
+            if query.prefix_is_hard:
+                return round(identifier_part * (weighted / total), 3), ["identifier_prefix", *matched]
+            # A prefix found in free text is one more soft component
+            total += WEIGHTS["cusip_prefix"]
+            if hit:
+                weighted += WEIGHTS["cusip_prefix"]
+                matched.append("cusip_prefix")
+
+        if total == 0:
+            return 0.0, []
+        return round(MAX_FUZZY_CONFIDENCE * weighted / total, 3), matched
+
+    def resolve(self, query: ResolveQuery, limit: int) -> List[dict]:
+        """Ranked matches: confidence, then larger outstanding, then earlier maturity."""
+        scored = []
+        for position in self.candidates(query):
+            entry = self.entries[position]
+            confidence, matched = self.score(entry, query)
+            if confidence <= 0:
+                continue
+            scored.append((-confidence, -entry.outstanding, entry.maturity_ordinal, entry.bond["id"], confidence, matched, entry))
+
+        scored.sort(key=lambda s: s[:4])
+        return [
+            {"confidence": confidence, "matched_on": matched, "bond": entry.bond}
+            for *_, confidence, matched, entry in scored[:limit]
+        ]
+
+
+def build_resolve_entry(d, c, issuer, guarantor_count: int) -> ResolveEntry:
+    bond = {
+        "id": str(d.id),
+        "name": d.name,
+        "cusip": d.cusip,
+        "isin": d.isin,
+        "company_ticker": c.ticker,
+        "company_name": c.name,
+        "coupon_rate": d.interest_rate / 100 if d.interest_rate else None,
+        "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
+        "seniority": d.seniority,
+        "issuer": {
+            "name": issuer.name,
+            "entity_type": issuer.entity_type,
+        },
+        "outstanding": d.outstanding,
+        "guarantor_count": guarantor_count,
+    }
+    return ResolveEntry(
+        bond=bond,
+        ticker=(c.ticker or "").upper(),
+        cusip=d.cusip.upper() if d.cusip else None,
+        isin=d.isin.upper() if d.isin else None,
+        interest_rate=d.interest_rate,
+        year=d.maturity_date.year if d.maturity_date else None,
+        tokens=name_tokens(d.name) | name_tokens(issuer.name) | name_tokens(c.name),
+        outstanding=d.outstanding or 0,
+        maturity_ordinal=d.maturity_date.toordinal() if d.maturity_date else date.max.toordinal(),
+    )
+
+
+async def load_resolve_index(version: Optional[str]) -> ResolveIndex:
+    """
+    Load every active instrument with its guarantor count in one query.
+
+    Reads the primary (see load_snapshot in app/api/universe_store.py): the
+    index is kept until the graph version changes again.
+    """
+    guarantor_counts = (
+        select(Guarantee.debt_instrument_id, func.count(Guarantee.id).label("guarantor_count"))
+        .group_by(Guarantee.debt_instrument_id)
+        .subquery()
+    )
+    async with async_session_maker() as db:
+        rows = (await db.execute(
+            select(DebtInstrument, Company, Entity, func.coalesce(guarantor_counts.c.guarantor_count, 0))
+            .join(Company, DebtInstrument.company_id == Company.id)
+            .join(Entity, DebtInstrument.issuer_id == Entity.id)
+            .outerjoin(guarantor_counts, guarantor_counts.c.debt_instrument_id == DebtInstrument.id)
+            .where(DebtInstrument.is_active == True)
+        )).all()
+
+    return ResolveIndex([build_resolve_entry(d, c, issuer, count) for d, c, issuer, count in rows], version)
+
+
+# =============================================================================
+# BULK RESOLUTION
+# =============================================================================
+
+# A runner-up this close to the best match makes a line ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+
+def resolve_many(
+    index: ResolveIndex,
+    descriptions: List[str],
+    match_mode: str = "fuzzy",
+    limit: int = 3,
+    min_confidence: float = 0.0,
+) -> List[dict]:
+    """
+    Resolve a list of descriptions in one pass over the index.
+
+    Duplicate lines (after whitespace/case normalization) are parsed and
+    scored once. Each line gets a status: "matched" (identifier hit, or a
+    clear best match), "ambiguous" (runner-up within AMBIGUITY_MARGIN) or
+    "unmatched".
+    """
+    resolved: Dict[str, Tuple[bool, List[dict]]] = {}
+    results = []
+
+    for line_number, description in enumerate(descriptions):
+        key = " ".join((description or "").upper().split())
+        if key not in resolved:
+            parsed = parse_resolve_query(key, match_mode=match_mode, known_tickers=index.tickers)
+            if parsed.is_empty:
+                resolved[key] = (False, [])
+            else:
+                matches = [
+                    m for m in index.resolve(parsed, limit)
+                    if m["confidence"] >= min_confidence
+                ]
+                resolved[key] = (parsed.is_identifier, matches)
+        is_identifier, matches = resolved[key]
+
+        if not matches:
+            status = "unmatched"
+        elif (
+            not is_identifier and len(matches) > 1
+            and matches[0]["confidence"] - matches[1]["confidence"] < AMBIGUITY_MARGIN
+        ):
+            status = "ambiguous"
+        else:
+            status = "matched"
+
+        results.append({
+            "line": line_number,
+            "input": description,
+            "status": status,
+            "best": matches[0] if matches else None,
+            "matches": matches,
+        })
+    return results
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+
+class ResolveIndexStore:
+    """Holds the current index; the first caller waits for the build, later rebuilds run in the background."""
+
+    def __init__(self):
+        self._index: Optional[ResolveIndex] = None
+        self._checked_at = 0.0
+        self._reload_task: Optional[asyncio.Task] = None
+
+    async def get_index(self) -> ResolveIndex:
+        index = self._index
+        if index is None:
+            self.schedule_reload()
+            index = await asyncio.shield(self._reload_task)
+            if index is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail={"code": "INDEX_UNAVAILABLE", "message": "Bond resolution index is loading, retry shortly"},
+                )
+            return index
+
+        now = time.monotonic()
+        if now - self._checked_at < RECHECK_SECONDS:
+            return index
+        self._checked_at = now
+
+        version = await get_entity_graph_version()
+        if version is not None:
+            stale = version != index.version
+        else:
+            stale = time.time() - index.loaded_at > MAX_AGE_SECONDS
+        if stale:
+            self.schedule_reload()
+        return index
+
+    def schedule_reload(self) -> None:
+        """Start a background rebuild unless one is already running."""
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.get_running_loop().create_task(self.reload())
+
+    async def reload(self) -> Optional[ResolveIndex]:
+        start = time.perf_counter()
+        try:
+            version = await get_entity_graph_version()
+            index = await load_resolve_index(version)
+        except Exception as e:
+            logger.error("bond_resolver.reload.error", error=str(e))
+            return None
+
+        self._index = index
+        logger.info(
+            "bond_resolver.reload.complete",
+            instruments=index.size,
+            version=version,
+            duration_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        return index
+
+
+resolve_index_store = ResolveIndexStore()
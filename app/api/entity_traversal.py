@@ -0,0 +1,401 @@
+"""
+Entity traversal for POST /v1/entities/traverse.
+
+Traversals are served from the cached per-company EntityGraph
+(app/services/entity_graph.py) when it is enabled. The SQL path answers each
+relationship with a single statement: subsidiary and parent walks are
+recursive CTEs over entities.parent_id, entity filters are pushed into the
+recursive term (so a filtered-out entity prunes its subtree, as the
+level-by-level walk did), and debt-at-entity totals come from one grouped
+join instead of a SUM per child. Both paths return the same records.
+"""
+
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DebtInstrument, Entity, Guarantee
+from app.services.entity_graph import EntityGraph
+
+
+def entity_filter_clauses(filters: Optional[dict], entity=Entity) -> list:
+    """
+    Translate traverse `filters` into SQL predicates on an entities row.
+
+    Supports entity_type (string or list), is_guarantor, is_vie and
+    jurisdiction (case-insensitive substring).
+    """
+    if not filters:
+        return []
+
+    clauses = []
+    allowed_types = filters.get("entity_type")
+    if allowed_types:
+        if isinstance(allowed_types, str):
+            allowed_types = [allowed_types]
+        clauses.append(entity.entity_type.in_(list(allowed_types)))
+    if filters.get("is_guarantor") is not None:
+        clauses.append(entity.is_guarantor == bool(filters["is_guarantor"]))
+    if filters.get("is_vie") is not None:
+        clauses.append(entity.is_vie == bool(filters["is_vie"]))
+    if filters.get("jurisdiction"):
+        clauses.append(entity.jurisdiction.ilike(f"%{filters['jurisdiction']}%"))
+    return clauses
+
+
+def _debt_totals_subquery(company_id: UUID):
+    """Outstanding and instrument count per issuer, aggregated once per company."""
+    return (
+        select(
+            DebtInstrument.issuer_id.label("issuer_id"),
+            func.sum(DebtInstrument.outstanding).label("total_outstanding"),
+            func.count(DebtInstrument.id).label("instrument_count"),
+        )
+        .where(DebtInstrument.company_id == company_id)
+        .group_by(DebtInstrument.issuer_id)
+        .subquery("debt_totals")
+    )
+
+
+def subsidiary_tree_cte(
+    company_id: UUID,
+    max_depth: int,
+    start_ids: Optional[list[UUID]] = None,
+    filters: Optional[dict] = None,
+):
+    """
+    Recursive CTE of (id, depth, path) below the start entities.
+
+    With no start_ids the walk starts from the company's root entities.
+    Start rows sit at depth 0 and are never filtered; descendants must pass
+    `filters` to be emitted or expanded. `path` guards against cycles in
+    bad parent_id data.
+    """
+    anchor_where = [Entity.company_id == company_id]
+    if start_ids:
+        anchor_where.append(Entity.id.in_(start_ids))
+    else:
+        anchor_where.append(Entity.parent_id.is_(None))
+
+    tree = (
+        select(
+            Entity.id.label("id"),
+            literal(0).label("depth"),
+            array([Entity.id]).label("path"),
+        )
+        .where(*anchor_where)
+        .cte("entity_tree", recursive=True)
+    )
+
+    child = Entity.__table__.alias("child")
+    tree = tree.union_all(
+        select(
+            child.c.id,
+            (tree.c.depth + 1).label("depth"),
+            tree.c.path.op("||")(child.c.id).label("path"),
+        )
+        .join(tree, child.c.parent_id == tree.c.id)
+        .where(
+            tree.c.depth < max_depth,
+            ~child.c.id.op("=")(func.any(tree.c.path)),
+            *entity_filter_clauses(filters, child.c),
+        )
+    )
+    return tree
+
+
+async def traverse_subsidiaries(
+    db: AsyncSession,
+    company_id: UUID,
+    max_depth: int,
+    start_ids: Optional[list[UUID]] = None,
+    filters: Optional[dict] = None,
+    include_start: bool = False,
+    include_debt: bool = False,
+) -> tuple[list[dict], int]:
+    """
+    Walk subsidiaries in one round trip.
+
+    Returns (entities, depth_reached) with entities in breadth-first order.
+    depth_reached matches the old level-by-level walk: one past the deepest
+    level found, capped at max_depth.
+    """
+    tree = subsidiary_tree_cte(company_id, max_depth, start_ids, filters)
+    # An entity reachable twice (only possible with bad data) keeps its shallowest depth
+    nodes = (
+        select(tree.c.id, func.min(tree.c.depth).label("depth"))
+        .group_by(tree.c.id)
+        .subquery("nodes")
+    )
+
+    query = select(Entity, nodes.c.depth).join(nodes, nodes.c.id == Entity.id)
+    if include_debt:
+        debt = _debt_totals_subquery(company_id)
+        query = query.add_columns(
+            func.coalesce(debt.c.total_outstanding, 0),
+            func.coalesce(debt.c.instrument_count, 0),
+        ).outerjoin(debt, debt.c.issuer_id == Entity.id)
+    query = query.order_by(nodes.c.depth, Entity.name, Entity.id)
+
+    rows = (await db.execute(query)).all()
+
+    entities = []
+    max_found = None
+    for row in rows:
+        entity, depth = row[0], row[1]
+        max_found = depth if max_found is None else max(max_found, depth)
+        if depth == 0 and not include_start:
+            continue
+        entity_data = {
+            "id": str(entity.id),
+            "name": entity.name,
+            "entity_type": entity.entity_type,
+            "jurisdiction": entity.jurisdiction,
+            "is_guarantor": entity.is_guarantor,
+            "is_borrower": entity.is_borrower,
+            "is_vie": entity.is_vie,
+            "is_unrestricted": entity.is_unrestricted,
+            "parent_id": str(entity.parent_id) if entity.parent_id else None,
+            "depth": depth,
+        }
+        if include_debt:
+            entity_data["debt_at_entity"] = {
+                "total_outstanding": row[2],
+                "instrument_count": row[3],
+            }
+        entities.append(entity_data)
+
+    depth_reached = 0 if max_found is None else min(max_found + 1, max_depth)
+    return entities, depth_reached
+
+
+async def traverse_parents(db: AsyncSession, entity_id: UUID, max_depth: int) -> list[dict]:
+    """Walk up the parent chain from an entity in one recursive query."""
+    chain = (
+        select(
+            Entity.parent_id.label("id"),
+            literal(1).label("depth"),
+            array([Entity.id]).label("path"),
+        )
+        .where(Entity.id == entity_id, Entity.parent_id.isnot(None))
+        .cte("parent_chain", recursive=True)
+    )
+
+    parent = Entity.__table__.alias("parent")
+    chain = chain.union_all(
+        select(
+            parent.c.parent_id,
+            (chain.c.depth + 1).label("depth"),
+            chain.c.path.op("||")(parent.c.id).label("path"),
+        )
+        .join(chain, parent.c.id == chain.c.id)
+        .where(
+            chain.c.depth < max_depth,
+            parent.c.parent_id.isnot(None),
+            ~parent.c.id.op("=")(func.any(chain.c.path)),
+        )
+    )
+
+    rows = (await db.execute(
+        select(Entity, chain.c.depth)
+        .join(chain, chain.c.id == Entity.id)
+        .order_by(chain.c.depth)
+    )).all()
+
+    return [
+        {
+            "id": str(entity.id),
+            "name": entity.name,
+            "entity_type": entity.entity_type,
+            "jurisdiction": entity.jurisdiction,
+            "is_guarantor": entity.is_guarantor,
+            "depth": depth,
+        }
+        for entity, depth in rows
+    ]
+
+
+async def guarantors_for_debt(
+    db: AsyncSession,
+    debt_id: UUID,
+    filters: Optional[dict] = None,
+) -> list[dict]:
+    """Entities guaranteeing a debt instrument, with filters applied in SQL."""
+    rows = (await db.execute(
+        select(Guarantee, Entity)
+        .join(Entity, Guarantee.guarantor_id == Entity.id)
+        .where(Guarantee.debt_instrument_id == debt_id, *entity_filter_clauses(filters))
+    )).all()
+
+    return [
+        {
+            "id": str(entity.id),
+            "name": entity.name,
+            "entity_type": entity.entity_type,
+            "jurisdiction": entity.jurisdiction,
+            "is_guarantor": entity.is_guarantor,
+            "guarantee_type": guarantee.guarantee_type,
+        }
+        for guarantee, entity in rows
+    ]
+
+
+async def debt_at_entities(
+    db: AsyncSession,
+    company_id: Optional[UUID] = None,
+    entity_ids: Optional[list[UUID]] = None,
+    roots_only: bool = False,
+) -> list[dict]:
+    """
+    Active debt issued at the given entities, or at a company's entities.
+
+    With roots_only the company scope is narrowed to entities without a
+    parent, via a subquery rather than a separate id lookup.
+    """
+    if entity_ids:
+        scope = DebtInstrument.issuer_id.in_(entity_ids)
+    else:
+        issuers = select(Entity.id).where(Entity.company_id == company_id)
+        if roots_only:
+            issuers = issuers.where(Entity.parent_id.is_(None))
+        scope = DebtInstrument.issuer_id.in_(issuers)
+
+    result = await db.execute(
+        select(DebtInstrument)
+        .where(scope, DebtInstrument.is_active == True)
+        .order_by(DebtInstrument.maturity_date)
+    )
+
+    return [
+        {
+            "id": str(d.id),
+            "name": d.name,
+            "cusip": d.cusip,
+            "issuer_id": str(d.issuer_id),
+            "seniority": d.seniority,
+            "outstanding": d.outstanding,
+            "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
+        }
+        for d in result.scalars().all()
+    ]
+
+
+# =============================================================================
+# GRAPH PATH
+# =============================================================================
+
+
+def graph_subsidiaries(
+    graph: EntityGraph,
+    max_depth: int,
+    start_ids: Optional[list[UUID]] = None,
+    filters: Optional[dict] = None,
+    include_start: bool = False,
+    include_debt: bool = False,
+) -> tuple[list[dict], int]:
+    """traverse_subsidiaries over a cached graph."""
+    if start_ids:
+        starts = np.array([graph.index[i] for i in start_ids if i in graph.index], dtype=np.int32)
+    else:
+        starts = np.flatnonzero(~graph.has_parent_id).astype(np.int32)
+
+    walked, deepest = graph.walk_down(starts, max_depth, graph.filter_mask(filters))
+
+    entities = []
+    for i, depth in walked:
+        if depth == 0 and not include_start:
+            continue
+        node = graph.nodes[i]
+        entity_data = {
+            "id": node["id"],
+            "name": node["name"],
+            "entity_type": node["entity_type"],
+            "jurisdiction": node["jurisdiction"],
+            "is_guarantor": node["is_guarantor"],
+            "is_borrower": node["is_borrower"],
+            "is_vie": node["is_vie"],
+            "is_unrestricted": node["is_unrestricted"],
+            "parent_id": node["parent_id"],
+            "depth": depth,
+        }
+        if include_debt:
+            entity_data["debt_at_entity"] = {
+                "total_outstanding": int(graph.debt_total[i]),
+                "instrument_count": int(graph.debt_count[i]),
+            }
+        entities.append(entity_data)
+
+    depth_reached = 0 if deepest < 0 else min(deepest + 1, max_depth)
+    return entities, depth_reached
+
+
+def graph_parents(graph: EntityGraph, entity_id: UUID, max_depth: int) -> list[dict]:
+    """traverse_parents over a cached graph (stops at the company boundary)."""
+    i = graph.index.get(entity_id)
+    if i is None:
+        return []
+    return [
+        {
+            "id": graph.nodes[p]["id"],
+            "name": graph.nodes[p]["name"],
+            "entity_type": graph.nodes[p]["entity_type"],
+            "jurisdiction": graph.nodes[p]["jurisdiction"],
+            "is_guarantor": graph.nodes[p]["is_guarantor"],
+            "depth": depth,
+        }
+        for p, depth in graph.walk_up(i, max_depth)
+    ]
+
+
+def graph_guarantors(graph: EntityGraph, debt_id: UUID, filters: Optional[dict] = None) -> list[dict]:
+    """guarantors_for_debt over a cached graph."""
+    j = graph.instrument_index.get(debt_id)
+    if j is None:
+        return []
+    mask = graph.filter_mask(filters)
+    return [
+        {
+            "id": graph.nodes[g]["id"],
+            "name": graph.nodes[g]["name"],
+            "entity_type": graph.nodes[g]["entity_type"],
+            "jurisdiction": graph.nodes[g]["jurisdiction"],
+            "is_guarantor": graph.nodes[g]["is_guarantor"],
+            "guarantee_type": guarantee_type,
+        }
+        for g, guarantee_type in graph.guarantors_of(j)
+        if mask[g]
+    ]
+
+
+def graph_debt(
+    graph: EntityGraph,
+    entity_ids: Optional[list[UUID]] = None,
+    roots_only: bool = False,
+) -> list[dict]:
+    """debt_at_entities over a cached graph, in maturity order."""
+    if entity_ids:
+        targets = [graph.index[i] for i in entity_ids if i in graph.index]
+    elif roots_only:
+        targets = np.flatnonzero(~graph.has_parent_id)
+    else:
+        targets = range(graph.size)
+
+    # Instruments are stored in maturity order, so their indices sort the result
+    positions = sorted(d["_index"] for i in targets for d in graph.debt_of(i) if d["is_active"])
+    return [
+        {
+            "id": d["id"],
+            "name": d["name"],
+            "cusip": d["cusip"],
+            "issuer_id": d["issuer_id"],
+            "seniority": d["seniority"],
+            "outstanding": d["outstanding"],
+            "maturity_date": d["maturity_date"],
+        }
+        for d in (graph.instruments[j] for j in positions)
+    ]
+
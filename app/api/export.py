@@ -2,28 +2,47 @@
 Bulk Export API - Business Tier Only
 
 GET /v1/export - Bulk data export for offline analysis
+
+Exports are streamed: rows are read through a server-side cursor in batches
+of EXPORT_BATCH_SIZE and encoded to CSV, NDJSON, JSON, Arrow or Parquet
+chunks as they arrive, so memory stays flat and the first byte goes out
+immediately regardless of export size. Arrow and Parquet need the optional
+pyarrow package.
 """
 
 import csv
 import io
 from datetime import datetime
-from typing import Optional, List, Literal
+from typing import AsyncIterator, Callable, List, Literal, NamedTuple, Optional
 
+import orjson
+import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Select, select
 
-from app.core.auth import require_auth, check_tier_access
-from app.core.database import get_db
+from app.api.primitives_helpers import COLUMNAR_EXTENSIONS, COLUMNAR_MEDIA_TYPES, import_pyarrow
+from app.core.auth import Principal, require_auth, check_tier_access
+from app.core.database import read_session_maker
 from app.models import (
-    User, Company, DebtInstrument, Entity, CompanyMetrics,
+    Company, DebtInstrument, CompanyMetrics,
     CompanyFinancials, BondPricing, Covenant,
 )
 
 router = APIRouter(tags=["export"])
 
+logger = structlog.get_logger()
+
+# Rows fetched per server-side cursor round trip (and per emitted chunk)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+    **COLUMNAR_MEDIA_TYPES,
+}
+
 
 # =============================================================================
 # Export Endpoints
@@ -35,12 +54,11 @@ async def bulk_export(
     data_type: Literal["companies", "bonds", "financials", "covenants"] = Query(
         ..., description="Type of data to export"
     ),
-    format: Literal["csv", "json"] = Query("csv", description="Export format"),
+    format: Literal["csv", "ndjson", "json", "arrow", "parquet"] = Query("csv", description="Export format"),
     ticker: Optional[str] = Query(None, description="Filter by company ticker(s), comma-separated"),
     sector: Optional[str] = Query(None, description="Filter by sector"),
     limit: int = Query(10000, description="Maximum records to export", le=50000),
-    user: User = Depends(require_auth),
-    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(require_auth),
 ):
     """
     Bulk export data for offline analysis.
@@ -53,6 +71,13 @@ async def bulk_export(
     - `financials`: Quarterly financial statements
     - `covenants`: Extracted covenant data
 
+    Formats (all streamed as rows are read):
+    - `csv`: Header row, then one row per record
+    - `ndjson`: One JSON object per line
+    - `json`: `{"data_type", "exported_at", "data": [...], "record_count"}`
+    - `arrow`: Arrow IPC stream, one record batch per chunk
+    - `parquet`: Parquet file, one row group per chunk
+
     Max 50,000 records per export. Use filters to narrow results.
     """
     # Check tier access
@@ -65,92 +90,202 @@ async def bulk_export(
     if ticker:
         tickers = [t.strip().upper() for t in ticker.split(",")]
 
-    if data_type == "companies":
-        data = await _export_companies(db, tickers, sector, limit)
-    elif data_type == "bonds":
-        data = await _export_bonds(db, tickers, sector, limit)
-    elif data_type == "financials":
-        data = await _export_financials(db, tickers, limit)
-    elif data_type == "covenants":
-        data = await _export_covenants(db, tickers, limit)
-    else:
+    spec = EXPORTS.get(data_type)
+    if spec is None:
         raise HTTPException(status_code=400, detail=f"Invalid data_type: {data_type}")
-
-    if format == "json":
-        return {
+    # Fail before streaming starts if the optional dependency is missing
+    if format in COLUMNAR_MEDIA_TYPES:
+        import_pyarrow()
+
+    batches = _stream_rows(spec, spec.build_query(tickers, sector, limit), data_type)
+    if format == "csv":
+        chunks = csv_chunks(spec.columns, batches)
+    elif format == "ndjson":
+        chunks = ndjson_chunks(batches)
+    elif format in COLUMNAR_MEDIA_TYPES:
+        chunks = columnar_chunks(spec, batches, format)
+    else:
+        chunks = json_chunks(batches, {
             "data_type": data_type,
-            "record_count": len(data),
             "exported_at": datetime.utcnow().isoformat(),
-            "data": data,
-        }
+        })
+
+    extension = COLUMNAR_EXTENSIONS.get(format, format)
+    filename = f"debtstack_export_{data_type}_{datetime.utcnow().strftime('%Y%m%d')}.{extension}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+# =============================================================================
+# Streaming
+# =============================================================================
+
+
+class ExportSpec(NamedTuple):
+    """How to query and shape one export type."""
+
+    columns: tuple[str, ...]
+    # Arrow type alias per column ("int64", "float64", "bool"); others are strings
+    types: dict[str, str]
+    build_query: Callable[[Optional[List[str]], Optional[str], int], Select]
+    build_row: Callable[..., dict]
+
+
+async def _stream_rows(spec: ExportSpec, query: Select, data_type: str) -> AsyncIterator[List[dict]]:
+    """
+    Yield export rows in batches from a server-side cursor.
+
+    Opens its own session: the response body is produced after the endpoint
+    returns, so the request-scoped session may already be closed.
+    """
+    exported = 0
+    try:
+        async with read_session_maker() as session:
+            result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for partition in result.partitions():
+                batch = [spec.build_row(*row) for row in partition]
+                exported += len(batch)
+                yield batch
+    except Exception as e:
+        # Headers are already sent; abort the body so the client sees a failed transfer
+        logger.error("export.stream.error", data_type=data_type, exported=exported, error=str(e))
+        raise
+
+
+async def csv_chunks(columns: tuple[str, ...], batches: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    """Encode row batches as CSV, header first."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=sorted(columns), extrasaction='ignore')
+    writer.writeheader()
+    yield output.getvalue()
 
-    # CSV format
-    return _to_csv_response(data, f"debtstack_export_{data_type}_{datetime.utcnow().strftime('%Y%m%d')}.csv")
+    async for batch in batches:
+        output.seek(0)
+        output.truncate()
+        writer.writerows(batch)
+        yield output.getvalue()
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """Encode row batches as newline-delimited JSON."""
+    async for batch in batches:
+        if batch:
+            yield b"\n".join(orjson.dumps(row) for row in batch) + b"\n"
+
+
+async def json_chunks(batches: AsyncIterator[List[dict]], envelope: dict) -> AsyncIterator[bytes]:
+    """Encode row batches as one JSON document; record_count trails the data."""
+    yield orjson.dumps(envelope)[:-1] + b', "data": ['
+    count = 0
+    async for batch in batches:
+        if not batch:
+            continue
+        body = b",".join(orjson.dumps(row) for row in batch)
+        yield (b"," + body) if count else body
+        count += len(batch)
+    yield b'], "record_count": ' + str(count).encode() + b"}"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets, so position counts drained bytes too
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def columnar_chunks(spec: ExportSpec, batches: AsyncIterator[List[dict]], format: str) -> AsyncIterator[bytes]:
+    """Encode row batches as an Arrow IPC stream or Parquet row groups, column by column."""
+    pa = import_pyarrow()
+    schema = pa.schema([(column, pa.type_for_alias(spec.types.get(column, "string"))) for column in spec.columns])
+    sink = _ChunkSink()
+    if format == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    # The Arrow schema message (or Parquet magic) goes out before any rows
+    header = sink.drain()
+    if header:
+        yield header
+
+    async for batch in batches:
+        if not batch:
+            continue
+        arrays = [pa.array([row[field.name] for row in batch], type=field.type) for field in schema]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+
+    writer.close()
+    yield sink.drain()
 
 
 # =============================================================================
-# Export Helpers
+# Export Types
 # =============================================================================
 
 
-async def _export_companies(
-    db: AsyncSession,
-    tickers: Optional[List[str]],
-    sector: Optional[str],
-    limit: int,
-) -> List[dict]:
-    """Export company data with metrics."""
+def _companies_query(tickers: Optional[List[str]], sector: Optional[str], limit: int) -> Select:
     query = (
         select(Company, CompanyMetrics)
         .outerjoin(CompanyMetrics, Company.id == CompanyMetrics.company_id)
         .limit(limit)
     )
-
     if tickers:
         query = query.where(Company.ticker.in_(tickers))
     if sector:
         query = query.where(Company.sector == sector)
-
-    result = await db.execute(query)
-    rows = result.all()
-
-    data = []
-    for company, metrics in rows:
-        row = {
-            "ticker": company.ticker,
-            "name": company.name,
-            "sector": company.sector,
-            "industry": company.industry,
-            "cik": company.cik,
-        }
-        if metrics:
-            row.update({
-                "total_debt": metrics.total_debt,
-                "secured_debt": metrics.secured_debt,
-                "unsecured_debt": metrics.unsecured_debt,
-                "net_debt": metrics.net_debt,
-                "leverage_ratio": float(metrics.leverage_ratio) if metrics.leverage_ratio else None,
-                "net_leverage_ratio": float(metrics.net_leverage_ratio) if metrics.net_leverage_ratio else None,
-                "interest_coverage": float(metrics.interest_coverage) if metrics.interest_coverage else None,
-                "entity_count": metrics.entity_count,
-                "guarantor_count": metrics.guarantor_count,
-                "subordination_risk": metrics.subordination_risk,
-                "nearest_maturity": str(metrics.nearest_maturity) if metrics.nearest_maturity else None,
-                "sp_rating": metrics.sp_rating,
-                "moodys_rating": metrics.moodys_rating,
-            })
-        data.append(row)
-
-    return data
-
-
-async def _export_bonds(
-    db: AsyncSession,
-    tickers: Optional[List[str]],
-    sector: Optional[str],
-    limit: int,
-) -> List[dict]:
-    """Export bond data with pricing."""
+    return query
+
+
+def _company_row(company: Company, metrics: Optional[CompanyMetrics]) -> dict:
+    """Company data with metrics."""
+    return {
+        "ticker": company.ticker,
+        "name": company.name,
+        "sector": company.sector,
+        "industry": company.industry,
+        "cik": company.cik,
+        "total_debt": metrics.total_debt if metrics else None,
+        "secured_debt": metrics.secured_debt if metrics else None,
+        "unsecured_debt": metrics.unsecured_debt if metrics else None,
+        "net_debt": metrics.net_debt if metrics else None,
+        "leverage_ratio": float(metrics.leverage_ratio) if metrics and metrics.leverage_ratio else None,
+        "net_leverage_ratio": float(metrics.net_leverage_ratio) if metrics and metrics.net_leverage_ratio else None,
+        "interest_coverage": float(metrics.interest_coverage) if metrics and metrics.interest_coverage else None,
+        "entity_count": metrics.entity_count if metrics else None,
+        "guarantor_count": metrics.guarantor_count if metrics else None,
+        "subordination_risk": metrics.subordination_risk if metrics else None,
+        "nearest_maturity": str(metrics.nearest_maturity) if metrics and metrics.nearest_maturity else None,
+        "sp_rating": metrics.sp_rating if metrics else None,
+        "moodys_rating": metrics.moodys_rating if metrics else None,
+    }
+
+
+def _bonds_query(tickers: Optional[List[str]], sector: Optional[str], limit: int) -> Select:
     query = (
         select(DebtInstrument, BondPricing, Company)
         .join(Company, DebtInstrument.company_id == Company.id)
@@ -158,99 +293,77 @@ async def _export_bonds(
         .where(DebtInstrument.is_active == True)
         .limit(limit)
     )
-
     if tickers:
         query = query.where(Company.ticker.in_(tickers))
     if sector:
         query = query.where(Company.sector == sector)
-
-    result = await db.execute(query)
-    rows = result.all()
-
-    data = []
-    for bond, pricing, company in rows:
-        row = {
-            "ticker": company.ticker,
-            "company_name": company.name,
-            "sector": company.sector,
-            "bond_name": bond.name,
-            "cusip": bond.cusip,
-            "isin": bond.isin,
-            "instrument_type": bond.instrument_type,
-            "seniority": bond.seniority,
-            "security_type": bond.security_type,
-            "principal": bond.principal,
-            "outstanding": bond.outstanding,
-            "coupon_rate": float(bond.interest_rate) / 100 if bond.interest_rate else None,
-            "spread_bps": bond.spread_bps,
-            "benchmark": bond.benchmark,
-            "issue_date": str(bond.issue_date) if bond.issue_date else None,
-            "maturity_date": str(bond.maturity_date) if bond.maturity_date else None,
-        }
-        if pricing:
-            row.update({
-                "last_price": float(pricing.last_price) if pricing.last_price else None,
-                "ytm_pct": float(pricing.ytm_bps) / 100 if pricing.ytm_bps else None,
-                "spread_to_treasury_bps": pricing.spread_to_treasury_bps,
-                "last_trade_date": str(pricing.last_trade_date) if pricing.last_trade_date else None,
-            })
-        data.append(row)
-
-    return data
-
-
-async def _export_financials(
-    db: AsyncSession,
-    tickers: Optional[List[str]],
-    limit: int,
-) -> List[dict]:
-    """Export financial statement data."""
+    return query
+
+
+def _bond_row(bond: DebtInstrument, pricing: Optional[BondPricing], company: Company) -> dict:
+    """Bond data with pricing."""
+    return {
+        "ticker": company.ticker,
+        "company_name": company.name,
+        "sector": company.sector,
+        "bond_name": bond.name,
+        "cusip": bond.cusip,
+        "isin": bond.isin,
+        "instrument_type": bond.instrument_type,
+        "seniority": bond.seniority,
+        "security_type": bond.security_type,
+        "principal": bond.principal,
+        "outstanding": bond.outstanding,
+        "coupon_rate": float(bond.interest_rate) / 100 if bond.interest_rate else None,
+        "spread_bps": bond.spread_bps,
+        "benchmark": bond.benchmark,
+        "issue_date": str(bond.issue_date) if bond.issue_date else None,
+        "maturity_date": str(bond.maturity_date) if bond.maturity_date else None,
+        "last_price": float(pricing.last_price) if pricing and pricing.last_price else None,
+        "ytm_pct": float(pricing.ytm_bps) / 100 if pricing and pricing.ytm_bps else None,
+        "spread_to_treasury_bps": pricing.spread_to_treasury_bps if pricing else None,
+        "last_trade_date": str(pricing.last_trade_date) if pricing and pricing.last_trade_date else None,
+    }
+
+
+def _financials_query(tickers: Optional[List[str]], sector: Optional[str], limit: int) -> Select:
     query = (
         select(CompanyFinancials, Company)
         .join(Company, CompanyFinancials.company_id == Company.id)
         .order_by(Company.ticker, CompanyFinancials.period_end_date.desc())
         .limit(limit)
     )
-
     if tickers:
         query = query.where(Company.ticker.in_(tickers))
-
-    result = await db.execute(query)
-    rows = result.all()
-
-    data = []
-    for financials, company in rows:
-        data.append({
-            "ticker": company.ticker,
-            "company_name": company.name,
-            "fiscal_year": financials.fiscal_year,
-            "fiscal_quarter": financials.fiscal_quarter,
-            "period_end_date": str(financials.period_end_date),
-            "filing_type": financials.filing_type,
-            "revenue": financials.revenue,
-            "gross_profit": financials.gross_profit,
-            "operating_income": financials.operating_income,
-            "ebitda": financials.ebitda,
-            "interest_expense": financials.interest_expense,
-            "net_income": financials.net_income,
-            "cash_and_equivalents": financials.cash_and_equivalents,
-            "total_assets": financials.total_assets,
-            "total_debt": financials.total_debt,
-            "total_liabilities": financials.total_liabilities,
-            "stockholders_equity": financials.stockholders_equity,
-            "operating_cash_flow": financials.operating_cash_flow,
-            "capex": financials.capex,
-        })
-
-    return data
-
-
-async def _export_covenants(
-    db: AsyncSession,
-    tickers: Optional[List[str]],
-    limit: int,
-) -> List[dict]:
-    """Export covenant data."""
+    return query
+
+
+def _financials_row(financials: CompanyFinancials, company: Company) -> dict:
+    """Financial statement data."""
+    return {
+        "ticker": company.ticker,
+        "company_name": company.name,
+        "fiscal_year": financials.fiscal_year,
+        "fiscal_quarter": financials.fiscal_quarter,
+        "period_end_date": str(financials.period_end_date),
+        "filing_type": financials.filing_type,
+        "revenue": financials.revenue,
+        "gross_profit": financials.gross_profit,
+        "operating_income": financials.operating_income,
+        "ebitda": financials.ebitda,
+        "interest_expense": financials.interest_expense,
+        "net_income": financials.net_income,
+        "cash_and_equivalents": financials.cash_and_equivalents,
+        "total_assets": financials.total_assets,
+        "total_debt": financials.total_debt,
+        "total_liabilities": financials.total_liabilities,
+        "stockholders_equity": financials.stockholders_equity,
+        "operating_cash_flow": financials.operating_cash_flow,
+        "capex": financials.capex,
+    }
+
+
+def _covenants_query(tickers: Optional[List[str]], sector: Optional[str], limit: int) -> Select:
     query = (
         select(Covenant, Company, DebtInstrument)
         .join(Company, Covenant.company_id == Company.id)
@@ -258,61 +371,65 @@ async def _export_covenants(
         .order_by(Company.ticker, Covenant.covenant_type)
         .limit(limit)
     )
-
     if tickers:
         query = query.where(Company.ticker.in_(tickers))
-
-    result = await db.execute(query)
-    rows = result.all()
-
-    data = []
-    for covenant, company, instrument in rows:
-        data.append({
-            "ticker": company.ticker,
-            "company_name": company.name,
-            "instrument_name": instrument.name if instrument else None,
-            "cusip": instrument.cusip if instrument else None,
-            "covenant_type": covenant.covenant_type,
-            "covenant_name": covenant.covenant_name,
-            "test_metric": covenant.test_metric,
-            "threshold_value": float(covenant.threshold_value) if covenant.threshold_value else None,
-            "threshold_type": covenant.threshold_type,
-            "test_frequency": covenant.test_frequency,
-            "description": covenant.description,
-            "has_step_down": covenant.has_step_down,
-            "extraction_confidence": float(covenant.extraction_confidence) if covenant.extraction_confidence else None,
-        })
-
-    return data
-
-
-def _to_csv_response(data: List[dict], filename: str) -> StreamingResponse:
-    """Convert list of dicts to CSV streaming response."""
-    if not data:
-        output = io.StringIO()
-        output.write("")
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-
-    # Get all unique keys across all rows
-    all_keys = set()
-    for row in data:
-        all_keys.update(row.keys())
-    fieldnames = sorted(all_keys)
-
-    # Write CSV
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
-    writer.writeheader()
-    writer.writerows(data)
-
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return query
+
+
+def _covenant_row(covenant: Covenant, company: Company, instrument: Optional[DebtInstrument]) -> dict:
+    """Covenant data."""
+    return {
+        "ticker": company.ticker,
+        "company_name": company.name,
+        "instrument_name": instrument.name if instrument else None,
+        "cusip": instrument.cusip if instrument else None,
+        "covenant_type": covenant.covenant_type,
+        "covenant_name": covenant.covenant_name,
+        "test_metric": covenant.test_metric,
+        "threshold_value": float(covenant.threshold_value) if covenant.threshold_value else None,
+        "threshold_type": covenant.threshold_type,
+        "test_frequency": covenant.test_frequency,
+        "description": covenant.description,
+        "has_step_down": covenant.has_step_down,
+        "extraction_confidence": float(covenant.extraction_confidence) if covenant.extraction_confidence else None,
+    }
+
+
+def _export_spec(build_query, build_row, columns: str) -> ExportSpec:
+    """Build a spec from whitespace-separated "name" or "name:arrow_type" columns."""
+    names, types = [], {}
+    for token in columns.split():
+        name, _, arrow_type = token.partition(":")
+        names.append(name)
+        if arrow_type:
+            types[name] = arrow_type
+    return ExportSpec(tuple(names), types, build_query, build_row)
+
+
+EXPORTS = {
+    "companies": _export_spec(_companies_query, _company_row, """
+        ticker name sector industry cik total_debt:int64 secured_debt:int64
+        unsecured_debt:int64 net_debt:int64 leverage_ratio:float64
+        net_leverage_ratio:float64 interest_coverage:float64 entity_count:int64
+        guarantor_count:int64 subordination_risk nearest_maturity sp_rating moodys_rating
+    """),
+    "bonds": _export_spec(_bonds_query, _bond_row, """
+        ticker company_name sector bond_name cusip isin instrument_type seniority
+        security_type principal:int64 outstanding:int64 coupon_rate:float64
+        spread_bps:int64 benchmark issue_date maturity_date last_price:float64
+        ytm_pct:float64 spread_to_treasury_bps:int64 last_trade_date
+    """),
+    "financials": _export_spec(_financials_query, _financials_row, """
+        ticker company_name fiscal_year:int64 fiscal_quarter:int64 period_end_date
+        filing_type revenue:int64 gross_profit:int64 operating_income:int64
+        ebitda:int64 interest_expense:int64 net_income:int64
+        cash_and_equivalents:int64 total_assets:int64 total_debt:int64
+        total_liabilities:int64 stockholders_equity:int64
+        operating_cash_flow:int64 capex:int64
+    """),
+    "covenants": _export_spec(_covenants_query, _covenant_row, """
+        ticker company_name instrument_name cusip covenant_type covenant_name
+        test_metric threshold_value:float64 threshold_type test_frequency
+        description has_step_down:bool extraction_confidence:float64
+    """),
+}
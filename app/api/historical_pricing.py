@@ -14,9 +14,9 @@ from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.auth import require_auth, check_tier_access
-from app.core.database import get_db
-from app.models import User, DebtInstrument, BondPricingHistory
+from app.core.auth import Principal, require_auth, check_tier_access
+from app.core.database import get_read_db
+from app.models import DebtInstrument, BondPricingHistory
 
 router = APIRouter(tags=["historical-pricing"])
 
@@ -57,8 +57,8 @@ async def get_historical_pricing(
     cusip: str = Path(..., description="Bond CUSIP identifier"),
     from_date: Optional[date] = Query(None, description="Start date (default: 1 year ago)"),
     to_date: Optional[date] = Query(None, description="End date (default: today)"),
-    user: User = Depends(require_auth),
-    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(require_auth),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get historical pricing data for a bond.
@@ -17,12 +17,13 @@ from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import require_auth, get_tier_config, get_endpoint_cost, TIER_CONFIG
+from app.core.auth import Principal, require_auth, require_user, get_tier_config, get_endpoint_cost, TIER_CONFIG
 from app.core.billing import (
     TIER_CONFIG as BILLING_TIER_CONFIG,
     create_credit_checkout_session,
     create_checkout_session,
 )
+from app.core.credit_ledger import unflushed_credit_usage
 from app.core.database import get_db
 from app.models import User, UserCredits, UsageLog
 
@@ -212,7 +213,7 @@ async def calculate_cost(
 
 @router.get("/pricing/my-usage", response_model=UsageStats)
 async def get_my_usage(
-    user: User = Depends(require_auth),
+    user: Principal = Depends(require_auth),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -228,6 +229,8 @@ async def get_my_usage(
         select(UserCredits).where(UserCredits.user_id == user.id)
     )
     credits = credits_result.scalar_one_or_none()
+    # Deductions still in the Redis ledger haven't reached user_credits
+    unflushed = await unflushed_credit_usage(user.id) if credits else 0
 
     # Get usage stats for current month
     month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -245,8 +248,8 @@ async def get_my_usage(
 
     return UsageStats(
         tier=user.tier,
-        credits_remaining=float(credits.credits_remaining) if credits else 0.0,
-        credits_used_total=float(credits.credits_used) if credits else 0.0,
+        credits_remaining=float(credits.credits_remaining - unflushed) if credits else 0.0,
+        credits_used_total=float(credits.credits_used + unflushed) if credits else 0.0,
         credits_purchased_total=float(credits.credits_purchased) if credits else 0.0,
         queries_this_month=usage_row.query_count,
         cost_this_month=float(usage_row.total_cost),
@@ -259,7 +262,7 @@ async def purchase_credits(
     amount: int = Query(..., description="Credit package amount: 10, 25, 50, or 100"),
     success_url: Optional[str] = Query(None, description="URL to redirect to on success"),
     cancel_url: Optional[str] = Query(None, description="URL to redirect to on cancel"),
-    user: User = Depends(require_auth),
+    user: User = Depends(require_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -297,7 +300,7 @@ async def upgrade_subscription(
     tier: str = Query(..., description="Tier to upgrade to: 'pro' or 'business'"),
     success_url: Optional[str] = Query(None, description="URL to redirect to on success"),
     cancel_url: Optional[str] = Query(None, description="URL to redirect to on cancel"),
-    user: User = Depends(require_auth),
+    user: User = Depends(require_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -10,7 +10,7 @@ NOTE: Pricing data only includes actual TRACE market data, not estimated values.
 4. POST /v1/entities/traverse - Graph traversal
 5. GET /v1/documents/search - Full-text search across SEC filings
 6. POST /v1/batch - Batch operations
-7. GET /v1/companies/{ticker}/changes - Diff/changelog since date
+7. GET /v1/companies/{ticker}/changes - Changelog since date (event log)
 8. GET /v1/financials - Quarterly financial statements (income, balance sheet, cash flow)
 9. GET /v1/collateral - Collateral securing debt instruments
 
@@ -18,13 +18,15 @@ Additional:
 10. GET /v1/covenants - Structured covenant data
 11. GET /v1/covenants/compare - Cross-company covenant comparison (Business only)
 12. POST /v1/coverage/request - Request coverage for non-covered companies
+13. POST /v1/bonds/resolve/bulk - Bulk bond resolution for portfolio uploads
+14. GET /v1/changes - Universe-wide change feed
 
 DEPRECATED:
 - GET /v1/pricing - Use GET /v1/bonds?has_pricing=true instead
 """
 
-import re
-from datetime import date, datetime
+import asyncio
+from datetime import date, datetime, timezone
 from typing import Optional, List, Set
 from uuid import UUID
 
@@ -34,27 +36,51 @@ from pydantic import BaseModel, Field
 from sqlalchemy import select, func, or_, and_, desc, asc
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, read_session_maker
+from app.core.cache import get_data_version, response_cache_get
 from app.core.auth import (
-    require_auth, check_tier_access, get_endpoint_cost,
+    Principal, require_auth, check_tier_access, get_endpoint_cost,
     check_and_deduct_credits, normalize_tier,
 )
 from app.models import (
-    Company, CompanyMetrics, CompanySnapshot, Entity, DebtInstrument,
-    DebtInstrumentDocument, Guarantee, BondPricing, DocumentSection,
-    ExtractionMetadata, CompanyFinancials, Collateral, Covenant, User,
-    UsageLog, CoverageRequest,
+    Company, CompanyMetrics, CompanyChangeEvent, CompanyChangeState, CompanySnapshot, Entity,
+    DebtInstrument, DebtInstrumentDocument, Guarantee, BondPricing, DocumentSection,
+    ExtractionMetadata, CompanyFinancials, CompanyTTMFinancials, Collateral,
+    Covenant, User, UsageLog, CoverageRequest,
 )
 
 # Import shared helpers
+from app.api.universe_store import universe_store, screen_companies, screen_bonds
+from app.api.bond_resolver import parse_resolve_query, resolve_index_store, resolve_many
+from app.api.entity_traversal import (
+    debt_at_entities, guarantors_for_debt, traverse_parents, traverse_subsidiaries,
+    graph_debt, graph_guarantors, graph_parents, graph_subsidiaries,
+)
+from app.services.entity_graph import entity_graphs
+from app.services.change_log import (
+    EVENT_TYPES, PRICING_MOVED, SNAPSHOT_SECTIONS, change_event_record, diff_states,
+    load_company_state, snapshot_state, summarize_changes,
+)
 from app.api.primitives_helpers import (
-    # CSV export
+    # CSV / columnar export
     flatten_dict,
-    to_csv_response,
+    TABULAR_FORMATS,
+    tabular_response,
     # ETag caching
     generate_etag,
     check_etag,
     etag_response,
+    not_modified_response,
+    data_version_etag,
+    response_cache_version,
+    cache_response,
+    # Response cache
+    canonical_cache_params,
+    # Record builders
+    company_record,
+    bond_record,
+    collateral_summary,
+    source_document_summary,
     # Field selection
     COMPANY_FIELDS,
     BOND_FIELDS,
@@ -66,16 +92,42 @@ from app.api.primitives_helpers import (
     filter_dict,
     parse_comma_list,
     apply_sort,
+    apply_keyset_sort,
+    # Pagination
+    validate_total_mode,
+    page_rows,
+    estimate_row_count,
+    encode_cursor,
+    decode_cursor,
 )
 
 router = APIRouter()
 
 
+def _page_meta(total_count: Optional[int], total_mode: str, limit: int, offset: int, next_cursor: Optional[str]) -> dict:
+    """Pagination block of meta shared by the paginated search primitives."""
+    return {
+        "total": total_count,
+        "total_mode": total_mode,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
 # =============================================================================
 # PRIMITIVE 1: search.companies
 # =============================================================================
 
 
+COMPANY_DATA_SOURCES = {
+    "total_debt": "SEC financial statements (10-K/10-Q balance sheet)",
+    "leverage_ratio": "total_debt / TTM EBITDA from SEC filings",
+    "ebitda": "TTM from SEC filings; for banks, this is PPNR (check ebitda_type in /financials)",
+}
+
+
 @router.get("/companies", tags=["Primitives"])
 async def search_companies(
     # Ticker filter (supports comma-separated list)
@@ -105,20 +157,23 @@ async def search_companies(
     # Pagination
     limit: int = Query(50, ge=1, le=100, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
+    cursor: Optional[str] = Query(None, description="Cursor from meta.next_cursor (keyset pagination; overrides offset)"),
+    total: str = Query("exact", description="Total count: exact, estimate (planner statistics; exact when served from memory), or none"),
     # Export format
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # Metadata inclusion
     include_metadata: bool = Query(False, description="Include extraction metadata (qa_score, timestamps, warnings)"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Search companies with powerful filtering and field selection.
 
     Supports filtering by sector, leverage, ratings, risk flags, and more.
     Use `fields` parameter to request only the data you need.
-    Use `format=csv` for CSV export (useful for bulk data).
+    Use `format=csv` for CSV export, or `format=arrow` / `format=parquet` for
+    columnar files that load straight into dataframes.
     Use `include_metadata=true` for extraction quality info.
 
     **Example:** Find MAG7 company with highest leverage:
@@ -131,8 +186,46 @@ async def search_companies(
     GET /v1/companies?ticker=AAPL&include_metadata=true
     ```
     """
+    cache_params = canonical_cache_params(locals())
+
     # Parse and validate fields
     selected_fields = parse_fields(fields, COMPANY_FIELDS)
+    total_mode = validate_total_mode(total)
+
+    # Screens the in-memory universe can answer never touch Postgres
+    snapshot = None if include_metadata else await universe_store.get_snapshot()
+    if snapshot is not None:
+        etag = snapshot.etag("companies", cache_params)
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        screen = screen_companies(snapshot, cache_params)
+        data = [filter_dict(record, selected_fields) for record in screen.records]
+        if format.lower() in TABULAR_FORMATS:
+            return tabular_response(data, format, "companies")
+        # Counting the snapshot is free, so total=estimate gets the exact count
+        total_mode = "none" if total_mode == "none" else "exact"
+        total_count = screen.total if total_mode == "exact" else None
+        return etag_response({
+            "data": data,
+            "meta": {
+                **_page_meta(total_count, total_mode, limit, offset, screen.next_cursor),
+                "fields": list(selected_fields) if selected_fields else "all",
+                "data_sources": COMPANY_DATA_SOURCES,
+            }
+        }, if_none_match, etag=etag)
+
+    # Conditional requests are answered from data-version stamps, and repeat
+    # screens from the versioned response cache, before any search query runs
+    etag = cache_version = None
+    if format.lower() not in TABULAR_FORMATS:
+        etag = await data_version_etag(db, "companies", cache_params, cache_params.get("ticker"), include_metrics=True)
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        cache_version = await response_cache_version(cache_params.get("ticker"), etag)
+    if cache_version:
+        cached = await response_cache_get("companies", cache_params, cache_version)
+        if cached is not None:
+            return etag_response(cached, if_none_match, etag=etag)
 
     # Build query — LEFT JOIN so companies without metrics still appear
     query = select(Company, CompanyMetrics).outerjoin(
@@ -190,7 +283,12 @@ async def search_companies(
         ).where(and_(*filters))
 
     # Get total count
-    total = await db.scalar(count_query)
+    if total_mode == "exact":
+        total_count = await db.scalar(count_query)
+    elif total_mode == "estimate":
+        total_count = await estimate_row_count(db, query)
+    else:
+        total_count = None
 
     # Apply sorting
     sort_column_map = {
@@ -205,13 +303,15 @@ async def search_companies(
         "nearest_maturity": CompanyMetrics.nearest_maturity,
         "subordination_score": CompanyMetrics.subordination_score,
     }
-    query = apply_sort(query, sort, sort_column_map, Company.ticker)
+    query, sort_column = apply_keyset_sort(query, sort, sort_column_map, Company.ticker, Company.id, cursor)
 
-    # Apply pagination
-    query = query.offset(offset).limit(limit)
+    # Apply pagination (one extra row tells us whether there's a next page)
+    if not cursor:
+        query = query.offset(offset)
+    query = query.limit(limit + 1)
 
     result = await db.execute(query)
-    rows = result.all()
+    rows, next_cursor = page_rows(result.all(), limit, sort, sort_column, lambda row: row[0].id)
 
     # Fetch metadata if requested
     metadata_map = {}
@@ -227,39 +327,7 @@ async def search_companies(
     # Build response with field selection
     data = []
     for c, m in rows:
-        company_data = {
-            "ticker": c.ticker,
-            "name": c.name,
-            "sector": m.sector if m else None,
-            "industry": m.industry if m else None,
-            "cik": c.cik,
-            "total_debt": m.total_debt if m else None,
-            "secured_debt": m.secured_debt if m else None,
-            "unsecured_debt": m.unsecured_debt if m else None,
-            "net_debt": m.net_debt if m else None,
-            "leverage_ratio": float(m.leverage_ratio) if m and m.leverage_ratio else None,
-            "net_leverage_ratio": float(m.net_leverage_ratio) if m and m.net_leverage_ratio else None,
-            "interest_coverage": float(m.interest_coverage) if m and m.interest_coverage else None,
-            "secured_leverage": float(m.secured_leverage) if m and m.secured_leverage else None,
-            "entity_count": m.entity_count if m else None,
-            "guarantor_count": m.guarantor_count if m else None,
-            "subordination_risk": m.subordination_risk if m else None,
-            "subordination_score": float(m.subordination_score) if m and m.subordination_score else None,
-            "has_structural_sub": m.has_structural_sub if m else None,
-            "has_floating_rate": m.has_floating_rate if m else None,
-            "has_near_term_maturity": m.has_near_term_maturity if m else None,
-            "has_holdco_debt": m.has_holdco_debt if m else None,
-            "has_opco_debt": m.has_opco_debt if m else None,
-            "has_unrestricted_subs": m.has_unrestricted_subs if m else None,
-            "nearest_maturity": m.nearest_maturity.isoformat() if m and m.nearest_maturity else None,
-            "weighted_avg_maturity": float(m.weighted_avg_maturity) if m and m.weighted_avg_maturity else None,
-            "debt_due_1yr": m.debt_due_1yr if m else None,
-            "debt_due_2yr": m.debt_due_2yr if m else None,
-            "debt_due_3yr": m.debt_due_3yr if m else None,
-            "sp_rating": m.sp_rating if m else None,
-            "moodys_rating": m.moodys_rating if m else None,
-            "rating_bucket": m.rating_bucket if m else None,
-        }
+        company_data = company_record(c, m)
 
         # Add metadata if requested
         if include_metadata:
@@ -308,25 +376,21 @@ async def search_companies(
 
         data.append(filter_dict(company_data, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="companies.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "companies")
 
     response_data = {
         "data": data,
         "meta": {
-            "total": total,
-            "limit": limit,
-            "offset": offset,
+            **_page_meta(total_count, total_mode, limit, offset, next_cursor),
             "fields": list(selected_fields) if selected_fields else "all",
-            "data_sources": {
-                "total_debt": "SEC financial statements (10-K/10-Q balance sheet)",
-                "leverage_ratio": "total_debt / TTM EBITDA from SEC filings",
-                "ebitda": "TTM from SEC filings; for banks, this is PPNR (check ebitda_type in /financials)",
-            },
+            "data_sources": COMPANY_DATA_SOURCES,
         }
     }
-    return etag_response(response_data, if_none_match)
+    if cache_version:
+        await cache_response("companies", cache_params, cache_version, response_data)
+    return etag_response(response_data, if_none_match, etag=etag)
 
 
 # =============================================================================
@@ -373,16 +437,19 @@ async def search_bonds(
     # Pagination
     limit: int = Query(50, ge=1, le=100, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
+    cursor: Optional[str] = Query(None, description="Cursor from meta.next_cursor (keyset pagination; overrides offset)"),
+    total: str = Query("exact", description="Total count: exact, estimate (planner statistics; exact when served from memory), or none"),
     # Export format
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Search bonds across all companies with comprehensive filtering.
 
-    Use `format=csv` for CSV export (useful for bulk data).
+    Use `format=csv` for CSV export, or `format=arrow` / `format=parquet` for
+    columnar files that load straight into dataframes.
 
     **Example:** Find senior unsecured bonds yielding >8%:
     ```
@@ -394,8 +461,45 @@ async def search_bonds(
     GET /v1/bonds?format=csv&limit=100
     ```
     """
+    cache_params = canonical_cache_params(locals())
+
     # Parse and validate fields
     selected_fields = parse_fields(fields, BOND_FIELDS)
+    total_mode = validate_total_mode(total)
+
+    # Screens the in-memory universe can answer never touch Postgres
+    snapshot = await universe_store.get_snapshot()
+    if snapshot is not None:
+        etag = snapshot.etag("bonds", cache_params)
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        screen = screen_bonds(snapshot, cache_params)
+        data = [filter_dict(record, selected_fields) for record in screen.records]
+        if format.lower() in TABULAR_FORMATS:
+            return tabular_response(data, format, "bonds")
+        # Counting the snapshot is free, so total=estimate gets the exact count
+        total_mode = "none" if total_mode == "none" else "exact"
+        total_count = screen.total if total_mode == "exact" else None
+        return etag_response({
+            "data": data,
+            "meta": _page_meta(total_count, total_mode, limit, offset, screen.next_cursor),
+        }, if_none_match, etag=etag)
+
+    # Conditional requests are answered from data-version stamps, and repeat
+    # screens from the versioned response cache, before any search query runs
+    etag = cache_version = None
+    if format.lower() not in TABULAR_FORMATS:
+        etag = await data_version_etag(
+            db, "bonds", cache_params, cache_params.get("ticker"),
+            include_pricing=True, sources=(DebtInstrument.updated_at,),
+        )
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        cache_version = await response_cache_version(cache_params.get("ticker"), etag)
+    if cache_version:
+        cached = await response_cache_get("bonds", cache_params, cache_version)
+        if cached is not None:
+            return etag_response(cached, if_none_match, etag=etag)
 
     # Determine if we need pricing filters (always include pricing data via outer join)
     needs_pricing_filter = any([min_ytm, max_ytm, min_spread, max_spread, has_pricing])
@@ -505,7 +609,12 @@ async def search_bonds(
     if filters:
         count_query = count_query.where(and_(*filters))
 
-    total = await db.scalar(count_query)
+    if total_mode == "exact":
+        total_count = await db.scalar(count_query)
+    elif total_mode == "estimate":
+        total_count = await estimate_row_count(db, query)
+    else:
+        total_count = None
 
     # Apply sorting (pricing columns always available since we always join)
     sort_column_map = {
@@ -520,13 +629,17 @@ async def search_bonds(
         "pricing.last_price": BondPricing.last_price,
     }
 
-    query = apply_sort(query, sort, sort_column_map, DebtInstrument.maturity_date)
+    query, sort_column = apply_keyset_sort(
+        query, sort, sort_column_map, DebtInstrument.maturity_date, DebtInstrument.id, cursor
+    )
 
-    # Apply pagination
-    query = query.offset(offset).limit(limit)
+    # Apply pagination (one extra row tells us whether there's a next page)
+    if not cursor:
+        query = query.offset(offset)
+    query = query.limit(limit + 1)
 
     result = await db.execute(query)
-    rows = result.all()
+    rows, next_cursor = page_rows(result.all(), limit, sort, sort_column, lambda row: row[0].id)
 
     # Get guarantor counts for returned bonds
     bond_ids = [row[0].id for row in rows]
@@ -550,12 +663,7 @@ async def search_bonds(
         for coll in coll_result.scalars().all():
             if coll.debt_instrument_id not in collateral_by_bond:
                 collateral_by_bond[coll.debt_instrument_id] = []
-            collateral_by_bond[coll.debt_instrument_id].append({
-                "type": coll.collateral_type,
-                "description": coll.description,
-                "priority": coll.priority,
-                "estimated_value": coll.estimated_value,
-            })
+            collateral_by_bond[coll.debt_instrument_id].append(collateral_summary(coll))
 
     # Get source documents for returned bonds (only when requested)
     source_docs_by_bond = {}
@@ -569,88 +677,32 @@ async def search_bonds(
         for link, doc in doc_result.all():
             if link.debt_instrument_id not in source_docs_by_bond:
                 source_docs_by_bond[link.debt_instrument_id] = []
-            source_docs_by_bond[link.debt_instrument_id].append({
-                "doc_type": doc.doc_type,
-                "section_type": doc.section_type,
-                "section_title": doc.section_title,
-                "filing_date": doc.filing_date.isoformat() if doc.filing_date else None,
-                "sec_filing_url": doc.sec_filing_url,
-                "relationship": link.relationship_type,
-                "match_confidence": float(link.match_confidence) if link.match_confidence else None,
-                "match_method": link.match_method,
-            })
+            source_docs_by_bond[link.debt_instrument_id].append(source_document_summary(link, doc))
 
     # Build response (always have 4 elements since we always join pricing)
     data = []
     for row in rows:
         d, c, issuer, pricing = row
 
-        bond_data = {
-            "id": str(d.id),
-            "name": d.name,
-            "cusip": d.cusip,
-            "isin": d.isin,
-            "company_ticker": c.ticker,
-            "company_name": c.name,
-            "company_sector": c.sector,
-            "issuer_name": issuer.name,
-            "issuer_type": issuer.entity_type,
-            "issuer_id": str(issuer.id),
-            "instrument_type": d.instrument_type,
-            "seniority": d.seniority,
-            "security_type": d.security_type,
-            "commitment": d.commitment,
-            "principal": d.principal,
-            "outstanding": d.outstanding,
-            "currency": d.currency,
-            "rate_type": d.rate_type,
-            "coupon_rate": d.interest_rate / 100 if d.interest_rate else None,
-            "spread_bps": d.spread_bps,
-            "benchmark": d.benchmark,
-            "floor_bps": d.floor_bps,
-            "issue_date": d.issue_date.isoformat() if d.issue_date else None,
-            "issue_date_estimated": d.issue_date_estimated,
-            "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-            "is_active": d.is_active,
-            "is_drawn": d.is_drawn,
-            "guarantor_count": guarantor_counts.get(d.id, 0),
-            "guarantee_data_confidence": d.guarantee_data_confidence,
-            "collateral": collateral_by_bond.get(d.id, []),
-            "collateral_data_confidence": d.collateral_data_confidence,
-            "source_documents": source_docs_by_bond.get(d.id, []),
-        }
-
-        # Add pricing data (only actual TRACE pricing, not estimated)
-        if pricing and pricing.last_price is not None and pricing.price_source == "TRACE":
-            bond_data["pricing"] = {
-                "last_price": float(pricing.last_price) if pricing.last_price else None,
-                "last_trade_date": pricing.last_trade_date.isoformat() if pricing.last_trade_date else None,
-                "ytm": pricing.ytm_bps / 100 if pricing.ytm_bps else None,
-                "ytm_bps": pricing.ytm_bps,
-                "spread": pricing.spread_to_treasury_bps,
-                "spread_bps": pricing.spread_to_treasury_bps,
-                "treasury_benchmark": pricing.treasury_benchmark,
-                "price_source": pricing.price_source,
-                "staleness_days": pricing.staleness_days,
-            }
-        else:
-            bond_data["pricing"] = None
-
+        bond_data = bond_record(
+            d, c, issuer, pricing,
+            guarantor_count=guarantor_counts.get(d.id, 0),
+            collateral=collateral_by_bond.get(d.id, []),
+            source_documents=source_docs_by_bond.get(d.id, []),
+        )
         data.append(filter_dict(bond_data, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="bonds.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "bonds")
 
     response_data = {
         "data": data,
-        "meta": {
-            "total": total,
-            "limit": limit,
-            "offset": offset,
-        }
+        "meta": _page_meta(total_count, total_mode, limit, offset, next_cursor),
     }
-    return etag_response(response_data, if_none_match)
+    if cache_version:
+        await cache_response("bonds", cache_params, cache_version, response_data)
+    return etag_response(response_data, if_none_match, etag=etag)
 
 
 # =============================================================================
@@ -668,7 +720,6 @@ async def resolve_bond(
     maturity_year: Optional[int] = Query(None, description="Maturity year"),
     match_mode: str = Query("fuzzy", description="Match mode: exact, fuzzy"),
     limit: int = Query(5, ge=1, le=20, description="Max matches to return"),
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Resolve bond identifiers - map between descriptions, CUSIPs, and issuers.
@@ -686,134 +737,75 @@ async def resolve_bond(
             }
         )
 
-    query = select(DebtInstrument, Company, Entity).join(
-        Company, DebtInstrument.company_id == Company.id
-    ).join(
-        Entity, DebtInstrument.issuer_id == Entity.id
-    ).where(DebtInstrument.is_active == True)
+    return await _resolve_bond_data(q, cusip, isin, ticker, coupon, maturity_year, match_mode, limit)
 
-    filters = []
-    exact_match = False
-
-    # Exact identifier lookups
-    if cusip:
-        filters.append(DebtInstrument.cusip == cusip.upper())
-        exact_match = True
-    elif isin:
-        filters.append(DebtInstrument.isin == isin.upper())
-        exact_match = True
-    else:
-        # Fuzzy/text search
-        if ticker:
-            filters.append(Company.ticker == ticker.upper())
-
-        if coupon is not None:
-            # Allow +/- 0.5% tolerance for fuzzy matching
-            if match_mode == "exact":
-                filters.append(DebtInstrument.interest_rate == int(coupon * 100))
-            else:
-                coupon_bps = int(coupon * 100)
-                filters.append(DebtInstrument.interest_rate.between(coupon_bps - 50, coupon_bps + 50))
-
-        if maturity_year is not None:
-            # Filter to bonds maturing in that year
-            year_start = date(maturity_year, 1, 1)
-            year_end = date(maturity_year, 12, 31)
-            filters.append(DebtInstrument.maturity_date.between(year_start, year_end))
-
-        # Free-text search
-        if q:
-            # Parse the query string for patterns
-            q_upper = q.upper()
-
-            # Try to extract ticker (first word if it's short)
-            words = q_upper.split()
-            if words and len(words[0]) <= 5 and not words[0].replace(".", "").isdigit():
-                filters.append(or_(
-                    Company.ticker == words[0],
-                    Company.ticker.ilike(f"%{words[0]}%")
-                ))
 
-            # Look for percentage pattern (e.g., "8%" or "8.5%")
-            pct_match = re.search(r'(\d+\.?\d*)\s*%', q)
-            if pct_match:
-                coupon_val = float(pct_match.group(1))
-                coupon_bps = int(coupon_val * 100)
-                if match_mode == "exact":
-                    filters.append(DebtInstrument.interest_rate == coupon_bps)
-                else:
-                    filters.append(DebtInstrument.interest_rate.between(coupon_bps - 25, coupon_bps + 25))
-
-            # Look for year pattern (e.g., "2027" or "due 2027")
-            year_match = re.search(r'(?:due\s+)?(\d{4})', q)
-            if year_match:
-                year = int(year_match.group(1))
-                if 2020 <= year <= 2060:
-                    year_start = date(year, 1, 1)
-                    year_end = date(year, 12, 31)
-                    filters.append(DebtInstrument.maturity_date.between(year_start, year_end))
-
-            # Also search in bond name
-            filters.append(or_(
-                DebtInstrument.name.ilike(f"%{q}%"),
-                True  # Don't fail if name doesn't match
-            ))
+BULK_RESOLVE_MAX_DESCRIPTIONS = 5000
 
-    if filters:
-        query = query.where(and_(*filters))
 
-    query = query.limit(limit)
-    result = await db.execute(query)
-    rows = result.all()
+class BulkResolveRequest(BaseModel):
+    """Bulk bond resolution request (e.g. a portfolio upload)."""
+    descriptions: List[str] = Field(
+        ..., min_length=1, max_length=BULK_RESOLVE_MAX_DESCRIPTIONS,
+        description="Bond descriptions, one per line: 'RIG 8% 2027', CUSIPs (full or partial), ISINs"
+    )
+    match_mode: str = Field(default="fuzzy", description="Match mode: exact, fuzzy")
+    limit: int = Field(default=3, ge=1, le=10, description="Max matches per description")
+    min_confidence: float = Field(default=0.0, ge=0, le=1, description="Drop matches below this confidence")
 
-    # Calculate confidence scores
-    matches = []
-    for d, c, issuer in rows:
-        confidence = 1.0 if exact_match else 0.8
 
-        # Boost confidence based on match quality
-        if cusip and d.cusip == cusip.upper():
-            confidence = 1.0
-        elif isin and d.isin == isin.upper():
-            confidence = 1.0
+@router.post("/bonds/resolve/bulk", tags=["Primitives"])
+async def resolve_bonds_bulk(request: BulkResolveRequest = Body(...)):
+    """
+    Resolve up to 5,000 bond descriptions in one call.
 
-        # Get guarantor count
-        gc_result = await db.execute(
-            select(func.count(Guarantee.id)).where(Guarantee.debt_instrument_id == d.id)
-        )
-        guarantor_count = gc_result.scalar() or 0
-
-        matches.append({
-            "confidence": confidence,
-            "bond": {
-                "id": str(d.id),
-                "name": d.name,
-                "cusip": d.cusip,
-                "isin": d.isin,
-                "company_ticker": c.ticker,
-                "company_name": c.name,
-                "coupon_rate": d.interest_rate / 100 if d.interest_rate else None,
-                "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-                "seniority": d.seniority,
-                "issuer": {
-                    "name": issuer.name,
-                    "entity_type": issuer.entity_type,
-                },
-                "outstanding": d.outstanding,
-                "guarantor_count": guarantor_count,
-            }
-        })
+    Uses the same parsing and ranking as `GET /v1/bonds/resolve`. Results
+    are returned in input order with a status per line: `matched`,
+    `ambiguous` (top two matches within 0.05 confidence) or `unmatched`.
+
+    **Example:**
+    ```json
+    {"descriptions": ["RIG 8% 2027", "89157VAG8", "CHTR 4.75 '30"]}
+    ```
+    """
+    index = await resolve_index_store.get_index()
+    # Pure CPU over an immutable index; keep the event loop free for large uploads
+    results = await asyncio.to_thread(
+        resolve_many, index, request.descriptions, request.match_mode, request.limit, request.min_confidence,
+    )
 
-    # Sort by confidence
-    matches.sort(key=lambda x: x["confidence"], reverse=True)
+    summary = {"total": len(results), "matched": 0, "ambiguous": 0, "unmatched": 0}
+    for result in results:
+        summary[result["status"]] += 1
+
+    return {"data": results, "meta": summary}
+
+
+async def _resolve_bond_data(
+    q: Optional[str],
+    cusip: Optional[str],
+    isin: Optional[str],
+    ticker: Optional[str],
+    coupon: Optional[float],
+    maturity_year: Optional[int],
+    match_mode: str,
+    limit: int,
+) -> dict:
+    """Resolve one description against the in-memory resolution index."""
+    index = await resolve_index_store.get_index()
+    parsed = parse_resolve_query(
+        q, cusip, isin, ticker, coupon, maturity_year, match_mode, known_tickers=index.tickers,
+    )
+    matches = index.resolve(parsed, limit)
+    exact_match = parsed.is_identifier
 
     # Generate suggestions if no exact match
     suggestions = []
     if not exact_match and matches:
         # Check if user might have meant a different year
-        if maturity_year or (q and re.search(r'\d{4}', q)):
+        if parsed.year is not None:
             actual_years = set(m["bond"]["maturity_date"][:4] for m in matches if m["bond"]["maturity_date"])
-            if actual_years:
+            if actual_years and actual_years != {str(parsed.year)}:
                 suggestions.append(f"Found bonds maturing in: {', '.join(sorted(actual_years))}")
 
     return {
@@ -851,7 +843,7 @@ class TraversalRequest(BaseModel):
 @router.post("/entities/traverse", tags=["Primitives"])
 async def traverse_entities(
     request: TraversalRequest = Body(...),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Traverse entity relationships for guarantor chains, org structure, and subordination analysis.
@@ -879,6 +871,7 @@ async def traverse_entities(
     start_data = {}
     company_id = None
     entity_ids = []
+    from_company_roots = False
     debt_id = None
 
     if request.start.type == "company":
@@ -894,12 +887,8 @@ async def traverse_entities(
             )
         start_data = {"type": "company", "id": request.start.id.upper(), "name": company.name}
         company_id = company.id
-
-        # Get root entities for this company
-        root_result = await db.execute(
-            select(Entity).where(Entity.company_id == company_id, Entity.parent_id.is_(None))
-        )
-        entity_ids = [e.id for e in root_result.scalars().all()]
+        # Start from the company's root entities (resolved inside each traversal query)
+        from_company_roots = True
 
     elif request.start.type == "bond":
         # Find bond by CUSIP or ID
@@ -974,231 +963,80 @@ async def traverse_entities(
             detail={"code": "INVALID_TYPE", "message": f"Invalid start type: {request.start.type}"}
         )
 
+    # Serve from the cached company graph when available, else one SQL statement per relationship
+    graph = await entity_graphs.get(db, company_id) if company_id else None
+
     # Process relationships
     traversal_results = []
 
     for relationship in request.relationships:
         if relationship == "guarantees":
-            # Find guarantors for a bond or bonds guaranteed by an entity
+            # Inbound: find entities that guarantee this bond
             if debt_id:
-                # Inbound: find entities that guarantee this bond
-                result = await db.execute(
-                    select(Guarantee, Entity)
-                    .join(Entity, Guarantee.guarantor_id == Entity.id)
-                    .where(Guarantee.debt_instrument_id == debt_id)
-                )
-                entities = []
-                for guarantee, entity in result:
-                    entity_data = {
-                        "id": str(entity.id),
-                        "name": entity.name,
-                        "entity_type": entity.entity_type,
-                        "jurisdiction": entity.jurisdiction,
-                        "is_guarantor": entity.is_guarantor,
-                        "guarantee_type": guarantee.guarantee_type,
-                    }
-                    if request.filters:
-                        # Apply filters
-                        if request.filters.get("entity_type") and entity.entity_type not in request.filters["entity_type"]:
-                            continue
-                        if request.filters.get("is_guarantor") is not None and entity.is_guarantor != request.filters["is_guarantor"]:
-                            continue
-                    entities.append(entity_data)
-
+                if graph:
+                    entities = graph_guarantors(graph, debt_id, request.filters)
+                else:
+                    entities = await guarantors_for_debt(db, debt_id, request.filters)
                 traversal_results.append({
                     "relationship": "guarantees",
                     "direction": "inbound",
-                    "entities": entities
+                    "entities": entities,
                 })
 
         elif relationship == "subsidiaries":
-            # Find child entities
             if not company_id:
                 continue
 
-            # BFS traversal
-            visited = set()
-            current_level = entity_ids if entity_ids else []
-            all_entities = []
-            current_depth = 0
-
-            # If starting from company, get all root entities first
-            if not entity_ids:
-                root_result = await db.execute(
-                    select(Entity).where(Entity.company_id == company_id, Entity.parent_id.is_(None))
-                )
-                current_level = [e.id for e in root_result.scalars().all()]
-
-                # Add root entities
-                for eid in current_level:
-                    e_result = await db.execute(select(Entity).where(Entity.id == eid))
-                    e = e_result.scalar_one_or_none()
-                    if e:
-                        all_entities.append({
-                            "id": str(e.id),
-                            "name": e.name,
-                            "entity_type": e.entity_type,
-                            "jurisdiction": e.jurisdiction,
-                            "is_guarantor": e.is_guarantor,
-                            "is_borrower": e.is_borrower,
-                            "is_vie": e.is_vie,
-                            "is_unrestricted": e.is_unrestricted,
-                            "parent_id": None,
-                            "depth": 0,
-                        })
-                        visited.add(e.id)
-
-            while current_level and current_depth < request.depth:
-                current_depth += 1
-
-                # Get children of current level
-                result = await db.execute(
-                    select(Entity).where(
-                        Entity.parent_id.in_(current_level),
-                        Entity.id.notin_(visited) if visited else True
-                    )
-                )
-                children = result.scalars().all()
-
-                next_level = []
-                for child in children:
-                    if child.id in visited:
-                        continue
-                    visited.add(child.id)
-
-                    # Apply filters
-                    if request.filters:
-                        if request.filters.get("entity_type"):
-                            allowed_types = request.filters["entity_type"]
-                            if isinstance(allowed_types, str):
-                                allowed_types = [allowed_types]
-                            if child.entity_type not in allowed_types:
-                                continue
-                        if request.filters.get("is_guarantor") is not None:
-                            if child.is_guarantor != request.filters["is_guarantor"]:
-                                continue
-                        if request.filters.get("is_vie") is not None:
-                            if child.is_vie != request.filters["is_vie"]:
-                                continue
-                        if request.filters.get("jurisdiction"):
-                            if not child.jurisdiction or request.filters["jurisdiction"].lower() not in child.jurisdiction.lower():
-                                continue
-
-                    entity_data = {
-                        "id": str(child.id),
-                        "name": child.name,
-                        "entity_type": child.entity_type,
-                        "jurisdiction": child.jurisdiction,
-                        "is_guarantor": child.is_guarantor,
-                        "is_borrower": child.is_borrower,
-                        "is_vie": child.is_vie,
-                        "is_unrestricted": child.is_unrestricted,
-                        "parent_id": str(child.parent_id) if child.parent_id else None,
-                        "depth": current_depth,
-                    }
-
-                    # Get debt at entity if requested
-                    if request.fields and "debt_at_entity" in request.fields:
-                        debt_result = await db.execute(
-                            select(func.sum(DebtInstrument.outstanding), func.count(DebtInstrument.id))
-                            .where(DebtInstrument.issuer_id == child.id)
-                        )
-                        debt_row = debt_result.first()
-                        entity_data["debt_at_entity"] = {
-                            "total_outstanding": debt_row[0] if debt_row else 0,
-                            "instrument_count": debt_row[1] if debt_row else 0,
-                        }
-
-                    all_entities.append(entity_data)
-                    next_level.append(child.id)
-
-                current_level = next_level
-
+            walk_args = dict(
+                start_ids=entity_ids or None,
+                filters=request.filters,
+                # A bond start has no start entities, so the company roots are listed too
+                include_start=not entity_ids and not from_company_roots,
+                include_debt=bool(request.fields and "debt_at_entity" in request.fields),
+            )
+            if graph:
+                entities, depth_reached = graph_subsidiaries(graph, request.depth, **walk_args)
+            else:
+                entities, depth_reached = await traverse_subsidiaries(db, company_id, request.depth, **walk_args)
             traversal_results.append({
                 "relationship": "subsidiaries",
                 "direction": "outbound",
-                "entities": all_entities,
-                "depth_reached": current_depth,
+                "entities": entities,
+                "depth_reached": depth_reached,
             })
 
         elif relationship == "parents":
-            # Traverse upward to parent entities
+            # Company roots have no parents by definition
             if not entity_ids:
+                if from_company_roots:
+                    traversal_results.append({"relationship": "parents", "direction": "inbound", "entities": []})
                 continue
 
-            all_parents = []
-            current = entity_ids[0] if entity_ids else None
-            current_depth = 0
-
-            while current and current_depth < request.depth:
-                result = await db.execute(
-                    select(Entity).where(Entity.id == current)
-                )
-                entity = result.scalar_one_or_none()
-                if not entity or not entity.parent_id:
-                    break
-
-                parent_result = await db.execute(
-                    select(Entity).where(Entity.id == entity.parent_id)
-                )
-                parent = parent_result.scalar_one_or_none()
-                if not parent:
-                    break
-
-                all_parents.append({
-                    "id": str(parent.id),
-                    "name": parent.name,
-                    "entity_type": parent.entity_type,
-                    "jurisdiction": parent.jurisdiction,
-                    "is_guarantor": parent.is_guarantor,
-                    "depth": current_depth + 1,
-                })
-
-                current = parent.id
-                current_depth += 1
-
+            if graph:
+                entities = graph_parents(graph, entity_ids[0], request.depth)
+            else:
+                entities = await traverse_parents(db, entity_ids[0], request.depth)
             traversal_results.append({
                 "relationship": "parents",
                 "direction": "inbound",
-                "entities": all_parents,
+                "entities": entities,
             })
 
         elif relationship == "debt":
             # Find debt issued at entity/entities
-            if entity_ids:
-                target_ids = entity_ids
-            elif company_id:
-                # Get all entity IDs for company
-                result = await db.execute(
-                    select(Entity.id).where(Entity.company_id == company_id)
-                )
-                target_ids = [r[0] for r in result.all()]
-            else:
+            if not entity_ids and not company_id:
                 continue
 
-            result = await db.execute(
-                select(DebtInstrument)
-                .where(DebtInstrument.issuer_id.in_(target_ids), DebtInstrument.is_active == True)
-                .order_by(DebtInstrument.maturity_date)
-            )
-            debts = result.scalars().all()
-
-            debt_list = []
-            for d in debts:
-                debt_list.append({
-                    "id": str(d.id),
-                    "name": d.name,
-                    "cusip": d.cusip,
-                    "issuer_id": str(d.issuer_id),
-                    "seniority": d.seniority,
-                    "outstanding": d.outstanding,
-                    "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-                })
-
+            if graph:
+                instruments = graph_debt(graph, entity_ids or None, roots_only=from_company_roots)
+            else:
+                instruments = await debt_at_entities(
+                    db, company_id, entity_ids or None, roots_only=from_company_roots,
+                )
             traversal_results.append({
                 "relationship": "debt",
                 "direction": "outbound",
-                "instruments": debt_list,
+                "instruments": instruments,
             })
 
     # Build summary
@@ -1236,10 +1074,10 @@ async def search_pricing(
     sort: str = Query("-ytm", description="Sort field"),
     limit: int = Query(50, ge=1, le=100, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     **DEPRECATED**: Use `GET /v1/bonds?has_pricing=true` instead.
@@ -1251,7 +1089,7 @@ async def search_pricing(
 
     Search bond pricing data from FINRA TRACE.
 
-    Use `format=csv` for CSV export.
+    Use `format=csv`, `format=arrow` or `format=parquet` for file export.
 
     **Example:** Get pricing for all RIG bonds:
     ```
@@ -1358,9 +1196,9 @@ async def search_pricing(
         }
         data.append(filter_dict(item, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="pricing.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "pricing")
 
     response_data = {
         "data": data,
@@ -1387,7 +1225,7 @@ async def search_pricing(
 DOCUMENT_FIELDS = {
     "id", "ticker", "company_name",
     "doc_type", "filing_date", "section_type", "section_title",
-    "snippet", "content", "content_length",
+    "snippet", "passage", "content", "content_length",
     "relevance_score", "sec_filing_url",
 }
 
@@ -1400,6 +1238,115 @@ VALID_SECTION_TYPES = {
 # Valid doc types
 VALID_DOC_TYPES = {"10-K", "10-Q", "8-K"}
 
+# total=exact counts stop here; meta.total_capped says the real total is larger
+DOCUMENT_COUNT_CAP = 10_000
+
+# Document sections aren't covered by every data version bump, so cached
+# searches expire quickly
+DOCUMENT_SEARCH_CACHE_TTL = 120  # seconds
+
+
+def _passage_search_sql(
+    passage_where: str,
+    section_where: str,
+    order_clause: str,
+    headline_options: str,
+    include_content: bool = False,
+    seek_where: str = "",
+) -> str:
+    """
+    SQL for passage-level document search.
+
+    Ranks matching passages (document_passages) in sections that pass the
+    section filters (section_where, on ds), keeps the best passage per
+    section, applies the cursor seek and sort to those sections, and runs
+    ts_headline on the page's passages only. plainto_tsquery is evaluated
+    once. Expects :query, :limit and :offset.
+    """
+    content_column = "ds.content," if include_content else ""
+    content_join = "JOIN document_sections ds ON ds.id = page.id" if include_content else ""
+    # Filter sections before ranking so filtered queries don't rank the whole corpus
+    section_join = "JOIN document_sections ds ON ds.id = p.document_section_id" if section_where else ""
+    return f"""
+        WITH q AS (SELECT plainto_tsquery('english', :query) AS query),
+        best AS (
+            SELECT DISTINCT ON (p.document_section_id)
+                p.document_section_id,
+                p.id AS passage_id,
+                p.start_offset AS passage_start,
+                p.end_offset AS passage_end,
+                ts_rank_cd(p.search_vector, q.query) AS relevance_score
+            FROM document_passages p
+            {section_join}
+            CROSS JOIN q
+            WHERE p.search_vector @@ q.query
+            {passage_where}
+            {section_where}
+            ORDER BY p.document_section_id, relevance_score DESC, p.passage_index
+        )
+        SELECT
+            page.*,
+            c.ticker,
+            c.name as company_name,
+            {content_column}
+            ts_headline('english', p.content, q.query, '{headline_options}') as snippet
+        FROM (
+            SELECT
+                ds.id,
+                ds.company_id,
+                ds.doc_type,
+                ds.filing_date,
+                ds.section_type,
+                ds.section_title,
+                ds.content_length,
+                ds.sec_filing_url,
+                best.passage_id,
+                best.passage_start,
+                best.passage_end,
+                best.relevance_score
+            FROM best
+            JOIN document_sections ds ON ds.id = best.document_section_id
+            WHERE TRUE
+            {seek_where}
+            {order_clause}
+            LIMIT :limit OFFSET :offset
+        ) page
+        JOIN document_passages p ON p.id = page.passage_id
+        JOIN companies c ON c.id = page.company_id
+        {content_join}
+        CROSS JOIN q
+        {order_clause}
+    """
+
+
+def _matching_sections_sql(passage_where: str, section_where: str) -> str:
+    """Sections with at least one matching passage (search filters, no cursor)."""
+    return f"""
+        SELECT DISTINCT p.document_section_id
+        FROM document_passages p
+        JOIN document_sections ds ON ds.id = p.document_section_id
+        WHERE p.search_vector @@ plainto_tsquery('english', :query)
+        {passage_where}
+        {section_where}
+    """
+
+
+def _capped_count_sql(matching_sections: str) -> str:
+    """
+    Count matching sections, stopping early: broad terms match most of the
+    corpus and an uncapped count costs as much as the search itself. Bind
+    :count_cap to DOCUMENT_COUNT_CAP + 1 so a total of exactly the cap isn't
+    reported as capped (see _cap_total).
+    """
+    return f"SELECT COUNT(*) FROM ({matching_sections} LIMIT :count_cap) capped"
+
+
+def _cap_total(count: int) -> tuple[int, bool]:
+    """(total, total_capped) from a count run with LIMIT DOCUMENT_COUNT_CAP + 1."""
+    if count > DOCUMENT_COUNT_CAP:
+        return DOCUMENT_COUNT_CAP, True
+    return count, False
+
 
 @router.get("/documents/search", tags=["Primitives"])
 async def search_documents(
@@ -1418,11 +1365,13 @@ async def search_documents(
     # Pagination
     limit: int = Query(50, ge=1, le=100, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
+    cursor: Optional[str] = Query(None, description="Cursor from meta.next_cursor (keyset pagination; overrides offset)"),
+    total: str = Query("exact", description="Total count: exact (capped at 10,000), estimate (planner statistics), or none"),
     # Export format
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Full-text search across SEC filing sections.
@@ -1433,6 +1382,11 @@ async def search_documents(
     Uses PostgreSQL full-text search with relevance ranking.
     Search terms are stemmed and matched intelligently.
 
+    Sections are split into ~1,500 character passages and ranked by their
+    best-matching passage, so all search terms must appear close together.
+    Each result includes that passage's offsets into the section content
+    (`passage`), and `snippet` is highlighted from it.
+
     **Section Types:**
     - `exhibit_21`: Subsidiary list from 10-K Exhibit 21
     - `debt_footnote`: Long-term debt details from Notes
@@ -1457,8 +1411,11 @@ async def search_documents(
     GET /v1/documents/search?q=amended%20credit&section_type=credit_agreement&filed_after=2024-01-01
     ```
     """
+    cache_params = canonical_cache_params(locals())
+
     # Parse and validate fields
     selected_fields = parse_fields(fields, DOCUMENT_FIELDS)
+    total_mode = validate_total_mode(total)
 
     # Validate section_type
     if section_type:
@@ -1492,43 +1449,30 @@ async def search_documents(
     else:
         doc_types = []
 
-    # Build the search query using PostgreSQL full-text search
-    # plainto_tsquery converts plain text to a tsquery
-    # ts_rank_cd provides relevance scoring (cover density ranking)
-    # ts_headline generates snippets with highlighted matches
+    # Repeat searches are served from a short-lived response cache
+    cache_version = None
+    if format.lower() not in TABULAR_FORMATS:
+        cache_version = await get_data_version(cache_params.get("ticker"))
+    if cache_version:
+        cached = await response_cache_get("documents", cache_params, cache_version)
+        if cached is not None:
+            return etag_response(cached, if_none_match)
 
-    from sqlalchemy import text, literal_column
+    # Passage-level full-text search (see _passage_search_sql): rank passages,
+    # keep the best passage per section, then page sections by that score
 
-    # Base query with full-text search
-    # We use raw SQL for the FTS functions since SQLAlchemy doesn't have native support
-    search_query = text("""
-        SELECT
-            ds.id,
-            c.ticker,
-            c.name as company_name,
-            ds.doc_type,
-            ds.filing_date,
-            ds.section_type,
-            ds.section_title,
-            ds.content,
-            ds.content_length,
-            ds.sec_filing_url,
-            ts_rank_cd(ds.search_vector, plainto_tsquery('english', :query)) as relevance_score,
-            ts_headline('english', ds.content, plainto_tsquery('english', :query),
-                'MaxWords=50, MinWords=20, MaxFragments=1, StartSel=<b>, StopSel=</b>') as snippet
-        FROM document_sections ds
-        JOIN companies c ON ds.company_id = c.id
-        WHERE ds.search_vector @@ plainto_tsquery('english', :query)
-    """)
+    from sqlalchemy import text
 
-    # Build dynamic WHERE conditions
+    # Build dynamic WHERE conditions (both apply before the best-passage
+    # pick; section conditions through a join to document_sections)
+    passage_conditions = []
     conditions = []
     params = {"query": q}
 
     # Ticker filter
     ticker_list = parse_comma_list(ticker)
     if ticker_list:
-        conditions.append("c.ticker = ANY(:tickers)")
+        passage_conditions.append("p.company_id IN (SELECT id FROM companies WHERE ticker = ANY(:tickers))")
         params["tickers"] = ticker_list
 
     # Doc type filter
@@ -1550,64 +1494,81 @@ async def search_documents(
         params["filed_before"] = filed_before
 
     # Build full query with conditions
-    where_clause = ""
-    if conditions:
-        where_clause = " AND " + " AND ".join(conditions)
-
-    # Determine sort order
-    if sort == "-relevance" or sort == "relevance":
-        order_clause = "ORDER BY relevance_score DESC"
-    elif sort == "-filing_date":
-        order_clause = "ORDER BY ds.filing_date DESC"
+    passage_where = "".join(f" AND {c}" for c in passage_conditions)
+    where_clause = "".join(f" AND {c}" for c in conditions)
+
+    # Sorting (ranked sections and the outer page share column names)
+    if sort not in ("-filing_date", "filing_date"):
+        sort = "-relevance"
+    if sort == "-filing_date":
+        order_clause = "ORDER BY filing_date DESC NULLS LAST, id ASC"
     elif sort == "filing_date":
-        order_clause = "ORDER BY ds.filing_date ASC"
+        order_clause = "ORDER BY filing_date ASC NULLS LAST, id ASC"
     else:
-        order_clause = "ORDER BY relevance_score DESC"
-
-    # Full query with pagination
-    full_query = text(f"""
-        SELECT
-            ds.id,
-            c.ticker,
-            c.name as company_name,
-            ds.doc_type,
-            ds.filing_date,
-            ds.section_type,
-            ds.section_title,
-            ds.content,
-            ds.content_length,
-            ds.sec_filing_url,
-            ts_rank_cd(ds.search_vector, plainto_tsquery('english', :query)) as relevance_score,
-            ts_headline('english', ds.content, plainto_tsquery('english', :query),
-                'MaxWords=50, MinWords=20, MaxFragments=1, StartSel=<b>, StopSel=</b>') as snippet
-        FROM document_sections ds
-        JOIN companies c ON ds.company_id = c.id
-        WHERE ds.search_vector @@ plainto_tsquery('english', :query)
-        {where_clause}
-        {order_clause}
-        LIMIT :limit OFFSET :offset
-    """)
+        order_clause = "ORDER BY relevance_score DESC, id ASC"
+
+    # Keyset pagination: seek past the cursor row instead of using OFFSET
+    seek_clause = ""
+    if cursor:
+        cursor_value, cursor_id = decode_cursor(cursor, sort)
+        params["cursor_id"] = cursor_id
+        if sort == "-relevance":
+            seek_clause = """
+                AND (best.relevance_score < :cursor_value
+                     OR (best.relevance_score = :cursor_value AND ds.id > :cursor_id))
+            """
+            params["cursor_value"] = cursor_value
+        elif cursor_value is None:
+            seek_clause = " AND ds.filing_date IS NULL AND ds.id > :cursor_id"
+        else:
+            op = "<" if sort == "-filing_date" else ">"
+            seek_clause = f"""
+                AND (ds.filing_date {op} :cursor_value
+                     OR (ds.filing_date = :cursor_value AND ds.id > :cursor_id)
+                     OR ds.filing_date IS NULL)
+            """
+            params["cursor_value"] = cursor_value
 
-    params["limit"] = limit
-    params["offset"] = offset
+    include_content = selected_fields is not None and "content" in selected_fields
 
-    # Count query
-    count_query = text(f"""
-        SELECT COUNT(*)
-        FROM document_sections ds
-        JOIN companies c ON ds.company_id = c.id
-        WHERE ds.search_vector @@ plainto_tsquery('english', :query)
-        {where_clause}
-    """)
+    # Full query with pagination
+    full_query = text(_passage_search_sql(
+        passage_where,
+        where_clause,
+        order_clause,
+        "MaxWords=50, MinWords=20, MaxFragments=1, StartSel=<b>, StopSel=</b>",
+        include_content=include_content,
+        seek_where=seek_clause,
+    ))
+
+    # Fetch one extra row to tell whether there's a next page
+    count_params = {k: v for k, v in params.items() if k not in ("cursor_value", "cursor_id")}
+    params["limit"] = limit + 1
+    params["offset"] = 0 if cursor else offset
+
+    matching_sections = _matching_sections_sql(passage_where, where_clause)
+    count_query = text(_capped_count_sql(matching_sections))
 
     # Execute queries
     result = await db.execute(full_query, params)
     rows = result.fetchall()
-
-    # Get count (remove limit/offset params for count query)
-    count_params = {k: v for k, v in params.items() if k not in ("limit", "offset")}
-    total_result = await db.execute(count_query, count_params)
-    total = total_result.scalar()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_value = last.relevance_score if sort == "-relevance" else last.filing_date
+        next_cursor = encode_cursor(sort, last_value, last.id)
+
+    # Get count (same filters, no cursor or pagination)
+    total_capped = False
+    if total_mode == "exact":
+        total_result = await db.execute(count_query, {**count_params, "count_cap": DOCUMENT_COUNT_CAP + 1})
+        total_count, total_capped = _cap_total(total_result.scalar())
+    elif total_mode == "estimate":
+        estimate_query = text(matching_sections).bindparams(**count_params)
+        total_count = await estimate_row_count(db, estimate_query)
+    else:
+        total_count = None
 
     # Build response
     data = []
@@ -1621,7 +1582,12 @@ async def search_documents(
             "section_type": row.section_type,
             "section_title": row.section_title,
             "snippet": row.snippet,
-            "content": row.content if (selected_fields is None or "content" in selected_fields) else None,
+            "passage": {
+                "id": str(row.passage_id),
+                "start_offset": row.passage_start,
+                "end_offset": row.passage_end,
+            },
+            "content": row.content if include_content else None,
             "content_length": row.content_length,
             "relevance_score": round(float(row.relevance_score), 4) if row.relevance_score else 0,
             "sec_filing_url": row.sec_filing_url,
@@ -1633,17 +1599,16 @@ async def search_documents(
 
         data.append(filter_dict(item, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="documents.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "documents")
 
     response_data = {
         "data": data,
         "meta": {
             "query": q,
-            "total": total,
-            "limit": limit,
-            "offset": offset,
+            **_page_meta(total_count, total_mode, limit, offset, next_cursor),
+            "total_capped": total_capped,
             "filters": {
                 "ticker": ticker_list if ticker_list else None,
                 "doc_type": doc_types if doc_types else None,
@@ -1653,6 +1618,8 @@ async def search_documents(
             }
         }
     }
+    if cache_version:
+        await cache_response("documents", cache_params, cache_version, response_data, ttl_seconds=DOCUMENT_SEARCH_CACHE_TTL)
     return etag_response(response_data, if_none_match)
 
 
@@ -1667,6 +1634,10 @@ class BatchOperation(BaseModel):
     params: dict = Field(default_factory=dict, description="Parameters for the primitive")
 
 
+# Max operations from one batch running at once (each holds a pooled connection)
+BATCH_MAX_CONCURRENCY = 4
+
+
 class BatchRequest(BaseModel):
     """Batch request containing multiple operations."""
     operations: List[BatchOperation] = Field(..., min_length=1, max_length=10, description="List of operations (1-10)")
@@ -1683,12 +1654,12 @@ class BatchOperationResult(BaseModel):
 @router.post("/batch", tags=["Primitives"])
 async def batch_operations(
     request: BatchRequest = Body(...),
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Execute multiple primitive operations in a single request.
 
-    Accepts up to 10 operations and executes them in parallel.
+    Accepts up to 10 operations and executes them in parallel, each on its own
+    database session. Identical operations run once and share a result.
     Each operation is independent - failures in one don't affect others.
 
     **Supported Primitives:**
@@ -1720,14 +1691,19 @@ async def batch_operations(
       ],
       "meta": {
         "total_operations": 3,
+        "unique_operations": 3,
         "successful": 2,
         "failed": 1,
-        "duration_ms": 234
+        "duration_ms": 234,
+        "operations": [
+          {"operation_id": 0, "primitive": "search.companies", "duration_ms": 120},
+          ...
+        ]
       }
     }
     ```
     """
-    import asyncio
+    import json
     import time
 
     start_time = time.time()
@@ -1742,46 +1718,57 @@ async def batch_operations(
         "search.documents": _batch_search_documents,
     }
 
-    async def execute_operation(op_id: int, op: BatchOperation) -> BatchOperationResult:
-        """Execute a single operation and return result."""
+    # Each operation gets its own pooled session (asyncpg doesn't support
+    # concurrent operations on a single connection); the semaphore keeps one
+    # batch from draining the pool.
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def execute_operation(op: BatchOperation) -> tuple[str, Optional[dict], Optional[dict], int]:
+        """Execute a single operation and return (status, data, error, duration_ms)."""
         handler = primitive_handlers.get(op.primitive)
         if not handler:
-            return BatchOperationResult(
-                operation_id=op_id,
-                status="error",
-                error={
-                    "code": "INVALID_PRIMITIVE",
-                    "message": f"Unknown primitive: {op.primitive}",
-                    "valid_primitives": list(primitive_handlers.keys())
-                }
-            )
-
-        try:
-            result = await handler(op.params, db)
-            return BatchOperationResult(
-                operation_id=op_id,
-                status="success",
-                data=result
-            )
-        except HTTPException as e:
-            return BatchOperationResult(
-                operation_id=op_id,
-                status="error",
-                error=e.detail if isinstance(e.detail, dict) else {"code": "ERROR", "message": str(e.detail)}
-            )
-        except Exception as e:
-            return BatchOperationResult(
-                operation_id=op_id,
-                status="error",
-                error={"code": "INTERNAL_ERROR", "message": str(e)}
-            )
+            return "error", None, {
+                "code": "INVALID_PRIMITIVE",
+                "message": f"Unknown primitive: {op.primitive}",
+                "valid_primitives": list(primitive_handlers.keys())
+            }, 0
+
+        async with semaphore:
+            op_start = time.time()
+            try:
+                async with read_session_maker() as session:
+                    result = await handler(op.params, session)
+                return "success", result, None, int((time.time() - op_start) * 1000)
+            except HTTPException as e:
+                error = e.detail if isinstance(e.detail, dict) else {"code": "ERROR", "message": str(e.detail)}
+                return "error", None, error, int((time.time() - op_start) * 1000)
+            except Exception as e:
+                return "error", None, {"code": "INTERNAL_ERROR", "message": str(e)}, int((time.time() - op_start) * 1000)
+
+    # De-duplicate identical operations so each distinct one runs once
+    op_keys = [
+        (op.primitive, json.dumps(op.params, sort_keys=True, default=str))
+        for op in request.operations
+    ]
+    first_index = {}
+    for i, key in enumerate(op_keys):
+        first_index.setdefault(key, i)
+
+    unique_keys = list(first_index)
+    outcomes = dict(zip(
+        unique_keys,
+        await asyncio.gather(*(execute_operation(request.operations[first_index[k]]) for k in unique_keys)),
+    ))
 
-    # Execute operations sequentially to avoid concurrent connection issues
-    # (asyncpg doesn't support concurrent operations on a single connection)
     results = []
-    for i, op in enumerate(request.operations):
-        result = await execute_operation(i, op)
-        results.append(result)
+    timings = []
+    for i, key in enumerate(op_keys):
+        status, data, error, op_duration_ms = outcomes[key]
+        results.append(BatchOperationResult(operation_id=i, status=status, data=data, error=error))
+        timing = {"operation_id": i, "primitive": request.operations[i].primitive, "duration_ms": op_duration_ms}
+        if first_index[key] != i:
+            timing["duplicate_of"] = first_index[key]
+        timings.append(timing)
 
     duration_ms = int((time.time() - start_time) * 1000)
     successful = sum(1 for r in results if r.status == "success")
@@ -1791,9 +1778,11 @@ async def batch_operations(
         "results": [r.model_dump() for r in results],
         "meta": {
             "total_operations": len(request.operations),
+            "unique_operations": len(unique_keys),
             "successful": successful,
             "failed": failed,
             "duration_ms": duration_ms,
+            "operations": timings,
         }
     }
 
@@ -2066,73 +2055,9 @@ async def _batch_resolve_bond(params: dict, db: AsyncSession) -> dict:
             detail={"code": "MISSING_PARAMETER", "message": "At least one of q, cusip, isin, or ticker is required"}
         )
 
-    query = select(DebtInstrument, Company, Entity).join(
-        Company, DebtInstrument.company_id == Company.id
-    ).join(
-        Entity, DebtInstrument.issuer_id == Entity.id
-    ).where(DebtInstrument.is_active == True)
-
-    filters = []
-    exact_match = False
-
-    if cusip:
-        filters.append(DebtInstrument.cusip == cusip.upper())
-        exact_match = True
-    elif isin:
-        filters.append(DebtInstrument.isin == isin.upper())
-        exact_match = True
-    else:
-        if ticker:
-            filters.append(Company.ticker == ticker.upper())
-        if coupon is not None:
-            coupon_bps = int(coupon * 100)
-            filters.append(DebtInstrument.interest_rate.between(coupon_bps - 50, coupon_bps + 50))
-        if maturity_year is not None:
-            year_start = date(maturity_year, 1, 1)
-            year_end = date(maturity_year, 12, 31)
-            filters.append(DebtInstrument.maturity_date.between(year_start, year_end))
-        if q:
-            q_upper = q.upper()
-            words = q_upper.split()
-            if words and len(words[0]) <= 5:
-                filters.append(or_(Company.ticker == words[0], Company.ticker.ilike(f"%{words[0]}%")))
-            pct_match = re.search(r'(\d+\.?\d*)\s*%', q)
-            if pct_match:
-                coupon_val = float(pct_match.group(1))
-                coupon_bps = int(coupon_val * 100)
-                filters.append(DebtInstrument.interest_rate.between(coupon_bps - 25, coupon_bps + 25))
-            year_match = re.search(r'(\d{4})', q)
-            if year_match:
-                year = int(year_match.group(1))
-                if 2020 <= year <= 2060:
-                    year_start = date(year, 1, 1)
-                    year_end = date(year, 12, 31)
-                    filters.append(DebtInstrument.maturity_date.between(year_start, year_end))
-
-    if filters:
-        query = query.where(and_(*filters))
-
-    query = query.limit(limit)
-    result = await db.execute(query)
-    rows = result.all()
-
-    matches = []
-    for d, c, issuer in rows:
-        confidence = 1.0 if exact_match else 0.8
-        matches.append({
-            "confidence": confidence,
-            "bond": {
-                "id": str(d.id),
-                "name": d.name,
-                "cusip": d.cusip,
-                "company_ticker": c.ticker,
-                "coupon_rate": d.interest_rate / 100 if d.interest_rate else None,
-                "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-                "seniority": d.seniority,
-            }
-        })
-
-    return {"data": {"query": q or cusip or isin, "matches": matches, "exact_match": exact_match}}
+    return await _resolve_bond_data(
+        q, cusip, isin, ticker, coupon, maturity_year, params.get("match_mode", "fuzzy"), limit,
+    )
 
 
 async def _batch_traverse_entities(params: dict, db: AsyncSession) -> dict:
@@ -2161,21 +2086,36 @@ async def _batch_traverse_entities(params: dict, db: AsyncSession) -> dict:
         )
 
     # Get entities for the company
-    entity_result = await db.execute(
-        select(Entity).where(Entity.company_id == company.id)
-    )
-    entities = entity_result.scalars().all()
-
-    entity_list = []
-    for e in entities:
-        entity_list.append({
-            "id": str(e.id),
-            "name": e.name,
-            "entity_type": e.entity_type,
-            "is_guarantor": e.is_guarantor,
-            "is_borrower": e.is_borrower,
-            "parent_id": str(e.parent_id) if e.parent_id else None,
-        })
+    graph = await entity_graphs.get(db, company.id)
+    if graph:
+        entities = graph.nodes
+    else:
+        entity_result = await db.execute(
+            select(Entity).where(Entity.company_id == company.id)
+        )
+        entities = [
+            {
+                "id": str(e.id),
+                "name": e.name,
+                "entity_type": e.entity_type,
+                "is_guarantor": e.is_guarantor,
+                "is_borrower": e.is_borrower,
+                "parent_id": str(e.parent_id) if e.parent_id else None,
+            }
+            for e in entity_result.scalars().all()
+        ]
+
+    entity_list = [
+        {
+            "id": e["id"],
+            "name": e["name"],
+            "entity_type": e["entity_type"],
+            "is_guarantor": e["is_guarantor"],
+            "is_borrower": e["is_borrower"],
+            "parent_id": e["parent_id"],
+        }
+        for e in entities
+    ]
 
     return {
         "data": {
@@ -2262,12 +2202,13 @@ async def _batch_search_documents(params: dict, db: AsyncSession) -> dict:
     from sqlalchemy import text
 
     # Build dynamic WHERE conditions
+    passage_where = ""
     conditions = []
     query_params = {"query": q, "limit": limit, "offset": offset}
 
     ticker_list = parse_comma_list(ticker) if ticker else []
     if ticker_list:
-        conditions.append("c.ticker = ANY(:tickers)")
+        passage_where = " AND p.company_id IN (SELECT id FROM companies WHERE ticker = ANY(:tickers))"
         query_params["tickers"] = ticker_list
 
     if doc_type:
@@ -2280,26 +2221,15 @@ async def _batch_search_documents(params: dict, db: AsyncSession) -> dict:
         conditions.append("ds.section_type = ANY(:section_types)")
         query_params["section_types"] = section_types
 
-    where_clause = ""
-    if conditions:
-        where_clause = " AND " + " AND ".join(conditions)
+    where_clause = "".join(f" AND {c}" for c in conditions)
 
-    full_query = text(f"""
-        SELECT
-            ds.id,
-            c.ticker,
-            ds.doc_type,
-            ds.section_type,
-            ts_rank_cd(ds.search_vector, plainto_tsquery('english', :query)) as relevance_score,
-            ts_headline('english', ds.content, plainto_tsquery('english', :query),
-                'MaxWords=30, MinWords=10, MaxFragments=1, StartSel=<b>, StopSel=</b>') as snippet
-        FROM document_sections ds
-        JOIN companies c ON ds.company_id = c.id
-        WHERE ds.search_vector @@ plainto_tsquery('english', :query)
-        {where_clause}
-        ORDER BY relevance_score DESC
-        LIMIT :limit OFFSET :offset
-    """)
+    # Same passage-level search as search_documents, with shorter snippets
+    full_query = text(_passage_search_sql(
+        passage_where,
+        where_clause,
+        "ORDER BY relevance_score DESC, id ASC",
+        "MaxWords=30, MinWords=10, MaxFragments=1, StartSel=<b>, StopSel=</b>",
+    ))
 
     result = await db.execute(full_query, query_params)
     rows = result.fetchall()
@@ -2313,6 +2243,11 @@ async def _batch_search_documents(params: dict, db: AsyncSession) -> dict:
             "section_type": row.section_type,
             "relevance_score": round(float(row.relevance_score), 4) if row.relevance_score else 0,
             "snippet": row.snippet,
+            "passage": {
+                "id": str(row.passage_id),
+                "start_offset": row.passage_start,
+                "end_offset": row.passage_end,
+            },
         })
 
     return {"data": data, "meta": {"query": q, "limit": limit, "offset": offset}}
@@ -2348,10 +2283,10 @@ async def search_financials(
     limit: int = Query(50, ge=1, le=200, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
     # Export format
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Search quarterly financial statements across all companies.
@@ -2379,8 +2314,26 @@ async def search_financials(
     - `latest`: Most recent quarter only
     - `2025Q3`: Specific quarter
     """
+    cache_params = canonical_cache_params(locals())
     selected_fields = parse_fields(fields, FINANCIALS_FIELDS)
 
+    # Conditional requests are answered from data-version stamps, and repeat
+    # screens from the versioned response cache, before any search query runs
+    etag = cache_version = None
+    if format.lower() not in TABULAR_FORMATS:
+        # Every company_financials write refreshes the company's TTM row (migration 029)
+        etag = await data_version_etag(
+            db, "financials", cache_params, cache_params.get("ticker"),
+            sources=(CompanyTTMFinancials.computed_at,),
+        )
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        cache_version = await response_cache_version(cache_params.get("ticker"), etag)
+    if cache_version:
+        cached = await response_cache_get("financials", cache_params, cache_version)
+        if cached is not None:
+            return etag_response(cached, if_none_match, etag=etag)
+
     # Build base query
     query = select(CompanyFinancials, Company).join(
         Company, CompanyFinancials.company_id == Company.id
@@ -2448,8 +2401,14 @@ async def search_financials(
                 )
             )
         elif period_upper == "TTM":
-            # TTM will be computed in post-processing
-            pass
+            # TTM rollups are materialized per company; one read, no count/page queries
+            ttm_data = await _read_ttm_financials(db, ticker_list, selected_fields)
+            if format.lower() in TABULAR_FORMATS:
+                return tabular_response(ttm_data, format, "financials_ttm")
+            ttm_response = {"data": ttm_data, "meta": {"total": len(ttm_data), "period": "TTM"}}
+            if cache_version:
+                await cache_response("financials", cache_params, cache_version, ttm_response)
+            return etag_response(ttm_response, if_none_match, etag=etag)
         elif "Q" in period_upper:
             # Parse specific quarter like "2025Q3"
             try:
@@ -2490,14 +2449,6 @@ async def search_financials(
     result = await db.execute(query)
     rows = result.all()
 
-    # Handle TTM aggregation
-    if period and period.upper() == "TTM":
-        # Group by company and compute TTM sums
-        ttm_data = await _compute_ttm_financials(db, ticker_list, selected_fields)
-        if format.lower() == "csv":
-            return to_csv_response(ttm_data, filename="financials_ttm.csv")
-        return etag_response({"data": ttm_data, "meta": {"total": len(ttm_data), "period": "TTM"}}, if_none_match)
-
     # Build response
     data = []
     for row in rows:
@@ -2565,9 +2516,9 @@ async def search_financials(
 
         data.append(filter_dict(fin_data, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="financials.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "financials")
 
     response_data = {
         "data": data,
@@ -2583,118 +2534,65 @@ async def search_financials(
             },
         }
     }
-    return etag_response(response_data, if_none_match)
+    if cache_version:
+        await cache_response("financials", cache_params, cache_version, response_data)
+    return etag_response(response_data, if_none_match, etag=etag)
 
 
-async def _compute_ttm_financials(db: AsyncSession, ticker_list: List[str], selected_fields: Optional[Set[str]]) -> List[dict]:
-    """Compute TTM (Trailing Twelve Months) financials for companies."""
-    # Get latest 4 quarters for each company
-    if ticker_list:
-        companies_query = select(Company).where(Company.ticker.in_(ticker_list))
-    else:
-        companies_query = select(Company)
+def ttm_financials_dict(ttm: CompanyTTMFinancials, company: Company) -> dict:
+    """Shape a materialized TTM rollup row for the financials response."""
+    fin_data = {
+        "ticker": company.ticker,
+        "company_name": company.name,
+        "period": "TTM",
+        "ttm_source": ttm.ttm_source,
+    }
+    if ttm.ttm_quarters is not None:
+        fin_data["ttm_quarters"] = ttm.ttm_quarters
+    fin_data.update({
+        "period_end_date": ttm.period_end_date.isoformat() if ttm.period_end_date else None,
+        "revenue": ttm.revenue,
+        "ebitda": ttm.ebitda,
+        "operating_income": ttm.operating_income,
+        "net_income": ttm.net_income,
+        "interest_expense": ttm.interest_expense,
+        "depreciation_amortization": ttm.depreciation_amortization,
+        "cash": ttm.cash_and_equivalents,
+        "total_assets": ttm.total_assets,
+        "total_debt": ttm.total_debt,
+        "total_liabilities": ttm.total_liabilities,
+        "stockholders_equity": ttm.stockholders_equity,
+        "operating_cash_flow": ttm.operating_cash_flow,
+        "capex": ttm.capex,
+        "source_filing": ttm.source_filing,
+    })
+    # Compute free cash flow
+    if ttm.operating_cash_flow is not None and ttm.capex is not None:
+        fin_data["free_cash_flow"] = ttm.operating_cash_flow - abs(ttm.capex)
+    return fin_data
+
+
+async def _read_ttm_financials(db: AsyncSession, ticker_list: List[str], selected_fields: Optional[Set[str]]) -> List[dict]:
+    """
+    Read TTM (Trailing Twelve Months) financials from company_ttm_financials.
 
-    companies_result = await db.execute(companies_query)
-    companies = companies_result.scalars().all()
+    The rollups are kept current by database triggers on company_financials
+    (10-K latest: annual figures; otherwise the last 4 quarters summed), so
+    this is a single primary-key join regardless of how many companies match.
+    """
+    query = (
+        select(CompanyTTMFinancials, Company)
+        .join(Company, CompanyTTMFinancials.company_id == Company.id)
+        .order_by(Company.ticker)
+    )
+    if ticker_list:
+        query = query.where(Company.ticker.in_(ticker_list))
 
+    result = await db.execute(query)
     ttm_data = []
-    for company in companies:
-        # Get the most recent financial record to check filing type
-        latest_query = select(CompanyFinancials).where(
-            CompanyFinancials.company_id == company.id
-        ).order_by(desc(CompanyFinancials.period_end_date)).limit(1)
-
-        latest_result = await db.execute(latest_query)
-        latest = latest_result.scalar_one_or_none()
-
-        if not latest:
-            continue
-
-        # If latest is 10-K, use it directly (already annual)
-        if latest.filing_type == "10-K":
-            fin_data = {
-                "ticker": company.ticker,
-                "company_name": company.name,
-                "period": "TTM",
-                "ttm_source": "10-K",
-                "period_end_date": latest.period_end_date.isoformat() if latest.period_end_date else None,
-                "revenue": latest.revenue,
-                "ebitda": latest.ebitda,
-                "operating_income": latest.operating_income,
-                "net_income": latest.net_income,
-                "interest_expense": latest.interest_expense,
-                "depreciation_amortization": latest.depreciation_amortization,
-                "cash": latest.cash_and_equivalents,
-                "total_assets": latest.total_assets,
-                "total_debt": latest.total_debt,
-                "total_liabilities": latest.total_liabilities,
-                "stockholders_equity": latest.stockholders_equity,
-                "operating_cash_flow": latest.operating_cash_flow,
-                "capex": latest.capex,
-                "source_filing": latest.source_filing,
-            }
-            # Compute free cash flow
-            if latest.operating_cash_flow is not None and latest.capex is not None:
-                fin_data["free_cash_flow"] = latest.operating_cash_flow - abs(latest.capex)
-
-            ttm_data.append(filter_dict(fin_data, selected_fields) if selected_fields else fin_data)
-        else:
-            # Sum last 4 quarters of 10-Q data
-            quarters_query = select(CompanyFinancials).where(
-                CompanyFinancials.company_id == company.id
-            ).order_by(desc(CompanyFinancials.period_end_date)).limit(4)
-
-            quarters_result = await db.execute(quarters_query)
-            quarters = quarters_result.scalars().all()
-
-            if not quarters:
-                continue
-
-            # Sum income statement items (flow items)
-            def safe_sum(items):
-                filtered = [x for x in items if x is not None]
-                return sum(filtered) if filtered else None
-
-            revenue = safe_sum([q.revenue for q in quarters])
-            ebitda = safe_sum([q.ebitda for q in quarters])
-            operating_income = safe_sum([q.operating_income for q in quarters])
-            net_income = safe_sum([q.net_income for q in quarters])
-            interest_expense = safe_sum([q.interest_expense for q in quarters])
-            da = safe_sum([q.depreciation_amortization for q in quarters])
-            ocf = safe_sum([q.operating_cash_flow for q in quarters])
-            capex = safe_sum([q.capex for q in quarters])
-
-            # Balance sheet items: use most recent (not summed)
-            most_recent = quarters[0]
-
-            fin_data = {
-                "ticker": company.ticker,
-                "company_name": company.name,
-                "period": "TTM",
-                "ttm_source": f"{len(quarters)}_quarters",
-                "ttm_quarters": len(quarters),
-                "period_end_date": most_recent.period_end_date.isoformat() if most_recent.period_end_date else None,
-                "revenue": revenue,
-                "ebitda": ebitda,
-                "operating_income": operating_income,
-                "net_income": net_income,
-                "interest_expense": interest_expense,
-                "depreciation_amortization": da,
-                "cash": most_recent.cash_and_equivalents,
-                "total_assets": most_recent.total_assets,
-                "total_debt": most_recent.total_debt,
-                "total_liabilities": most_recent.total_liabilities,
-                "stockholders_equity": most_recent.stockholders_equity,
-                "operating_cash_flow": ocf,
-                "capex": capex,
-                "source_filing": most_recent.source_filing,
-            }
-            # Compute free cash flow
-            if ocf is not None and capex is not None:
-                fin_data["free_cash_flow"] = ocf - abs(capex)
-
-            ttm_data.append(filter_dict(fin_data, selected_fields) if selected_fields else fin_data)
-
+    for ttm, company in result.all():
+        fin_data = ttm_financials_dict(ttm, company)
+        ttm_data.append(filter_dict(fin_data, selected_fields) if selected_fields else fin_data)
     return ttm_data
 
 
@@ -2725,10 +2623,10 @@ async def search_collateral(
     limit: int = Query(50, ge=1, le=200, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
     # Export format
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Search collateral securing debt instruments.
@@ -2762,8 +2660,24 @@ async def search_collateral(
     GET /v1/collateral?cusip=893830AK8
     ```
     """
+    cache_params = canonical_cache_params(locals())
     selected_fields = parse_fields(fields, COLLATERAL_FIELDS)
 
+    # Conditional requests are answered from data-version stamps, and repeat
+    # screens from the versioned response cache, before any search query runs
+    etag = cache_version = None
+    if format.lower() not in TABULAR_FORMATS:
+        etag = await data_version_etag(
+            db, "collateral", cache_params, cache_params.get("ticker"), sources=(Collateral.updated_at,)
+        )
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        cache_version = await response_cache_version(cache_params.get("ticker"), etag)
+    if cache_version:
+        cached = await response_cache_get("collateral", cache_params, cache_version)
+        if cached is not None:
+            return etag_response(cached, if_none_match, etag=etag)
+
     # Build query with joins
     query = select(Collateral, DebtInstrument, Company).join(
         DebtInstrument, Collateral.debt_instrument_id == DebtInstrument.id
@@ -2869,9 +2783,9 @@ async def search_collateral(
 
         data.append(filter_dict(coll_data, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="collateral.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "collateral")
 
     # Compute summary stats
     total_value = sum(c.get("estimated_value") or 0 for c in data)
@@ -2887,25 +2801,31 @@ async def search_collateral(
             "collateral_types": sorted(types_found),
         }
     }
-    return etag_response(response_data, if_none_match)
+    if cache_version:
+        await cache_response("collateral", cache_params, cache_version, response_data)
+    return etag_response(response_data, if_none_match, etag=etag)
 
 
 # =============================================================================
-# PRIMITIVE 10: changes (diff/changelog)
+# PRIMITIVE 10: changes (changelog)
 # =============================================================================
 
 
 @router.get("/companies/{ticker}/changes", tags=["Primitives"])
 async def get_company_changes(
     ticker: str,
-    since: date = Query(..., description="Compare changes since this date (YYYY-MM-DD)"),
-    db: AsyncSession = Depends(get_db),
+    since: date = Query(..., description="Report changes since this date (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get changes to a company's data since a specified date.
 
-    Compares current data against the nearest snapshot on or before the `since` date.
-    Returns deltas including new bonds, entity changes, metric changes, and pricing movements.
+    Reads the company's change log: every cache refresh, snapshot and pricing
+    run appends debt/entity additions and removals, significant metric changes
+    and YTM moves as they are observed. Changes inside the window are netted
+    (a bond added and removed again drops out). If `since` is earlier than the
+    start of the log, debt, entity and metric changes come from diffing the
+    nearest snapshot on or before `since` against current data.
 
     **Example:** Get changes since Q4 2025:
     ```
@@ -2913,213 +2833,83 @@ async def get_company_changes(
     ```
 
     **Response includes:**
-    - `new_debt`: Bonds/loans added after the snapshot
+    - `new_debt`: Bonds/loans added since the date
     - `removed_debt`: Bonds/loans no longer active
     - `entity_changes`: Subsidiaries added or removed
     - `metric_changes`: Significant changes to leverage, debt totals
-    - `pricing_changes`: YTM movements >50bps (if pricing data available)
+    - `pricing_changes`: YTM movements >=50bps
+    - `tracking_since`: When the log started for this company; pricing moves
+      are only known from then on
+    - `snapshot_date`: The snapshot diffed against, when `since` predates the log
+    - `complete`: false if part of the window is covered by neither
     """
     ticker = ticker.upper()
 
-    # Get company
+    # Company and its change-log baseline
     company_result = await db.execute(
-        select(Company).where(Company.ticker == ticker)
+        select(Company, CompanyChangeState.tracking_since)
+        .outerjoin(CompanyChangeState, CompanyChangeState.company_id == Company.id)
+        .where(Company.ticker == ticker)
     )
-    company = company_result.scalar_one_or_none()
-    if not company:
+    row = company_result.first()
+    if not row:
         raise HTTPException(
             status_code=404,
             detail={"code": "NOT_FOUND", "message": f"Company '{ticker}' not found"}
         )
-
-    # Find nearest snapshot on or before the since date
-    snapshot_result = await db.execute(
-        select(CompanySnapshot)
-        .where(
-            CompanySnapshot.company_id == company.id,
-            CompanySnapshot.snapshot_date <= since
+    company, tracking_since = row
+    since_at = datetime(since.year, since.month, since.day, tzinfo=timezone.utc)
+
+    # Windows the log doesn't cover fall back to the nearest snapshot on or before since
+    snapshot = None
+    if tracking_since is None or since_at < tracking_since:
+        snapshot_result = await db.execute(
+            select(CompanySnapshot)
+            .where(
+                CompanySnapshot.company_id == company.id,
+                CompanySnapshot.snapshot_date <= since
+            )
+            .order_by(desc(CompanySnapshot.snapshot_date))
+            .limit(1)
         )
-        .order_by(desc(CompanySnapshot.snapshot_date))
-        .limit(1)
-    )
-    snapshot = snapshot_result.scalar_one_or_none()
-
-    if not snapshot:
+        snapshot = snapshot_result.scalar_one_or_none()
+    if tracking_since is None and snapshot is None:
         raise HTTPException(
             status_code=404,
             detail={
-                "code": "NO_SNAPSHOT",
-                "message": f"No snapshot found on or before {since}. Earliest snapshot may be after this date."
+                "code": "NO_CHANGE_LOG",
+                "message": f"Changes are not tracked for '{ticker}' yet and there is no snapshot on or before {since}."
             }
         )
 
-    # Get current data
-    # Current entities
-    current_entities_result = await db.execute(
-        select(Entity).where(Entity.company_id == company.id)
-    )
-    current_entities = {str(e.id): e for e in current_entities_result.scalars().all()}
-
-    # Current debt instruments
-    current_debt_result = await db.execute(
-        select(DebtInstrument).where(
-            DebtInstrument.company_id == company.id,
-            DebtInstrument.is_active == True
+    # Range scan on idx_change_events_company_time
+    events_query = (
+        select(CompanyChangeEvent)
+        .where(
+            CompanyChangeEvent.company_id == company.id,
+            CompanyChangeEvent.occurred_at >= since_at,
         )
+        .order_by(CompanyChangeEvent.occurred_at, CompanyChangeEvent.id)
     )
-    current_debt = {str(d.id): d for d in current_debt_result.scalars().all()}
-
-    # Current metrics
-    current_metrics_result = await db.execute(
-        select(CompanyMetrics).where(CompanyMetrics.company_id == company.id)
-    )
-    current_metrics = current_metrics_result.scalar_one_or_none()
-
-    # Current pricing
-    current_pricing = {}
-    if current_debt:
-        pricing_result = await db.execute(
-            select(BondPricing, DebtInstrument)
-            .join(DebtInstrument, BondPricing.debt_instrument_id == DebtInstrument.id)
-            .where(DebtInstrument.company_id == company.id)
+    events = []
+    if snapshot:
+        # The snapshot diff spans the whole window for everything but pricing
+        events_query = events_query.where(CompanyChangeEvent.event_type == PRICING_MOVED)
+        diffed, _ = diff_states(
+            snapshot_state(snapshot), await load_company_state(db, company.id), SNAPSHOT_SECTIONS
         )
-        for pricing, debt in pricing_result.all():
-            current_pricing[str(debt.id)] = pricing
-
-    # Parse snapshot data
-    snapshot_entities = {e["id"]: e for e in (snapshot.entities_snapshot or [])}
-    snapshot_debt = {d["id"]: d for d in (snapshot.debt_snapshot or [])}
-    snapshot_metrics = snapshot.metrics_snapshot or {}
-
-    # Calculate changes
-    changes = {
-        "new_debt": [],
-        "removed_debt": [],
-        "entity_changes": {
-            "added": [],
-            "removed": [],
-        },
-        "metric_changes": [],
-        "pricing_changes": [],
-    }
-
-    # --- Debt changes ---
-    current_debt_ids = set(current_debt.keys())
-    snapshot_debt_ids = set(snapshot_debt.keys())
-
-    # New debt
-    for debt_id in current_debt_ids - snapshot_debt_ids:
-        d = current_debt[debt_id]
-        changes["new_debt"].append({
-            "id": debt_id,
-            "name": d.name,
-            "cusip": d.cusip,
-            "instrument_type": d.instrument_type,
-            "seniority": d.seniority,
-            "principal": d.principal,
-            "interest_rate": d.interest_rate / 100 if d.interest_rate else None,
-            "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-            "issue_date": d.issue_date.isoformat() if d.issue_date else None,
-        })
-
-    # Removed debt
-    for debt_id in snapshot_debt_ids - current_debt_ids:
-        d = snapshot_debt[debt_id]
-        changes["removed_debt"].append({
-            "id": debt_id,
-            "name": d.get("name"),
-            "cusip": d.get("cusip"),
-            "instrument_type": d.get("instrument_type"),
-            "maturity_date": d.get("maturity_date"),
-        })
-
-    # --- Entity changes ---
-    current_entity_ids = set(current_entities.keys())
-    snapshot_entity_ids = set(snapshot_entities.keys())
-
-    # Added entities
-    for entity_id in current_entity_ids - snapshot_entity_ids:
-        e = current_entities[entity_id]
-        changes["entity_changes"]["added"].append({
-            "id": entity_id,
-            "name": e.name,
-            "entity_type": e.entity_type,
-            "is_guarantor": e.is_guarantor,
-            "jurisdiction": e.jurisdiction,
-        })
-
-    # Removed entities
-    for entity_id in snapshot_entity_ids - current_entity_ids:
-        e = snapshot_entities[entity_id]
-        changes["entity_changes"]["removed"].append({
-            "id": entity_id,
-            "name": e.get("name"),
-            "entity_type": e.get("entity_type"),
-        })
-
-    # --- Metric changes ---
-    if current_metrics and snapshot_metrics:
-        # Total debt change
-        current_total_debt = current_metrics.total_debt or 0
-        snapshot_total_debt = snapshot_metrics.get("total_debt") or 0
-        if current_total_debt != snapshot_total_debt:
-            debt_change = current_total_debt - snapshot_total_debt
-            debt_change_pct = (debt_change / snapshot_total_debt * 100) if snapshot_total_debt else None
-            if abs(debt_change) > 100_000_000_00:  # >$1B change
-                changes["metric_changes"].append({
-                    "metric": "total_debt",
-                    "previous": snapshot_total_debt,
-                    "current": current_total_debt,
-                    "change": debt_change,
-                    "change_pct": round(debt_change_pct, 1) if debt_change_pct else None,
-                })
-
-        # Leverage ratio change
-        current_leverage = float(current_metrics.leverage_ratio) if current_metrics.leverage_ratio else None
-        snapshot_leverage = snapshot_metrics.get("leverage_ratio")
-        if current_leverage and snapshot_leverage:
-            leverage_change = current_leverage - snapshot_leverage
-            if abs(leverage_change) > 0.5:  # >0.5x change
-                changes["metric_changes"].append({
-                    "metric": "leverage_ratio",
-                    "previous": snapshot_leverage,
-                    "current": current_leverage,
-                    "change": round(leverage_change, 2),
-                })
-
-        # Subordination risk change
-        current_sub_risk = current_metrics.subordination_risk
-        snapshot_sub_risk = snapshot_metrics.get("subordination_risk")
-        if current_sub_risk != snapshot_sub_risk:
-            changes["metric_changes"].append({
-                "metric": "subordination_risk",
-                "previous": snapshot_sub_risk,
-                "current": current_sub_risk,
-            })
-
-    # --- Pricing changes (>50bps YTM movement) ---
-    # Note: We don't have historical pricing in snapshots yet, so this compares
-    # against any pricing stored in the snapshot's debt data (if available)
-    for debt_id, pricing in current_pricing.items():
-        if pricing.ytm_bps:
-            # For now, just report current pricing for bonds that exist in both
-            if debt_id in snapshot_debt:
-                changes["pricing_changes"].append({
-                    "debt_id": debt_id,
-                    "name": current_debt[debt_id].name if debt_id in current_debt else None,
-                    "cusip": pricing.cusip,
-                    "current_ytm": pricing.ytm_bps / 100,
-                    "current_price": float(pricing.last_price) if pricing.last_price else None,
-                    "note": "Historical pricing comparison not yet available",
-                })
+        events = [CompanyChangeEvent(**event) for event in diffed]
+    events.extend((await db.execute(events_query)).scalars().all())
+    changes = summarize_changes(events)
 
     # Build response
     response = {
         "ticker": ticker,
         "company_name": company.name,
         "since": since.isoformat(),
-        "snapshot_date": snapshot.snapshot_date.isoformat(),
-        "snapshot_type": snapshot.snapshot_type,
+        "tracking_since": tracking_since.isoformat() if tracking_since else None,
+        "snapshot_date": snapshot.snapshot_date.isoformat() if snapshot else None,
+        "complete": snapshot is not None or since_at >= tracking_since,
         "changes": changes,
         "summary": {
             "new_debt_count": len(changes["new_debt"]),
@@ -3127,12 +2917,14 @@ async def get_company_changes(
             "entities_added": len(changes["entity_changes"]["added"]),
             "entities_removed": len(changes["entity_changes"]["removed"]),
             "metric_changes_count": len(changes["metric_changes"]),
+            "pricing_changes_count": len(changes["pricing_changes"]),
             "has_changes": any([
                 changes["new_debt"],
                 changes["removed_debt"],
                 changes["entity_changes"]["added"],
                 changes["entity_changes"]["removed"],
                 changes["metric_changes"],
+                changes["pricing_changes"],
             ])
         }
     }
@@ -3140,6 +2932,97 @@ async def get_company_changes(
     return response
 
 
+@router.get("/changes", tags=["Primitives"])
+async def get_changes_feed(
+    since: datetime = Query(..., description="Return changes at or after this time (ISO 8601)"),
+    ticker: Optional[str] = Query(None, description="Company ticker(s), comma-separated"),
+    event_type: Optional[str] = Query(
+        None,
+        description="Event type(s), comma-separated: debt_added, debt_removed, entity_added, "
+                    "entity_removed, metric_changed, pricing_moved"
+    ),
+    limit: int = Query(200, ge=1, le=1000, description="Events per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's meta.next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Universe-wide change feed, oldest first.
+
+    Each event is one observed change (see /v1/companies/{ticker}/changes for
+    the per-company netted view). Events are ordered by commit, so a cursor
+    never skips one committed later. Page with `cursor` until `has_more` is
+    false; every page, including an empty one, returns a `next_cursor` to
+    poll for new events with.
+
+    **Example:** Everything since the start of the month:
+    ```
+    GET /v1/changes?since=2026-10-01T00:00:00Z
+    ```
+    """
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    query = select(CompanyChangeEvent).where(
+        CompanyChangeEvent.occurred_at >= since,
+        CompanyChangeEvent.seq.isnot(None),
+    )
+
+    if ticker:
+        query = query.where(CompanyChangeEvent.ticker.in_([t.upper() for t in parse_comma_list(ticker)]))
+    if event_type:
+        event_types = [t.lower() for t in parse_comma_list(event_type)]
+        invalid = set(event_types) - EVENT_TYPES
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "code": "INVALID_EVENT_TYPE",
+                    "message": f"Invalid event type(s): {', '.join(sorted(invalid))}",
+                    "valid_event_types": sorted(EVENT_TYPES),
+                }
+            )
+        query = query.where(CompanyChangeEvent.event_type.in_(event_types))
+
+    # Keyset pagination on idx_change_events_seq (commit order, see migration 036)
+    if cursor:
+        cursor_seq, _ = decode_cursor(cursor, "seq")
+        if not isinstance(cursor_seq, int):
+            raise HTTPException(
+                status_code=400,
+                detail={"code": "INVALID_CURSOR", "message": "Malformed pagination cursor"}
+            )
+        query = query.where(CompanyChangeEvent.seq > cursor_seq)
+
+    query = query.order_by(CompanyChangeEvent.seq).limit(limit + 1)
+    rows = (await db.execute(query)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Always hand back a resume point: the last event, else the request's
+    # cursor, else the newest event before `since` (anything committed later
+    # gets a higher seq)
+    if rows:
+        next_cursor = encode_cursor("seq", rows[-1].seq, rows[-1].id)
+    elif cursor:
+        next_cursor = cursor
+    else:
+        anchor = await db.scalar(
+            select(func.coalesce(func.max(CompanyChangeEvent.seq), 0))
+            .where(CompanyChangeEvent.occurred_at < since)
+        )
+        next_cursor = encode_cursor("seq", anchor, UUID(int=0))
+
+    return {
+        "data": [change_event_record(event) for event in rows],
+        "meta": {
+            "since": since.isoformat(),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        },
+    }
+
+
 # =============================================================================
 # PRIMITIVE 11: search.covenants
 # =============================================================================
@@ -3169,10 +3052,10 @@ async def search_covenants(
     limit: int = Query(50, ge=1, le=200, description="Results per page"),
     offset: int = Query(0, ge=0, description="Pagination offset"),
     # Export format
-    format: str = Query("json", description="Response format: json or csv"),
+    format: str = Query("json", description="Response format: json, csv, arrow or parquet"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Search structured covenant data across companies and instruments.
@@ -3214,8 +3097,24 @@ async def search_covenants(
     GET /v1/covenants?ticker=CHTR,ATUS&format=csv
     ```
     """
+    cache_params = canonical_cache_params(locals())
     selected_fields = parse_fields(fields, COVENANT_FIELDS)
 
+    # Conditional requests are answered from data-version stamps, and repeat
+    # screens from the versioned response cache, before any search query runs
+    etag = cache_version = None
+    if format.lower() not in TABULAR_FORMATS:
+        etag = await data_version_etag(
+            db, "covenants", cache_params, cache_params.get("ticker"), sources=(Covenant.updated_at,)
+        )
+        if check_etag(if_none_match, etag):
+            return not_modified_response(etag)
+        cache_version = await response_cache_version(cache_params.get("ticker"), etag)
+    if cache_version:
+        cached = await response_cache_get("covenants", cache_params, cache_version)
+        if cached is not None:
+            return etag_response(cached, if_none_match, etag=etag)
+
     # Build query with optional joins
     query = select(Covenant, Company, DebtInstrument).join(
         Company, Covenant.company_id == Company.id
@@ -3331,9 +3230,9 @@ async def search_covenants(
 
         data.append(filter_dict(cov_data, selected_fields))
 
-    # Return CSV if requested
-    if format.lower() == "csv":
-        return to_csv_response(data, filename="covenants.csv")
+    # Return a CSV / Arrow / Parquet file if requested
+    if format.lower() in TABULAR_FORMATS:
+        return tabular_response(data, format, "covenants")
 
     # Compute summary stats
     types_found = list(set(c.get("covenant_type") for c in data if c.get("covenant_type")))
@@ -3349,7 +3248,9 @@ async def search_covenants(
             "test_metrics": sorted(metrics_found) if metrics_found else None,
         }
     }
-    return etag_response(response_data, if_none_match)
+    if cache_version:
+        await cache_response("covenants", cache_params, cache_version, response_data)
+    return etag_response(response_data, if_none_match, etag=etag)
 
 
 # =============================================================================
@@ -3366,8 +3267,8 @@ async def compare_covenants(
     covenant_type: Optional[str] = Query(None, description="Covenant type: financial, negative, incurrence, protective"),
     # ETag support
     if_none_match: Optional[str] = Header(None, description="ETag for conditional request"),
-    user: User = Depends(require_auth),
-    db: AsyncSession = Depends(get_db),
+    user: Principal = Depends(require_auth),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Compare covenants across multiple companies.
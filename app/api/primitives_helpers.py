@@ -3,21 +3,36 @@ Shared Helpers for Primitives API
 
 Common utilities used across all primitive endpoints:
 - CSV export
+- Arrow / Parquet export (optional pyarrow)
 - ETag caching
+- Response cache keys
+- Response record builders
 - Field selection/filtering
 - Sorting
+- Keyset (cursor) pagination and total counts
 - Common query helpers
 """
 
+import base64
 import csv
 import hashlib
 import io
 import json
-from typing import Optional, List, Set
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, List, Sequence, Set, Tuple
+from uuid import UUID
 
 from fastapi import HTTPException, Response
 from fastapi.responses import StreamingResponse, JSONResponse
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, and_, or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import (
+    REPLICA_RESPONSE_CACHE_TTL, RESPONSE_CACHE_TTL, get_data_version, response_cache_set,
+)
+from app.core.database import READ_REPLICA
+from app.models import BondPricing, Collateral, Company, CompanyCache, CompanyMetrics, DebtInstrument
 
 
 # =============================================================================
@@ -71,6 +86,95 @@ def to_csv_response(data: List[dict], filename: str = "export.csv") -> Streaming
     )
 
 
+# =============================================================================
+# COLUMNAR (ARROW / PARQUET) EXPORT HELPER
+# =============================================================================
+#
+# pyarrow is an optional dependency: without it these formats answer 501 and
+# json/csv keep working.
+
+# `format` values answered with a file instead of the JSON envelope
+TABULAR_FORMATS = {"csv", "arrow", "parquet"}
+
+COLUMNAR_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+COLUMNAR_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+
+def import_pyarrow():
+    """Import pyarrow (with ipc and parquet), or raise 501 if it isn't installed."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail={"code": "FORMAT_UNAVAILABLE", "message": "Arrow and Parquet output are not available on this server"},
+        )
+    return pyarrow
+
+
+def _arrow_value(value: Any) -> Any:
+    """Match the JSON encoding: UUIDs as strings, Decimals as floats."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _arrow_column(pa, values: list):
+    """Build one Arrow array, falling back to strings for mixed or unsupported types."""
+    # Normalize first: pyarrow infers its arrow.uuid / decimal128 types rather than raising
+    values = [_arrow_value(v) for v in values]
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def columnar_table(data: List[dict]):
+    """
+    Build an Arrow table from response records, one column at a time.
+
+    Nested dicts are flattened with the same names as CSV output; columns keep
+    first-seen key order and rows missing a key get nulls.
+    """
+    pa = import_pyarrow()
+    rows = [flatten_dict(row) for row in data]
+    keys = dict.fromkeys(key for row in rows for key in row)
+    return pa.table({key: _arrow_column(pa, [row.get(key) for row in rows]) for key in keys})
+
+
+def write_columnar(table, format: str) -> bytes:
+    """Serialize an Arrow table as an Arrow IPC stream or a Parquet file."""
+    pa = import_pyarrow()
+    sink = pa.BufferOutputStream()
+    if format == "parquet":
+        pa.parquet.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def tabular_response(data: List[dict], format: str, name: str) -> Response:
+    """Return records as a csv, arrow or parquet file download named after the resource."""
+    format = format.lower()
+    if format == "csv":
+        return to_csv_response(data, filename=f"{name}.csv")
+    body = write_columnar(columnar_table(data), format)
+    return Response(
+        content=body,
+        media_type=COLUMNAR_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={name}.{COLUMNAR_EXTENSIONS[format]}"},
+    )
+
+
 # =============================================================================
 # ETAG CACHING HELPER
 # =============================================================================
@@ -90,9 +194,13 @@ def check_etag(if_none_match: Optional[str], etag: str) -> bool:
     return etag in client_etags or '*' in client_etags
 
 
-def etag_response(data: dict, if_none_match: Optional[str] = None) -> Response:
-    """Return JSON response with ETag header, or 304 if unchanged."""
-    etag = generate_etag(data)
+def etag_response(data: dict, if_none_match: Optional[str] = None, etag: Optional[str] = None) -> Response:
+    """
+    Return JSON response with ETag header, or 304 if unchanged.
+
+    Pass `etag` (e.g. from data_version_etag) to skip hashing the body.
+    """
+    etag = etag or generate_etag(data)
 
     if check_etag(if_none_match, etag):
         return Response(status_code=304, headers={"ETag": f'"{etag}"'})
@@ -103,6 +211,273 @@ def etag_response(data: dict, if_none_match: Optional[str] = None) -> Response:
     )
 
 
+def not_modified_response(etag: str) -> Response:
+    """Return a 304 response for a matched ETag."""
+    return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+
+
+async def data_version_etag(
+    db: AsyncSession,
+    namespace: str,
+    params: dict,
+    tickers: Optional[List[str]] = None,
+    include_metrics: bool = False,
+    include_pricing: bool = False,
+    sources: Sequence[Any] = (),
+) -> str:
+    """
+    Build an ETag from cheap data-version stamps instead of the response body.
+
+    Stamps are max(company_cache.computed_at) and the covered company count,
+    plus max(company_metrics.updated_at) and/or max(bond_pricing.fetched_at)
+    when the endpoint depends on them. `sources` are the stamp columns of the
+    tables the endpoint reads directly (e.g. Covenant.updated_at), which are
+    written without a cache refresh; each adds its max(), an index probe (no
+    row counts: those would scan the table). All are read in a single
+    statement, scoped to `tickers` when given, so a matching If-None-Match
+    can be answered with 304 before any search query runs.
+    """
+    def scoped(query, ticker_column):
+        return query.where(ticker_column.in_(tickers)) if tickers else query
+
+    def scoped_source(query, model):
+        if not tickers:
+            return query
+        if model is Collateral:
+            query = query.join(DebtInstrument, Collateral.debt_instrument_id == DebtInstrument.id)
+            company_id = DebtInstrument.company_id
+        else:
+            company_id = model.company_id
+        return query.join(Company, company_id == Company.id).where(Company.ticker.in_(tickers))
+
+    stamps = [
+        scoped(select(func.max(CompanyCache.computed_at)), CompanyCache.ticker).scalar_subquery(),
+        scoped(select(func.count()).select_from(CompanyCache), CompanyCache.ticker).scalar_subquery(),
+    ]
+    if include_metrics:
+        stamps.append(
+            scoped(select(func.max(CompanyMetrics.updated_at)), CompanyMetrics.ticker).scalar_subquery()
+        )
+    if include_pricing:
+        pricing_query = select(func.max(BondPricing.fetched_at))
+        if tickers:
+            pricing_query = pricing_query.join(
+                DebtInstrument, BondPricing.debt_instrument_id == DebtInstrument.id
+            ).join(
+                Company, DebtInstrument.company_id == Company.id
+            ).where(Company.ticker.in_(tickers))
+        stamps.append(pricing_query.scalar_subquery())
+    for column in sources:
+        stamps.append(scoped_source(select(func.max(column)), column.class_).scalar_subquery())
+
+    row = (await db.execute(select(*stamps))).one()
+    return generate_etag({
+        "namespace": namespace,
+        "params": params,
+        "stamps": [str(value) for value in row],
+    })
+
+
+async def response_cache_version(tickers: Optional[List[str]], etag: Optional[str]) -> Optional[str]:
+    """
+    Version to key a response cache entry on: the Redis data version plus the
+    request's data_version_etag.
+
+    Stamped tables can change without a version bump; keying on the ETag too
+    means a cached body is only ever served under the ETag it was built with.
+    Returns None if Redis is unavailable.
+    """
+    version = await get_data_version(tickers)
+    if version and etag:
+        return f"{version}|{etag}"
+    return version
+
+
+async def cache_response(
+    namespace: str,
+    params: dict,
+    version: str,
+    value: Any,
+    ttl_seconds: int = RESPONSE_CACHE_TTL,
+) -> bool:
+    """
+    Cache a response body built on the read engine under `version`.
+
+    With a read replica the body may predate the version (the bump lands
+    before the replica replays the write), so it is only cached if the data
+    version is still the one read before the query, and for at most
+    REPLICA_RESPONSE_CACHE_TTL. Returns whether the entry was written.
+    """
+    if READ_REPLICA:
+        data_version = version.partition("|")[0]
+        if await get_data_version(params.get("ticker")) != data_version:
+            return False
+        ttl_seconds = min(ttl_seconds, REPLICA_RESPONSE_CACHE_TTL)
+    return await response_cache_set(namespace, params, version, value, ttl_seconds=ttl_seconds)
+
+
+# =============================================================================
+# RESPONSE CACHE HELPER
+# =============================================================================
+
+# Parameters that never change the response body
+NON_CACHE_PARAMS = {"db", "if_none_match"}
+
+# Comma-separated identifier params whose order doesn't affect results
+CACHE_LIST_PARAMS = {"ticker", "cusip", "fields"}
+
+
+def canonical_cache_params(params: dict) -> dict:
+    """
+    Normalize endpoint parameters into a stable response-cache key form.
+
+    Drops unset values and request-only params, and sorts/dedupes identifier
+    lists so `ticker=msft,AAPL` and `ticker=AAPL,MSFT` share a cache entry.
+    """
+    canonical = {}
+    for key, value in params.items():
+        if key in NON_CACHE_PARAMS or value is None:
+            continue
+        if key in CACHE_LIST_PARAMS and isinstance(value, str):
+            value = sorted(set(parse_comma_list(value, uppercase=key != "fields")))
+        elif isinstance(value, str):
+            value = value.strip()
+        canonical[key] = value
+    return canonical
+
+
+# =============================================================================
+# RECORD BUILDERS
+# =============================================================================
+#
+# Shared by the SQL search paths and the in-memory universe store so both
+# produce identical records.
+
+def company_record(c, m) -> dict:
+    """Build a search.companies record from a Company and its (optional) CompanyMetrics."""
+    return {
+        "ticker": c.ticker,
+        "name": c.name,
+        "sector": m.sector if m else None,
+        "industry": m.industry if m else None,
+        "cik": c.cik,
+        "total_debt": m.total_debt if m else None,
+        "secured_debt": m.secured_debt if m else None,
+        "unsecured_debt": m.unsecured_debt if m else None,
+        "net_debt": m.net_debt if m else None,
+        "leverage_ratio": float(m.leverage_ratio) if m and m.leverage_ratio else None,
+        "net_leverage_ratio": float(m.net_leverage_ratio) if m and m.net_leverage_ratio else None,
+        "interest_coverage": float(m.interest_coverage) if m and m.interest_coverage else None,
+        "secured_leverage": float(m.secured_leverage) if m and m.secured_leverage else None,
+        "entity_count": m.entity_count if m else None,
+        "guarantor_count": m.guarantor_count if m else None,
+        "subordination_risk": m.subordination_risk if m else None,
+        "subordination_score": float(m.subordination_score) if m and m.subordination_score else None,
+        "has_structural_sub": m.has_structural_sub if m else None,
+        "has_floating_rate": m.has_floating_rate if m else None,
+        "has_near_term_maturity": m.has_near_term_maturity if m else None,
+        "has_holdco_debt": m.has_holdco_debt if m else None,
+        "has_opco_debt": m.has_opco_debt if m else None,
+        "has_unrestricted_subs": m.has_unrestricted_subs if m else None,
+        "nearest_maturity": m.nearest_maturity.isoformat() if m and m.nearest_maturity else None,
+        "weighted_avg_maturity": float(m.weighted_avg_maturity) if m and m.weighted_avg_maturity else None,
+        "debt_due_1yr": m.debt_due_1yr if m else None,
+        "debt_due_2yr": m.debt_due_2yr if m else None,
+        "debt_due_3yr": m.debt_due_3yr if m else None,
+        "sp_rating": m.sp_rating if m else None,
+        "moodys_rating": m.moodys_rating if m else None,
+        "rating_bucket": m.rating_bucket if m else None,
+    }
+
+
+def collateral_summary(coll) -> dict:
+    """Build the collateral entry embedded in a bond record."""
+    return {
+        "type": coll.collateral_type,
+        "description": coll.description,
+        "priority": coll.priority,
+        "estimated_value": coll.estimated_value,
+    }
+
+
+def source_document_summary(link, doc) -> dict:
+    """Build the source document entry embedded in a bond record."""
+    return {
+        "doc_type": doc.doc_type,
+        "section_type": doc.section_type,
+        "section_title": doc.section_title,
+        "filing_date": doc.filing_date.isoformat() if doc.filing_date else None,
+        "sec_filing_url": doc.sec_filing_url,
+        "relationship": link.relationship_type,
+        "match_confidence": float(link.match_confidence) if link.match_confidence else None,
+        "match_method": link.match_method,
+    }
+
+
+def bond_record(
+    d,
+    c,
+    issuer,
+    pricing,
+    guarantor_count: int = 0,
+    collateral: Optional[List[dict]] = None,
+    source_documents: Optional[List[dict]] = None,
+) -> dict:
+    """Build a search.bonds record from a DebtInstrument, its Company, issuer Entity and pricing."""
+    bond_data = {
+        "id": str(d.id),
+        "name": d.name,
+        "cusip": d.cusip,
+        "isin": d.isin,
+        "company_ticker": c.ticker,
+        "company_name": c.name,
+        "company_sector": c.sector,
+        "issuer_name": issuer.name,
+        "issuer_type": issuer.entity_type,
+        "issuer_id": str(issuer.id),
+        "instrument_type": d.instrument_type,
+        "seniority": d.seniority,
+        "security_type": d.security_type,
+        "commitment": d.commitment,
+        "principal": d.principal,
+        "outstanding": d.outstanding,
+        "currency": d.currency,
+        "rate_type": d.rate_type,
+        "coupon_rate": d.interest_rate / 100 if d.interest_rate else None,
+        "spread_bps": d.spread_bps,
+        "benchmark": d.benchmark,
+        "floor_bps": d.floor_bps,
+        "issue_date": d.issue_date.isoformat() if d.issue_date else None,
+        "issue_date_estimated": d.issue_date_estimated,
+        "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
+        "is_active": d.is_active,
+        "is_drawn": d.is_drawn,
+        "guarantor_count": guarantor_count,
+        "guarantee_data_confidence": d.guarantee_data_confidence,
+        "collateral": collateral or [],
+        "collateral_data_confidence": d.collateral_data_confidence,
+        "source_documents": source_documents or [],
+    }
+
+    # Add pricing data (only actual TRACE pricing, not estimated)
+    if pricing and pricing.last_price is not None and pricing.price_source == "TRACE":
+        bond_data["pricing"] = {
+            "last_price": float(pricing.last_price) if pricing.last_price else None,
+            "last_trade_date": pricing.last_trade_date.isoformat() if pricing.last_trade_date else None,
+            "ytm": pricing.ytm_bps / 100 if pricing.ytm_bps else None,
+            "ytm_bps": pricing.ytm_bps,
+            "spread": pricing.spread_to_treasury_bps,
+            "spread_bps": pricing.spread_to_treasury_bps,
+            "treasury_benchmark": pricing.treasury_benchmark,
+            "price_source": pricing.price_source,
+            "staleness_days": pricing.staleness_days,
+        }
+    else:
+        bond_data["pricing"] = None
+
+    return bond_data
+
+
 # =============================================================================
 # FIELD SELECTION HELPER
 # =============================================================================
@@ -219,3 +594,150 @@ def apply_sort(query, sort: str, column_map: dict, default_column):
     if sort_desc:
         return query.order_by(desc(sort_column).nulls_last())
     return query.order_by(asc(sort_column).nulls_last())
+
+
+def apply_keyset_sort(query, sort: str, column_map: dict, default_column, id_column, cursor: Optional[str] = None):
+    """
+    Apply sort plus an id tie-breaker, and seek past `cursor` if given.
+
+    Ordering is `sort_column NULLS LAST, id ASC` so every row has a unique
+    position and the next page can be found with a WHERE clause instead of
+    OFFSET. Returns (query, sort_column).
+    """
+    sort_desc = sort.startswith("-")
+    sort_field = sort[1:] if sort_desc else sort
+    sort_column = column_map.get(sort_field, default_column)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if value is None:
+            # Already in the trailing NULL block
+            query = query.where(and_(sort_column.is_(None), id_column > last_id))
+        else:
+            past_value = sort_column < value if sort_desc else sort_column > value
+            query = query.where(or_(
+                past_value,
+                and_(sort_column == value, id_column > last_id),
+                sort_column.is_(None),
+            ))
+
+    primary = desc(sort_column).nulls_last() if sort_desc else asc(sort_column).nulls_last()
+    return query.order_by(primary, asc(id_column)), sort_column
+
+
+# =============================================================================
+# PAGINATION HELPER
+# =============================================================================
+
+# Accepted values for the `total` query parameter
+TOTAL_MODES = {"exact", "estimate", "none"}
+
+
+def validate_total_mode(total: str) -> str:
+    """Validate the `total` parameter (exact, estimate, none)."""
+    mode = total.lower()
+    if mode not in TOTAL_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "INVALID_TOTAL_MODE",
+                "message": f"Invalid total mode: {total}",
+                "valid_modes": sorted(TOTAL_MODES),
+            }
+        )
+    return mode
+
+
+def _encode_cursor_value(value: Any) -> list:
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["n", str(value)]
+    return ["v", value]
+
+
+def _decode_cursor_value(tagged: list) -> Any:
+    tag, value = tagged
+    if value is None or tag == "v":
+        return value
+    if tag == "dt":
+        return datetime.fromisoformat(value)
+    if tag == "d":
+        return date.fromisoformat(value)
+    if tag == "n":
+        return Decimal(value)
+    raise ValueError(f"unknown cursor tag {tag}")
+
+
+def encode_cursor(sort: str, sort_value: Any, row_id: UUID) -> str:
+    """Encode the active sort, last row's sort key and id as an opaque cursor token."""
+    payload = json.dumps([sort, _encode_cursor_value(sort_value), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, UUID]:
+    """Decode a cursor token into (sort_value, id), or raise 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, tagged_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = _decode_cursor_value(tagged_value), UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_CURSOR", "message": "Malformed pagination cursor"}
+        )
+    if cursor_sort != sort:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "INVALID_CURSOR",
+                "message": f"Cursor was issued for sort={cursor_sort}; repeat the request with the same sort",
+            }
+        )
+    return value, last_id
+
+
+def page_rows(rows: list, limit: int, sort: str, sort_column, id_of) -> Tuple[list, Optional[str]]:
+    """
+    Trim a `limit + 1` fetch to one page and build the next-page cursor.
+
+    `id_of` extracts the tie-breaker id from a row. Returns (page, next_cursor);
+    next_cursor is None on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(sort, row_sort_value(last, sort_column), id_of(last))
+
+
+def row_sort_value(row, sort_column) -> Any:
+    """Read an ORM sort column's value from a result row of entities."""
+    for item in row:
+        if isinstance(item, sort_column.class_):
+            return getattr(item, sort_column.key)
+    return None
+
+
+async def estimate_row_count(db: AsyncSession, query) -> Optional[int]:
+    """
+    Estimate a query's row count from planner statistics.
+
+    Runs `EXPLAIN (FORMAT JSON)` and reads the top plan node's row estimate
+    (derived from pg_class.reltuples and column stats), so no rows are
+    scanned. Returns None if the estimate can't be obtained.
+    """
+    try:
+        conn = await db.connection()
+        compiled = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+        params = compiled.construct_params()
+        values = tuple(params[name] for name in compiled.positiontup or [])
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", values)
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
@@ -30,7 +30,8 @@ from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
 from app.core.cache import cache_ping
-from app.models import Company, CompanyCache, CompanyFinancials, CompanyMetrics, Entity, DebtInstrument, Guarantee, ObligorGroupFinancials, BondPricing, OwnershipLink
+from app.models import Company, CompanyCache, CompanyFinancials, CompanyMetrics, Entity, DebtInstrument, Guarantee, ObligorGroupFinancials, BondPricing
+from app.services.entity_graph import entity_graphs
 from app.services.yield_calculation import get_staleness_indicator
 
 router = APIRouter()
@@ -72,11 +73,12 @@ def company_header(company: Company) -> dict:
     return {"ticker": company.ticker, "name": company.name}
 
 
-def cached_response(cache: CompanyCache, data: Any) -> ORJSONResponse:
+def cached_response(cache: CompanyCache, data: Any, etag: Optional[str] = None) -> ORJSONResponse:
     """Return cached response with ETag headers."""
+    etag = etag or cache.etag
     return ORJSONResponse(
-        content={"data": data, "meta": {"cached": True, "etag": cache.etag}},
-        headers={"ETag": cache.etag or "", "Cache-Control": "public, max-age=3600"},
+        content={"data": data, "meta": {"cached": True, "etag": etag}},
+        headers={"ETag": etag or "", "Cache-Control": "public, max-age=3600"},
     )
 
 
@@ -225,7 +227,26 @@ async def get_company_structure(ticker: str, db: AsyncSession = Depends(get_db))
     cache = await get_cache_or_404(db, ticker)
     if not cache.response_structure:
         raise HTTPException(status_code=404, detail=f"Structure data not available for {ticker.upper()}")
-    return cached_response(cache, cache.response_structure)
+
+    graph = await entity_graphs.get(db, cache.company_id)
+    if not graph:
+        return cached_response(cache, cache.response_structure)
+
+    # Tree and coverage come from the live graph; total_debt and as_of_date from the cache refresh
+    cached = cache.response_structure
+    view = graph.structure_view()
+    data = {
+        "company": cached.get("company"),
+        "structure": view["structure"],
+        "summary": {**view["summary"], "total_debt": (cached.get("summary") or {}).get("total_debt")},
+        "ownership_coverage": view["ownership_coverage"],
+        "other_subsidiaries": view["other_subsidiaries"],
+        "meta": {
+            "as_of_date": (cached.get("meta") or {}).get("as_of_date"),
+            "confidence": view["confidence"],
+        },
+    }
+    return cached_response(cache, data, etag=f"{cache.etag}-g{graph.version}" if graph.version else None)
 
 
 # =============================================================================
@@ -1000,15 +1021,8 @@ async def get_company_ownership(ticker: str, db: AsyncSession = Depends(get_db))
     - Consolidation methods
     """
     company = await get_company_or_404(db, ticker)
-
-    # Get all entities for this company
-    entities_result = await db.execute(
-        select(Entity).where(Entity.company_id == company.id)
-    )
-    entities = {e.id: e for e in entities_result.scalars().all()}
-    entity_ids = list(entities.keys())
-
-    if not entity_ids:
+    graph = await entity_graphs.get_or_build(db, company.id)
+    if not graph.size:
         return {
             "data": {
                 "company": company_header(company),
@@ -1018,80 +1032,7 @@ async def get_company_ownership(ticker: str, db: AsyncSession = Depends(get_db))
             }
         }
 
-    # Get ownership links where either parent or child is in this company
-    links_result = await db.execute(
-        select(OwnershipLink).where(
-            or_(
-                OwnershipLink.parent_entity_id.in_(entity_ids),
-                OwnershipLink.child_entity_id.in_(entity_ids),
-            )
-        ).order_by(OwnershipLink.parent_entity_id)
-    )
-    links = links_result.scalars().all()
-
-    ownership_links = []
-    joint_ventures = []
-
-    for link in links:
-        parent = entities.get(link.parent_entity_id)
-        child = entities.get(link.child_entity_id)
-
-        link_data = {
-            "id": str(link.id),
-            "parent": {
-                "entity_id": str(link.parent_entity_id),
-                "name": parent.name if parent else "External Entity",
-                "type": parent.entity_type if parent else None,
-            },
-            "child": {
-                "entity_id": str(link.child_entity_id),
-                "name": child.name if child else "External Entity",
-                "type": child.entity_type if child else None,
-            },
-            "ownership_pct": float(link.ownership_pct) if link.ownership_pct else None,
-            "ownership_type": link.ownership_type,
-            "consolidation_method": link.consolidation_method,
-            "effective_from": link.effective_from.isoformat() if link.effective_from else None,
-            "effective_to": link.effective_to.isoformat() if link.effective_to else None,
-            "is_current": link.effective_to is None,
-        }
-
-        ownership_links.append(link_data)
-
-        if link.is_joint_venture:
-            jv_data = {
-                **link_data,
-                "jv_partner_name": link.jv_partner_name,
-            }
-            joint_ventures.append(jv_data)
-
-    # Also include simple parent-child relationships from Entity.parent_id
-    simple_ownership = []
-    for entity in entities.values():
-        if entity.parent_id and entity.parent_id in entities:
-            parent = entities[entity.parent_id]
-            simple_ownership.append({
-                "parent": {"entity_id": str(parent.id), "name": parent.name, "type": parent.entity_type},
-                "child": {"entity_id": str(entity.id), "name": entity.name, "type": entity.entity_type},
-                "ownership_pct": float(entity.ownership_pct) if entity.ownership_pct else 100.0,
-                "ownership_type": "direct",
-                "source": "entity_hierarchy",
-            })
-
-    return {
-        "data": {
-            "company": company_header(company),
-            "ownership_links": ownership_links,
-            "simple_hierarchy": simple_ownership,
-            "joint_ventures": joint_ventures,
-            "summary": {
-                "total_complex_links": len(ownership_links),
-                "total_simple_links": len(simple_ownership),
-                "joint_ventures": len(joint_ventures),
-                "partial_ownership": sum(1 for l in ownership_links if l["ownership_pct"] and l["ownership_pct"] < 100),
-            },
-        },
-    }
+    return {"data": {"company": company_header(company), **graph.ownership_view()}}
 
 
 # =============================================================================
@@ -1108,72 +1049,9 @@ async def get_company_hierarchy(ticker: str, db: AsyncSession = Depends(get_db))
     with debt amounts at each level.
     """
     company = await get_company_or_404(db, ticker)
+    graph = await entity_graphs.get_or_build(db, company.id)
 
-    # Get all entities
-    entities_result = await db.execute(
-        select(Entity).where(Entity.company_id == company.id)
-    )
-    entities = list(entities_result.scalars().all())
-
-    # Get debt totals by issuer
-    debt_result = await db.execute(
-        select(DebtInstrument.issuer_id, func.sum(DebtInstrument.outstanding), func.count(DebtInstrument.id))
-        .where(DebtInstrument.company_id == company.id)
-        .group_by(DebtInstrument.issuer_id)
-    )
-    debt_by_entity = {row[0]: {"total": row[1], "count": row[2]} for row in debt_result}
-
-    # Build entity lookup
-    entity_map = {e.id: e for e in entities}
-
-    # Find roots (entities without parents or parent outside company)
-    roots = [e for e in entities if not e.parent_id or e.parent_id not in entity_map]
-
-    def build_node(entity):
-        debt_info = debt_by_entity.get(entity.id, {"total": 0, "count": 0})
-        children = [e for e in entities if e.parent_id == entity.id]
-
-        node = {
-            "entity_id": str(entity.id),
-            "name": entity.name,
-            "entity_type": entity.entity_type,
-            "jurisdiction": entity.jurisdiction,
-            "is_guarantor": entity.is_guarantor,
-            "is_borrower": entity.is_borrower,
-            "is_vie": entity.is_vie,
-            "debt_at_entity": {
-                "total_outstanding": debt_info["total"],
-                "instrument_count": debt_info["count"],
-            },
-            "children": [build_node(c) for c in sorted(children, key=lambda x: x.name)],
-        }
-        return node
-
-    # Build tree from roots
-    tree = [build_node(r) for r in sorted(roots, key=lambda x: (x.entity_type != "holdco", x.name))]
-
-    # Calculate totals
-    def sum_debt(node):
-        total = node["debt_at_entity"]["total_outstanding"] or 0
-        for child in node["children"]:
-            total += sum_debt(child)
-        return total
-
-    total_debt = sum(sum_debt(n) for n in tree)
-
-    return {
-        "data": {
-            "company": company_header(company),
-            "hierarchy": tree,
-            "summary": {
-                "total_entities": len(entities),
-                "root_entities": len(roots),
-                "max_depth": max((lambda n, d=0: max(d, max((lambda c: sum_debt(c))(c) for c in n["children"]) if n["children"] else d))(n) for n in tree) if tree else 0,
-                "total_debt": total_debt,
-                "entities_with_debt": len([e for e in entities if e.id in debt_by_entity]),
-            },
-        },
-    }
+    return {"data": {"company": company_header(company), **graph.hierarchy_view()}}
 
 
 # =============================================================================
@@ -1447,6 +1325,7 @@ async def get_usage_analytics(
         get_endpoint_breakdown,
         check_alerts,
     )
+    from app.core.metrics import registry as metrics_registry
 
     # Clamp values
     hours = min(max(hours, 1), 48)
@@ -1462,6 +1341,8 @@ async def get_usage_analytics(
             "hourly_metrics": hourly,
             "daily_metrics": daily,
             "endpoint_breakdown": endpoints,
+            # Since this process started (see /metrics for the histograms)
+            "route_latency": metrics_registry.route_latency_summary(),
             "alerts": alerts,
         },
     }
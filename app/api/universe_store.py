@@ -0,0 +1,570 @@
+"""
+In-memory columnar universe store for company and bond screening.
+
+The covered universe is small (hundreds of companies, ~10k instruments), so
+search.companies and search.bonds screens are answered from a NumPy snapshot
+of the columns they filter and sort on, without touching Postgres:
+
+- Filters are evaluated as vectorized boolean masks.
+- Sorts use np.lexsort with NULLS LAST and an id tie-breaker, matching the
+  SQL ordering (and keyset cursors) of the search primitives.
+- Response records are pre-built with the same builders as the SQL path, so
+  field selection only touches the returned page.
+
+Snapshots are immutable and replaced wholesale (a single reference swap), so
+readers never see a half-loaded universe. Staleness is checked against the
+global data version in Redis at most every RECHECK_SECONDS, and a snapshot
+is reloaded every MAX_AGE_SECONDS regardless, so a lost version bump can't
+pin old data. A snapshot past EXPIRE_SECONDS (reloads keep failing) is not
+served. Until the first load completes, callers fall back to the SQL path.
+
+Totals are always exact counts over the snapshot; `total=estimate` gets
+the exact count too, reported as total_mode "exact".
+
+Text sorts use code-point order, which can differ from the database
+collation for mixed-case or punctuated names.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import structlog
+from sqlalchemy import func, select
+
+from app.api.primitives_helpers import (
+    bond_record,
+    collateral_summary,
+    company_record,
+    decode_cursor,
+    encode_cursor,
+    generate_etag,
+    source_document_summary,
+)
+from app.core.cache import get_data_version
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.models import (
+    BondPricing, Collateral, Company, CompanyMetrics, DebtInstrument,
+    DebtInstrumentDocument, DocumentSection, Entity, Guarantee,
+)
+
+logger = structlog.get_logger()
+
+# How often to compare the snapshot against the Redis data version
+RECHECK_SECONDS = 5
+
+# Reload interval, whether or not the data version has moved
+MAX_AGE_SECONDS = 300
+
+# Past this a snapshot isn't served at all; screens fall back to SQL
+EXPIRE_SECONDS = 3 * MAX_AGE_SECONDS
+
+
+# =============================================================================
+# COLUMNS
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class Column:
+    """One screenable column: vectorized values, null mask and raw Python values."""
+
+    values: np.ndarray
+    null: np.ndarray
+    raw: np.ndarray  # original values, used to encode keyset cursors
+    kind: str  # "num", "text" or "date"
+    folded: Optional[np.ndarray] = None  # lowercased text, for ILIKE-style filters
+
+
+def _raw(values: List[Any]) -> np.ndarray:
+    raw = np.empty(len(values), dtype=object)
+    raw[:] = values
+    return raw
+
+
+def num_column(values: List[Any]) -> Column:
+    """Numeric column (ints, Decimals, floats, bools) as float64 with NaN for NULL."""
+    arr = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    return Column(arr, np.isnan(arr), _raw(values), "num")
+
+
+def text_column(values: List[Optional[str]]) -> Column:
+    """Text column as a fixed-width unicode array ('' for NULL)."""
+    arr = np.array([v or "" for v in values], dtype=str)
+    null = np.array([v is None for v in values], dtype=bool)
+    return Column(arr, null, _raw(values), "text", folded=np.char.lower(arr))
+
+
+def date_column(values: List[Optional[date]]) -> Column:
+    """Date column as datetime64[D] (NaT for NULL)."""
+    arr = np.array(
+        [np.datetime64(v, "D") if v else np.datetime64("NaT") for v in values],
+        dtype="datetime64[D]",
+    )
+    return Column(arr, np.isnat(arr), _raw(values), "date")
+
+
+def _scalar(column: Column, value: Any) -> Any:
+    """Convert a filter or cursor value to the column's vectorized representation."""
+    if column.kind == "num":
+        return float(value)
+    if column.kind == "date":
+        return np.datetime64(value, "D")
+    return str(value)
+
+
+@dataclass(frozen=True)
+class ColumnTable:
+    """Columns plus pre-built response records for one entity type."""
+
+    ids: np.ndarray  # UUID strings; lexicographic order matches Postgres uuid order
+    columns: Dict[str, Column]
+    records: List[dict]
+
+    @property
+    def size(self) -> int:
+        return len(self.records)
+
+    def all(self) -> np.ndarray:
+        return np.ones(self.size, dtype=bool)
+
+    def eq(self, name: str, value: Any) -> np.ndarray:
+        col = self.columns[name]
+        return ~col.null & (col.values == _scalar(col, value))
+
+    def isin(self, name: str, values: List[Any]) -> np.ndarray:
+        col = self.columns[name]
+        return ~col.null & np.isin(col.values, [_scalar(col, v) for v in values])
+
+    def gte(self, name: str, value: Any) -> np.ndarray:
+        col = self.columns[name]
+        return ~col.null & (col.values >= _scalar(col, value))
+
+    def lte(self, name: str, value: Any) -> np.ndarray:
+        col = self.columns[name]
+        return ~col.null & (col.values <= _scalar(col, value))
+
+    def contains_ci(self, name: str, needle: str) -> np.ndarray:
+        """Case-insensitive substring match (ILIKE '%needle%')."""
+        col = self.columns[name]
+        return ~col.null & (np.char.find(col.folded, needle.lower()) >= 0)
+
+    def is_null(self, name: str) -> np.ndarray:
+        return self.columns[name].null.copy()
+
+    def order(self, mask: np.ndarray, sort_name: str, descending: bool) -> np.ndarray:
+        """Indices of masked rows ordered by sort column (NULLS LAST), then id."""
+        col = self.columns[sort_name]
+        idx = np.flatnonzero(mask)
+        values = col.values[idx]
+        null = col.null[idx]
+        # Rank non-null values so descending order works for any dtype
+        ranks = np.zeros(len(idx), dtype=np.int64)
+        if (~null).any():
+            _, inverse = np.unique(values[~null], return_inverse=True)
+            ranks[~null] = -inverse if descending else inverse
+        return idx[np.lexsort((self.ids[idx], ranks, null))]
+
+    def after_cursor(self, sort_name: str, descending: bool, value: Any, last_id: str) -> np.ndarray:
+        """Mask of rows positioned after a keyset cursor in (sort NULLS LAST, id) order."""
+        col = self.columns[sort_name]
+        later_id = self.ids > last_id
+        if value is None:
+            return col.null & later_id
+        v = _scalar(col, value)
+        past = col.values < v if descending else col.values > v
+        return (~col.null & (past | ((col.values == v) & later_id))) | col.null
+
+
+@dataclass(frozen=True)
+class UniverseSnapshot:
+    """Immutable point-in-time view of the screenable universe."""
+
+    version: Optional[str]
+    loaded_at: float
+    companies: ColumnTable
+    bonds: ColumnTable
+
+    def etag(self, namespace: str, params: dict) -> str:
+        """ETag for a screen answered from this snapshot."""
+        return generate_etag({
+            "namespace": namespace,
+            "params": params,
+            "universe": [self.version, self.loaded_at],
+        })
+
+
+# =============================================================================
+# SCREENS
+# =============================================================================
+
+
+@dataclass
+class ScreenResult:
+    """A page of pre-built records plus pagination info."""
+
+    records: List[dict]
+    total: int
+    next_cursor: Optional[str] = None
+
+
+def _paginate(table: ColumnTable, mask: np.ndarray, sort: str, sort_map: dict, default_sort: str, params: dict) -> ScreenResult:
+    sort_desc = sort.startswith("-")
+    sort_name = sort_map.get(sort[1:] if sort_desc else sort, default_sort)
+
+    total = int(mask.sum())
+    cursor = params.get("cursor")
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        mask = mask & table.after_cursor(sort_name, sort_desc, value, str(last_id))
+
+    ordered = table.order(mask, sort_name, sort_desc)
+    start = 0 if cursor else params.get("offset", 0)
+    limit = params.get("limit", 50)
+    page = ordered[start:start + limit]
+
+    next_cursor = None
+    if len(ordered) > start + limit:
+        last = page[-1]
+        next_cursor = encode_cursor(sort, table.columns[sort_name].raw[last], table.ids[last])
+
+    return ScreenResult(
+        records=[table.records[i] for i in page],
+        total=total,
+        next_cursor=next_cursor,
+    )
+
+
+COMPANY_SORTS = {
+    "ticker": "ticker",
+    "name": "name",
+    "sector": "sector",
+    "total_debt": "total_debt",
+    "leverage_ratio": "leverage_ratio",
+    "net_leverage_ratio": "net_leverage_ratio",
+    "interest_coverage": "interest_coverage",
+    "entity_count": "entity_count",
+    "nearest_maturity": "nearest_maturity",
+    "subordination_score": "subordination_score",
+}
+
+COMPANY_FLAG_FILTERS = (
+    "has_structural_sub", "has_floating_rate", "has_near_term_maturity",
+    "has_holdco_debt", "has_opco_debt",
+)
+
+
+def screen_companies(snapshot: UniverseSnapshot, params: dict) -> ScreenResult:
+    """
+    Evaluate a search.companies screen against the snapshot.
+
+    `params` are the endpoint's canonical cache params (see
+    canonical_cache_params); semantics match the SQL filters, including
+    NULL handling.
+    """
+    t = snapshot.companies
+    mask = t.all()
+
+    if params.get("ticker"):
+        mask &= t.isin("ticker", params["ticker"])
+    if params.get("sector"):
+        mask &= t.contains_ci("sector", params["sector"])
+    if params.get("industry"):
+        mask &= t.contains_ci("industry", params["industry"])
+    if params.get("rating_bucket"):
+        mask &= t.eq("rating_bucket", params["rating_bucket"])
+
+    for param, column, compare in (
+        ("min_leverage", "leverage_ratio", t.gte),
+        ("max_leverage", "leverage_ratio", t.lte),
+        ("min_net_leverage", "net_leverage_ratio", t.gte),
+        ("max_net_leverage", "net_leverage_ratio", t.lte),
+        ("min_debt", "total_debt", t.gte),
+        ("max_debt", "total_debt", t.lte),
+    ):
+        if params.get(param) is not None:
+            mask &= compare(column, params[param])
+
+    for flag in COMPANY_FLAG_FILTERS:
+        if params.get(flag) is not None:
+            mask &= t.eq(flag, params[flag])
+
+    return _paginate(t, mask, params.get("sort", "ticker"), COMPANY_SORTS, "ticker", params)
+
+
+BOND_SORTS = {
+    "maturity_date": "maturity_date",
+    "coupon_rate": "interest_rate",
+    "outstanding": "outstanding",
+    "name": "name",
+    "issuer_type": "issuer_type",
+    "company_ticker": "ticker",
+    "pricing.ytm": "ytm_bps",
+    "pricing.spread": "spread_bps",
+    "pricing.last_price": "last_price",
+}
+
+BOND_EQ_FILTERS = ("seniority", "security_type", "instrument_type", "issuer_type", "rate_type")
+
+
+def screen_bonds(snapshot: UniverseSnapshot, params: dict) -> ScreenResult:
+    """Evaluate a search.bonds screen against the snapshot (same semantics as the SQL path)."""
+    t = snapshot.bonds
+    mask = t.all()
+
+    if params.get("is_active") is not None:
+        mask &= t.eq("is_active", params["is_active"])
+    if params.get("ticker"):
+        mask &= t.isin("ticker", params["ticker"])
+    if params.get("cusip"):
+        mask &= t.isin("cusip", params["cusip"])
+    if params.get("sector"):
+        mask &= t.contains_ci("company_sector", params["sector"])
+    for name in BOND_EQ_FILTERS:
+        if params.get(name):
+            mask &= t.eq(name, params[name])
+    if params.get("currency"):
+        mask &= t.eq("currency", params["currency"].upper())
+
+    # Coupons are stored in bps
+    if params.get("min_coupon") is not None:
+        mask &= t.gte("interest_rate", int(params["min_coupon"] * 100))
+    if params.get("max_coupon") is not None:
+        mask &= t.lte("interest_rate", int(params["max_coupon"] * 100))
+
+    if params.get("maturity_before"):
+        mask &= t.lte("maturity_date", params["maturity_before"])
+    if params.get("maturity_after"):
+        mask &= t.gte("maturity_date", params["maturity_after"])
+    if params.get("min_outstanding") is not None:
+        mask &= t.gte("outstanding", params["min_outstanding"])
+    if params.get("max_outstanding") is not None:
+        mask &= t.lte("outstanding", params["max_outstanding"])
+
+    if params.get("has_cusip") is True:
+        mask &= ~t.is_null("cusip")
+    elif params.get("has_cusip") is False:
+        mask &= t.is_null("cusip")
+
+    # Pricing filters apply under the same condition as the SQL path
+    min_ytm, max_ytm = params.get("min_ytm"), params.get("max_ytm")
+    min_spread, max_spread = params.get("min_spread"), params.get("max_spread")
+    has_pricing = params.get("has_pricing")
+    if any([min_ytm, max_ytm, min_spread, max_spread, has_pricing]):
+        if min_ytm is not None:
+            mask &= t.gte("ytm_bps", int(min_ytm * 100))
+        if max_ytm is not None:
+            mask &= t.lte("ytm_bps", int(max_ytm * 100))
+        if min_spread is not None:
+            mask &= t.gte("spread_bps", min_spread)
+        if max_spread is not None:
+            mask &= t.lte("spread_bps", max_spread)
+        if has_pricing is True:
+            mask &= t.eq("has_trace_price", True)
+        elif has_pricing is False:
+            # last_price IS NULL or no pricing row (estimated prices with a price count as priced)
+            mask &= t.is_null("last_price")
+
+    if params.get("has_guarantors") is True:
+        mask &= t.gte("guarantor_count", 1)
+    elif params.get("has_guarantors") is False:
+        mask &= t.eq("guarantor_count", 0)
+
+    return _paginate(t, mask, params.get("sort", "maturity_date"), BOND_SORTS, "maturity_date", params)
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+
+async def load_snapshot(version: Optional[str]) -> UniverseSnapshot:
+    """
+    Load the full screenable universe from Postgres into a new snapshot.
+
+    Reads the primary, not the replica: the snapshot is tagged with a data
+    version read just before, and a lagging replica's data under the new
+    version would be kept until some unrelated write bumped it again.
+    """
+    async with async_session_maker() as db:
+        company_rows = (await db.execute(
+            select(Company, CompanyMetrics).outerjoin(
+                CompanyMetrics, Company.id == CompanyMetrics.company_id
+            )
+        )).all()
+
+        bond_rows = (await db.execute(
+            select(DebtInstrument, Company, Entity, BondPricing).join(
+                Company, DebtInstrument.company_id == Company.id
+            ).join(
+                Entity, DebtInstrument.issuer_id == Entity.id
+            ).outerjoin(
+                BondPricing, DebtInstrument.id == BondPricing.debt_instrument_id
+            )
+        )).all()
+
+        guarantor_counts = dict((await db.execute(
+            select(Guarantee.debt_instrument_id, func.count(Guarantee.id))
+            .group_by(Guarantee.debt_instrument_id)
+        )).all())
+
+        collateral_by_bond: Dict[Any, List[dict]] = {}
+        for coll in (await db.execute(select(Collateral))).scalars():
+            collateral_by_bond.setdefault(coll.debt_instrument_id, []).append(collateral_summary(coll))
+
+        # Only the columns the summary needs (section content is large)
+        source_docs_by_bond: Dict[Any, List[dict]] = {}
+        doc_rows = await db.execute(
+            select(
+                DebtInstrumentDocument.debt_instrument_id,
+                DebtInstrumentDocument.relationship_type,
+                DebtInstrumentDocument.match_confidence,
+                DebtInstrumentDocument.match_method,
+                DocumentSection.doc_type,
+                DocumentSection.section_type,
+                DocumentSection.section_title,
+                DocumentSection.filing_date,
+                DocumentSection.sec_filing_url,
+            )
+            .join(DocumentSection, DebtInstrumentDocument.document_section_id == DocumentSection.id)
+            .order_by(DebtInstrumentDocument.match_confidence.desc())
+        )
+        for row in doc_rows:
+            source_docs_by_bond.setdefault(row.debt_instrument_id, []).append(source_document_summary(row, row))
+
+    companies = ColumnTable(
+        ids=np.array([str(c.id) for c, _ in company_rows], dtype=str),
+        columns={
+            "ticker": text_column([c.ticker for c, _ in company_rows]),
+            "name": text_column([c.name for c, _ in company_rows]),
+            "sector": text_column([m.sector if m else None for _, m in company_rows]),
+            "industry": text_column([m.industry if m else None for _, m in company_rows]),
+            "rating_bucket": text_column([m.rating_bucket if m else None for _, m in company_rows]),
+            "total_debt": num_column([m.total_debt if m else None for _, m in company_rows]),
+            "leverage_ratio": num_column([m.leverage_ratio if m else None for _, m in company_rows]),
+            "net_leverage_ratio": num_column([m.net_leverage_ratio if m else None for _, m in company_rows]),
+            "interest_coverage": num_column([m.interest_coverage if m else None for _, m in company_rows]),
+            "entity_count": num_column([m.entity_count if m else None for _, m in company_rows]),
+            "subordination_score": num_column([m.subordination_score if m else None for _, m in company_rows]),
+            "nearest_maturity": date_column([m.nearest_maturity if m else None for _, m in company_rows]),
+            **{
+                flag: num_column([getattr(m, flag) if m else None for _, m in company_rows])
+                for flag in COMPANY_FLAG_FILTERS
+            },
+        },
+        records=[company_record(c, m) for c, m in company_rows],
+    )
+
+    bonds = ColumnTable(
+        ids=np.array([str(d.id) for d, _, _, _ in bond_rows], dtype=str),
+        columns={
+            "ticker": text_column([c.ticker for _, c, _, _ in bond_rows]),
+            "cusip": text_column([d.cusip for d, _, _, _ in bond_rows]),
+            "name": text_column([d.name for d, _, _, _ in bond_rows]),
+            "company_sector": text_column([c.sector for _, c, _, _ in bond_rows]),
+            "seniority": text_column([d.seniority for d, _, _, _ in bond_rows]),
+            "security_type": text_column([d.security_type for d, _, _, _ in bond_rows]),
+            "instrument_type": text_column([d.instrument_type for d, _, _, _ in bond_rows]),
+            "issuer_type": text_column([e.entity_type for _, _, e, _ in bond_rows]),
+            "rate_type": text_column([d.rate_type for d, _, _, _ in bond_rows]),
+            "currency": text_column([d.currency for d, _, _, _ in bond_rows]),
+            "interest_rate": num_column([d.interest_rate for d, _, _, _ in bond_rows]),
+            "outstanding": num_column([d.outstanding for d, _, _, _ in bond_rows]),
+            "maturity_date": date_column([d.maturity_date for d, _, _, _ in bond_rows]),
+            "is_active": num_column([d.is_active for d, _, _, _ in bond_rows]),
+            "ytm_bps": num_column([p.ytm_bps if p else None for _, _, _, p in bond_rows]),
+            "spread_bps": num_column([p.spread_to_treasury_bps if p else None for _, _, _, p in bond_rows]),
+            "last_price": num_column([p.last_price if p else None for _, _, _, p in bond_rows]),
+            "has_trace_price": num_column([
+                bool(p and p.last_price is not None and p.price_source == "TRACE")
+                for _, _, _, p in bond_rows
+            ]),
+            "guarantor_count": num_column([guarantor_counts.get(d.id, 0) for d, _, _, _ in bond_rows]),
+        },
+        records=[
+            bond_record(
+                d, c, issuer, pricing,
+                guarantor_count=guarantor_counts.get(d.id, 0),
+                collateral=collateral_by_bond.get(d.id, []),
+                source_documents=source_docs_by_bond.get(d.id, []),
+            )
+            for d, c, issuer, pricing in bond_rows
+        ],
+    )
+
+    return UniverseSnapshot(version=version, loaded_at=time.time(), companies=companies, bonds=bonds)
+
+
+class UniverseStore:
+    """Holds the current snapshot and reloads it in the background when data changes."""
+
+    def __init__(self):
+        self._snapshot: Optional[UniverseSnapshot] = None
+        self._checked_at = 0.0
+        self._reload_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return get_settings().universe_store_enabled
+
+    async def get_snapshot(self) -> Optional[UniverseSnapshot]:
+        """
+        Return the current snapshot, or None if not loaded yet or expired.
+
+        A stale snapshot is still returned while a replacement loads in the
+        background; the swap is a single reference assignment.
+        """
+        if not self.enabled:
+            return None
+
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < RECHECK_SECONDS:
+            return snapshot
+        self._checked_at = now
+
+        if snapshot is None:
+            stale = True
+        else:
+            age = time.time() - snapshot.loaded_at
+            version = await get_data_version()
+            stale = age > MAX_AGE_SECONDS or (version is not None and version != snapshot.version)
+            if age > EXPIRE_SECONDS:
+                logger.warning("universe_store.snapshot_expired", age_seconds=round(age))
+                snapshot = None
+
+        if stale:
+            self.schedule_reload()
+        return snapshot
+
+    def schedule_reload(self) -> None:
+        """Start a background reload unless one is already running."""
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.get_running_loop().create_task(self.reload())
+
+    async def reload(self) -> Optional[UniverseSnapshot]:
+        """Load a fresh snapshot and swap it in."""
+        start = time.perf_counter()
+        try:
+            version = await get_data_version()
+            snapshot = await load_snapshot(version)
+        except Exception as e:
+            logger.error("universe_store.reload.error", error=str(e))
+            return None
+
+        self._snapshot = snapshot
+        logger.info(
+            "universe_store.reload.complete",
+            companies=snapshot.companies.size,
+            bonds=snapshot.bonds.size,
+            version=version,
+            duration_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        return snapshot
+
+
+universe_store = UniverseStore()
@@ -13,9 +13,10 @@ from pydantic import BaseModel
 from sqlalchemy import select, func, and_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import require_auth, check_tier_access
+from app.core.auth import Principal, require_auth, check_tier_access
+from app.core.credit_ledger import unflushed_credit_usage
 from app.core.database import get_db
-from app.models import User, UsageLog, UserCredits
+from app.models import UsageLog, UserCredits
 
 router = APIRouter(tags=["usage-analytics"])
 
@@ -87,7 +88,7 @@ class UsageTrendResponse(BaseModel):
 @router.get("/usage/analytics", response_model=UsageAnalyticsResponse)
 async def get_usage_analytics(
     days: int = Query(30, description="Number of days to analyze", ge=1, le=365),
-    user: User = Depends(require_auth),
+    user: Principal = Depends(require_auth),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -114,6 +115,8 @@ async def get_usage_analytics(
         select(UserCredits).where(UserCredits.user_id == user.id)
     )
     credits = credits_result.scalar_one_or_none()
+    # Deductions still in the Redis ledger haven't reached user_credits
+    unflushed = await unflushed_credit_usage(user.id) if credits else 0
 
     # Total usage for period
     total_result = await db.execute(
@@ -203,9 +206,9 @@ async def get_usage_analytics(
         avg_queries_per_day=round(avg_queries_per_day, 1),
         peak_day=peak_day,
         peak_day_queries=peak_day_queries,
-        credits_remaining=float(credits.credits_remaining) if credits else 0.0,
+        credits_remaining=float(credits.credits_remaining - unflushed) if credits else 0.0,
         credits_purchased_total=float(credits.credits_purchased) if credits else 0.0,
-        credits_used_total=float(credits.credits_used) if credits else 0.0,
+        credits_used_total=float(credits.credits_used + unflushed) if credits else 0.0,
         daily_usage=daily_usage,
         endpoint_breakdown=endpoint_breakdown,
         team_usage=None,  # TODO: Implement team usage for Business tier with team members
@@ -215,7 +218,7 @@ async def get_usage_analytics(
 @router.get("/usage/trends", response_model=UsageTrendResponse)
 async def get_usage_trends(
     period: str = Query("30d", description="Period to analyze: '7d', '30d', or '90d'"),
-    user: User = Depends(require_auth),
+    user: Principal = Depends(require_auth),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -18,12 +18,18 @@ from uuid import UUID
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import APIKeyHeader
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
+from app.core.credit_ledger import (
+    deduct_credits,
+    schedule_credit_balance_invalidation,
+    unflushed_credit_usage,
+)
 from app.core.database import get_db
 from app.core.posthog import capture_event as posthog_capture
+from app.core.principal import Principal, get_principal
 from app.models import User, UserCredits
 
 settings = get_settings()
@@ -87,10 +93,12 @@ TIER_CONFIG = {
             '/v1/covenants': Decimal('0.05'),
             # Complex: $0.10
             '/v1/companies/{ticker}/changes': Decimal('0.10'),
+            '/v1/changes': Decimal('0.10'),
             # Advanced: $0.15
             '/v1/entities/traverse': Decimal('0.15'),
             '/v1/documents/search': Decimal('0.15'),
             '/v1/batch': Decimal('0.15'),  # Base cost, actual depends on operations
+            '/v1/bonds/resolve/bulk': Decimal('0.15'),
         }
     },
     'pro': {
@@ -204,7 +212,7 @@ def get_endpoint_cost(endpoint: str, tier: str) -> Decimal:
     return config['endpoint_costs'].get(endpoint_pattern, Decimal('0.05'))
 
 
-def check_tier_access(user: User, endpoint: str) -> Tuple[bool, Optional[str]]:
+def check_tier_access(user: Principal, endpoint: str) -> Tuple[bool, Optional[str]]:
     """
     Check if user's tier has access to an endpoint.
 
@@ -234,9 +242,44 @@ def check_tier_access(user: User, endpoint: str) -> Tuple[bool, Optional[str]]:
     return True, None
 
 
+async def _deduct_credits_in_db(
+    db: AsyncSession,
+    user_id: UUID,
+    cost: Decimal,
+) -> Tuple[bool, Optional[Decimal]]:
+    """
+    Deduct with one conditional UPDATE and commit. Returns (deducted, balance).
+
+    Deductions still pending in the Redis ledger count against the balance,
+    and the ledger balance is dropped afterwards so it reseeds from
+    user_credits instead of overstating what is left.
+    """
+    unflushed = await unflushed_credit_usage(user_id)
+    result = await db.execute(
+        update(UserCredits)
+        .where(UserCredits.user_id == user_id, UserCredits.credits_remaining >= cost + unflushed)
+        .values(
+            credits_remaining=UserCredits.credits_remaining - cost,
+            credits_used=UserCredits.credits_used + cost,
+            last_credit_usage=datetime.utcnow(),
+        )
+        .returning(UserCredits.credits_remaining)
+    )
+    credits_remaining = result.scalar_one_or_none()
+    if credits_remaining is None:
+        balance = (await db.execute(
+            select(UserCredits.credits_remaining).where(UserCredits.user_id == user_id)
+        )).scalar_one_or_none()
+        return False, balance - unflushed if balance is not None else None
+
+    await db.commit()
+    schedule_credit_balance_invalidation([user_id])
+    return True, credits_remaining - unflushed
+
+
 async def check_and_deduct_credits(
     db: AsyncSession,
-    user: User,
+    user: Principal,
     endpoint: str,
     cost: Decimal
 ) -> Tuple[bool, Optional[str]]:
@@ -244,6 +287,10 @@ async def check_and_deduct_credits(
     Check if user has sufficient credits and deduct if so.
 
     Only applies to Pay-as-You-Go tier. Pro/Business have unlimited.
+    Deducts from the Redis credit ledger (see app/core/credit_ledger.py),
+    which is flushed to user_credits in the background; falls back to a
+    conditional UPDATE when Redis is unavailable. The cached principal's
+    credit snapshot is never trusted for billing.
 
     Returns:
         Tuple[bool, Optional[str]]: (success, error_message)
@@ -254,19 +301,17 @@ async def check_and_deduct_credits(
     if normalized in ('pro', 'business'):
         return True, None
 
-    # Pay-as-You-Go: check credits
-    if not user.credits:
-        return False, "No credit balance. Purchase credits at https://debtstack.ai/pricing"
-
-    if user.credits.credits_remaining < cost:
-        return False, f"Insufficient credits. Balance: ${user.credits.credits_remaining:.2f}, Required: ${cost:.2f}. Purchase credits at https://debtstack.ai/pricing"
-
-    # Deduct credits
-    user.credits.credits_remaining -= cost
-    user.credits.credits_used += cost
-    user.credits.last_credit_usage = datetime.utcnow()
+    # Pay-as-You-Go: deduct if the balance covers the cost
+    ledger_result = await deduct_credits(db, user.id, cost)
+    if ledger_result is not None:
+        deducted, credits_remaining = ledger_result
+    else:
+        deducted, credits_remaining = await _deduct_credits_in_db(db, user.id, cost)
 
-    await db.commit()
+    if not deducted:
+        if credits_remaining is None:
+            return False, "No credit balance. Purchase credits at https://debtstack.ai/pricing"
+        return False, f"Insufficient credits. Balance: ${credits_remaining:.2f}, Required: ${cost:.2f}. Purchase credits at https://debtstack.ai/pricing"
 
     # Track credit deduction in PostHog
     posthog_capture(
@@ -275,7 +320,7 @@ async def check_and_deduct_credits(
         properties={
             "endpoint": endpoint,
             "cost_usd": float(cost),
-            "credits_remaining": float(user.credits.credits_remaining),
+            "credits_remaining": float(credits_remaining),
             "tier": user.tier,
         },
     )
@@ -336,8 +381,13 @@ async def require_auth(
     request: Request,
     api_key: Optional[str] = Depends(api_key_header),
     db: AsyncSession = Depends(get_db),
-) -> User:
-    """Require authentication. Raises 401 if not authenticated."""
+) -> Principal:
+    """
+    Require authentication. Raises 401 if not authenticated.
+
+    Returns the cached Principal (see app/core/principal.py); the database is
+    only queried on a cache miss. Use require_user for the full User row.
+    """
     if settings.auth_bypass:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -356,8 +406,23 @@ async def require_auth(
             detail=f"Invalid API key format. Keys start with '{settings.api_key_prefix}'",
         )
 
-    user = await get_user_by_api_key(api_key, db)
-    if not user:
+    principal = await get_principal(hash_api_key(api_key), db)
+    if not principal:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+        )
+
+    return principal
+
+
+async def require_user(
+    principal: Principal = Depends(require_auth),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """Require authentication and load the User row (account and billing endpoints)."""
+    user = await db.get(User, principal.id)
+    if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
@@ -1,14 +1,33 @@
 """Redis cache client for DebtStack API."""
 
-from typing import Optional, Tuple
+import asyncio
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
 import redis.asyncio as redis
+import structlog
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+
 from app.core.config import get_settings
+from app.core.metrics import registry as metrics_registry
+
+logger = structlog.get_logger()
 
 
 # Rate limiting defaults
 DEFAULT_RATE_LIMIT = 100  # requests per window
 DEFAULT_RATE_WINDOW = 60  # seconds
 
+# Response cache defaults
+RESPONSE_CACHE_TTL = 600  # seconds; upper bound on staleness if a version bump is lost
+REPLICA_RESPONSE_CACHE_TTL = 30  # seconds; for bodies read from a replica that may lag a bump
+GLOBAL_DATA_VERSION_KEY = "dataver:global"
+
 
 _redis_client: Optional[redis.Redis] = None
 
@@ -88,6 +107,85 @@ async def cache_ping() -> tuple[bool, str]:
     return False, "no client"
 
 
+# GCRA (generic cell rate algorithm): one key per identifier holding the
+# "theoretical arrival time" (TAT) in milliseconds. Each request advances it
+# by window/limit; a request is allowed while TAT stays within one window of
+# now. Equivalent to a token bucket of `limit` tokens refilled evenly over
+# the window, in one atomic read-modify-write with the expiry set alongside.
+#
+# ARGV: emission interval (ms), window (ms). Uses Redis TIME so every worker
+# shares one clock. Returns {allowed, remaining, ms until reset or retry}.
+_GCRA_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + tonumber(now_parts[2]) / 1000
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+if new_tat - now > window + interval / 2 then
+    return {0, 0, math.ceil(new_tat - window - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((window - (new_tat - now)) / interval + 0.5), math.ceil(new_tat - now)}
+"""
+
+RATE_LIMIT_REDIS_BACKOFF = 5.0  # seconds to use the local limiter after a Redis error
+LOCAL_RATE_LIMIT_MAX_KEYS = 50_000
+
+_gcra_script: Optional[Tuple[Any, Any]] = None  # (client, registered script)
+_rate_limit_redis_retry_at = 0.0
+
+
+def gcra(
+    tat: Optional[float],
+    now: float,
+    limit: int,
+    window: float,
+) -> Tuple[bool, Optional[float], int, float]:
+    """
+    One GCRA step (the same algorithm as _GCRA_LUA).
+
+    Returns (allowed, new TAT or None if denied, remaining, seconds until the
+    limit is fully restored, or until the next request is allowed if denied).
+    """
+    interval = window / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval
+    # Half an interval of slack absorbs float error in the accumulated TAT
+    if new_tat - now > window + interval / 2:
+        return False, None, 0, new_tat - window - now
+    return True, new_tat, round((window - (new_tat - now)) / interval), new_tat - now
+
+
+class LocalRateLimiter:
+    """
+    In-process GCRA limiter used while Redis is unreachable.
+
+    Limits are per worker, so the effective limit during an outage is the
+    configured limit times the number of workers — loose, but not disabled.
+    """
+
+    def __init__(self, max_keys: int = LOCAL_RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: OrderedDict[str, float] = OrderedDict()
+
+    def check(self, identifier: str, limit: int, window: int) -> Tuple[bool, int, int]:
+        now = time.monotonic()
+        allowed, new_tat, remaining, wait = gcra(self._tats.get(identifier), now, limit, window)
+        if allowed:
+            self._tats[identifier] = new_tat
+            self._tats.move_to_end(identifier)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+        return allowed, remaining, max(1, math.ceil(wait))
+
+
+local_rate_limiter = LocalRateLimiter()
+
+
 async def check_rate_limit(
     identifier: str,
     limit: int = DEFAULT_RATE_LIMIT,
@@ -96,7 +194,9 @@ async def check_rate_limit(
     """
     Check and update rate limit for an identifier.
 
-    Uses sliding window counter algorithm with Redis.
+    Uses GCRA in a single Lua script (one round trip, expiry set atomically
+    with the state). Falls back to an in-process limiter when Redis is not
+    configured or unreachable, rather than failing open.
 
     Args:
         identifier: Unique identifier (IP address, API key, etc.)
@@ -106,40 +206,28 @@ async def check_rate_limit(
     Returns:
         Tuple of (allowed, remaining, reset_seconds)
         - allowed: True if request should be allowed
-        - remaining: Number of requests remaining in window
-        - reset_seconds: Seconds until window resets
+        - remaining: Requests that could be made right now
+        - reset_seconds: Seconds until the full limit is available again,
+          or until the next request is allowed if this one was denied
     """
-    client = await get_redis()
+    global _gcra_script, _rate_limit_redis_retry_at
 
-    # If Redis unavailable, allow all requests (fail open)
-    if not client:
-        return True, limit, window
-
-    key = f"ratelimit:{identifier}"
+    client = await get_redis()
+    if not client or time.monotonic() < _rate_limit_redis_retry_at:
+        return local_rate_limiter.check(identifier, limit, window)
 
     try:
-        # Use Redis pipeline for atomic operations
-        pipe = client.pipeline()
-        pipe.incr(key)
-        pipe.ttl(key)
-        results = await pipe.execute()
-
-        current_count = results[0]
-        ttl = results[1]
-
-        # Set expiry on first request in window
-        if ttl == -1:
-            await client.expire(key, window)
-            ttl = window
-
-        remaining = max(0, limit - current_count)
-        allowed = current_count <= limit
-
-        return allowed, remaining, ttl if ttl > 0 else window
-
-    except Exception:
-        # Fail open on Redis errors
-        return True, limit, window
+        if _gcra_script is None or _gcra_script[0] is not client:
+            _gcra_script = (client, client.register_script(_GCRA_LUA))
+        allowed, remaining, wait_ms = await _gcra_script[1](
+            keys=[f"ratelimit:{identifier}"],
+            args=[window * 1000 / limit, window * 1000],
+        )
+        return bool(allowed), int(remaining), max(1, math.ceil(int(wait_ms) / 1000))
+    except Exception as exc:
+        _rate_limit_redis_retry_at = time.monotonic() + RATE_LIMIT_REDIS_BACKOFF
+        logger.warning("rate_limit.redis_unavailable", error=str(exc))
+        return local_rate_limiter.check(identifier, limit, window)
 
 
 async def check_rate_limit_user(
@@ -166,3 +254,260 @@ async def check_rate_limit_user(
         limit=limit,
         window=window,
     )
+
+
+# =============================================================================
+# DATA VERSIONS & RESPONSE CACHE
+# =============================================================================
+#
+# Every write path that changes what the primitives return (cache refresh,
+# pricing, metrics) bumps a per-company counter plus the global counter.
+# Response cache keys embed the counters they depend on, so a bump makes the
+# old entries unreachable instead of requiring a scan-and-delete.
+#
+# Bumps registered on a session run as tasks after its commit and are dropped
+# on rollback. Nothing awaits those tasks inline, so processes that exit right
+# after a write (CLI scripts, API shutdown) must drain them first with
+# drain_version_bumps().
+
+_PENDING_BUMPS_KEY = "pending_data_version_bumps"
+_background_tasks: set = set()
+
+
+def _company_version_key(ticker: str) -> str:
+    return f"dataver:company:{ticker.upper()}"
+
+
+async def bump_data_version(ticker: Optional[str] = None) -> bool:
+    """Bump the global data version and, if given, the company's version."""
+    client = await get_redis()
+    if client:
+        try:
+            pipe = client.pipeline()
+            if ticker:
+                pipe.incr(_company_version_key(ticker))
+            pipe.incr(GLOBAL_DATA_VERSION_KEY)
+            await pipe.execute()
+            return True
+        except Exception:
+            return False
+    return False
+
+
+async def get_data_version(tickers: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Get the data version string for a set of tickers.
+
+    With tickers, the version only depends on those companies, so an update to
+    one company does not invalidate screens scoped to others. Without tickers
+    the global version is used. Returns None if Redis is unavailable.
+    """
+    client = await get_redis()
+    if not client:
+        return None
+
+    try:
+        if tickers:
+            ordered = sorted({t.upper() for t in tickers})
+            values = await client.mget([_company_version_key(t) for t in ordered])
+            return ",".join(f"{t}={v or 0}" for t, v in zip(ordered, values))
+        value = await client.get(GLOBAL_DATA_VERSION_KEY)
+        return f"g={value or 0}"
+    except Exception:
+        return None
+
+
+def build_response_cache_key(namespace: str, params: dict, version: str) -> str:
+    """Build a response cache key from canonical params and a data version."""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha1(f"{version}|{canonical}".encode()).hexdigest()
+    return f"resp:{namespace}:{digest}"
+
+
+async def response_cache_get(namespace: str, params: dict, version: str) -> Optional[Any]:
+    """Get a cached response body for the given data version."""
+    cached = await cache_get(build_response_cache_key(namespace, params, version))
+    metrics_registry.record_cache_lookup(f"response:{namespace}", cached is not None)
+    if cached is None:
+        return None
+    try:
+        return json.loads(cached)
+    except ValueError:
+        return None
+
+
+async def response_cache_set(
+    namespace: str,
+    params: dict,
+    version: str,
+    value: Any,
+    ttl_seconds: int = RESPONSE_CACHE_TTL,
+) -> bool:
+    """
+    Cache a response body under a data version.
+
+    Pass the version read *before* running the queries: if a write bumps the
+    version mid-request, the result lands under the old key and is never served.
+    """
+    return await cache_set(
+        build_response_cache_key(namespace, params, version),
+        json.dumps(value, default=str),
+        ttl_seconds=ttl_seconds,
+    )
+
+
+def bump_data_version_on_commit(db: Any, ticker: Optional[str] = None) -> None:
+    """
+    Schedule a data version bump for when the session's transaction commits.
+
+    Used by write paths that only flush (the caller owns the commit), so that
+    readers never cache pre-commit data under the new version.
+    """
+    session = getattr(db, "sync_session", db)
+    session.info.setdefault(_PENDING_BUMPS_KEY, set()).add(ticker.upper() if ticker else None)
+
+
+def _start_bump(coro: Any, kind: str) -> None:
+    """Run a post-commit bump as a tracked task so drain_version_bumps() can await it."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()
+        logger.warning("cache.version_bump_dropped", kind=kind, reason="no running event loop")
+        return
+    task = loop.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def drain_version_bumps(timeout: float = 5.0) -> int:
+    """
+    Wait for post-commit version bumps still in flight.
+
+    Call before the event loop closes (API shutdown, run_async in scripts);
+    asyncio.run() otherwise cancels them before the INCR reaches Redis.
+    Returns the number of bumps that didn't finish within `timeout`.
+    """
+    if not _background_tasks:
+        return 0
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=timeout)
+    if pending:
+        logger.warning("cache.version_bumps_unfinished", count=len(pending))
+    return len(pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending_version_bumps(session: Session) -> None:
+    pending = session.info.pop(_PENDING_BUMPS_KEY, None)
+    for ticker in pending or ():
+        _start_bump(bump_data_version(ticker), "data")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_bumps(session: Session) -> None:
+    # The writes that registered them never became visible
+    session.info.pop(_PENDING_BUMPS_KEY, None)
+    session.info.pop(_PENDING_GRAPH_BUMPS_KEY, None)
+
+
+# =============================================================================
+# ENTITY GRAPH VERSIONS
+# =============================================================================
+#
+# Cached per-company entity graphs (see app/services/entity_graph.py) compare a
+# per-company counter before reuse. The ORM flush listener below bumps it for
+# any company whose entities, ownership links, debt instruments or guarantees
+# were written, so callers don't have to remember to invalidate. Raw-SQL
+# writers call bump_entity_graph_version_on_commit themselves.
+
+_PENDING_GRAPH_BUMPS_KEY = "pending_entity_graph_bumps"
+
+# Bumped alongside any company's graph version; universe-wide indexes over
+# instruments (e.g. the bond resolve index) watch this one
+GLOBAL_GRAPH_VERSION_KEY = "graphver:global"
+
+# Tables whose rows carry company_id directly
+_GRAPH_COMPANY_TABLES = {"entities", "debt_instruments"}
+# Tables whose rows only reference entities: (table, entity id attributes)
+_GRAPH_ENTITY_REF_TABLES = {
+    "ownership_links": ("parent_entity_id", "child_entity_id"),
+    "guarantees": ("guarantor_id",),
+}
+
+
+def _entity_graph_version_key(company_id: Any) -> str:
+    return f"graphver:company:{company_id}"
+
+
+async def bump_entity_graph_versions(company_ids: Iterable[Any]) -> bool:
+    """Bump the entity graph version for each company."""
+    client = await get_redis()
+    ids = {str(c) for c in company_ids if c}
+    if not client or not ids:
+        return False
+    try:
+        pipe = client.pipeline()
+        for company_id in ids:
+            pipe.incr(_entity_graph_version_key(company_id))
+        pipe.incr(GLOBAL_GRAPH_VERSION_KEY)
+        await pipe.execute()
+        return True
+    except Exception:
+        return False
+
+
+async def get_entity_graph_version(company_id: Any = None) -> Optional[str]:
+    """
+    Get a company's entity graph version, or the universe-wide one without a
+    company. Returns None if Redis is unavailable.
+    """
+    client = await get_redis()
+    if not client:
+        return None
+    key = _entity_graph_version_key(company_id) if company_id else GLOBAL_GRAPH_VERSION_KEY
+    try:
+        value = await client.get(key)
+        return str(value or 0)
+    except Exception:
+        return None
+
+
+def bump_entity_graph_version_on_commit(db: Any, company_id: Any) -> None:
+    """Schedule an entity graph version bump for when the session commits."""
+    session = getattr(db, "sync_session", db)
+    session.info.setdefault(_PENDING_GRAPH_BUMPS_KEY, set()).add(company_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_entity_graph_writes(session: Session, flush_context: Any) -> None:
+    company_ids = set()
+    entity_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        # Read loaded values only: deleted or expired rows must not trigger a refresh
+        loaded = vars(obj)
+        if table in _GRAPH_COMPANY_TABLES:
+            company_ids.add(loaded.get("company_id"))
+        elif table in _GRAPH_ENTITY_REF_TABLES:
+            entity_ids.update(loaded.get(attr) for attr in _GRAPH_ENTITY_REF_TABLES[table])
+
+    entity_ids.discard(None)
+    if entity_ids:
+        rows = session.connection().execute(
+            text("SELECT DISTINCT company_id FROM entities WHERE id IN :ids").bindparams(
+                bindparam("ids", expanding=True)
+            ),
+            {"ids": list(entity_ids)},
+        )
+        company_ids.update(row[0] for row in rows)
+
+    company_ids.discard(None)
+    if company_ids:
+        session.info.setdefault(_PENDING_GRAPH_BUMPS_KEY, set()).update(company_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending_graph_bumps(session: Session) -> None:
+    pending = session.info.pop(_PENDING_GRAPH_BUMPS_KEY, None)
+    if pending:
+        _start_bump(bump_entity_graph_versions(pending), "entity_graph")
@@ -0,0 +1,350 @@
+"""
+Redis credit ledger for Pay-as-You-Go billing.
+
+Deducting credits used to be a conditional UPDATE on user_credits and a
+commit inside the request, which serializes parallel requests from one key
+on that row's lock. The ledger keeps each user's balance in Redis instead:
+
+    credits:balance:{user_id}   balance in cents; seeded from user_credits,
+                                expires after LEDGER_BALANCE_TTL
+    credits:pending:{user_id}   cents deducted but not yet claimed by a flush
+    credits:flushing:{user_id}  hash {batch, amount} of the batch being flushed
+    credits:dirty               user ids with pending or flushing amounts
+
+A Lua script checks and decrements the balance atomically. The scheduler's
+flusher (flush_credit_ledger) moves pending amounts into a numbered batch,
+subtracts the batch from user_credits and records it in
+credit_ledger_flushes in one transaction, then clears the batch.
+
+Reconciliation:
+- A flusher that dies mid-batch leaves the flushing hash in place; the next
+  run retries that same batch, and credit_ledger_flushes makes the retry a
+  no-op if the first attempt committed.
+- Balances are reseeded from user_credits minus unflushed amounts when the
+  balance key expires, when user_credits is written through the ORM
+  (purchases, tier changes) or after a database-path deduction, so drift
+  cannot outlive LEDGER_BALANCE_TTL. Invalidations that fail while Redis is
+  erroring are retried by the next flush.
+- Deductions not yet flushed live only in Redis; losing Redis loses at most
+  one flush interval of charges.
+
+If Redis is unavailable, callers fall back to deducting in the database.
+"""
+
+import asyncio
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Iterable, Optional, Tuple
+from uuid import UUID, uuid4
+
+import structlog
+from sqlalchemy import event, exists, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_redis
+from app.core.database import job_session_maker
+from app.models import CreditLedgerFlush, UserCredits
+
+logger = structlog.get_logger()
+
+LEDGER_BALANCE_TTL = 600  # seconds; balances are reseeded from the database at least this often
+CREDIT_FLUSH_INTERVAL = 10  # seconds between scheduler flushes
+SEED_ATTEMPTS = 3
+
+DIRTY_KEY = "credits:dirty"
+
+_PENDING_LEDGER_KEY = "pending_credit_balance_invalidations"
+_background_tasks: set = set()
+
+# User ids whose balance invalidation failed; retried by flush_credit_ledger
+_failed_invalidations: set = set()
+
+
+# Returns {1, balance} on success, {-1, balance} if the balance is too low,
+# {0, 0} if the balance isn't seeded.
+_DEDUCT_LUA = """
+local balance = redis.call('GET', KEYS[1])
+if not balance then
+    return {0, 0}
+end
+balance = tonumber(balance)
+local cost = tonumber(ARGV[1])
+if balance < cost then
+    return {-1, balance}
+end
+balance = redis.call('DECRBY', KEYS[1], cost)
+redis.call('INCRBY', KEYS[2], cost)
+redis.call('SADD', KEYS[3], ARGV[2])
+return {1, balance}
+"""
+
+# ARGV: database balance (cents), flushing batch seen before the database
+# read ('' for none), whether that batch was already applied, TTL.
+# Returns the balance, or nil if a flush moved on since the database read.
+_SEED_LUA = """
+local existing = redis.call('GET', KEYS[1])
+if existing then
+    return tonumber(existing)
+end
+local batch = redis.call('HGET', KEYS[3], 'batch') or ''
+if batch ~= ARGV[2] then
+    return false
+end
+local unflushed = tonumber(redis.call('GET', KEYS[2]) or '0')
+if batch ~= '' and ARGV[3] == '0' then
+    unflushed = unflushed + tonumber(redis.call('HGET', KEYS[3], 'amount'))
+end
+local balance = tonumber(ARGV[1]) - unflushed
+redis.call('SET', KEYS[1], balance, 'EX', tonumber(ARGV[4]))
+return balance
+"""
+
+# Returns {batch, amount} for the in-flight batch (an unfinished one first),
+# or nil if there is nothing to flush.
+_CLAIM_LUA = """
+local batch = redis.call('HGET', KEYS[2], 'batch')
+if batch then
+    return {batch, redis.call('HGET', KEYS[2], 'amount')}
+end
+local amount = tonumber(redis.call('GET', KEYS[1]) or '0')
+if amount <= 0 then
+    return false
+end
+redis.call('DECRBY', KEYS[1], amount)
+redis.call('HSET', KEYS[2], 'batch', ARGV[1], 'amount', amount)
+return {ARGV[1], tostring(amount)}
+"""
+
+# Clears a flushed batch, and the user's dirty flag once nothing is owed.
+_COMPLETE_LUA = """
+if ARGV[1] ~= '' and redis.call('HGET', KEYS[2], 'batch') == ARGV[1] then
+    redis.call('DEL', KEYS[2])
+end
+if redis.call('EXISTS', KEYS[2]) == 0 and tonumber(redis.call('GET', KEYS[1]) or '0') <= 0 then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[3], ARGV[2])
+end
+return 1
+"""
+
+
+def to_cents(amount: Decimal) -> int:
+    return int((amount * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(cents) / 100).quantize(Decimal("0.01"))
+
+
+def _balance_key(user_id: Any) -> str:
+    return f"credits:balance:{user_id}"
+
+
+def _pending_key(user_id: Any) -> str:
+    return f"credits:pending:{user_id}"
+
+
+def _flushing_key(user_id: Any) -> str:
+    return f"credits:flushing:{user_id}"
+
+
+async def _seed_balance(client: Any, db: AsyncSession, user_id: UUID) -> Optional[int]:
+    """
+    Seed the Redis balance from user_credits minus unflushed deductions.
+
+    Returns the balance in cents, or None if the user has no credits row.
+    Raises RuntimeError if concurrent flushes keep invalidating the read.
+    """
+    seed = client.register_script(_SEED_LUA)
+    keys = [_balance_key(user_id), _pending_key(user_id), _flushing_key(user_id)]
+    for _ in range(SEED_ATTEMPTS):
+        batch = await client.hget(_flushing_key(user_id), "batch") or ""
+        query = select(UserCredits.credits_remaining).where(UserCredits.user_id == user_id)
+        if batch:
+            query = query.add_columns(
+                exists().where(CreditLedgerFlush.batch_id == UUID(batch))
+            )
+        row = (await db.execute(query)).first()
+        if row is None:
+            return None
+
+        applied = "1" if batch and row[1] else "0"
+        balance = await seed(
+            keys=keys,
+            args=[to_cents(row[0]), batch, applied, LEDGER_BALANCE_TTL],
+        )
+        if balance is not None:
+            return int(balance)
+    raise RuntimeError("credit balance seed kept racing a flush")
+
+
+async def deduct_credits(
+    db: AsyncSession,
+    user_id: UUID,
+    cost: Decimal,
+) -> Optional[Tuple[bool, Optional[Decimal]]]:
+    """
+    Atomically check and deduct `cost` from the user's Redis balance.
+
+    Returns (deducted, balance after the attempt), with a None balance if the
+    user has no credits row, or None if the ledger is unavailable and the
+    caller should deduct in the database instead.
+    """
+    client = await get_redis()
+    if not client:
+        return None
+
+    cents = to_cents(cost)
+    keys = [_balance_key(user_id), _pending_key(user_id), DIRTY_KEY]
+    try:
+        deduct = client.register_script(_DEDUCT_LUA)
+        status, balance = await deduct(keys=keys, args=[cents, str(user_id)])
+        if status == 0:
+            if await _seed_balance(client, db, user_id) is None:
+                return False, None
+            status, balance = await deduct(keys=keys, args=[cents, str(user_id)])
+    except Exception as exc:
+        logger.warning("credit_ledger.deduct_failed", user_id=str(user_id), error=str(exc))
+        return None
+
+    if status == 0:
+        # Balance expired between seeding and deducting; let the database decide
+        return None
+    return status == 1, from_cents(balance)
+
+
+async def unflushed_credit_usage(user_id: UUID) -> Decimal:
+    """Credits deducted in Redis that user_credits doesn't reflect yet."""
+    client = await get_redis()
+    if not client:
+        return Decimal("0")
+    try:
+        pipe = client.pipeline()
+        pipe.get(_pending_key(user_id))
+        pipe.hget(_flushing_key(user_id), "amount")
+        pending, flushing = await pipe.execute()
+    except Exception as exc:
+        logger.warning("credit_ledger.read_failed", user_id=str(user_id), error=str(exc))
+        return Decimal("0")
+    return from_cents(int(pending or 0) + int(flushing or 0))
+
+
+async def _apply_batch(db: AsyncSession, user_id: UUID, batch_id: UUID, cents: int) -> bool:
+    """Subtract a batch from user_credits unless it was already applied."""
+    amount = from_cents(cents)
+    inserted = await db.execute(
+        pg_insert(CreditLedgerFlush)
+        .values(batch_id=batch_id, user_id=user_id, amount=amount)
+        .on_conflict_do_nothing(index_elements=["batch_id"])
+        .returning(CreditLedgerFlush.batch_id)
+    )
+    if inserted.scalar_one_or_none() is None:
+        return False
+
+    await db.execute(
+        update(UserCredits)
+        .where(UserCredits.user_id == user_id)
+        .values(
+            credits_remaining=UserCredits.credits_remaining - amount,
+            credits_used=UserCredits.credits_used + amount,
+            last_credit_usage=datetime.utcnow(),
+        )
+    )
+    return True
+
+
+async def flush_credit_ledger() -> dict:
+    """
+    Write pending Redis deductions to user_credits, one batch per user.
+
+    Safe to run concurrently from several workers: claims hand out the same
+    in-flight batch, and credit_ledger_flushes applies each batch once.
+    """
+    stats = {"users": 0, "batches_applied": 0, "batches_skipped": 0, "errors": 0}
+    client = await get_redis()
+    if not client:
+        return stats
+
+    if _failed_invalidations:
+        retry = set(_failed_invalidations)
+        _failed_invalidations.difference_update(retry)
+        await invalidate_credit_balances(retry)
+
+    try:
+        user_ids = await client.smembers(DIRTY_KEY)
+    except Exception as exc:
+        logger.warning("credit_ledger.flush_failed", error=str(exc))
+        return stats
+
+    claim = client.register_script(_CLAIM_LUA)
+    complete = client.register_script(_COMPLETE_LUA)
+    async with job_session_maker() as session:
+        for user_id in user_ids:
+            stats["users"] += 1
+            keys = [_pending_key(user_id), _flushing_key(user_id), DIRTY_KEY]
+            try:
+                claimed = await claim(keys=keys, args=[str(uuid4())])
+                batch = ""
+                if claimed:
+                    batch, cents = claimed
+                    applied = await _apply_batch(session, UUID(user_id), UUID(batch), int(cents))
+                    await session.commit()
+                    stats["batches_applied" if applied else "batches_skipped"] += 1
+                await complete(keys=keys, args=[batch, user_id])
+            except Exception as exc:
+                await session.rollback()
+                stats["errors"] += 1
+                logger.error("credit_ledger.flush_user_failed", user_id=user_id, error=str(exc))
+
+    if stats["batches_applied"] or stats["errors"]:
+        logger.info("credit_ledger.flushed", **stats)
+    return stats
+
+
+async def invalidate_credit_balances(user_ids: Iterable[Any]) -> None:
+    """Drop Redis balances so the next deduction reseeds from user_credits."""
+    ids = {str(u) for u in user_ids if u}
+    if not ids:
+        return
+    client = await get_redis()
+    if not client:
+        return
+    try:
+        await client.delete(*(_balance_key(u) for u in ids))
+    except Exception as exc:
+        _failed_invalidations.update(ids)
+        logger.warning("credit_ledger.invalidate_failed", error=str(exc))
+
+
+def schedule_credit_balance_invalidation(user_ids: Iterable[Any]) -> None:
+    """Run invalidate_credit_balances in the background (no-op outside an event loop)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    task = loop.create_task(invalidate_credit_balances(list(user_ids)))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_credit_writes(session: Session, flush_context: Any) -> None:
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if getattr(obj, "__tablename__", None) == "user_credits":
+            # Read loaded values only: touching expired attributes would emit SQL
+            user_ids.add(vars(obj).get("user_id"))
+
+    user_ids.discard(None)
+    if user_ids:
+        session.info.setdefault(_PENDING_LEDGER_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending_credit_invalidations(session: Session) -> None:
+    pending = session.info.pop(_PENDING_LEDGER_KEY, None)
+    if pending:
+        schedule_credit_balance_invalidation(pending)
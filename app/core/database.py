@@ -1,30 +1,139 @@
-"""Database connection and session management."""
+"""
+Database connection and session management.
 
+Three engines, each with its own connection pool:
+
+- primary (engine / async_session_maker / get_db): writes and anything
+  that must read its own writes - auth, credits, billing, coverage requests
+- read (read_engine / read_session_maker / get_read_db): read-only
+  primitives and exports. Uses DATABASE_READ_URL (a replica) when set,
+  else shares the primary engine. Replica lag can serve data older than
+  the current data version, so with a replica response cache entries are
+  only written if the version didn't move during the request and live at
+  most REPLICA_RESPONSE_CACHE_TTL (see primitives_helpers.cache_response).
+  In-memory snapshots and indexes (universe store, bond resolve index,
+  entity graphs) are kept until the version changes again, so they load
+  from the primary instead.
+- jobs (job_engine / job_session_maker): scheduler jobs, on the primary
+  but in a separate small pool so refresh runs can't starve API requests
+  of connections
+
+Set DATABASE_PGBOUNCER=true when connecting through PgBouncer in
+transaction mode: asyncpg's prepared statement cache is disabled and
+statement names are made unique per connection checkout.
+"""
+
+import time
 from typing import AsyncGenerator
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import get_settings
+from .metrics import current_request_stats, registry
 
 settings = get_settings()
 
-# Create async engine
-engine = create_async_engine(
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited (see app/core/metrics.py)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.observe_pool_wait(time.perf_counter() - start, pool=self.logging_name)
+
+
+def _connect_args() -> dict:
+    if not settings.database_pgbouncer:
+        return {}
+    # Transaction-mode PgBouncer hands each transaction a different server
+    # connection, so server-side prepared statements can't be reused
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+def _create_engine(url: str, name: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        connect_args=_connect_args(),
+    )
+    event.listen(new_engine.sync_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _record_query_time)
+    registry.register_gauge(
+        "debtstack_db_pool_checked_out", "Database connections in use",
+        lambda: new_engine.pool.checkedout(), labels={"pool": name},
+    )
+    registry.register_gauge(
+        "debtstack_db_pool_overflow", "Database connections open beyond pool_size",
+        lambda: max(0, new_engine.pool.overflow()), labels={"pool": name},
+    )
+    return new_engine
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record_query(statement, time.perf_counter() - context._query_started_at)
+
+
+# Primary engine (writes, auth, billing)
+engine = _create_engine(
     settings.database_url,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+    "primary",
+    settings.database_pool_size,
+    settings.database_max_overflow,
 )
 
-# Session factory
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
+# Read engine (replica if configured)
+read_engine: AsyncEngine = engine
+READ_REPLICA = bool(settings.database_read_url)
+if READ_REPLICA:
+    read_engine = _create_engine(
+        settings.database_read_url,
+        "read",
+        settings.database_read_pool_size,
+        settings.database_read_max_overflow,
+    )
+
+# Scheduler jobs get their own pool on the primary
+job_engine = _create_engine(
+    settings.database_url,
+    "jobs",
+    settings.database_job_pool_size,
+    settings.database_job_max_overflow,
 )
 
 
+def _session_maker(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(bind, class_=AsyncSession, expire_on_commit=False)
+
+
+# Session factories
+async_session_maker = _session_maker(engine)
+read_session_maker = _session_maker(read_engine)
+job_session_maker = _session_maker(job_engine)
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database sessions."""
     async with async_session_maker() as session:
@@ -32,3 +141,22 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only endpoints (replica when configured)."""
+    async with read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def dispose_engines() -> None:
+    """Close all pooled connections (application shutdown)."""
+    disposed: set[int] = set()
+    for each in (engine, read_engine, job_engine):
+        if id(each) not in disposed:
+            disposed.add(id(each))
+            await each.dispose()
+
@@ -0,0 +1,332 @@
+"""
+In-process latency histograms and Prometheus exposition for DebtStack API.
+
+The hourly Redis aggregates in app/core/monitoring.py answer "how much
+traffic"; this module answers "how slow, where". Per route it keeps:
+
+- request latency histogram (p50/p95/p99 via histogram_quantile, or
+  Histogram.quantile for the JSON view)
+- database time histogram (cursor execution time summed per request)
+- request counts by status
+
+plus a connection pool wait histogram, cache hit/miss counters and gauges
+(pool checkouts, event loop tasks, pending background work) sampled at
+scrape time. Rendered by GET /metrics in Prometheus text format 0.0.4.
+
+Per request it also counts SQL statements by shape (values stripped), for
+the Server-Timing header, the request log line, and sql.n_plus_one
+warnings when one shape repeats sql_n_plus_one_threshold times.
+track_queries does the same for scheduler jobs and scripts.
+
+Histograms use fixed log-linear buckets (four per power of two, 0.5ms to
+~2 minutes), so quantile estimates are within about 10% at any latency and
+every series has the same bucket layout. Metrics are per process.
+"""
+
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import structlog
+
+from app.core.config import get_settings
+
+logger = structlog.get_logger()
+
+# Upper bounds in seconds: 0.5ms * 2^(i/4)
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(0.0005 * 2 ** (i / 4) for i in range(73))
+
+UNMATCHED_ROUTE = "unmatched"  # 404s and mounts; keeps label cardinality bounded
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0-1), interpolating within the bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return LATENCY_BUCKETS[-1]
+
+
+class RequestStats:
+    """
+    Per-request SQL accumulators filled by the engine hooks in database.py.
+
+    Statements are counted by their exact text (cheap per query) and only
+    normalized into shapes when the request is reported.
+    """
+
+    __slots__ = ("db_seconds", "query_count", "statements")
+
+    def __init__(self) -> None:
+        self.db_seconds = 0.0
+        self.query_count = 0
+        self.statements: Counter = Counter()
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        self.db_seconds += seconds
+        self.query_count += 1
+        self.statements[statement] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least `threshold` times, most frequent first."""
+        shapes: Counter = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Server-Timing header value: db (with query count), app and total."""
+        db_ms = self.db_seconds * 1000
+        total_ms = total_seconds * 1000
+        return (
+            f'db;dur={db_ms:.1f};desc="{self.query_count} queries", '
+            f"app;dur={max(0.0, total_ms - db_ms):.1f}, total;dur={total_ms:.1f}"
+        )
+
+
+# Set by the request middleware (or track_queries); hooks add to it when present
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+_BIND_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+|\?")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so executions differing only in values match.
+
+    Bind parameters and literals become ?, and IN lists of any length
+    collapse to one ?.
+    """
+    shape = _LITERAL.sub("?", _BIND_PARAM.sub("?", statement))
+    return " ".join(_VALUE_LIST.sub("?", shape).split())
+
+
+def report_query_stats(stats: RequestStats, event_name: str, **fields) -> None:
+    """Log a unit of work's SQL totals, and warn on likely N+1 patterns."""
+    threshold = get_settings().sql_n_plus_one_threshold
+    for shape, count in stats.repeated_shapes(threshold):
+        logger.warning(
+            "sql.n_plus_one",
+            unit=event_name,
+            repeats=count,
+            statement=shape[:300],
+            **fields,
+        )
+
+
+@contextmanager
+def track_queries(event_name: str, **fields) -> Iterator[RequestStats]:
+    """
+    Count SQL for a unit of work outside a request (scheduler jobs, scripts).
+
+    Logs `event_name` with query count and DB time on exit, plus any
+    sql.n_plus_one warnings.
+    """
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request_stats.reset(token)
+        logger.info(
+            event_name,
+            db_queries=stats.query_count,
+            db_ms=round(stats.db_seconds * 1000, 2),
+            **fields,
+        )
+        report_query_stats(stats, event_name, **fields)
+
+
+def route_label(scope: dict) -> Optional[str]:
+    """
+    The matched route template for a handled request, e.g. /v1/companies/{ticker}.
+
+    Rebuilt from the request path and path params, so it includes router
+    prefixes whatever the FastAPI version. None if no route matched.
+    """
+    if "route" not in scope:
+        return None
+    params = {str(v): k for k, v in scope.get("path_params", {}).items()}
+    return "/".join(
+        f"{{{params[segment]}}}" if segment in params else segment
+        for segment in scope["path"].split("/")
+    )
+
+
+class MetricsRegistry:
+    """All process metrics, rendered together by render_prometheus."""
+
+    def __init__(self) -> None:
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_db_time: Dict[Tuple[str, str], Histogram] = {}
+        self.requests_total: Counter = Counter()  # (method, route, status)
+        self.pool_wait: Dict[str, Histogram] = {}
+        self.cache_lookups: Counter = Counter()  # (cache, result)
+        # {name: (help, {label items: read})}
+        self._gauges: Dict[str, Tuple[str, Dict[Tuple[Tuple[str, str], ...], Callable[[], float]]]] = {}
+
+    def observe_request(
+        self,
+        method: str,
+        route: Optional[str],
+        status_code: int,
+        seconds: float,
+        db_seconds: float,
+    ) -> None:
+        key = (method, route or UNMATCHED_ROUTE)
+        latency = self.request_latency.get(key)
+        if latency is None:
+            latency = self.request_latency[key] = Histogram()
+            self.request_db_time[key] = Histogram()
+        latency.observe(seconds)
+        self.request_db_time[key].observe(db_seconds)
+        self.requests_total[(*key, str(status_code))] += 1
+
+    def observe_pool_wait(self, seconds: float, pool: str = "primary") -> None:
+        histogram = self.pool_wait.get(pool)
+        if histogram is None:
+            histogram = self.pool_wait[pool] = Histogram()
+        histogram.observe(seconds)
+
+    def record_cache_lookup(self, cache: str, hit: bool) -> None:
+        self.cache_lookups[(cache, "hit" if hit else "miss")] += 1
+
+    def register_gauge(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], float],
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Register a gauge sampled at scrape time (e.g. a queue length)."""
+        _, series = self._gauges.setdefault(name, (help_text, {}))
+        series[tuple(sorted((labels or {}).items()))] = read
+
+    def route_latency_summary(self) -> List[dict]:
+        """Per-route percentiles in milliseconds, slowest p99 first."""
+        rows = []
+        for (method, route), latency in self.request_latency.items():
+            db_time = self.request_db_time[(method, route)]
+            rows.append({
+                "method": method,
+                "route": route,
+                "count": latency.count,
+                "p50_ms": _ms(latency.quantile(0.50)),
+                "p95_ms": _ms(latency.quantile(0.95)),
+                "p99_ms": _ms(latency.quantile(0.99)),
+                "db_p95_ms": _ms(db_time.quantile(0.95)),
+                "avg_db_ms": _ms(db_time.sum / db_time.count if db_time.count else None),
+            })
+        return sorted(rows, key=lambda r: r["p99_ms"] or 0, reverse=True)
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+
+        _header(lines, "debtstack_http_request_duration_seconds", "histogram",
+                "Request latency by route")
+        for (method, route), histogram in sorted(self.request_latency.items()):
+            _histogram_lines(lines, "debtstack_http_request_duration_seconds",
+                             {"method": method, "route": route}, histogram)
+
+        _header(lines, "debtstack_http_request_db_seconds", "histogram",
+                "Database cursor time per request by route")
+        for (method, route), histogram in sorted(self.request_db_time.items()):
+            _histogram_lines(lines, "debtstack_http_request_db_seconds",
+                             {"method": method, "route": route}, histogram)
+
+        _header(lines, "debtstack_http_requests_total", "counter",
+                "Requests by route and status code")
+        for (method, route, status), value in sorted(self.requests_total.items()):
+            lines.append(_sample("debtstack_http_requests_total",
+                                 {"method": method, "route": route, "status": status}, value))
+
+        _header(lines, "debtstack_db_pool_wait_seconds", "histogram",
+                "Time spent waiting to check out a database connection")
+        for pool, histogram in sorted(self.pool_wait.items()):
+            _histogram_lines(lines, "debtstack_db_pool_wait_seconds", {"pool": pool}, histogram)
+
+        _header(lines, "debtstack_cache_lookups_total", "counter",
+                "Cache lookups by cache and result")
+        for (cache, result), value in sorted(self.cache_lookups.items()):
+            lines.append(_sample("debtstack_cache_lookups_total",
+                                 {"cache": cache, "result": result}, value))
+
+        for name, (help_text, series) in sorted(self._gauges.items()):
+            _header(lines, name, "gauge", help_text)
+            for labels, read in sorted(series.items()):
+                try:
+                    value = read()
+                except Exception:
+                    continue
+                lines.append(_sample(name, dict(labels), value))
+
+        return "\n".join(lines) + "\n"
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    if isinstance(value, float) and math.isinf(value):
+        formatted = "+Inf" if value > 0 else "-Inf"
+    elif isinstance(value, float) and not value.is_integer():
+        formatted = repr(value)
+    else:
+        formatted = str(int(value))
+    return f"{name}{{{label_text}}} {formatted}" if label_text else f"{name} {formatted}"
+
+
+def _histogram_lines(lines: List[str], name: str, labels: Dict[str, str], histogram: Histogram) -> None:
+    cumulative = 0
+    bounds: Iterable[str] = (*(f"{b:.6g}" for b in LATENCY_BUCKETS), "+Inf")
+    for bound, bucket_count in zip(bounds, histogram.counts):
+        cumulative += bucket_count
+        lines.append(_sample(f"{name}_bucket", {**labels, "le": bound}, cumulative))
+    lines.append(_sample(f"{name}_sum", labels, float(histogram.sum)))
+    lines.append(_sample(f"{name}_count", labels, histogram.count))
+
+
+registry = MetricsRegistry()
@@ -7,104 +7,175 @@ Tracks:
 - Error rates by status code
 - Rate limit hits
 
-All metrics are stored in Redis with TTL for automatic cleanup.
+Requests are aggregated in process and flushed to Redis every few seconds
+(one pipeline per flush, not per request). All metrics are stored in Redis
+with TTL for automatic cleanup.
 """
 
+import asyncio
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, Set
+
+import structlog
 
 from app.core.cache import get_redis
 
+logger = structlog.get_logger()
+
 
 # Redis key prefixes
 METRICS_PREFIX = "metrics:"
 HOURLY_PREFIX = f"{METRICS_PREFIX}hourly:"
 DAILY_PREFIX = f"{METRICS_PREFIX}daily:"
 
+HOURLY_TTL = 48 * 3600  # 48 hours
+DAILY_TTL = 30 * 24 * 3600  # 30 days
+METRICS_FLUSH_INTERVAL = 5  # seconds
 
-async def record_request(
-    path: str,
-    method: str,
-    status_code: int,
-    duration_ms: float,
-    client_ip: str,
-) -> None:
+
+class MetricsAggregator:
     """
-    Record a request for analytics.
+    Accumulates request metrics in memory and flushes merged deltas to Redis.
 
-    Stores hourly and daily aggregates in Redis.
+    Recording is a few dict updates with no I/O; every METRICS_FLUSH_INTERVAL
+    seconds the pending counters go out in a single pipeline. Up to one
+    interval of metrics per worker is lost if the process is killed.
     """
-    client = await get_redis()
-    if not client:
-        return  # Skip if Redis unavailable
 
-    try:
+    def __init__(self, flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        # {redis key: Counter of hash field deltas}
+        self.counters: Dict[str, Counter] = defaultdict(Counter)
+        # {redis key: float hash field deltas}
+        self.float_counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # {redis set key: members}
+        self.sets: Dict[str, Set[str]] = defaultdict(set)
+
+    def record_request(
+        self,
+        path: str,
+        method: str,
+        status_code: int,
+        duration_ms: float,
+        client_ip: str,
+    ) -> None:
         now = datetime.utcnow()
-        hour_key = now.strftime("%Y-%m-%d-%H")
-        day_key = now.strftime("%Y-%m-%d")
+        hourly_key = f"{HOURLY_PREFIX}{now.strftime('%Y-%m-%d-%H')}"
+        daily_key = f"{DAILY_PREFIX}{now.strftime('%Y-%m-%d')}"
 
         # Normalize path (remove specific IDs/tickers)
         normalized_path = _normalize_path(path)
 
-        # Pipeline for atomic updates
-        pipe = client.pipeline()
-
-        # Hourly metrics (TTL: 48 hours)
-        hourly_key = f"{HOURLY_PREFIX}{hour_key}"
-        pipe.hincrby(hourly_key, "total_requests", 1)
-        pipe.hincrby(hourly_key, f"path:{normalized_path}", 1)
-        pipe.hincrby(hourly_key, f"status:{status_code}", 1)
-        pipe.hincrby(hourly_key, f"method:{method}", 1)
-        pipe.expire(hourly_key, 48 * 3600)  # 48 hours TTL
-
+        hourly = self.counters[hourly_key]
+        hourly["total_requests"] += 1
+        hourly[f"path:{normalized_path}"] += 1
+        hourly[f"status:{status_code}"] += 1
+        hourly[f"method:{method}"] += 1
         # Track latency buckets (for percentile estimation)
-        latency_bucket = _get_latency_bucket(duration_ms)
-        pipe.hincrby(hourly_key, f"latency:{latency_bucket}", 1)
+        hourly[f"latency:{_get_latency_bucket(duration_ms)}"] += 1
 
-        # Daily metrics (TTL: 30 days)
-        daily_key = f"{DAILY_PREFIX}{day_key}"
-        pipe.hincrby(daily_key, "total_requests", 1)
-        pipe.hincrby(daily_key, f"path:{normalized_path}", 1)
-        pipe.hincrby(daily_key, f"status:{status_code}", 1)
-        pipe.hincrbyfloat(daily_key, "total_latency_ms", duration_ms)
-        pipe.expire(daily_key, 30 * 24 * 3600)  # 30 days TTL
+        daily = self.counters[daily_key]
+        daily["total_requests"] += 1
+        daily[f"path:{normalized_path}"] += 1
+        daily[f"status:{status_code}"] += 1
+        self.float_counters[daily_key]["total_latency_ms"] += duration_ms
 
         # Track unique IPs (daily)
-        pipe.sadd(f"{daily_key}:ips", client_ip)
-        pipe.expire(f"{daily_key}:ips", 30 * 24 * 3600)
+        self.sets[f"{daily_key}:ips"].add(client_ip)
 
         # Track errors separately for alerting
         if status_code >= 500:
-            pipe.hincrby(hourly_key, "errors_5xx", 1)
-            pipe.hincrby(daily_key, "errors_5xx", 1)
+            hourly["errors_5xx"] += 1
+            daily["errors_5xx"] += 1
         elif status_code >= 400:
-            pipe.hincrby(hourly_key, "errors_4xx", 1)
-            pipe.hincrby(daily_key, "errors_4xx", 1)
+            hourly["errors_4xx"] += 1
+            daily["errors_4xx"] += 1
 
-        await pipe.execute()
+    def record_rate_limit_hit(self, client_ip: str) -> None:
+        now = datetime.utcnow()
+        self.counters[f"{HOURLY_PREFIX}{now.strftime('%Y-%m-%d-%H')}"]["rate_limit_hits"] += 1
+        self.counters[f"{DAILY_PREFIX}{now.strftime('%Y-%m-%d')}"]["rate_limit_hits"] += 1
+
+    async def flush(self) -> int:
+        """Send pending deltas to Redis in one pipeline. Returns commands sent."""
+        counters, float_counters, sets = self.counters, self.float_counters, self.sets
+        self._reset()
+        if not (counters or float_counters or sets):
+            return 0
+
+        client = await get_redis()
+        if not client:
+            return 0  # Skip if Redis unavailable
+
+        pipe = client.pipeline(transaction=False)
+        for key, fields in counters.items():
+            for field, delta in fields.items():
+                pipe.hincrby(key, field, delta)
+        for key, fields in float_counters.items():
+            for field, delta in fields.items():
+                pipe.hincrbyfloat(key, field, delta)
+        for key, members in sets.items():
+            pipe.sadd(key, *members)
+        for key in {*counters, *float_counters, *sets}:
+            pipe.expire(key, HOURLY_TTL if key.startswith(HOURLY_PREFIX) else DAILY_TTL)
+
+        try:
+            commands = len(pipe)
+            await pipe.execute()
+            return commands
+        except Exception as exc:
+            # Don't fail requests (or keep growing) due to monitoring errors
+            logger.warning("metrics.flush_failed", error=str(exc))
+            return 0
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and send whatever is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+metrics_aggregator = MetricsAggregator()
+
+
+def record_request(
+    path: str,
+    method: str,
+    status_code: int,
+    duration_ms: float,
+    client_ip: str,
+) -> None:
+    """
+    Record a request for analytics.
 
-    except Exception:
-        pass  # Don't fail requests due to monitoring errors
+    Buffered in memory; flushed to hourly and daily aggregates in Redis.
+    """
+    metrics_aggregator.record_request(path, method, status_code, duration_ms, client_ip)
 
 
-async def record_rate_limit_hit(client_ip: str) -> None:
+def record_rate_limit_hit(client_ip: str) -> None:
     """Record a rate limit hit for monitoring."""
-    client = await get_redis()
-    if not client:
-        return
-
-    try:
-        now = datetime.utcnow()
-        hour_key = f"{HOURLY_PREFIX}{now.strftime('%Y-%m-%d-%H')}"
-        day_key = f"{DAILY_PREFIX}{now.strftime('%Y-%m-%d')}"
-
-        pipe = client.pipeline()
-        pipe.hincrby(hour_key, "rate_limit_hits", 1)
-        pipe.hincrby(day_key, "rate_limit_hits", 1)
-        await pipe.execute()
-    except Exception:
-        pass
+    metrics_aggregator.record_rate_limit_hit(client_ip)
 
 
 async def get_hourly_metrics(hours_back: int = 24) -> list[Dict[str, Any]]:
@@ -0,0 +1,262 @@
+"""
+Authenticated principal cache for DebtStack API.
+
+Resolving an API key used to cost a users query (plus the lazy credits
+load) on every request, and the rate-limit middleware opened its own
+session on every miss. A Principal is the slice of the user that request
+handling needs (id, tier, rate limit, credit state), cached in two levels
+keyed by api_key_hash:
+
+1. In-process TTL LRU: no I/O, PRINCIPAL_LOCAL_TTL seconds
+2. Redis: shared across workers, PRINCIPAL_REDIS_TTL seconds
+
+A miss at both levels loads users + user_credits in one query. Unknown
+keys are cached too, briefly, so bad keys don't reach the database.
+
+Invalidation: ORM writes to users or user_credits (billing webhooks, tier
+changes, key rotation) invalidate the user's entry when the session
+commits. This worker's LRU is cleared immediately; other workers' LRU
+entries expire within PRINCIPAL_LOCAL_TTL. Raw-SQL writers call
+invalidate_principals_for_users themselves.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+import structlog
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_redis
+from app.core.database import async_session_maker
+from app.core.metrics import registry as metrics_registry
+from app.models import User, UserCredits
+
+logger = structlog.get_logger()
+
+PRINCIPAL_LOCAL_TTL = 15  # seconds; bounds staleness on other workers
+PRINCIPAL_LOCAL_MAX_SIZE = 10_000
+PRINCIPAL_REDIS_TTL = 300  # seconds
+PRINCIPAL_NEGATIVE_TTL = 30  # seconds, for keys that match no active user
+
+_PENDING_PRINCIPAL_KEY = "pending_principal_invalidations"
+_background_tasks: set = set()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated caller.
+
+    Attribute names match User so tier checks work on either. Credit state is
+    a snapshot as of the last cache fill, not a live balance.
+    """
+
+    id: UUID
+    api_key_hash: str
+    tier: str
+    rate_limit_per_minute: int
+    credits_remaining: Optional[Decimal] = None
+    credits_monthly_limit: Optional[int] = None
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["id"] = str(self.id)
+        if self.credits_remaining is not None:
+            data["credits_remaining"] = str(self.credits_remaining)
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        data = json.loads(raw)
+        data["id"] = UUID(data["id"])
+        if data.get("credits_remaining") is not None:
+            data["credits_remaining"] = Decimal(data["credits_remaining"])
+        return cls(**data)
+
+
+class LocalPrincipalCache:
+    """Bounded in-process TTL LRU of principals (None = known-bad key)."""
+
+    _MISS = object()
+
+    def __init__(self, max_size: int = PRINCIPAL_LOCAL_MAX_SIZE, ttl: float = PRINCIPAL_LOCAL_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Optional[Principal]]] = OrderedDict()
+
+    def get(self, api_key_hash: str) -> Any:
+        """Return the cached principal (or None for a bad key), or LocalPrincipalCache._MISS."""
+        entry = self._entries.get(api_key_hash)
+        if entry is None:
+            return self._MISS
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._entries[api_key_hash]
+            return self._MISS
+        self._entries.move_to_end(api_key_hash)
+        return principal
+
+    def set(self, api_key_hash: str, principal: Optional[Principal], ttl: Optional[float] = None) -> None:
+        self._entries[api_key_hash] = (time.monotonic() + (ttl or self.ttl), principal)
+        self._entries.move_to_end(api_key_hash)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, api_key_hash: str) -> None:
+        self._entries.pop(api_key_hash, None)
+
+    def discard_users(self, user_ids: Iterable[Any]) -> None:
+        ids = {str(u) for u in user_ids}
+        for key in [k for k, (_, p) in self._entries.items() if p and str(p.id) in ids]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+local_principals = LocalPrincipalCache()
+
+
+def _principal_key(api_key_hash: str) -> str:
+    return f"principal:{api_key_hash}"
+
+
+def _principal_user_key(user_id: Any) -> str:
+    return f"principal:user:{user_id}"
+
+
+async def _load_principal(db: AsyncSession, api_key_hash: str) -> Optional[Principal]:
+    result = await db.execute(
+        select(
+            User.id, User.tier, User.rate_limit_per_minute,
+            UserCredits.credits_remaining, UserCredits.credits_monthly_limit,
+        )
+        .outerjoin(UserCredits, UserCredits.user_id == User.id)
+        .where(User.api_key_hash == api_key_hash, User.is_active == True)
+    )
+    row = result.first()
+    if not row:
+        return None
+    return Principal(
+        id=row.id,
+        api_key_hash=api_key_hash,
+        tier=row.tier,
+        rate_limit_per_minute=row.rate_limit_per_minute,
+        credits_remaining=row.credits_remaining,
+        credits_monthly_limit=row.credits_monthly_limit,
+    )
+
+
+async def get_principal(api_key_hash: str, db: Optional[AsyncSession] = None) -> Optional[Principal]:
+    """
+    Resolve an API key hash to its Principal, or None if it matches no active user.
+
+    Uses `db` on a full miss if given, else a short-lived session of its own.
+    """
+    cached = local_principals.get(api_key_hash)
+    metrics_registry.record_cache_lookup("principal_local", cached is not LocalPrincipalCache._MISS)
+    if cached is not LocalPrincipalCache._MISS:
+        return cached
+
+    client = await get_redis()
+    if client:
+        try:
+            raw = await client.get(_principal_key(api_key_hash))
+            metrics_registry.record_cache_lookup("principal_redis", raw is not None)
+            if raw is not None:
+                principal = Principal.from_json(raw) if raw else None
+                local_principals.set(api_key_hash, principal, None if principal else PRINCIPAL_NEGATIVE_TTL)
+                return principal
+        except Exception as exc:
+            logger.warning("principal.redis_get_failed", error=str(exc))
+
+    if db is not None:
+        principal = await _load_principal(db, api_key_hash)
+    else:
+        async with async_session_maker() as session:
+            principal = await _load_principal(session, api_key_hash)
+
+    local_principals.set(api_key_hash, principal, None if principal else PRINCIPAL_NEGATIVE_TTL)
+    if client:
+        try:
+            pipe = client.pipeline()
+            if principal:
+                pipe.setex(_principal_key(api_key_hash), PRINCIPAL_REDIS_TTL, principal.to_json())
+                pipe.setex(_principal_user_key(principal.id), PRINCIPAL_REDIS_TTL, api_key_hash)
+            else:
+                pipe.setex(_principal_key(api_key_hash), PRINCIPAL_NEGATIVE_TTL, "")
+            await pipe.execute()
+        except Exception as exc:
+            logger.warning("principal.redis_set_failed", error=str(exc))
+    return principal
+
+
+async def invalidate_principals_for_users(user_ids: Iterable[Any]) -> None:
+    """Drop cached principals for these users from this worker and Redis."""
+    ids = {str(u) for u in user_ids if u}
+    if not ids:
+        return
+    local_principals.discard_users(ids)
+
+    client = await get_redis()
+    if not client:
+        return
+    try:
+        user_keys = [_principal_user_key(u) for u in ids]
+        hashes = [h for h in await client.mget(user_keys) if h]
+        await client.delete(*user_keys, *(_principal_key(h) for h in hashes))
+    except Exception as exc:
+        logger.warning("principal.invalidate_failed", error=str(exc))
+
+
+async def invalidate_principal(api_key_hash: str) -> None:
+    """Drop a cached principal (or cached bad-key marker) by API key hash."""
+    local_principals.discard(api_key_hash)
+    client = await get_redis()
+    if client:
+        try:
+            await client.delete(_principal_key(api_key_hash))
+        except Exception as exc:
+            logger.warning("principal.invalidate_failed", error=str(exc))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_writes(session: Session, flush_context: Any) -> None:
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        # Read loaded values only: touching expired attributes would emit SQL
+        loaded = vars(obj)
+        if table == "users":
+            user_ids.add(loaded.get("id"))
+        elif table == "user_credits":
+            user_ids.add(loaded.get("user_id"))
+
+    user_ids.discard(None)
+    if user_ids:
+        session.info.setdefault(_PENDING_PRINCIPAL_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending_principal_invalidations(session: Session) -> None:
+    pending = session.info.pop(_PENDING_PRINCIPAL_KEY, None)
+    if not pending:
+        return
+    # This worker stops serving the stale entry before the commit returns
+    local_principals.discard_users(pending)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    task = loop.create_task(invalidate_principals_for_users(pending))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
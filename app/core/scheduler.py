@@ -13,6 +13,12 @@ Runs on APScheduler AsyncIOScheduler (US/Eastern timezone):
   - 7:30 AM ET:  Check for new filings, refresh data (catches overnight/early filings)
   - 1:00 PM ET:  Check for new filings, refresh data (catches late morning filings)
 
+  Company Cache:
+  - Every 30 min: Rebuild company_cache sections marked dirty by other writers
+
+  Billing:
+  - Every 10s:   Flush Redis credit ledger deductions to user_credits
+
 Reuses the same service functions as scripts/collect_daily_pricing.py
 and scripts/refresh_filings.py.
 """
@@ -24,7 +30,8 @@ import structlog
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from app.core.database import async_session_maker
+from app.core.database import job_session_maker
+from app.core.metrics import track_queries
 from app.services.bond_pricing import (
     get_bonds_needing_pricing,
     get_bond_price,
@@ -33,8 +40,11 @@ from app.services.bond_pricing import (
 )
 from app.services.yield_calculation import calculate_ytm_and_spread
 from app.services.pricing_history import copy_current_to_history
+from app.services.change_log import record_pricing_changes
 from app.services.treasury_yields import backfill_treasury_yields
 from app.core.alerting import check_and_alert
+from app.core.credit_ledger import CREDIT_FLUSH_INTERVAL, flush_credit_ledger
+from app.services.company_cache import rebuild_company_caches
 
 logger = structlog.get_logger()
 
@@ -58,7 +68,7 @@ async def refresh_current_prices() -> dict:
     }
 
     try:
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             bonds = await get_bonds_needing_pricing(
                 session,
                 stale_only=True,
@@ -152,6 +162,15 @@ async def refresh_current_prices() -> dict:
                         )
                         break
 
+            # Log YTM moves for the change feed
+            if stats["prices_updated"]:
+                try:
+                    stats["change_events"] = await record_pricing_changes(session)
+                    await session.commit()
+                except Exception as exc:
+                    await session.rollback()
+                    logger.error("scheduler.refresh_prices.change_log_error", error=str(exc))
+
     except Exception as exc:
         logger.error("scheduler.refresh_prices.error", error=str(exc))
 
@@ -167,7 +186,7 @@ async def refresh_treasury_yields() -> dict:
     stats = {"saved": 0, "error": None}
 
     try:
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             current_year = date.today().year
             result = await backfill_treasury_yields(
                 session,
@@ -209,7 +228,7 @@ async def check_and_refresh_filings() -> dict:
         # Step 1: Scan for new filings
         monitor = FilingMonitor()
         try:
-            async with async_session_maker() as session:
+            async with job_session_maker() as session:
                 new_filings = await monitor.check_all_companies(session)
                 stats["companies_checked"] = 314  # approximate
         finally:
@@ -240,7 +259,12 @@ async def check_and_refresh_filings() -> dict:
 
         for filing in deduped:
             try:
-                result = await service.refresh_for_filing(filing)
+                with track_queries(
+                    "scheduler.filing_refresh.sql",
+                    ticker=filing.ticker,
+                    form_type=filing.form_type,
+                ):
+                    result = await service.refresh_for_filing(filing)
                 stats["processed"] += 1
                 if result.success:
                     stats["succeeded"] += 1
@@ -291,7 +315,7 @@ async def refresh_and_snapshot() -> None:
 
     logger.info("scheduler.snapshot.start")
     try:
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             snapshot_stats = await copy_current_to_history(session)
             logger.info(
                 "scheduler.snapshot.done",
@@ -349,6 +373,25 @@ def start_scheduler() -> None:
         id="check_alerts_15min",
         replace_existing=True,
     )
+    scheduler.add_job(
+        rebuild_company_caches,
+        "interval",
+        minutes=30,
+        kwargs={"dirty_only": True},
+        id="rebuild_dirty_company_caches",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        flush_credit_ledger,
+        "interval",
+        seconds=CREDIT_FLUSH_INTERVAL,
+        id="flush_credit_ledger",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
     scheduler.start()
     logger.info(
         "scheduler.started",
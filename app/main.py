@@ -4,6 +4,7 @@ DebtStack.ai - The credit API for AI agents
 Main FastAPI application entry point.
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import AsyncGenerator
@@ -11,7 +12,7 @@ from typing import AsyncGenerator
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 import structlog
 
 from app.api.routes import router as api_router
@@ -21,13 +22,22 @@ from app.api.pricing_api import router as pricing_router
 from app.api.historical_pricing import router as historical_pricing_router
 from app.api.export import router as export_router
 from app.api.usage import router as usage_router
+from app.api.universe_store import universe_store
+from app.api.bond_resolver import resolve_index_store
 import sentry_sdk
 from app.core.config import get_settings
-from app.core.cache import check_rate_limit, cache_get, cache_set, DEFAULT_RATE_LIMIT, DEFAULT_RATE_WINDOW
-from app.core.monitoring import record_request, record_rate_limit_hit
+from app.core.cache import check_rate_limit, drain_version_bumps, DEFAULT_RATE_LIMIT, DEFAULT_RATE_WINDOW
+from app.core.monitoring import metrics_aggregator, record_request, record_rate_limit_hit
+from app.core.metrics import (
+    RequestStats, current_request_stats, registry as metrics_registry, report_query_stats, route_label,
+)
+from app.core.database import dispose_engines
+from app.core import cache as cache_module, credit_ledger, principal as principal_module
 from app.core.auth import hash_api_key, TIER_RATE_LIMITS
+from app.core.principal import get_principal
 from app.core.posthog import capture_event as posthog_capture, shutdown as posthog_shutdown
 from app.core.scheduler import start_scheduler, stop_scheduler
+from app.core.credit_ledger import flush_credit_ledger
 
 settings = get_settings()
 
@@ -61,13 +71,42 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     # Startup
     logger.info("Starting DebtStack.ai API", version=settings.api_version)
     start_scheduler()
+    metrics_aggregator.start()
+    if settings.universe_store_enabled:
+        # Warm the screening snapshot in the background; SQL serves until it's ready
+        universe_store.schedule_reload()
+    # Warm the bond resolution index; the first resolve call waits for it otherwise
+    resolve_index_store.schedule_reload()
     yield
     # Shutdown
     stop_scheduler()
+    # Write this worker's view of pending credit deductions before exiting
+    await flush_credit_ledger()
+    # Let post-commit data/graph version bumps reach Redis before the loop closes
+    await drain_version_bumps()
+    await metrics_aggregator.stop()
     posthog_shutdown()
+    await dispose_engines()
     logger.info("Shutting down DebtStack.ai API")
 
 
+# Queue depths, sampled when /metrics is scraped (pool gauges are in database.py)
+metrics_registry.register_gauge(
+    "debtstack_event_loop_tasks", "Tasks on the event loop", lambda: len(asyncio.all_tasks())
+)
+metrics_registry.register_gauge(
+    "debtstack_background_tasks",
+    "Pending cache/principal/credit invalidation tasks",
+    lambda: len(cache_module._background_tasks) + len(principal_module._background_tasks)
+    + len(credit_ledger._background_tasks),
+)
+metrics_registry.register_gauge(
+    "debtstack_metrics_pending_keys",
+    "Redis analytics keys waiting for the next flush",
+    lambda: len(metrics_aggregator.counters) + len(metrics_aggregator.sets),
+)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.api_title,
@@ -100,10 +139,23 @@ async def logging_middleware(request: Request, call_next):
 
     request_id = str(uuid.uuid4())[:8]
     start = time.perf_counter()
+    stats = RequestStats()
+    stats_token = current_request_stats.set(stats)
 
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(stats_token)
 
     duration_ms = (time.perf_counter() - start) * 1000
+    route = route_label(request.scope)
+    metrics_registry.observe_request(
+        request.method,
+        route,
+        response.status_code,
+        duration_ms / 1000,
+        stats.db_seconds,
+    )
 
     logger.info(
         "request",
@@ -112,7 +164,11 @@ async def logging_middleware(request: Request, call_next):
         path=request.url.path,
         status=response.status_code,
         duration_ms=round(duration_ms, 2),
+        db_queries=stats.query_count,
+        db_ms=round(stats.db_seconds * 1000, 2),
     )
+    report_query_stats(stats, "request", request_id=request_id, route=route)
+    response.headers["Server-Timing"] = stats.server_timing(duration_ms / 1000)
 
     # Record metrics for analytics (non-blocking)
     # Get client IP for analytics
@@ -122,15 +178,14 @@ async def logging_middleware(request: Request, call_next):
     else:
         client_ip = request.client.host if request.client else "unknown"
 
-    # Fire and forget - don't await to avoid slowing down response
-    import asyncio
-    asyncio.create_task(record_request(
+    # Buffered in process; flushed to Redis in the background
+    record_request(
         path=request.url.path,
         method=request.method,
         status_code=response.status_code,
         duration_ms=duration_ms,
         client_ip=client_ip,
-    ))
+    )
 
     # Track authenticated /v1/ API requests in PostHog
     path = request.url.path
@@ -159,40 +214,18 @@ async def logging_middleware(request: Request, call_next):
 async def _get_user_rate_limit(api_key_hash: str) -> int:
     """Look up a user's rate limit by API key hash.
 
-    Uses Redis cache (5-minute TTL) to avoid hitting the DB on every request.
-    On cache miss, queries the DB for the user's rate_limit_per_minute.
+    Reads the cached principal (in-process, then Redis, then DB), the same
+    entry require_auth uses, so a request costs at most one user lookup.
     Falls back to pay-as-you-go limit (60) if the user is not found.
     """
-    cache_key = f"user_rate_limit:{api_key_hash}"
-    cached = await cache_get(cache_key)
-    if cached is not None:
-        try:
-            return int(cached)
-        except (ValueError, TypeError):
-            pass
-
-    # Cache miss — look up from DB
-    from sqlalchemy import select, text
-    from app.core.database import async_session_maker
-
     try:
-        async with async_session_maker() as session:
-            result = await session.execute(
-                text("SELECT rate_limit_per_minute FROM users WHERE api_key_hash = :h AND is_active = true"),
-                {"h": api_key_hash},
-            )
-            row = result.first()
-            if row and row[0]:
-                limit = row[0]
-            else:
-                limit = TIER_RATE_LIMITS.get("pay_as_you_go", 60)
-
-        # Cache for 5 minutes
-        await cache_set(cache_key, str(limit), ttl_seconds=300)
-        return limit
+        principal = await get_principal(api_key_hash)
     except Exception:
         # Fail open with pay-as-you-go default
         return TIER_RATE_LIMITS.get("pay_as_you_go", 60)
+    if principal and principal.rate_limit_per_minute:
+        return principal.rate_limit_per_minute
+    return TIER_RATE_LIMITS.get("pay_as_you_go", 60)
 
 
 # Rate limiting middleware (supports both IP-based and user-based limits)
@@ -201,7 +234,7 @@ async def rate_limit_middleware(request: Request, call_next):
     """Apply rate limiting based on user tier (if authenticated) or client IP."""
     # Skip rate limiting for health checks and docs
     path = request.url.path
-    if path in ["/", "/docs", "/redoc", "/openapi.json", "/v1/ping", "/v1/health"]:
+    if path in ["/", "/docs", "/redoc", "/openapi.json", "/v1/ping", "/v1/health", "/metrics"]:
         return await call_next(request)
 
     # Skip auth endpoints to allow signup/login
@@ -239,9 +272,8 @@ async def rate_limit_middleware(request: Request, call_next):
             path=path,
             identifier=rate_limit_identifier[:20],  # Truncate for logging
         )
-        # Record rate limit hit for monitoring (fire and forget)
-        import asyncio
-        asyncio.create_task(record_rate_limit_hit(client_ip))
+        # Record rate limit hit for monitoring
+        record_rate_limit_hit(client_ip)
         return ORJSONResponse(
             status_code=429,
             content={
@@ -306,9 +338,11 @@ async def root():
             "bonds": "/v1/bonds",
             "pricing": "/v1/pricing",
             "resolve": "/v1/bonds/resolve",
+            "resolve_bulk": "/v1/bonds/resolve/bulk",
             "traverse": "/v1/entities/traverse",
             "documents": "/v1/documents/search",
             "batch": "/v1/batch",
+            "changes_feed": "/v1/changes",
         },
         "system": {
             "health": "/v1/health",
@@ -317,6 +351,18 @@ async def root():
     }
 
 
+# Prometheus scrape endpoint (per-route latency, DB time, pool wait, caches)
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Process metrics in Prometheus text format."""
+    if settings.metrics_token and request.headers.get("Authorization") != f"Bearer {settings.metrics_token}":
+        return PlainTextResponse("Unauthorized\n", status_code=401)
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 # MCP server card for Smithery and other MCP directories
 @app.get("/.well-known/mcp/server-card.json", include_in_schema=False)
 async def mcp_server_card():
@@ -7,15 +7,20 @@ from .schema import (
     Collateral,
     Company,
     CompanyCache,
+    CompanyChangeEvent,
+    CompanyChangeState,
     CompanyFinancials,
     CompanyMetrics,
     CompanySnapshot,
+    CompanyTTMFinancials,
     Covenant,
     CoverageRequest,
+    CreditLedgerFlush,
     CrossDefaultLink,
     DebtInstrument,
     DebtInstrumentDocument,
     DocumentSection,
+    DocumentPassage,
     Entity,
     ExtractionMetadata,
     Guarantee,
@@ -35,15 +40,20 @@ __all__ = [
     "Collateral",
     "Company",
     "CompanyCache",
+    "CompanyChangeEvent",
+    "CompanyChangeState",
     "CompanyFinancials",
     "CompanyMetrics",
     "CompanySnapshot",
+    "CompanyTTMFinancials",
     "Covenant",
     "CoverageRequest",
+    "CreditLedgerFlush",
     "CrossDefaultLink",
     "DebtInstrument",
     "DebtInstrumentDocument",
     "DocumentSection",
+    "DocumentPassage",
     "Entity",
     "ExtractionMetadata",
     "Guarantee",
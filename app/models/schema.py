@@ -24,7 +24,7 @@ from sqlalchemy import (
     UniqueConstraint,
     func,
 )
-from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID as PGUUID
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, UUID as PGUUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -299,6 +299,7 @@ class DebtInstrument(Base):
             "is_active",
             postgresql_where=(is_active == True),
         ),
+        Index("idx_debt_updated_at", "updated_at"),
     )
 
 
@@ -349,6 +350,7 @@ class BondPricing(Base):
         Index("idx_bond_pricing_debt", "debt_instrument_id"),
         Index("idx_bond_pricing_cusip", "cusip"),
         Index("idx_bond_pricing_staleness", "staleness_days"),
+        Index("idx_bond_pricing_fetched_at", "fetched_at"),
     )
 
 
@@ -417,6 +419,48 @@ class DocumentSection(Base):
     )
 
 
+class DocumentPassage(Base):
+    """
+    Overlapping passage of a DocumentSection, the unit document search ranks.
+
+    Sections run to 100k characters, so ranking and headlining whole sections
+    is both imprecise and slow. Passages are ~1,500 characters with offsets
+    into the parent section's content; see app/services/passage_index.py.
+    """
+
+    __tablename__ = "document_passages"
+
+    id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True, default=uuid4
+    )
+    document_section_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("document_sections.id", ondelete="CASCADE"), nullable=False
+    )
+    company_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+
+    # Position within the section (content[start_offset:end_offset])
+    passage_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    end_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Full-text search vector (auto-computed via trigger in migration)
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR)
+
+    indexed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index("idx_document_passages_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_document_passages_section", "document_section_id", "passage_index", unique=True),
+        Index("idx_document_passages_company", "company_id"),
+    )
+
+
 class OwnershipLink(Base):
     """Complex ownership relationships between entities (multiple parents, JVs, etc.)."""
 
@@ -631,6 +675,7 @@ class Collateral(Base):
     __table_args__ = (
         Index("ix_collateral_debt_instrument_id", "debt_instrument_id"),
         Index("ix_collateral_collateral_type", "collateral_type"),
+        Index("ix_collateral_updated_at", "updated_at"),
     )
 
 
@@ -744,6 +789,10 @@ class CompanyCache(Base):
     entity_count: Mapped[Optional[int]] = mapped_column(Integer)
     sector: Mapped[Optional[str]] = mapped_column(String(100))
 
+    # Source inputs changed since the last rebuild, e.g. {"guarantees": true};
+    # set by the flush listener in app/services/company_cache.py, NULL when clean
+    dirty_sources: Mapped[Optional[dict]] = mapped_column(JSONB(none_as_null=True))
+
     # Extraction status tracking (for idempotent re-runs)
     # Format: {"step_name": {"status": "success|no_data|error", "attempted_at": "ISO timestamp", "details": "..."}}
     # Steps: core, document_sections, financials, hierarchy, guarantees, collateral
@@ -752,7 +801,10 @@ class CompanyCache(Base):
     # Relationships
     company: Mapped["Company"] = relationship(back_populates="cache")
 
-    __table_args__ = (Index("idx_cache_ticker", "ticker"),)
+    __table_args__ = (
+        Index("idx_cache_ticker", "ticker"),
+        Index("idx_cache_computed_at", "computed_at"),
+    )
 
 
 class CompanyFinancials(Base):
@@ -850,6 +902,64 @@ class CompanyFinancials(Base):
     )
 
 
+class CompanyTTMFinancials(Base):
+    """
+    Trailing-twelve-month rollup of company_financials, one row per company.
+
+    Maintained by the database: statement-level triggers on company_financials
+    call refresh_company_ttm_financials() for the companies each write touched,
+    which recomputes the rollup set-wise with window functions (migration 029).
+
+    Rule: if the latest filing is a 10-K its annual figures are used directly;
+    otherwise flow items are summed over the latest 4 quarters. Balance sheet
+    items always come from the latest quarter.
+    """
+
+    __tablename__ = "company_ttm_financials"
+
+    company_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Latest period in the window
+    fiscal_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    fiscal_quarter: Mapped[int] = mapped_column(Integer, nullable=False)
+    period_end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    ttm_source: Mapped[str] = mapped_column(String(20), nullable=False)  # "10-K" or "<n>_quarters"
+    ttm_quarters: Mapped[Optional[int]] = mapped_column(Integer)  # NULL when ttm_source is "10-K"
+    # company_financials rows in the trailing window, newest first
+    quarter_ids: Mapped[list[UUID]] = mapped_column(ARRAY(PGUUID(as_uuid=True)), nullable=False)
+
+    # Flow items, summed over the window (all in cents)
+    revenue: Mapped[Optional[int]] = mapped_column(BigInteger)
+    ebitda: Mapped[Optional[int]] = mapped_column(BigInteger)
+    operating_income: Mapped[Optional[int]] = mapped_column(BigInteger)
+    net_income: Mapped[Optional[int]] = mapped_column(BigInteger)
+    interest_expense: Mapped[Optional[int]] = mapped_column(BigInteger)
+    depreciation_amortization: Mapped[Optional[int]] = mapped_column(BigInteger)
+    operating_cash_flow: Mapped[Optional[int]] = mapped_column(BigInteger)
+    capex: Mapped[Optional[int]] = mapped_column(BigInteger)
+
+    # Balance sheet items, from the latest period (all in cents)
+    cash_and_equivalents: Mapped[Optional[int]] = mapped_column(BigInteger)
+    total_assets: Mapped[Optional[int]] = mapped_column(BigInteger)
+    total_debt: Mapped[Optional[int]] = mapped_column(BigInteger)
+    total_liabilities: Mapped[Optional[int]] = mapped_column(BigInteger)
+    stockholders_equity: Mapped[Optional[int]] = mapped_column(BigInteger)
+
+    # Metadata
+    source_filing: Mapped[Optional[str]] = mapped_column(String(500))  # Latest filing URL
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index("idx_ttm_financials_computed_at", "computed_at"),
+    )
+
+
 class ObligorGroupFinancials(Base):
     """
     SEC Rule 13-01 Summarized Financial Information for Obligor Group.
@@ -978,6 +1088,75 @@ class CompanySnapshot(Base):
     )
 
 
+class CompanyChangeEvent(Base):
+    """
+    Append-only log of changes to a company's credit data.
+
+    Written by app/services/change_log.py whenever a cache refresh, snapshot
+    or pricing run observes a difference from the last recorded state
+    (CompanyChangeState). Never deleted; /v1/companies/{ticker}/changes reads it
+    by time range and /v1/changes pages it by seq.
+
+    A deferred trigger (migration 036) stamps seq and occurred_at when the
+    writing transaction commits, in commit order, so a poller resuming after
+    a seq never misses an event committed later.
+    """
+
+    __tablename__ = "company_change_events"
+
+    id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True, default=uuid4
+    )
+    company_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    ticker: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # debt_added, debt_removed, entity_added, entity_removed, metric_changed, pricing_moved
+    event_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    # Debt instrument or entity id; metric name for metric_changed
+    subject: Mapped[Optional[str]] = mapped_column(String(100))
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    source: Mapped[str] = mapped_column(String(20), nullable=False)  # refresh, snapshot, pricing
+
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )  # reset to commit time by the stamp trigger
+    seq: Mapped[Optional[int]] = mapped_column(BigInteger)  # NULL until commit
+
+    __table_args__ = (
+        Index("idx_change_events_company_time", "company_id", "occurred_at"),
+        Index("idx_change_events_time", "occurred_at", "id"),
+        Index("idx_change_events_seq", "seq", unique=True),
+    )
+
+
+class CompanyChangeState(Base):
+    """
+    Last observed state per company, the baseline the change log diffs against.
+
+    The first observation of a company only records a baseline; events start
+    with the next observation (tracking_since).
+    """
+
+    __tablename__ = "company_change_state"
+
+    company_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # {"debt": {id: {...}}, "entities": {id: {...}}, "metrics": {...}, "pricing": {id: {...}}}
+    state: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    tracking_since: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    observed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
 class ExtractionMetadata(Base):
     """Extraction quality and provenance tracking per company."""
 
@@ -1204,6 +1383,32 @@ class UsageLog(Base):
     )
 
 
+class CreditLedgerFlush(Base):
+    """
+    One applied batch of Redis credit ledger deductions.
+
+    Inserted in the same transaction that subtracts the batch from
+    user_credits, so a batch retried after a crash is applied at most once.
+    """
+
+    __tablename__ = "credit_ledger_flushes"
+
+    batch_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    flushed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index("ix_credit_ledger_flushes_user", "user_id", "flushed_at"),
+    )
+
+
 # =============================================================================
 # ANALYTICS TABLES
 # =============================================================================
@@ -1310,6 +1515,7 @@ class CompanyMetrics(Base):
         Index("idx_metrics_sector_leverage", "sector", "leverage_ratio"),
         Index("idx_metrics_sector_subordination", "sector", "subordination_risk"),
         Index("idx_metrics_rating_leverage", "rating_bucket", "leverage_ratio"),
+        Index("idx_metrics_updated_at", "updated_at"),
         Index(
             "idx_metrics_risk_flags",
             "subordination_risk",
@@ -1408,6 +1614,7 @@ class Covenant(Base):
         Index("idx_covenants_name", "covenant_name"),
         Index("idx_covenants_metric", "test_metric"),
         Index("idx_covenants_company_type", "company_id", "covenant_type"),
+        Index("idx_covenants_updated_at", "updated_at"),
     )
 
 
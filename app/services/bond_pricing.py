@@ -21,6 +21,7 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import bump_data_version
 from app.models import DebtInstrument, BondPricing, BondPricingHistory, Company
 
 
@@ -554,6 +555,14 @@ async def save_bond_pricing(
 
     await session.commit()
     await session.refresh(record)
+
+    # Invalidate cached primitive responses for the issuer
+    ticker = await session.scalar(
+        select(Company.ticker)
+        .join(DebtInstrument, DebtInstrument.company_id == Company.id)
+        .where(DebtInstrument.id == debt_instrument_id)
+    )
+    await bump_data_version(ticker)
     return record
 
 
@@ -0,0 +1,467 @@
+"""
+Change Log Service for DebtStack.ai
+
+Maintains an append-only log of changes to each company's credit data:
+- Debt instruments added / removed
+- Entities added / removed
+- Significant metric changes (total debt, leverage, subordination risk)
+- Pricing moves (YTM) over threshold
+
+Each observation (cache refresh, snapshot, pricing run) diffs the company's
+current state against the last observed state in company_change_state,
+appends one company_change_events row per difference and stores the new
+baseline. Readers never diff: /v1/companies/{ticker}/changes and the
+universe-wide /v1/changes feed range-scan the log by time. Windows that start
+before a company's tracking_since are answered by diffing the nearest
+CompanySnapshot against the current state instead.
+
+Metric and pricing baselines only advance when an event is recorded, so a
+slow drift still produces an event once it crosses the threshold.
+"""
+
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    BondPricing, Company, CompanyChangeEvent, CompanyChangeState, CompanyMetrics,
+    CompanySnapshot, DebtInstrument, Entity,
+)
+
+
+DEBT_ADDED = "debt_added"
+DEBT_REMOVED = "debt_removed"
+ENTITY_ADDED = "entity_added"
+ENTITY_REMOVED = "entity_removed"
+METRIC_CHANGED = "metric_changed"
+PRICING_MOVED = "pricing_moved"
+
+EVENT_TYPES = {DEBT_ADDED, DEBT_REMOVED, ENTITY_ADDED, ENTITY_REMOVED, METRIC_CHANGED, PRICING_MOVED}
+
+# Thresholds for recording an event
+TOTAL_DEBT_CHANGE_THRESHOLD = 100_000_000_00  # >$1B (cents)
+LEVERAGE_CHANGE_THRESHOLD = 0.5  # >0.5x
+PRICING_MOVE_THRESHOLD_BPS = 50  # >=50bps YTM
+
+STATE_SECTIONS = ("debt", "entities", "metrics", "pricing")
+SNAPSHOT_SECTIONS = ("debt", "entities", "metrics")  # snapshots carry no pricing
+
+
+# =============================================================================
+# STATE
+# =============================================================================
+
+
+def _iso(value: Any) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def debt_state(d: DebtInstrument) -> dict:
+    return {
+        "name": d.name,
+        "cusip": d.cusip,
+        "instrument_type": d.instrument_type,
+        "seniority": d.seniority,
+        "principal": d.principal,
+        "interest_rate": d.interest_rate,  # bps
+        "maturity_date": _iso(d.maturity_date),
+        "issue_date": _iso(d.issue_date),
+    }
+
+
+def entity_state(e: Entity) -> dict:
+    return {
+        "name": e.name,
+        "entity_type": e.entity_type,
+        "is_guarantor": e.is_guarantor,
+        "jurisdiction": e.jurisdiction,
+    }
+
+
+def metrics_state(m: Optional[CompanyMetrics]) -> Optional[dict]:
+    if m is None:
+        return None
+    return {
+        "total_debt": m.total_debt,
+        "leverage_ratio": float(m.leverage_ratio) if m.leverage_ratio else None,
+        "subordination_risk": m.subordination_risk,
+    }
+
+
+def pricing_state(p: BondPricing, d: DebtInstrument) -> dict:
+    return {
+        "name": d.name,
+        "cusip": p.cusip or d.cusip,
+        "ytm_bps": p.ytm_bps,
+        "price": float(p.last_price) if p.last_price else None,
+    }
+
+
+def build_state(
+    entities: Iterable[Entity],
+    debt_instruments: Iterable[DebtInstrument],
+    metrics: Optional[CompanyMetrics],
+    priced: Iterable[tuple[BondPricing, DebtInstrument]],
+) -> dict:
+    """Build the JSON-able state a company is diffed on."""
+    return {
+        "debt": {str(d.id): debt_state(d) for d in debt_instruments},
+        "entities": {str(e.id): entity_state(e) for e in entities},
+        "metrics": metrics_state(metrics),
+        "pricing": {str(d.id): pricing_state(p, d) for p, d in priced if p.ytm_bps is not None},
+    }
+
+
+def snapshot_state(snapshot: CompanySnapshot) -> dict:
+    """Rebuild the SNAPSHOT_SECTIONS of a state from a CompanySnapshot's JSON."""
+    return {
+        "debt": {d["id"]: d for d in snapshot.debt_snapshot or []},
+        "entities": {e["id"]: e for e in snapshot.entities_snapshot or []},
+        "metrics": snapshot.metrics_snapshot or None,
+        "pricing": {},
+    }
+
+
+async def load_company_state(db: AsyncSession, company_id: UUID) -> dict:
+    """Load a company's current entities, active debt, metrics and pricing as a state dict."""
+    entities = (await db.execute(
+        select(Entity).where(Entity.company_id == company_id)
+    )).scalars().all()
+    debt_instruments = (await db.execute(
+        select(DebtInstrument).where(
+            DebtInstrument.company_id == company_id,
+            DebtInstrument.is_active == True,
+        )
+    )).scalars().all()
+    metrics = (await db.execute(
+        select(CompanyMetrics).where(CompanyMetrics.company_id == company_id)
+    )).scalar_one_or_none()
+    priced = (await db.execute(
+        select(BondPricing, DebtInstrument)
+        .join(DebtInstrument, BondPricing.debt_instrument_id == DebtInstrument.id)
+        .where(DebtInstrument.company_id == company_id, DebtInstrument.is_active == True)
+    )).all()
+    return build_state(entities, debt_instruments, metrics, priced)
+
+
+# =============================================================================
+# DIFF
+# =============================================================================
+
+
+def _event(event_type: str, subject: Optional[str], payload: dict) -> dict:
+    return {"event_type": event_type, "subject": subject, "payload": payload}
+
+
+def _diff_debt(previous: dict, current: dict) -> tuple[list[dict], dict]:
+    events = []
+    for debt_id in sorted(current.keys() - previous.keys()):
+        d = current[debt_id]
+        events.append(_event(DEBT_ADDED, debt_id, {
+            "id": debt_id,
+            "name": d["name"],
+            "cusip": d["cusip"],
+            "instrument_type": d["instrument_type"],
+            "seniority": d["seniority"],
+            "principal": d["principal"],
+            "interest_rate": d["interest_rate"] / 100 if d["interest_rate"] else None,
+            "maturity_date": d["maturity_date"],
+            "issue_date": d["issue_date"],
+        }))
+    for debt_id in sorted(previous.keys() - current.keys()):
+        d = previous[debt_id]
+        events.append(_event(DEBT_REMOVED, debt_id, {
+            "id": debt_id,
+            "name": d.get("name"),
+            "cusip": d.get("cusip"),
+            "instrument_type": d.get("instrument_type"),
+            "maturity_date": d.get("maturity_date"),
+        }))
+    return events, current
+
+
+def _diff_entities(previous: dict, current: dict) -> tuple[list[dict], dict]:
+    events = []
+    for entity_id in sorted(current.keys() - previous.keys()):
+        e = current[entity_id]
+        events.append(_event(ENTITY_ADDED, entity_id, {"id": entity_id, **e}))
+    for entity_id in sorted(previous.keys() - current.keys()):
+        e = previous[entity_id]
+        events.append(_event(ENTITY_REMOVED, entity_id, {
+            "id": entity_id,
+            "name": e.get("name"),
+            "entity_type": e.get("entity_type"),
+        }))
+    return events, current
+
+
+def _diff_metrics(previous: Optional[dict], current: Optional[dict]) -> tuple[list[dict], Optional[dict]]:
+    if not current:
+        return [], previous
+    if not previous:
+        return [], current
+
+    events = []
+    baseline = dict(previous)
+
+    # Total debt change
+    previous_debt = previous.get("total_debt") or 0
+    current_debt = current.get("total_debt") or 0
+    debt_change = current_debt - previous_debt
+    if abs(debt_change) > TOTAL_DEBT_CHANGE_THRESHOLD:
+        events.append(_event(METRIC_CHANGED, "total_debt", {
+            "metric": "total_debt",
+            "previous": previous_debt,
+            "current": current_debt,
+            "change": debt_change,
+            "change_pct": round(debt_change / previous_debt * 100, 1) if previous_debt else None,
+        }))
+        baseline["total_debt"] = current.get("total_debt")
+
+    # Leverage ratio change
+    previous_leverage = previous.get("leverage_ratio")
+    current_leverage = current.get("leverage_ratio")
+    if previous_leverage and current_leverage:
+        leverage_change = current_leverage - previous_leverage
+        if abs(leverage_change) > LEVERAGE_CHANGE_THRESHOLD:
+            events.append(_event(METRIC_CHANGED, "leverage_ratio", {
+                "metric": "leverage_ratio",
+                "previous": previous_leverage,
+                "current": current_leverage,
+                "change": round(leverage_change, 2),
+            }))
+            baseline["leverage_ratio"] = current_leverage
+    else:
+        # Leverage appearing or disappearing isn't a move; adopt it as the baseline
+        baseline["leverage_ratio"] = current_leverage
+
+    # Subordination risk change
+    if current.get("subordination_risk") != previous.get("subordination_risk"):
+        events.append(_event(METRIC_CHANGED, "subordination_risk", {
+            "metric": "subordination_risk",
+            "previous": previous.get("subordination_risk"),
+            "current": current.get("subordination_risk"),
+        }))
+        baseline["subordination_risk"] = current.get("subordination_risk")
+
+    return events, baseline
+
+
+def _diff_pricing(previous: dict, current: dict) -> tuple[list[dict], dict]:
+    events = []
+    baseline = {}
+    for debt_id, now in current.items():
+        before = previous.get(debt_id)
+        if not before or before.get("ytm_bps") is None:
+            baseline[debt_id] = now
+            continue
+        move = now["ytm_bps"] - before["ytm_bps"]
+        if abs(move) >= PRICING_MOVE_THRESHOLD_BPS:
+            events.append(_event(PRICING_MOVED, debt_id, {
+                "debt_id": debt_id,
+                "name": now["name"],
+                "cusip": now["cusip"],
+                "previous_ytm": before["ytm_bps"] / 100,
+                "current_ytm": now["ytm_bps"] / 100,
+                "change_bps": move,
+                "current_price": now["price"],
+            }))
+            baseline[debt_id] = now
+        else:
+            # Keep measuring from the last reported yield
+            baseline[debt_id] = {**now, "ytm_bps": before["ytm_bps"]}
+    return events, baseline
+
+
+_DIFFERS = {
+    "debt": _diff_debt,
+    "entities": _diff_entities,
+    "metrics": _diff_metrics,
+    "pricing": _diff_pricing,
+}
+
+
+def diff_states(previous: dict, current: dict, sections: Iterable[str] = STATE_SECTIONS) -> tuple[list[dict], dict]:
+    """
+    Diff two company states section by section.
+
+    Returns (events, baseline): the events to append and the state to store
+    as the next baseline. Sections not listed keep their previous baseline.
+    """
+    events = []
+    baseline = dict(previous)
+    for section in sections:
+        empty = None if section == "metrics" else {}
+        section_events, baseline[section] = _DIFFERS[section](
+            previous.get(section) or empty, current.get(section) or empty
+        )
+        events.extend(section_events)
+    return events, baseline
+
+
+# =============================================================================
+# RECORDING
+# =============================================================================
+
+
+async def _record(
+    db: AsyncSession,
+    state_row: Optional[CompanyChangeState],
+    company_id: UUID,
+    ticker: str,
+    source: str,
+    current: dict,
+    sections: Iterable[str] = STATE_SECTIONS,
+) -> int:
+    if state_row is None:
+        # First observation: baseline only
+        db.add(CompanyChangeState(company_id=company_id, state=current))
+        return 0
+
+    events, baseline = diff_states(state_row.state, current, sections)
+    db.add_all(
+        CompanyChangeEvent(company_id=company_id, ticker=ticker, source=source, **event)
+        for event in events
+    )
+    if baseline != state_row.state:
+        state_row.state = baseline
+    return len(events)
+
+
+async def record_company_changes(db: AsyncSession, company_id: UUID, ticker: str, source: str) -> int:
+    """
+    Append change events for one company and advance its baseline.
+
+    Flushes but doesn't commit, so events land in the caller's transaction
+    together with the writes that caused them. Returns the number of events.
+    """
+    current = await load_company_state(db, company_id)
+    state_row = await db.get(CompanyChangeState, company_id)
+    count = await _record(db, state_row, company_id, ticker.upper(), source, current)
+    await db.flush()
+    return count
+
+
+async def record_pricing_changes(db: AsyncSession, source: str = "pricing") -> int:
+    """
+    Append pricing_moved events across the universe after a pricing run.
+
+    Two queries regardless of universe size; companies not yet tracked are
+    skipped until their next refresh records a baseline. Flushes but doesn't
+    commit. Returns the number of events.
+    """
+    priced = (await db.execute(
+        select(BondPricing, DebtInstrument)
+        .join(DebtInstrument, BondPricing.debt_instrument_id == DebtInstrument.id)
+        .where(DebtInstrument.is_active == True, BondPricing.ytm_bps.isnot(None))
+    )).all()
+    pricing_by_company: dict[UUID, dict] = defaultdict(dict)
+    for pricing, debt in priced:
+        pricing_by_company[debt.company_id][str(debt.id)] = pricing_state(pricing, debt)
+
+    tracked = (await db.execute(
+        select(CompanyChangeState, Company.ticker)
+        .join(Company, CompanyChangeState.company_id == Company.id)
+    )).all()
+
+    count = 0
+    for state_row, ticker in tracked:
+        current = {"pricing": pricing_by_company.get(state_row.company_id, {})}
+        count += await _record(db, state_row, state_row.company_id, ticker, source, current, ("pricing",))
+    await db.flush()
+    return count
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+
+_EVENT_FAMILIES = {
+    DEBT_ADDED: "debt", DEBT_REMOVED: "debt",
+    ENTITY_ADDED: "entity", ENTITY_REMOVED: "entity",
+    METRIC_CHANGED: "metric", PRICING_MOVED: "pricing",
+}
+
+
+def _merge_moves(first: dict, last: dict, previous_key: str, current_key: str) -> Optional[dict]:
+    """Span a run of metric/pricing events: previous from the first, current from the last."""
+    merged = {**last, previous_key: first.get(previous_key)}
+    previous, current = merged[previous_key], merged[current_key]
+    if previous == current:
+        return None
+    if isinstance(previous, (int, float)) and isinstance(current, (int, float)):
+        if "change" in merged:
+            merged["change"] = current - previous if isinstance(current, int) else round(current - previous, 2)
+        if "change_pct" in merged:
+            merged["change_pct"] = round((current - previous) / previous * 100, 1) if previous else None
+        if "change_bps" in merged:
+            merged["change_bps"] = round((current - previous) * 100)
+    return merged
+
+
+def summarize_changes(events: Iterable[Any]) -> dict:
+    """
+    Fold a chronological run of change events into the /changes sections.
+
+    Events for the same subject are netted: something added and removed again
+    inside the window drops out, and repeated metric or pricing moves collapse
+    to one change from the first previous value to the latest current value.
+    """
+    firsts: dict[tuple, Any] = {}
+    lasts: dict[tuple, Any] = {}
+    for event in events:
+        key = (_EVENT_FAMILIES.get(event.event_type), event.subject)
+        firsts.setdefault(key, event)
+        lasts.pop(key, None)
+        lasts[key] = event  # re-insert so sections follow latest-change order
+
+    changes = {
+        "new_debt": [],
+        "removed_debt": [],
+        "entity_changes": {
+            "added": [],
+            "removed": [],
+        },
+        "metric_changes": [],
+        "pricing_changes": [],
+    }
+    for key, last in lasts.items():
+        first = firsts[key]
+        family = key[0]
+        if family in ("debt", "entity"):
+            if first.event_type != last.event_type:
+                continue
+            if last.event_type == DEBT_ADDED:
+                changes["new_debt"].append(last.payload)
+            elif last.event_type == DEBT_REMOVED:
+                changes["removed_debt"].append(last.payload)
+            elif last.event_type == ENTITY_ADDED:
+                changes["entity_changes"]["added"].append(last.payload)
+            else:
+                changes["entity_changes"]["removed"].append(last.payload)
+        elif family == "metric":
+            merged = _merge_moves(first.payload, last.payload, "previous", "current")
+            if merged:
+                changes["metric_changes"].append(merged)
+        elif family == "pricing":
+            merged = _merge_moves(first.payload, last.payload, "previous_ytm", "current_ytm")
+            if merged:
+                changes["pricing_changes"].append(merged)
+    return changes
+
+
+def change_event_record(event: CompanyChangeEvent) -> dict:
+    """Shape one log row for the /v1/changes feed."""
+    return {
+        "id": str(event.id),
+        "ticker": event.ticker,
+        "event_type": event.event_type,
+        "subject": event.subject,
+        "occurred_at": event.occurred_at.isoformat() if event.occurred_at else None,
+        "source": event.source,
+        "data": event.payload,
+    }
@@ -0,0 +1,781 @@
+"""
+Pre-computed company API responses (company_cache) and company_metrics.
+
+refresh_company_cache rebuilds one company inside the caller's transaction.
+Its data is loaded in a fixed number of queries whatever the company's size:
+company, entities, debt instruments, latest financials and all of the
+company's guarantees in one join. Entity trees are built from child and
+per-issuer instrument indexes, so a company with thousands of subsidiaries
+costs a linear pass instead of a scan per node.
+
+Rebuilds are incremental by section. An ORM flush listener records which
+inputs of a company changed (company row, entities and ownership links, debt
+instruments, guarantees, financials) in company_cache.dirty_sources, in the
+writer's transaction. Given `sources`, refresh_company_cache rebuilds only
+the sections that depend on those or the recorded ones (SECTION_SOURCES):
+a guarantee change rebuilds structure and debt but not the company header or
+metrics, and a financials change rebuilds nothing unless it moves the
+total_debt fallback. Raw-SQL writers pass the sources they touched.
+
+rebuild_company_caches rebuilds many companies concurrently, each in its own
+session and transaction, with at most `concurrency` in flight, and returns
+per-company timings and query counts (used after schema changes and by
+scripts/rebuild_company_cache.py).
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+import structlog
+from sqlalchemy import bindparam, event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.cache import bump_data_version_on_commit, bump_entity_graph_version_on_commit
+from app.core.database import job_session_maker
+from app.core.metrics import track_queries
+from app.models import (
+    Company, CompanyCache, CompanyFinancials, CompanyMetrics,
+    DebtInstrument, Entity, Guarantee,
+)
+from app.services.change_log import record_company_changes
+
+logger = structlog.get_logger()
+
+# Companies rebuilt at once by rebuild_company_caches; keep within the jobs pool
+REBUILD_CONCURRENCY = 4
+
+# Inputs each section is built from. "total_debt" stands for a financials
+# change that moved the total_debt fallback, "filing" for a new as-of date.
+# Bond pricing feeds no section, so pricing runs never dirty the cache.
+SECTION_SOURCES: dict[str, frozenset[str]] = {
+    "company": frozenset({"company", "entities", "debt", "total_debt", "filing"}),
+    "structure": frozenset({"company", "entities", "debt", "guarantees", "total_debt", "filing"}),
+    "debt": frozenset({"company", "entities", "debt", "guarantees", "total_debt", "filing"}),
+    "metrics": frozenset({"company", "entities", "debt", "total_debt"}),
+}
+SECTIONS = tuple(SECTION_SOURCES)
+RESPONSE_SECTIONS = ("company", "structure", "debt")
+
+# Tables whose rows carry company_id (companies: id) -> source
+_SOURCE_BY_COMPANY_TABLE = {
+    "companies": "company",
+    "entities": "entities",
+    "debt_instruments": "debt",
+    "company_financials": "financials",
+}
+# Tables whose rows only reference entities -> (source, entity id attributes)
+_SOURCE_BY_ENTITY_REF_TABLE = {
+    "ownership_links": ("entities", ("parent_entity_id", "child_entity_id")),
+    "guarantees": ("guarantees", ("guarantor_id",)),
+}
+
+_PENDING_DIRTY_KEY = "pending_company_cache_sources"
+
+_MARK_DIRTY_SQL = text(
+    "UPDATE company_cache "
+    "SET dirty_sources = COALESCE(dirty_sources, CAST('{}' AS jsonb)) || CAST(:sources AS jsonb) "
+    "WHERE company_id = :company_id"
+)
+
+
+@dataclass
+class CompanyCacheData:
+    """Everything the cached responses are built from, for one company."""
+
+    company: Company
+    entities: list[Entity]
+    debt_instruments: list[DebtInstrument]
+    guarantees_by_debt: dict[UUID, list[UUID]]
+    financials_total_debt: Optional[int] = None
+
+
+async def load_company_cache_data(db: AsyncSession, company_id: UUID) -> CompanyCacheData:
+    """Load a company's cache inputs in five queries."""
+    company = (await db.execute(
+        select(Company).where(Company.id == company_id)
+    )).scalar_one()
+
+    entities = list((await db.execute(
+        select(Entity).where(Entity.company_id == company_id)
+    )).scalars().all())
+
+    debt_instruments = list((await db.execute(
+        select(DebtInstrument).where(DebtInstrument.company_id == company_id)
+    )).scalars().all())
+
+    # Latest financials for the total_debt fallback
+    latest_financials = (await db.execute(
+        select(CompanyFinancials)
+        .where(CompanyFinancials.company_id == company_id)
+        .order_by(CompanyFinancials.fiscal_year.desc(), CompanyFinancials.fiscal_quarter.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+
+    guarantees_by_debt: dict[UUID, list[UUID]] = defaultdict(list)
+    rows = await db.execute(
+        select(Guarantee.debt_instrument_id, Guarantee.guarantor_id)
+        .join(DebtInstrument, Guarantee.debt_instrument_id == DebtInstrument.id)
+        .where(DebtInstrument.company_id == company_id)
+    )
+    for debt_id, guarantor_id in rows:
+        guarantees_by_debt[debt_id].append(guarantor_id)
+
+    return CompanyCacheData(
+        company=company,
+        entities=entities,
+        debt_instruments=debt_instruments,
+        guarantees_by_debt=dict(guarantees_by_debt),
+        financials_total_debt=latest_financials.total_debt if latest_financials else None,
+    )
+
+
+def compute_total_debt(instruments_total_debt: int, financials_total_debt: Optional[int]) -> int:
+    """
+    Instrument sum, or financials total_debt when instruments are missing.
+
+    "Missing" means no instrument amounts, or instruments capturing less than
+    50% of the reported total.
+    """
+    if financials_total_debt and financials_total_debt > 0:
+        if instruments_total_debt == 0:
+            return financials_total_debt
+        if instruments_total_debt < financials_total_debt * 0.5:
+            return financials_total_debt
+    return instruments_total_debt
+
+
+def _instrument_detail(d: DebtInstrument, guarantor_names: list[str]) -> dict:
+    return {
+        "id": str(d.id),
+        "name": d.name,
+        "type": d.instrument_type,
+        "seniority": d.seniority,
+        "security_type": d.security_type,
+        "outstanding": d.outstanding,
+        "principal": d.principal,
+        "currency": d.currency,
+        "rate_type": d.rate_type,
+        "interest_rate": d.interest_rate,
+        "spread_bps": d.spread_bps,
+        "benchmark": d.benchmark,
+        "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
+        "guarantor_count": len(guarantor_names),
+        "guarantors": guarantor_names,
+    }
+
+
+def build_company_responses(
+    data: CompanyCacheData,
+    ticker: str,
+    filing_date: Optional[date] = None,
+    sections: Iterable[str] = RESPONSE_SECTIONS,
+) -> dict:
+    """
+    Build the requested response sections ("company", "structure", "debt").
+
+    Returns total_debt and a response_<section> entry per section, plus etag
+    when both structure and debt are built.
+    """
+    company = data.company
+    entities = data.entities
+    debt_instruments = data.debt_instruments
+    guarantees_by_debt = data.guarantees_by_debt
+
+    entity_by_id = {e.id: e for e in entities}
+
+    # Indexes replace per-node scans of the entity and instrument lists;
+    # both keep list order, so children and instruments come out as before
+    children_by_parent: dict[UUID, list[Entity]] = defaultdict(list)
+    for e in entities:
+        if e.parent_id is not None:
+            children_by_parent[e.parent_id].append(e)
+    debt_by_issuer: dict[UUID, list[DebtInstrument]] = defaultdict(list)
+    for d in debt_instruments:
+        debt_by_issuer[d.issuer_id].append(d)
+
+    guarantor_names_by_debt = {
+        d.id: [entity_by_id[g].name for g in guarantees_by_debt.get(d.id, []) if g in entity_by_id]
+        for d in debt_instruments
+    }
+
+    total_debt = compute_total_debt(
+        sum(d.outstanding or 0 for d in debt_instruments),
+        data.financials_total_debt,
+    )
+    responses: dict = {"total_debt": total_debt}
+
+    # ==========================================================================
+    # Build response_company
+    # ==========================================================================
+    if "company" in sections:
+        responses["response_company"] = {
+            "ticker": ticker,
+            "name": company.name,
+            "sector": company.sector,
+            "cik": company.cik,
+            "entity_count": len(entities),
+            "debt_instrument_count": len(debt_instruments),
+            "total_debt": total_debt,
+            "as_of_date": filing_date.isoformat() if filing_date else None,
+        }
+
+    # ==========================================================================
+    # Build response_structure (entity tree)
+    # ==========================================================================
+    if "structure" in sections:
+        # Identify key entities (issuers and guarantors) - these have known relationships
+        issuer_ids = {d.issuer_id for d in debt_instruments if d.issuer_id}
+        guarantor_ids = set()
+        for gids in guarantees_by_debt.values():
+            guarantor_ids.update(gids)
+        key_entity_ids = issuer_ids | guarantor_ids
+
+        # Classify entities by ownership confidence
+        entities_with_known_parent = []  # parent_id is set AND parent is not root, OR entity is key entity
+        entities_with_unknown_parent = []  # parent_id is NULL and not root
+
+        root_entity_ids = {e.id for e in entities if e.is_root}
+
+        for e in entities:
+            if e.is_root:
+                continue
+            if e.parent_id is not None:
+                # Has a parent - check if it's intermediate (not root)
+                parent = entity_by_id.get(e.parent_id)
+                if parent and not parent.is_root:
+                    entities_with_known_parent.append(e)
+                elif e.id in key_entity_ids:
+                    # Key entity linked to root - this is meaningful
+                    entities_with_known_parent.append(e)
+                else:
+                    # Non-key entity linked to root - we now set these to NULL
+                    entities_with_unknown_parent.append(e)
+            else:
+                # No parent set
+                if e.id in key_entity_ids:
+                    entities_with_known_parent.append(e)
+                else:
+                    entities_with_unknown_parent.append(e)
+
+        visited_entity_ids = set()
+
+        def build_entity_tree(entity: Entity) -> Optional[dict]:
+            # Guard against circular parent-child references
+            if entity.id in visited_entity_ids:
+                return None
+            visited_entity_ids.add(entity.id)
+
+            entity_debt_instruments = debt_by_issuer.get(entity.id, [])
+
+            # Determine ownership confidence for this entity
+            is_key = entity.id in key_entity_ids
+            has_intermediate_parent = (
+                entity.parent_id is not None
+                and entity.parent_id not in root_entity_ids
+            )
+
+            if entity.is_root:
+                ownership_confidence = "root"
+            elif has_intermediate_parent:
+                ownership_confidence = "verified"  # From indenture/credit agreement parsing
+            elif is_key:
+                ownership_confidence = "key_entity"  # Issuer or guarantor
+            else:
+                ownership_confidence = "unknown"  # From Exhibit 21 only
+
+            children = (build_entity_tree(c) for c in children_by_parent.get(entity.id, []))
+            return {
+                "id": str(entity.id),
+                "name": entity.name,
+                "type": entity.entity_type,
+                "tier": entity.structure_tier,
+                "jurisdiction": entity.jurisdiction,
+                "is_guarantor": entity.is_guarantor,
+                "is_borrower": entity.is_borrower,
+                "is_unrestricted": entity.is_unrestricted,
+                "ownership_pct": float(entity.ownership_pct) if entity.ownership_pct else 100.0,
+                "ownership_confidence": ownership_confidence,
+                "debt_at_entity": {
+                    "total": sum(d.outstanding or 0 for d in entity_debt_instruments),
+                    "instrument_count": len(entity_debt_instruments),
+                    "instruments": [
+                        _instrument_detail(d, guarantor_names_by_debt[d.id])
+                        for d in entity_debt_instruments
+                    ],
+                },
+                "children": [t for t in children if t is not None],
+            }
+
+        # Find root entities (is_root=True, fallback to entities with no parent)
+        root_entities = [e for e in entities if e.is_root]
+        if not root_entities:
+            root_entities = [e for e in entities if e.parent_id is None]
+
+        structure_tree = [t for t in (build_entity_tree(e) for e in root_entities) if t is not None]
+
+        # Build list of entities with unknown parent (for transparency)
+        unknown_parent_list = [
+            {"name": e.name, "jurisdiction": e.jurisdiction, "entity_type": e.entity_type}
+            for e in sorted(entities_with_unknown_parent, key=lambda x: x.name or "")
+        ]
+
+        response_structure = {
+            "company": {"ticker": ticker, "name": company.name, "sector": company.sector},
+            "structure": structure_tree[0] if len(structure_tree) == 1 else {"roots": structure_tree},
+            "summary": {
+                "total_entities": len(entities),
+                "guarantor_count": sum(1 for e in entities if e.is_guarantor),
+                "restricted_count": sum(1 for e in entities if e.is_restricted),
+                "unrestricted_count": sum(1 for e in entities if e.is_unrestricted),
+                "total_debt": total_debt,
+            },
+            "ownership_coverage": {
+                "known_relationships": len(entities_with_known_parent),
+                "unknown_relationships": len(entities_with_unknown_parent),
+                "key_entities": len(key_entity_ids),
+                "coverage_pct": round(
+                    len(entities_with_known_parent) / max(len(entities) - 1, 1) * 100, 1
+                ) if len(entities) > 1 else 100.0,
+                "note": "Ownership relationships are only shown where we have evidence from SEC filings (indentures, credit agreements). "
+                        "Entities with unknown parent are subsidiaries listed in Exhibit 21 where the intermediate holding structure is not disclosed."
+            },
+            "other_subsidiaries": {
+                "count": len(unknown_parent_list),
+                "note": "These subsidiaries exist but their parent company within the corporate structure is unknown from public SEC filings.",
+                "entities": unknown_parent_list[:50],  # Limit to 50 for response size
+                "truncated": len(unknown_parent_list) > 50,
+            } if unknown_parent_list else None,
+            "meta": {
+                "as_of_date": filing_date.isoformat() if filing_date else None,
+                "confidence": "high" if len(entities_with_unknown_parent) == 0 else "partial",
+            },
+        }
+        responses["response_structure"] = response_structure
+
+    # ==========================================================================
+    # Build response_debt
+    # ==========================================================================
+    if "debt" in sections:
+        debt_by_seniority: dict[str, int] = {}
+        debt_list = []
+        for d in debt_instruments:
+            issuer = entity_by_id.get(d.issuer_id)
+            debt_by_seniority[d.seniority] = debt_by_seniority.get(d.seniority, 0) + (d.outstanding or 0)
+
+            guarantor_names = guarantor_names_by_debt[d.id]
+            debt_list.append({
+                "id": str(d.id),
+                "name": d.name,
+                "type": d.instrument_type,
+                "seniority": d.seniority,
+                "security_type": d.security_type,
+                "issuer": issuer.name if issuer else None,
+                "principal": d.principal,
+                "outstanding": d.outstanding,
+                "currency": d.currency,
+                "rate_type": d.rate_type,
+                "interest_rate": d.interest_rate,
+                "spread_bps": d.spread_bps,
+                "benchmark": d.benchmark,
+                "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
+                "guarantor_count": len(guarantor_names),
+                "guarantors": guarantor_names,
+            })
+
+        nearest_maturity = min(
+            (d.maturity_date for d in debt_instruments if d.maturity_date),
+            default=None,
+        )
+        response_debt = {
+            "company": {"ticker": ticker, "name": company.name},
+            "summary": {
+                "total_debt": total_debt,
+                "debt_by_seniority": debt_by_seniority,
+                "instrument_count": len(debt_instruments),
+                "nearest_maturity": nearest_maturity.isoformat() if nearest_maturity else None,
+            },
+            "instruments": debt_list,
+            "meta": {"as_of_date": filing_date.isoformat() if filing_date else None},
+        }
+        responses["response_debt"] = response_debt
+
+    if "response_structure" in responses and "response_debt" in responses:
+        responses["etag"] = response_etag(responses["response_structure"], responses["response_debt"])
+    return responses
+
+
+def response_etag(response_structure: Optional[dict], response_debt: Optional[dict]) -> str:
+    cache_content = json.dumps(
+        {"structure": response_structure, "debt": response_debt}, sort_keys=True
+    ).encode()
+    return hashlib.md5(cache_content).hexdigest()[:16]
+
+
+def compute_company_metrics(
+    data: CompanyCacheData,
+    total_debt: int,
+    today: Optional[date] = None,
+) -> dict:
+    """CompanyMetrics column values derived from the cache inputs."""
+    entities = data.entities
+    debt_instruments = data.debt_instruments
+    entity_by_id = {e.id: e for e in entities}
+    today = today or date.today()
+
+    # total_debt already computed with financials fallback
+    secured_debt = sum(d.outstanding or 0 for d in debt_instruments if d.seniority == "senior_secured")
+    unsecured_debt = total_debt - secured_debt
+
+    nearest_maturity = min(
+        (d.maturity_date for d in debt_instruments if d.maturity_date),
+        default=None,
+    )
+
+    # Compute flags
+    has_holdco_debt = any(
+        entity_by_id.get(d.issuer_id) and entity_by_id[d.issuer_id].structure_tier == 1
+        for d in debt_instruments
+    )
+    has_opco_debt = any(
+        entity_by_id.get(d.issuer_id) and entity_by_id[d.issuer_id].structure_tier >= 3
+        for d in debt_instruments
+    )
+    has_structural_sub = has_holdco_debt and has_opco_debt
+
+    # Debt due in each year bucket
+    debt_due_1yr = sum(
+        d.outstanding or 0 for d in debt_instruments
+        if d.maturity_date and d.maturity_date <= today + timedelta(days=365)
+    )
+    debt_due_2yr = sum(
+        d.outstanding or 0 for d in debt_instruments
+        if d.maturity_date and today + timedelta(days=365) < d.maturity_date <= today + timedelta(days=730)
+    )
+    debt_due_3yr = sum(
+        d.outstanding or 0 for d in debt_instruments
+        if d.maturity_date and today + timedelta(days=730) < d.maturity_date <= today + timedelta(days=1095)
+    )
+
+    # Weighted average maturity (in years)
+    if total_debt > 0:
+        weighted_avg_maturity = sum(
+            (d.outstanding or 0) * max(0, (d.maturity_date - today).days / 365.0)
+            for d in debt_instruments
+            if d.maturity_date and d.outstanding
+        ) / total_debt
+    else:
+        weighted_avg_maturity = None
+
+    # Simple subordination score
+    if has_structural_sub:
+        subordination_risk = "moderate"
+        subordination_score = 5.0
+    elif has_holdco_debt:
+        subordination_risk = "low"
+        subordination_score = 2.0
+    else:
+        subordination_risk = "low"
+        subordination_score = 1.0
+
+    return {
+        "sector": data.company.sector,
+        "industry": data.company.industry,
+        "total_debt": total_debt,
+        "secured_debt": secured_debt,
+        "unsecured_debt": unsecured_debt,
+        "entity_count": len(entities),
+        "guarantor_count": sum(1 for e in entities if e.is_guarantor),
+        "nearest_maturity": nearest_maturity,
+        "debt_due_1yr": debt_due_1yr,
+        "debt_due_2yr": debt_due_2yr,
+        "debt_due_3yr": debt_due_3yr,
+        "weighted_avg_maturity": weighted_avg_maturity,
+        # Near-term maturity flag (debt due in next 24 months)
+        "has_near_term_maturity": (debt_due_1yr > 0) or (debt_due_2yr > 0),
+        "subordination_risk": subordination_risk,
+        "subordination_score": subordination_score,
+        "has_holdco_debt": has_holdco_debt,
+        "has_opco_debt": has_opco_debt,
+        "has_structural_sub": has_structural_sub,
+        "has_unrestricted_subs": any(e.is_unrestricted for e in entities),
+        "has_floating_rate": any(d.rate_type == "floating" for d in debt_instruments),
+    }
+
+
+def sections_for_sources(sources: Iterable[str]) -> set[str]:
+    """Sections that depend on any of `sources` (see SECTION_SOURCES)."""
+    changed = set(sources)
+    return {section for section, inputs in SECTION_SOURCES.items() if inputs & changed}
+
+
+async def _take_pending_sources(db: AsyncSession, company_id: UUID) -> set[str]:
+    """
+    Sources this session changed for the company but hasn't marked dirty yet.
+
+    A refresh in the writer's own transaction covers them, so they're removed
+    instead of being marked dirty at commit.
+    """
+    pending = getattr(db, "sync_session", db).info.get(_PENDING_DIRTY_KEY)
+    if not pending:
+        return set()
+    sources = pending["companies"].pop(company_id, set())
+    if pending["entities"]:
+        owned = (await db.execute(
+            select(Entity.id).where(
+                Entity.company_id == company_id,
+                Entity.id.in_(list(pending["entities"])),
+            )
+        )).scalars().all()
+        for entity_id in owned:
+            sources |= pending["entities"].pop(entity_id)
+    return sources
+
+
+async def refresh_company_cache(
+    db: AsyncSession,
+    company_id: UUID,
+    ticker: str,
+    filing_date: Optional[date] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> set[str]:
+    """
+    Compute and save pre-computed API responses. Flushes but doesn't commit.
+
+    With sources=None every section is rebuilt. Otherwise only the sections
+    depending on `sources` or on the company's recorded dirty_sources are,
+    and a None filing_date keeps the cached as-of date. Clears dirty_sources
+    and returns the sections rebuilt.
+    """
+    # Locked so a concurrent write can't mark a source dirty between our
+    # read of the inputs and the reset of dirty_sources
+    cache = (await db.execute(
+        select(CompanyCache)
+        .where(CompanyCache.company_id == company_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )).scalar_one_or_none()
+
+    changed = await _take_pending_sources(db, company_id)
+    full = cache is None or sources is None
+    if full:
+        sections = set(SECTIONS)
+    else:
+        changed |= set(sources) | set(cache.dirty_sources or ())
+        if filing_date is None:
+            filing_date = cache.source_filing_date
+        elif filing_date != cache.source_filing_date:
+            changed.add("filing")
+        sections = sections_for_sources(changed)
+        if not sections and "financials" not in changed:
+            cache.dirty_sources = None
+            await db.flush()
+            return set()
+
+    data = await load_company_cache_data(db, company_id)
+    company = data.company
+
+    if not full and "financials" in changed:
+        # Financials only reach the responses through the total_debt fallback
+        total_debt = compute_total_debt(
+            sum(d.outstanding or 0 for d in data.debt_instruments),
+            data.financials_total_debt,
+        )
+        if total_debt != cache.total_debt:
+            sections |= sections_for_sources({"total_debt"})
+
+    responses = build_company_responses(data, ticker, filing_date, sections)
+    total_debt = responses["total_debt"]
+
+    # ==========================================================================
+    # Save to company_cache
+    # ==========================================================================
+    if cache:
+        if sections & set(RESPONSE_SECTIONS):
+            for section in sections & set(RESPONSE_SECTIONS):
+                setattr(cache, f"response_{section}", responses[f"response_{section}"])
+            cache.etag = response_etag(cache.response_structure, cache.response_debt)
+            cache.computed_at = datetime.utcnow()
+        cache.source_filing_date = filing_date
+        cache.total_debt = total_debt
+        cache.entity_count = len(data.entities)
+        cache.sector = company.sector
+        cache.dirty_sources = None
+    else:
+        cache = CompanyCache(
+            company_id=company_id,
+            ticker=ticker,
+            response_company=responses["response_company"],
+            response_structure=responses["response_structure"],
+            response_debt=responses["response_debt"],
+            etag=responses["etag"],
+            source_filing_date=filing_date,
+            total_debt=total_debt,
+            entity_count=len(data.entities),
+            sector=company.sector,
+        )
+        db.add(cache)
+
+    # ==========================================================================
+    # Save to company_metrics
+    # ==========================================================================
+    if "metrics" in sections:
+        values = compute_company_metrics(data, total_debt)
+        metrics = (await db.execute(
+            select(CompanyMetrics).where(CompanyMetrics.ticker == ticker)
+        )).scalar_one_or_none()
+
+        if metrics:
+            for column, value in values.items():
+                setattr(metrics, column, value)
+        else:
+            db.add(CompanyMetrics(ticker=ticker, company_id=company_id, **values))
+
+    await db.flush()
+    if not sections:
+        return sections
+
+    # Append to the change log in the caller's transaction
+    await record_company_changes(db, company_id, ticker, source="refresh")
+
+    # Invalidate cached primitive responses and entity graphs once the caller commits
+    bump_data_version_on_commit(db, ticker)
+    bump_entity_graph_version_on_commit(db, company_id)
+    return sections
+
+
+async def rebuild_company_caches(
+    company_ids: Optional[Iterable[UUID]] = None,
+    concurrency: int = REBUILD_CONCURRENCY,
+    session_maker: async_sessionmaker = job_session_maker,
+    dirty_only: bool = False,
+) -> list[dict]:
+    """
+    Rebuild company_cache and company_metrics for many companies (all by default).
+
+    Each company is refreshed and committed in its own session, keeping its
+    current source_filing_date. With dirty_only, only companies with recorded
+    dirty_sources are refreshed, and only their dependent sections. A failure
+    is logged and reported in that company's timing without stopping the
+    others.
+
+    Returns one dict per company, in ticker order:
+    {ticker, status, sections, seconds, db_queries, db_ms[, error]}.
+    """
+    query = (
+        select(Company.id, Company.ticker, CompanyCache.source_filing_date)
+        .outerjoin(CompanyCache, CompanyCache.company_id == Company.id)
+        .order_by(Company.ticker)
+    )
+    if company_ids is not None:
+        query = query.where(Company.id.in_(list(company_ids)))
+    if dirty_only:
+        query = query.where(CompanyCache.dirty_sources.isnot(None))
+    async with session_maker() as session:
+        companies = (await session.execute(query)).all()
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def rebuild(company_id: UUID, ticker: str, filing_date: Optional[date]) -> dict:
+        async with semaphore:
+            timing = {"ticker": ticker, "status": "success", "sections": []}
+            started = time.perf_counter()
+            # Each gather task runs in its own context, so query stats don't mix
+            with track_queries("company_cache.rebuilt", ticker=ticker) as stats:
+                try:
+                    async with session_maker() as session:
+                        sections = await refresh_company_cache(
+                            session, company_id, ticker, filing_date,
+                            sources=() if dirty_only else None,
+                        )
+                        await session.commit()
+                    timing["sections"] = sorted(sections)
+                except Exception as exc:
+                    timing.update(status="error", error=str(exc))
+                    logger.error("company_cache.rebuild_failed", ticker=ticker, error=str(exc))
+            timing.update(
+                seconds=round(time.perf_counter() - started, 3),
+                db_queries=stats.query_count,
+                db_ms=round(stats.db_seconds * 1000, 2),
+            )
+            return timing
+
+    started = time.perf_counter()
+    timings = list(await asyncio.gather(*(rebuild(*row) for row in companies)))
+    logger.info(
+        "company_cache.rebuild_complete",
+        companies=len(timings),
+        errors=sum(1 for t in timings if t["status"] == "error"),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return timings
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_company_cache_writes(session: Session, flush_context: Any) -> None:
+    companies: dict[Any, set[str]] = defaultdict(set)
+    entities: dict[Any, set[str]] = defaultdict(set)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        # Read loaded values only: touching expired attributes would emit SQL
+        loaded = vars(obj)
+        if table in _SOURCE_BY_COMPANY_TABLE:
+            company_id = loaded.get("id" if table == "companies" else "company_id")
+            companies[company_id].add(_SOURCE_BY_COMPANY_TABLE[table])
+        elif table in _SOURCE_BY_ENTITY_REF_TABLE:
+            source, attrs = _SOURCE_BY_ENTITY_REF_TABLE[table]
+            for attr in attrs:
+                entities[loaded.get(attr)].add(source)
+
+    companies.pop(None, None)
+    entities.pop(None, None)
+    if companies or entities:
+        pending = session.info.setdefault(
+            _PENDING_DIRTY_KEY, {"companies": defaultdict(set), "entities": defaultdict(set)}
+        )
+        for key, found in (("companies", companies), ("entities", entities)):
+            for row_id, sources in found.items():
+                pending[key][row_id] |= sources
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_company_caches_dirty(session: Session) -> None:
+    """
+    Record changed sources in company_cache.dirty_sources, in the writer's transaction.
+
+    Done at commit rather than on each flush so the company_cache row lock is
+    held only for the commit itself.
+    """
+    if _PENDING_DIRTY_KEY not in session.info:
+        return
+    session.flush()
+    pending = session.info.pop(_PENDING_DIRTY_KEY)
+    changed = pending["companies"]
+    entity_refs = pending["entities"]
+    if entity_refs:
+        rows = session.connection().execute(
+            text("SELECT id, company_id FROM entities WHERE id IN :ids").bindparams(
+                bindparam("ids", expanding=True)
+            ),
+            {"ids": list(entity_refs)},
+        )
+        for entity_id, company_id in rows:
+            changed[company_id] |= entity_refs[entity_id]
+
+    if changed:
+        session.connection().execute(_MARK_DIRTY_SQL, [
+            {"company_id": company_id, "sources": json.dumps(dict.fromkeys(sorted(sources), True))}
+            for company_id, sources in changed.items()
+        ])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_company_cache_writes(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_PENDING_DIRTY_KEY, None)
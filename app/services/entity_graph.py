@@ -0,0 +1,729 @@
+"""
+Cached per-company entity graphs.
+
+Traversal, hierarchy, ownership and structure requests all need the same
+thing: a company's entities, how they nest, who guarantees what and how much
+debt sits where. An EntityGraph is built from four queries and kept in an
+in-process LRU so repeat graph queries never go back to Postgres:
+
+- Nodes are integer-indexed; `parent` holds parent indices (-1 for roots and
+  parents outside the company).
+- Children are stored CSR-style: the children of node i are
+  child_index[child_offsets[i]:child_offsets[i + 1]], sorted by name.
+- Instruments are stored the same way per issuer (sorted by maturity), and
+  guarantors per instrument.
+- Boolean masks mark guarantors (the entity flag and "appears in a
+  guarantee") and issuers, and per-node debt totals are precomputed.
+
+Graphs are immutable. Before reuse, the cached graph's version is compared
+with the company's entity graph version in Redis (at most every
+RECHECK_SECONDS), which the ORM flush listener in app/core/cache.py bumps on
+entity, ownership, debt and guarantee writes. Without Redis a graph lives for
+MAX_AGE_SECONDS. Cached graphs are loaded from the primary, since one loaded
+from a lagging replica would be kept under the current version.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+import structlog
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_entity_graph_version
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.models import DebtInstrument, Entity, Guarantee, OwnershipLink
+
+logger = structlog.get_logger()
+
+# How often a cached graph is compared against its Redis version
+RECHECK_SECONDS = 5
+
+# Lifetime of a graph when no version is available (Redis not configured)
+MAX_AGE_SECONDS = 300
+
+# Companies kept in memory
+MAX_GRAPHS = 256
+
+
+def _csr(groups: np.ndarray, order: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build CSR offsets/values grouping `order` (item indices) by groups[item].
+
+    Items with a negative group are dropped. Within a group, items keep their
+    relative position in `order`.
+    """
+    grouped = order[np.argsort(groups[order], kind="stable")]
+    grouped = grouped[groups[grouped] >= 0]
+    counts = np.bincount(groups[groups >= 0], minlength=size)
+    offsets = np.zeros(size + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, grouped.astype(np.int32)
+
+
+@dataclass
+class EntityGraph:
+    """Immutable adjacency view of one company's entities, debt and guarantees."""
+
+    company_id: UUID
+    version: Optional[str]
+    loaded_at: float
+
+    # Nodes
+    ids: list[UUID]
+    index: dict[UUID, int]
+    nodes: list[dict]  # per-node attributes, see _node_attrs
+    parent: np.ndarray  # int32, -1 if no parent in this company
+    has_parent_id: np.ndarray  # bool, parent_id IS NOT NULL
+    name_rank: np.ndarray  # int32, position in (name, id) order
+    child_offsets: np.ndarray
+    child_index: np.ndarray
+
+    # Columns used by filters
+    entity_type: np.ndarray  # object
+    jurisdiction_folded: np.ndarray  # object, lowercased or ""
+    is_guarantor: np.ndarray  # bool, Entity.is_guarantor flag
+    is_vie: np.ndarray  # bool
+    is_root: np.ndarray  # bool
+
+    # Bitsets
+    guarantees_debt: np.ndarray  # bool, appears as a guarantor on some instrument
+    is_issuer: np.ndarray  # bool, issues at least one instrument
+
+    # Debt
+    debt_total: np.ndarray  # int64, sum of outstanding (NULL as 0)
+    debt_count: np.ndarray  # int32
+    instruments: list[dict]
+    instrument_index: dict[UUID, int]
+    issuer_offsets: np.ndarray
+    issuer_debt: np.ndarray
+    guarantee_offsets: np.ndarray
+    guarantee_nodes: np.ndarray
+    guarantee_types: list[Optional[str]]  # aligned with guarantee_nodes
+
+    # Ownership links touching this company, ordered by parent_entity_id
+    ownership_links: list[dict]
+
+    _views: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def children(self, i: int) -> np.ndarray:
+        return self.child_index[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+    def debt_of(self, i: int) -> list[dict]:
+        return [self.instruments[j] for j in self.issuer_debt[self.issuer_offsets[i]:self.issuer_offsets[i + 1]]]
+
+    def guarantors_of(self, instrument: int) -> list[tuple[int, Optional[str]]]:
+        start, end = self.guarantee_offsets[instrument], self.guarantee_offsets[instrument + 1]
+        return [(int(self.guarantee_nodes[k]), self.guarantee_types[k]) for k in range(start, end)]
+
+    def by_name(self, idx: np.ndarray) -> np.ndarray:
+        return idx[np.argsort(self.name_rank[idx], kind="stable")]
+
+    # -------------------------------------------------------------------------
+    # Filters and walks
+    # -------------------------------------------------------------------------
+
+    def filter_mask(self, filters: Optional[dict]) -> np.ndarray:
+        """Vectorized equivalent of entity_filter_clauses in app/api/entity_traversal.py."""
+        mask = np.ones(self.size, dtype=bool)
+        if not filters:
+            return mask
+
+        allowed_types = filters.get("entity_type")
+        if allowed_types:
+            if isinstance(allowed_types, str):
+                allowed_types = [allowed_types]
+            mask &= np.isin(self.entity_type, list(allowed_types))
+        if filters.get("is_guarantor") is not None:
+            mask &= self.is_guarantor == bool(filters["is_guarantor"])
+        if filters.get("is_vie") is not None:
+            mask &= self.is_vie == bool(filters["is_vie"])
+        if filters.get("jurisdiction"):
+            needle = str(filters["jurisdiction"]).lower()
+            mask &= np.fromiter((needle in j for j in self.jurisdiction_folded), dtype=bool, count=self.size)
+        return mask
+
+    def walk_down(
+        self,
+        starts: np.ndarray,
+        max_depth: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> tuple[list[tuple[int, int]], int]:
+        """
+        Breadth-first walk below `starts`, one CSR gather per level.
+
+        Start nodes are depth 0 and unfiltered; a descendant failing `mask`
+        is neither emitted nor expanded. Returns ([(node, depth)], deepest
+        level found, or -1 if there were no start nodes). Each level is in
+        (name, id) order, matching the recursive-CTE ordering.
+        """
+        visited = np.zeros(self.size, dtype=bool)
+        frontier = self.by_name(np.unique(np.asarray(starts, dtype=np.int32)))
+        visited[frontier] = True
+        out = [(int(i), 0) for i in frontier]
+        deepest = 0 if len(frontier) else -1
+
+        depth = 0
+        while len(frontier) and depth < max_depth:
+            depth += 1
+            starts_, ends = self.child_offsets[frontier], self.child_offsets[frontier + 1]
+            if not (ends - starts_).any():
+                break
+            kids = np.concatenate([self.child_index[s:e] for s, e in zip(starts_, ends)])
+            kids = np.unique(kids[~visited[kids]])
+            if mask is not None:
+                kids = kids[mask[kids]]
+            visited[kids] = True
+            frontier = self.by_name(kids)
+            if len(frontier):
+                deepest = depth
+            out.extend((int(i), depth) for i in frontier)
+        return out, deepest
+
+    def walk_up(self, i: int, max_depth: int) -> list[tuple[int, int]]:
+        """Ancestors of node i within this company, nearest first."""
+        out = []
+        seen = {i}
+        current = i
+        for depth in range(1, max_depth + 1):
+            current = int(self.parent[current])
+            if current < 0 or current in seen:
+                break
+            seen.add(current)
+            out.append((current, depth))
+        return out
+
+    # -------------------------------------------------------------------------
+    # Memoized views
+    # -------------------------------------------------------------------------
+
+    def hierarchy_view(self) -> dict:
+        """Nested tree and summary for /companies/{ticker}/hierarchy."""
+        if "hierarchy" in self._views:
+            return self._views["hierarchy"]
+
+        def build_node(i: int, depth: int) -> tuple[dict, int, int]:
+            node = self.nodes[i]
+            children = []
+            subtree_debt = int(self.debt_total[i])
+            max_depth = depth
+            for c in self.children(i):
+                child, child_debt, child_depth = build_node(int(c), depth + 1)
+                children.append(child)
+                subtree_debt += child_debt
+                max_depth = max(max_depth, child_depth)
+            return {
+                "entity_id": node["id"],
+                "name": node["name"],
+                "entity_type": node["entity_type"],
+                "jurisdiction": node["jurisdiction"],
+                "is_guarantor": node["is_guarantor"],
+                "is_borrower": node["is_borrower"],
+                "is_vie": node["is_vie"],
+                "debt_at_entity": {
+                    "total_outstanding": int(self.debt_total[i]),
+                    "instrument_count": int(self.debt_count[i]),
+                },
+                "children": children,
+            }, subtree_debt, max_depth
+
+        roots = sorted(
+            np.flatnonzero(self.parent < 0),
+            key=lambda i: (self.nodes[i]["entity_type"] != "holdco", self.nodes[i]["name"]),
+        )
+        tree, total_debt, max_depth = [], 0, 0
+        for r in roots:
+            node, debt, depth = build_node(int(r), 0)
+            tree.append(node)
+            total_debt += debt
+            max_depth = max(max_depth, depth)
+
+        view = {
+            "hierarchy": tree,
+            "summary": {
+                "total_entities": self.size,
+                "root_entities": len(roots),
+                "max_depth": max_depth,
+                "total_debt": total_debt,
+                "entities_with_debt": int(self.is_issuer.sum()),
+            },
+        }
+        self._views["hierarchy"] = view
+        return view
+
+    def ownership_view(self) -> dict:
+        """Complex links, JVs and simple parent links for /companies/{ticker}/ownership."""
+        if "ownership" in self._views:
+            return self._views["ownership"]
+
+        def endpoint(entity_id: UUID) -> dict:
+            i = self.index.get(entity_id)
+            return {
+                "entity_id": str(entity_id),
+                "name": self.nodes[i]["name"] if i is not None else "External Entity",
+                "type": self.nodes[i]["entity_type"] if i is not None else None,
+            }
+
+        ownership_links = []
+        joint_ventures = []
+        for link in self.ownership_links:
+            link_data = {
+                "id": link["id"],
+                "parent": endpoint(link["parent_entity_id"]),
+                "child": endpoint(link["child_entity_id"]),
+                "ownership_pct": link["ownership_pct"],
+                "ownership_type": link["ownership_type"],
+                "consolidation_method": link["consolidation_method"],
+                "effective_from": link["effective_from"],
+                "effective_to": link["effective_to"],
+                "is_current": link["effective_to"] is None,
+            }
+            ownership_links.append(link_data)
+            if link["is_joint_venture"]:
+                joint_ventures.append({**link_data, "jv_partner_name": link["jv_partner_name"]})
+
+        simple_ownership = []
+        for i in np.flatnonzero(self.parent >= 0):
+            node, parent = self.nodes[i], self.nodes[self.parent[i]]
+            simple_ownership.append({
+                "parent": {"entity_id": parent["id"], "name": parent["name"], "type": parent["entity_type"]},
+                "child": {"entity_id": node["id"], "name": node["name"], "type": node["entity_type"]},
+                "ownership_pct": node["ownership_pct"] if node["ownership_pct"] else 100.0,
+                "ownership_type": "direct",
+                "source": "entity_hierarchy",
+            })
+
+        view = {
+            "ownership_links": ownership_links,
+            "simple_hierarchy": simple_ownership,
+            "joint_ventures": joint_ventures,
+            "summary": {
+                "total_complex_links": len(ownership_links),
+                "total_simple_links": len(simple_ownership),
+                "joint_ventures": len(joint_ventures),
+                "partial_ownership": sum(1 for l in ownership_links if l["ownership_pct"] and l["ownership_pct"] < 100),
+            },
+        }
+        self._views["ownership"] = view
+        return view
+
+    def structure_view(self) -> dict:
+        """
+        Entity tree, coverage and unknown-parent list for /companies/{ticker}/structure.
+
+        Mirrors the response_structure built by refresh_company_cache, minus
+        the company header, total_debt and as_of_date which come from the cache.
+        """
+        if "structure" in self._views:
+            return self._views["structure"]
+
+        key_entity = self.is_issuer | self.guarantees_debt
+        parent_is_root = np.zeros(self.size, dtype=bool)
+        in_company = self.parent >= 0
+        parent_is_root[in_company] = self.is_root[self.parent[in_company]]
+
+        # Known parent: an intermediate (non-root) parent, or a key entity either way
+        intermediate = in_company & ~parent_is_root
+        known = ~self.is_root & (intermediate | key_entity)
+        unknown = ~self.is_root & ~known
+        # A parent outside the company still counts as intermediate for confidence
+        has_intermediate_parent = self.has_parent_id & ~parent_is_root
+
+        visited = np.zeros(self.size, dtype=bool)
+
+        def build_node(i: int) -> Optional[dict]:
+            if visited[i]:
+                return None
+            visited[i] = True
+            node = self.nodes[i]
+
+            debt_details = []
+            for d in self.debt_of(i):
+                guarantor_names = [self.nodes[g]["name"] for g, _ in self.guarantors_of(d["_index"])]
+                debt_details.append({
+                    "id": d["id"],
+                    "name": d["name"],
+                    "type": d["instrument_type"],
+                    "seniority": d["seniority"],
+                    "security_type": d["security_type"],
+                    "outstanding": d["outstanding"],
+                    "principal": d["principal"],
+                    "currency": d["currency"],
+                    "rate_type": d["rate_type"],
+                    "interest_rate": d["interest_rate"],
+                    "spread_bps": d["spread_bps"],
+                    "benchmark": d["benchmark"],
+                    "maturity_date": d["maturity_date"],
+                    "guarantor_count": len(guarantor_names),
+                    "guarantors": guarantor_names,
+                })
+
+            if self.is_root[i]:
+                ownership_confidence = "root"
+            elif has_intermediate_parent[i]:
+                ownership_confidence = "verified"
+            elif key_entity[i]:
+                ownership_confidence = "key_entity"
+            else:
+                ownership_confidence = "unknown"
+
+            return {
+                "id": node["id"],
+                "name": node["name"],
+                "type": node["entity_type"],
+                "tier": node["structure_tier"],
+                "jurisdiction": node["jurisdiction"],
+                "is_guarantor": node["is_guarantor"],
+                "is_borrower": node["is_borrower"],
+                "is_unrestricted": node["is_unrestricted"],
+                "ownership_pct": node["ownership_pct"] or 100.0,
+                "ownership_confidence": ownership_confidence,
+                "debt_at_entity": {
+                    "total": int(self.debt_total[i]),
+                    "instrument_count": int(self.debt_count[i]),
+                    "instruments": debt_details,
+                },
+                "children": [t for t in (build_node(int(c)) for c in self.children(i)) if t is not None],
+            }
+
+        roots = np.flatnonzero(self.is_root)
+        if not len(roots):
+            roots = np.flatnonzero(~self.has_parent_id)
+        structure_tree = [t for t in (build_node(int(r)) for r in self.by_name(roots)) if t is not None]
+
+        unknown_parent_list = sorted(
+            (
+                {
+                    "name": self.nodes[i]["name"],
+                    "jurisdiction": self.nodes[i]["jurisdiction"],
+                    "entity_type": self.nodes[i]["entity_type"],
+                }
+                for i in np.flatnonzero(unknown)
+            ),
+            key=lambda e: e["name"] or "",
+        )
+        known_count, unknown_count = int(known.sum()), int(unknown.sum())
+
+        view = {
+            "structure": structure_tree[0] if len(structure_tree) == 1 else {"roots": structure_tree},
+            "summary": {
+                "total_entities": self.size,
+                "guarantor_count": int(self.is_guarantor.sum()),
+                "restricted_count": sum(1 for n in self.nodes if n["is_restricted"]),
+                "unrestricted_count": sum(1 for n in self.nodes if n["is_unrestricted"]),
+            },
+            "ownership_coverage": {
+                "known_relationships": known_count,
+                "unknown_relationships": unknown_count,
+                "key_entities": int(key_entity.sum()),
+                "coverage_pct": round(
+                    known_count / max(self.size - 1, 1) * 100, 1
+                ) if self.size > 1 else 100.0,
+                "note": "Ownership relationships are only shown where we have evidence from SEC filings (indentures, credit agreements). "
+                        "Entities with unknown parent are subsidiaries listed in Exhibit 21 where the intermediate holding structure is not disclosed."
+            },
+            "other_subsidiaries": {
+                "count": len(unknown_parent_list),
+                "note": "These subsidiaries exist but their parent company within the corporate structure is unknown from public SEC filings.",
+                "entities": unknown_parent_list[:50],  # Limit to 50 for response size
+                "truncated": len(unknown_parent_list) > 50,
+            } if unknown_parent_list else None,
+            "confidence": "high" if unknown_count == 0 else "partial",
+        }
+        self._views["structure"] = view
+        return view
+
+
+# =============================================================================
+# BUILDING
+# =============================================================================
+
+
+def _node_attrs(e: Entity) -> dict:
+    return {
+        "id": str(e.id),
+        "name": e.name,
+        "entity_type": e.entity_type,
+        "jurisdiction": e.jurisdiction,
+        "structure_tier": e.structure_tier,
+        "parent_id": str(e.parent_id) if e.parent_id else None,
+        "ownership_pct": float(e.ownership_pct) if e.ownership_pct else None,
+        "is_guarantor": e.is_guarantor,
+        "is_borrower": e.is_borrower,
+        "is_vie": e.is_vie,
+        "is_restricted": e.is_restricted,
+        "is_unrestricted": e.is_unrestricted,
+    }
+
+
+def _instrument_attrs(d: DebtInstrument) -> dict:
+    return {
+        "id": str(d.id),
+        "name": d.name,
+        "cusip": d.cusip,
+        "issuer_id": str(d.issuer_id) if d.issuer_id else None,
+        "instrument_type": d.instrument_type,
+        "seniority": d.seniority,
+        "security_type": d.security_type,
+        "outstanding": d.outstanding,
+        "principal": d.principal,
+        "currency": d.currency,
+        "rate_type": d.rate_type,
+        "interest_rate": d.interest_rate,
+        "spread_bps": d.spread_bps,
+        "benchmark": d.benchmark,
+        "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
+        "is_active": d.is_active,
+    }
+
+
+def build_entity_graph(
+    company_id: UUID,
+    entities: list,
+    instruments: list,
+    guarantees: list[tuple[UUID, UUID, Optional[str]]],
+    links: list,
+    version: Optional[str] = None,
+) -> EntityGraph:
+    """
+    Build a graph from loaded rows.
+
+    guarantees are (debt_instrument_id, guarantor_id, guarantee_type) tuples;
+    instruments should be ordered by maturity and links by parent_entity_id.
+    """
+    n = len(entities)
+    ids = [e.id for e in entities]
+    index = {eid: i for i, eid in enumerate(ids)}
+    nodes = [_node_attrs(e) for e in entities]
+
+    parent = np.array([index.get(e.parent_id, -1) for e in entities], dtype=np.int32)
+    has_parent_id = np.array([e.parent_id is not None for e in entities], dtype=bool)
+    name_order = np.array(
+        sorted(range(n), key=lambda i: (entities[i].name or "", str(ids[i]))), dtype=np.int32
+    )
+    name_rank = np.empty(n, dtype=np.int32)
+    name_rank[name_order] = np.arange(n, dtype=np.int32)
+    child_offsets, child_index = _csr(parent, name_order, n)
+
+    def flags(attr: str) -> np.ndarray:
+        return np.array([bool(getattr(e, attr)) for e in entities], dtype=bool)
+
+    entity_type = np.empty(n, dtype=object)
+    entity_type[:] = [e.entity_type for e in entities]
+    jurisdiction_folded = np.empty(n, dtype=object)
+    jurisdiction_folded[:] = [(e.jurisdiction or "").lower() for e in entities]
+
+    # Debt per issuer
+    instrument_rows = [_instrument_attrs(d) for d in instruments]
+    for j, row in enumerate(instrument_rows):
+        row["_index"] = j
+    instrument_index = {d.id: j for j, d in enumerate(instruments)}
+    issuer = np.array([index.get(d.issuer_id, -1) for d in instruments], dtype=np.int32)
+    issuer_offsets, issuer_debt = _csr(issuer, np.arange(len(instruments), dtype=np.int32), n)
+    has_issuer = issuer >= 0
+    outstanding = np.array([d.outstanding or 0 for d in instruments], dtype=np.int64)
+    debt_total = np.zeros(n, dtype=np.int64)
+    np.add.at(debt_total, issuer[has_issuer], outstanding[has_issuer])
+    debt_count = np.diff(issuer_offsets).astype(np.int32)
+
+    # Guarantors per instrument
+    g_instrument = np.array([instrument_index.get(g[0], -1) for g in guarantees], dtype=np.int32)
+    g_node = np.array([index.get(g[1], -1) for g in guarantees], dtype=np.int32)
+    g_instrument[g_node < 0] = -1  # guarantors outside the company are not graph nodes
+    guarantee_offsets, guarantee_order = _csr(
+        g_instrument, np.arange(len(guarantees), dtype=np.int32), len(instruments)
+    )
+    guarantees_debt = np.zeros(n, dtype=bool)
+    guarantees_debt[g_node[guarantee_order]] = True
+
+    ownership_links = [
+        {
+            "id": str(link.id),
+            "parent_entity_id": link.parent_entity_id,
+            "child_entity_id": link.child_entity_id,
+            "ownership_pct": float(link.ownership_pct) if link.ownership_pct else None,
+            "ownership_type": link.ownership_type,
+            "consolidation_method": link.consolidation_method,
+            "effective_from": link.effective_from.isoformat() if link.effective_from else None,
+            "effective_to": link.effective_to.isoformat() if link.effective_to else None,
+            "is_joint_venture": link.is_joint_venture,
+            "jv_partner_name": link.jv_partner_name,
+        }
+        for link in links
+    ]
+
+    return EntityGraph(
+        company_id=company_id,
+        version=version,
+        loaded_at=time.time(),
+        ids=ids,
+        index=index,
+        nodes=nodes,
+        parent=parent,
+        has_parent_id=has_parent_id,
+        name_rank=name_rank,
+        child_offsets=child_offsets,
+        child_index=child_index,
+        entity_type=entity_type,
+        jurisdiction_folded=jurisdiction_folded,
+        is_guarantor=flags("is_guarantor"),
+        is_vie=flags("is_vie"),
+        is_root=flags("is_root"),
+        guarantees_debt=guarantees_debt,
+        is_issuer=debt_count > 0,
+        debt_total=debt_total,
+        debt_count=debt_count,
+        instruments=instrument_rows,
+        instrument_index=instrument_index,
+        issuer_offsets=issuer_offsets,
+        issuer_debt=issuer_debt,
+        guarantee_offsets=guarantee_offsets,
+        guarantee_nodes=g_node[guarantee_order],
+        guarantee_types=[guarantees[k][2] for k in guarantee_order],
+        ownership_links=ownership_links,
+    )
+
+
+async def load_entity_graph(db: AsyncSession, company_id: UUID, version: Optional[str] = None) -> EntityGraph:
+    """Load a company's graph with four queries."""
+    entities = (await db.execute(
+        select(Entity).where(Entity.company_id == company_id)
+    )).scalars().all()
+
+    instruments = (await db.execute(
+        select(DebtInstrument)
+        .where(DebtInstrument.company_id == company_id)
+        .order_by(DebtInstrument.maturity_date.asc().nulls_last(), DebtInstrument.id)
+    )).scalars().all()
+
+    guarantees = (await db.execute(
+        select(Guarantee.debt_instrument_id, Guarantee.guarantor_id, Guarantee.guarantee_type)
+        .join(DebtInstrument, Guarantee.debt_instrument_id == DebtInstrument.id)
+        .where(DebtInstrument.company_id == company_id)
+    )).all()
+
+    company_entities = select(Entity.id).where(Entity.company_id == company_id)
+    links = (await db.execute(
+        select(OwnershipLink).where(
+            or_(
+                OwnershipLink.parent_entity_id.in_(company_entities),
+                OwnershipLink.child_entity_id.in_(company_entities),
+            )
+        ).order_by(OwnershipLink.parent_entity_id)
+    )).scalars().all()
+
+    return build_entity_graph(
+        company_id, list(entities), list(instruments), [tuple(g) for g in guarantees], list(links), version,
+    )
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+
+@dataclass
+class _Entry:
+    graph: EntityGraph
+    checked_at: float
+
+
+class EntityGraphCache:
+    """In-process LRU of company graphs, revalidated against Redis versions."""
+
+    def __init__(self, max_graphs: int = MAX_GRAPHS):
+        self._entries: "OrderedDict[UUID, _Entry]" = OrderedDict()
+        self._locks: dict[UUID, asyncio.Lock] = {}
+        self._max_graphs = max_graphs
+
+    @property
+    def enabled(self) -> bool:
+        return get_settings().entity_graph_cache_enabled
+
+    async def get(self, db: AsyncSession, company_id: UUID) -> Optional[EntityGraph]:
+        """
+        Return the company's graph, loading it on a miss or version change.
+
+        Graphs are loaded from the primary rather than `db`, which may be a
+        replica session. Returns None when the cache is disabled, so callers
+        use their SQL path.
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entry(company_id)
+        if entry is not None and time.monotonic() - entry.checked_at < RECHECK_SECONDS:
+            return entry.graph
+
+        version = await get_entity_graph_version(company_id)
+        if entry is not None and self._still_valid(entry.graph, version):
+            entry.checked_at = time.monotonic()
+            return entry.graph
+
+        lock = self._locks.setdefault(company_id, asyncio.Lock())
+        async with lock:
+            # Another request may have rebuilt it while we waited
+            entry = self._entry(company_id)
+            if entry is not None and self._still_valid(entry.graph, version):
+                return entry.graph
+
+            start = time.perf_counter()
+            async with async_session_maker() as primary:
+                graph = await load_entity_graph(primary, company_id, version)
+            self._store(company_id, graph)
+            logger.info(
+                "entity_graph.load",
+                company_id=str(company_id),
+                entities=graph.size,
+                instruments=len(graph.instruments),
+                version=version,
+                duration_ms=round((time.perf_counter() - start) * 1000, 2),
+            )
+            return graph
+
+    async def get_or_build(self, db: AsyncSession, company_id: UUID) -> EntityGraph:
+        """Like get(), but builds an uncached graph when the cache is disabled."""
+        graph = await self.get(db, company_id)
+        if graph is None:
+            graph = await load_entity_graph(db, company_id)
+        return graph
+
+    def invalidate(self, company_id: Optional[UUID] = None) -> None:
+        """Drop one company's graph (or all graphs) from this process."""
+        if company_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(company_id, None)
+
+    def _entry(self, company_id: UUID) -> Optional[_Entry]:
+        entry = self._entries.get(company_id)
+        if entry is None:
+            return None
+        self._entries.move_to_end(company_id)
+        return entry
+
+    @staticmethod
+    def _still_valid(graph: EntityGraph, version: Optional[str]) -> bool:
+        if version is not None:
+            return graph.version == version
+        return time.time() - graph.loaded_at <= MAX_AGE_SECONDS
+
+    def _store(self, company_id: UUID, graph: EntityGraph) -> None:
+        self._entries[company_id] = _Entry(graph=graph, checked_at=time.monotonic())
+        self._entries.move_to_end(company_id)
+        while len(self._entries) > self._max_graphs:
+            evicted, _ = self._entries.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+
+entity_graphs = EntityGraphCache()
@@ -10,6 +10,7 @@ COMPONENTS (now split into separate modules)
 - sec_client.py: SecApiClient, SECEdgarClient, FilingInfo
 - llm_utils.py: LLM client utilities
 - base_extractor.py: Base class for extraction services
+- company_cache.py: refresh_company_cache, rebuild_company_caches
 
 This file contains:
 - Extraction prompt and models
@@ -25,7 +26,6 @@ USAGE
     company_id = await save_extraction_to_db(session, result, ticker)
 """
 
-import hashlib
 import json
 import re
 from datetime import date, datetime, timedelta
@@ -39,13 +39,14 @@ from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import (
-    Company, CompanyCache, CompanyFinancials, CompanyMetrics, Collateral,
+    Company, CompanyCache, CompanyFinancials, Collateral,
     DebtInstrument, DebtInstrumentDocument, DocumentSection, Entity, Guarantee, OwnershipLink
 )
 from app.services.utils import clean_filing_html
 
-# Re-export SEC clients for backwards compatibility
+# Re-export SEC clients and the cache builder for backwards compatibility
 from app.services.sec_client import SecApiClient, SECEdgarClient, FilingInfo
+from app.services.company_cache import refresh_company_cache
 
 
 # =============================================================================
@@ -1495,451 +1496,3 @@ async def save_extraction_to_db(
 
     await db.commit()
     return company_id
-
-
-async def refresh_company_cache(
-    db: AsyncSession,
-    company_id: UUID,
-    ticker: str,
-    filing_date: Optional[date] = None,
-) -> None:
-    """Compute and save pre-computed API responses."""
-
-    # Get company
-    result = await db.execute(
-        select(Company).where(Company.id == company_id)
-    )
-    company = result.scalar_one()
-
-    # Get entities
-    result = await db.execute(
-        select(Entity).where(Entity.company_id == company_id)
-    )
-    entities = result.scalars().all()
-
-    # Get debt instruments with guarantees
-    result = await db.execute(
-        select(DebtInstrument).where(DebtInstrument.company_id == company_id)
-    )
-    debt_instruments = result.scalars().all()
-
-    # Get latest financials for total_debt fallback
-    result = await db.execute(
-        select(CompanyFinancials)
-        .where(CompanyFinancials.company_id == company_id)
-        .order_by(CompanyFinancials.fiscal_year.desc(), CompanyFinancials.fiscal_quarter.desc())
-        .limit(1)
-    )
-    latest_financials = result.scalar_one_or_none()
-    financials_total_debt = latest_financials.total_debt if latest_financials else None
-
-    # Build entity lookup
-    entity_by_id = {e.id: e for e in entities}
-
-    # Get guarantees
-    guarantees_by_debt: dict[UUID, list[UUID]] = {}
-    for debt in debt_instruments:
-        result = await db.execute(
-            select(Guarantee).where(Guarantee.debt_instrument_id == debt.id)
-        )
-        guarantees = result.scalars().all()
-        guarantees_by_debt[debt.id] = [g.guarantor_id for g in guarantees]
-
-    # ==========================================================================
-    # Compute total_debt with fallback to financials
-    # ==========================================================================
-    instruments_total_debt = sum(d.outstanding or 0 for d in debt_instruments)
-
-    # Use financials total_debt if instruments sum is missing or significantly different
-    # "Significantly different" = instruments < 50% of financials (meaning we're missing a lot)
-    if financials_total_debt and financials_total_debt > 0:
-        if instruments_total_debt == 0:
-            # No instrument data - use financials
-            total_debt = financials_total_debt
-        elif instruments_total_debt < financials_total_debt * 0.5:
-            # Instruments capture less than 50% of total - use financials
-            total_debt = financials_total_debt
-        else:
-            # Instruments are in the ballpark - use instrument sum for accuracy
-            total_debt = instruments_total_debt
-    else:
-        # No financials - use instruments
-        total_debt = instruments_total_debt
-
-    # ==========================================================================
-    # Build response_company
-    # ==========================================================================
-    response_company = {
-        "ticker": ticker,
-        "name": company.name,
-        "sector": company.sector,
-        "cik": company.cik,
-        "entity_count": len(entities),
-        "debt_instrument_count": len(debt_instruments),
-        "total_debt": total_debt,
-        "as_of_date": filing_date.isoformat() if filing_date else None,
-    }
-
-    # ==========================================================================
-    # Build response_structure (entity tree)
-    # ==========================================================================
-
-    # Identify key entities (issuers and guarantors) - these have known relationships
-    issuer_ids = {d.issuer_id for d in debt_instruments if d.issuer_id}
-    guarantor_ids = set()
-    for debt_id, gids in guarantees_by_debt.items():
-        guarantor_ids.update(gids)
-    key_entity_ids = issuer_ids | guarantor_ids
-
-    # Classify entities by ownership confidence
-    entities_with_known_parent = []  # parent_id is set AND parent is not root, OR entity is key entity
-    entities_with_unknown_parent = []  # parent_id is NULL and not root
-
-    root_entity_ids = {e.id for e in entities if e.is_root}
-
-    for e in entities:
-        if e.is_root:
-            continue
-        if e.parent_id is not None:
-            # Has a parent - check if it's intermediate (not root)
-            parent = entity_by_id.get(e.parent_id)
-            if parent and not parent.is_root:
-                entities_with_known_parent.append(e)
-            elif e.id in key_entity_ids:
-                # Key entity linked to root - this is meaningful
-                entities_with_known_parent.append(e)
-            else:
-                # Non-key entity linked to root - we now set these to NULL
-                entities_with_unknown_parent.append(e)
-        else:
-            # No parent set
-            if e.id in key_entity_ids:
-                entities_with_known_parent.append(e)
-            else:
-                entities_with_unknown_parent.append(e)
-
-    visited_entity_ids = set()
-
-    def build_entity_tree(entity: Entity) -> dict:
-        # Guard against circular parent-child references
-        if entity.id in visited_entity_ids:
-            return None
-        visited_entity_ids.add(entity.id)
-
-        children = [e for e in entities if e.parent_id == entity.id]
-
-        # Get full debt instrument details for this entity
-        entity_debt_instruments = [d for d in debt_instruments if d.issuer_id == entity.id]
-        debt_details = []
-        for d in entity_debt_instruments:
-            guar_ids = guarantees_by_debt.get(d.id, [])
-            guarantor_names = [entity_by_id[g].name for g in guar_ids if g in entity_by_id]
-
-            debt_details.append({
-                "id": str(d.id),
-                "name": d.name,
-                "type": d.instrument_type,
-                "seniority": d.seniority,
-                "security_type": d.security_type,
-                "outstanding": d.outstanding,
-                "principal": d.principal,
-                "currency": d.currency,
-                "rate_type": d.rate_type,
-                "interest_rate": d.interest_rate,
-                "spread_bps": d.spread_bps,
-                "benchmark": d.benchmark,
-                "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-                "guarantor_count": len(guarantor_names),
-                "guarantors": guarantor_names,
-            })
-
-        # Determine ownership confidence for this entity
-        is_key = entity.id in key_entity_ids
-        has_intermediate_parent = (
-            entity.parent_id is not None
-            and entity.parent_id not in root_entity_ids
-        )
-
-        if entity.is_root:
-            ownership_confidence = "root"
-        elif has_intermediate_parent:
-            ownership_confidence = "verified"  # From indenture/credit agreement parsing
-        elif is_key:
-            ownership_confidence = "key_entity"  # Issuer or guarantor
-        else:
-            ownership_confidence = "unknown"  # From Exhibit 21 only
-
-        return {
-            "id": str(entity.id),
-            "name": entity.name,
-            "type": entity.entity_type,
-            "tier": entity.structure_tier,
-            "jurisdiction": entity.jurisdiction,
-            "is_guarantor": entity.is_guarantor,
-            "is_borrower": entity.is_borrower,
-            "is_unrestricted": entity.is_unrestricted,
-            "ownership_pct": float(entity.ownership_pct) if entity.ownership_pct else 100.0,
-            "ownership_confidence": ownership_confidence,
-            "debt_at_entity": {
-                "total": sum(d.outstanding or 0 for d in entity_debt_instruments),
-                "instrument_count": len(entity_debt_instruments),
-                "instruments": debt_details,
-            },
-            "children": [t for t in (build_entity_tree(c) for c in children) if t is not None],
-        }
-
-    # Find root entities (is_root=True, fallback to entities with no parent)
-    root_entities = [e for e in entities if e.is_root]
-    if not root_entities:
-        root_entities = [e for e in entities if e.parent_id is None]
-
-    structure_tree = [t for t in (build_entity_tree(e) for e in root_entities) if t is not None]
-
-    # Build list of entities with unknown parent (for transparency)
-    unknown_parent_list = [
-        {"name": e.name, "jurisdiction": e.jurisdiction, "entity_type": e.entity_type}
-        for e in sorted(entities_with_unknown_parent, key=lambda x: x.name or "")
-    ]
-
-    response_structure = {
-        "company": {"ticker": ticker, "name": company.name, "sector": company.sector},
-        "structure": structure_tree[0] if len(structure_tree) == 1 else {"roots": structure_tree},
-        "summary": {
-            "total_entities": len(entities),
-            "guarantor_count": sum(1 for e in entities if e.is_guarantor),
-            "restricted_count": sum(1 for e in entities if e.is_restricted),
-            "unrestricted_count": sum(1 for e in entities if e.is_unrestricted),
-            "total_debt": total_debt,
-        },
-        "ownership_coverage": {
-            "known_relationships": len(entities_with_known_parent),
-            "unknown_relationships": len(entities_with_unknown_parent),
-            "key_entities": len(key_entity_ids),
-            "coverage_pct": round(
-                len(entities_with_known_parent) / max(len(entities) - 1, 1) * 100, 1
-            ) if len(entities) > 1 else 100.0,
-            "note": "Ownership relationships are only shown where we have evidence from SEC filings (indentures, credit agreements). "
-                    "Entities with unknown parent are subsidiaries listed in Exhibit 21 where the intermediate holding structure is not disclosed."
-        },
-        "other_subsidiaries": {
-            "count": len(unknown_parent_list),
-            "note": "These subsidiaries exist but their parent company within the corporate structure is unknown from public SEC filings.",
-            "entities": unknown_parent_list[:50],  # Limit to 50 for response size
-            "truncated": len(unknown_parent_list) > 50,
-        } if unknown_parent_list else None,
-        "meta": {
-            "as_of_date": filing_date.isoformat() if filing_date else None,
-            "confidence": "high" if len(entities_with_unknown_parent) == 0 else "partial",
-        },
-    }
-
-    # ==========================================================================
-    # Build response_debt
-    # ==========================================================================
-    debt_by_seniority: dict[str, int] = {}
-    debt_list = []
-    for d in debt_instruments:
-        issuer = entity_by_id.get(d.issuer_id)
-        guarantor_ids = guarantees_by_debt.get(d.id, [])
-        guarantor_names = [entity_by_id[g].name for g in guarantor_ids if g in entity_by_id]
-
-        debt_by_seniority[d.seniority] = debt_by_seniority.get(d.seniority, 0) + (d.outstanding or 0)
-
-        debt_list.append({
-            "id": str(d.id),
-            "name": d.name,
-            "type": d.instrument_type,
-            "seniority": d.seniority,
-            "security_type": d.security_type,
-            "issuer": issuer.name if issuer else None,
-            "principal": d.principal,
-            "outstanding": d.outstanding,
-            "currency": d.currency,
-            "rate_type": d.rate_type,
-            "interest_rate": d.interest_rate,
-            "spread_bps": d.spread_bps,
-            "benchmark": d.benchmark,
-            "maturity_date": d.maturity_date.isoformat() if d.maturity_date else None,
-            "guarantor_count": len(guarantor_names),
-            "guarantors": guarantor_names,
-        })
-
-    response_debt = {
-        "company": {"ticker": ticker, "name": company.name},
-        "summary": {
-            "total_debt": total_debt,
-            "debt_by_seniority": debt_by_seniority,
-            "instrument_count": len(debt_instruments),
-            "nearest_maturity": min(
-                (d.maturity_date for d in debt_instruments if d.maturity_date),
-                default=None,
-            ),
-        },
-        "instruments": debt_list,
-        "meta": {"as_of_date": filing_date.isoformat() if filing_date else None},
-    }
-    if response_debt["summary"]["nearest_maturity"]:
-        response_debt["summary"]["nearest_maturity"] = response_debt["summary"]["nearest_maturity"].isoformat()
-
-    # ==========================================================================
-    # Compute ETag
-    # ==========================================================================
-    cache_content = json.dumps(
-        {"structure": response_structure, "debt": response_debt}, sort_keys=True
-    ).encode()
-    etag = hashlib.md5(cache_content).hexdigest()[:16]
-
-    # ==========================================================================
-    # Save to company_cache
-    # ==========================================================================
-    result = await db.execute(
-        select(CompanyCache).where(CompanyCache.company_id == company_id)
-    )
-    cache = result.scalar_one_or_none()
-
-    if cache:
-        cache.response_company = response_company
-        cache.response_structure = response_structure
-        cache.response_debt = response_debt
-        cache.etag = etag
-        cache.computed_at = datetime.utcnow()
-        cache.source_filing_date = filing_date
-        cache.total_debt = total_debt
-        cache.entity_count = len(entities)
-        cache.sector = company.sector
-    else:
-        cache = CompanyCache(
-            company_id=company_id,
-            ticker=ticker,
-            response_company=response_company,
-            response_structure=response_structure,
-            response_debt=response_debt,
-            etag=etag,
-            source_filing_date=filing_date,
-            total_debt=total_debt,
-            entity_count=len(entities),
-            sector=company.sector,
-        )
-        db.add(cache)
-
-    # ==========================================================================
-    # Save to company_metrics
-    # ==========================================================================
-    # total_debt already computed above with financials fallback
-    secured_debt = sum(d.outstanding or 0 for d in debt_instruments if d.seniority == "senior_secured")
-    unsecured_debt = total_debt - secured_debt
-
-    nearest_maturity = min(
-        (d.maturity_date for d in debt_instruments if d.maturity_date),
-        default=None,
-    )
-
-    # Compute flags
-    has_holdco_debt = any(
-        entity_by_id.get(d.issuer_id) and entity_by_id[d.issuer_id].structure_tier == 1
-        for d in debt_instruments
-    )
-    has_opco_debt = any(
-        entity_by_id.get(d.issuer_id) and entity_by_id[d.issuer_id].structure_tier >= 3
-        for d in debt_instruments
-    )
-    has_structural_sub = has_holdco_debt and has_opco_debt
-    has_unrestricted_subs = any(e.is_unrestricted for e in entities)
-    has_floating_rate = any(d.rate_type == "floating" for d in debt_instruments)
-
-    # Maturity profile calculations
-    from datetime import timedelta
-    today = date.today()
-
-    # Debt due in each year bucket
-    debt_due_1yr = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.maturity_date and d.maturity_date <= today + timedelta(days=365)
-    )
-    debt_due_2yr = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.maturity_date and today + timedelta(days=365) < d.maturity_date <= today + timedelta(days=730)
-    )
-    debt_due_3yr = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.maturity_date and today + timedelta(days=730) < d.maturity_date <= today + timedelta(days=1095)
-    )
-
-    # Near-term maturity flag (debt due in next 24 months)
-    has_near_term_maturity = (debt_due_1yr > 0) or (debt_due_2yr > 0)
-
-    # Weighted average maturity (in years)
-    if total_debt > 0:
-        weighted_avg_maturity = sum(
-            (d.outstanding or 0) * max(0, (d.maturity_date - today).days / 365.0)
-            for d in debt_instruments
-            if d.maturity_date and d.outstanding
-        ) / total_debt
-    else:
-        weighted_avg_maturity = None
-
-    # Simple subordination score
-    if has_structural_sub:
-        subordination_risk = "moderate"
-        subordination_score = 5.0
-    elif has_holdco_debt:
-        subordination_risk = "low"
-        subordination_score = 2.0
-    else:
-        subordination_risk = "low"
-        subordination_score = 1.0
-
-    result = await db.execute(
-        select(CompanyMetrics).where(CompanyMetrics.ticker == ticker)
-    )
-    metrics = result.scalar_one_or_none()
-
-    if metrics:
-        metrics.sector = company.sector
-        metrics.industry = company.industry
-        metrics.total_debt = total_debt
-        metrics.secured_debt = secured_debt
-        metrics.unsecured_debt = unsecured_debt
-        metrics.entity_count = len(entities)
-        metrics.guarantor_count = sum(1 for e in entities if e.is_guarantor)
-        metrics.nearest_maturity = nearest_maturity
-        metrics.debt_due_1yr = debt_due_1yr
-        metrics.debt_due_2yr = debt_due_2yr
-        metrics.debt_due_3yr = debt_due_3yr
-        metrics.weighted_avg_maturity = weighted_avg_maturity
-        metrics.has_near_term_maturity = has_near_term_maturity
-        metrics.subordination_risk = subordination_risk
-        metrics.subordination_score = subordination_score
-        metrics.has_holdco_debt = has_holdco_debt
-        metrics.has_opco_debt = has_opco_debt
-        metrics.has_structural_sub = has_structural_sub
-        metrics.has_unrestricted_subs = has_unrestricted_subs
-        metrics.has_floating_rate = has_floating_rate
-    else:
-        metrics = CompanyMetrics(
-            ticker=ticker,
-            company_id=company_id,
-            sector=company.sector,
-            industry=company.industry,
-            total_debt=total_debt,
-            secured_debt=secured_debt,
-            unsecured_debt=unsecured_debt,
-            entity_count=len(entities),
-            guarantor_count=sum(1 for e in entities if e.is_guarantor),
-            nearest_maturity=nearest_maturity,
-            debt_due_1yr=debt_due_1yr,
-            debt_due_2yr=debt_due_2yr,
-            debt_due_3yr=debt_due_3yr,
-            weighted_avg_maturity=weighted_avg_maturity,
-            has_near_term_maturity=has_near_term_maturity,
-            subordination_risk=subordination_risk,
-            subordination_score=subordination_score,
-            has_holdco_debt=has_holdco_debt,
-            has_opco_debt=has_opco_debt,
-            has_structural_sub=has_structural_sub,
-            has_unrestricted_subs=has_unrestricted_subs,
-            has_floating_rate=has_floating_rate,
-        )
-        db.add(metrics)
-
-    await db.flush()
@@ -25,7 +25,7 @@ import structlog
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import async_session_maker
+from app.core.database import job_session_maker
 from app.models import Company, CompanyCache, DebtInstrument
 from app.services.filing_monitor import NewFiling
 
@@ -60,6 +60,17 @@ STEPS_BY_FILING_TYPE: dict[str, list[str]] = {
 }
 
 
+# Cache inputs (see app/services/company_cache.py) each step may change. The
+# cache step rebuilds only the sections depending on these plus whatever the
+# ORM listener recorded, so raw-SQL steps are still covered.
+STEP_CACHE_SOURCES: dict[str, set[str]] = {
+    "financials": {"financials"},
+    "hierarchy": {"entities"},
+    "guarantees": {"guarantees"},
+    "amounts": {"debt"},
+}
+
+
 @dataclass
 class RefreshResult:
     """Tracks the outcome of a filing refresh."""
@@ -128,6 +139,7 @@ class FilingRefreshService:
             filings_content, filing_urls = await self._download_filings(filing)
 
         # Run each step, continuing on failure
+        cache_sources: set[str] = set()
         for step in steps:
             try:
                 logger.info(
@@ -135,7 +147,9 @@ class FilingRefreshService:
                     ticker=filing.ticker,
                     step=step,
                 )
-                await self._run_step(step, filing, filings_content, filing_urls)
+                # A failed step may still have committed some writes
+                cache_sources |= STEP_CACHE_SOURCES.get(step, set())
+                await self._run_step(step, filing, filings_content, filing_urls, cache_sources)
                 result.steps_run.append(step)
                 logger.info(
                     "filing_refresh.step_done",
@@ -180,6 +194,7 @@ class FilingRefreshService:
         filing: NewFiling,
         filings_content: dict[str, str],
         filing_urls: dict[str, str],
+        cache_sources: set[str],
     ) -> None:
         """Dispatch to the correct step handler."""
         handlers = {
@@ -191,8 +206,10 @@ class FilingRefreshService:
             "collateral": self._step_collateral,
             "covenants": self._step_covenants,
             "metrics": self._step_metrics,
-            "cache": self._step_cache,
         }
+        if step == "cache":
+            await self._step_cache(filing, cache_sources)
+            return
         handler = handlers[step]
         await handler(filing, filings_content, filing_urls)
 
@@ -234,7 +251,7 @@ class FilingRefreshService:
             saved_count = 0
             for fin in financials:
                 try:
-                    async with async_session_maker() as session:
+                    async with job_session_maker() as session:
                         result = await save_financials_to_db(
                             session, filing.ticker, fin
                         )
@@ -278,7 +295,7 @@ class FilingRefreshService:
             return
 
         # Extract sections
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             sections_stored = await extract_and_store_sections(
                 db=session,
                 company_id=filing.company_id,
@@ -287,7 +304,7 @@ class FilingRefreshService:
             )
 
         # Link documents to instruments
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             links_created = await link_documents_heuristic(
                 session=session,
                 company_id=filing.company_id,
@@ -324,7 +341,7 @@ class FilingRefreshService:
             run_phase_a,
         )
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             instruments = await get_bullet_instruments_needing_amounts(
                 session, filing.company_id
             )
@@ -403,7 +420,7 @@ class FilingRefreshService:
         """Extract ownership hierarchy from Exhibit 21 (10-K only)."""
         from app.services.hierarchy_extraction import extract_ownership_hierarchy
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             result = await extract_ownership_hierarchy(
                 session=session,
                 company_id=filing.company_id,
@@ -426,7 +443,7 @@ class FilingRefreshService:
         """Extract guarantee relationships."""
         from app.services.guarantee_extraction import extract_guarantees
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             count = await extract_guarantees(
                 session=session,
                 company_id=filing.company_id,
@@ -450,7 +467,7 @@ class FilingRefreshService:
         """Extract collateral for secured debt."""
         from app.services.collateral_extraction import extract_collateral
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             count = await extract_collateral(
                 session=session,
                 company_id=filing.company_id,
@@ -474,7 +491,7 @@ class FilingRefreshService:
         """Extract structured covenant data."""
         from app.services.covenant_extraction import extract_covenants
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             count = await extract_covenants(
                 session=session,
                 company_id=filing.company_id,
@@ -499,7 +516,7 @@ class FilingRefreshService:
         """Recompute credit metrics."""
         from app.services.metrics import recompute_metrics_for_company
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             result = await session.execute(
                 select(Company).where(Company.id == filing.company_id)
             )
@@ -514,22 +531,26 @@ class FilingRefreshService:
             filing.company_id, "metrics", "success", "Metrics recomputed"
         )
 
-    async def _step_cache(
-        self,
-        filing: NewFiling,
-        filings_content: dict[str, str],
-        filing_urls: dict[str, str],
-    ) -> None:
-        """Refresh pre-computed API cache."""
-        from app.services.extraction import refresh_company_cache
+    async def _step_cache(self, filing: NewFiling, sources: set[str]) -> None:
+        """Refresh the pre-computed API cache sections affected by this refresh."""
+        from app.services.company_cache import refresh_company_cache
 
-        async with async_session_maker() as session:
-            await refresh_company_cache(
+        async with job_session_maker() as session:
+            sections = await refresh_company_cache(
                 db=session,
                 company_id=filing.company_id,
                 ticker=filing.ticker,
                 filing_date=filing.filing_date,
+                sources=sources,
             )
+            await session.commit()
+
+        logger.info(
+            "filing_refresh.cache_sections",
+            ticker=filing.ticker,
+            sources=sorted(sources),
+            sections=sorted(sections),
+        )
 
     async def _update_status(
         self,
@@ -541,7 +562,7 @@ class FilingRefreshService:
         """Update extraction status for a step."""
         from app.services.extraction import update_extraction_status
 
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             await update_extraction_status(
                 db=session,
                 company_id=company_id,
@@ -552,7 +573,7 @@ class FilingRefreshService:
 
     async def _update_source_filing_date(self, filing: NewFiling) -> None:
         """Conditionally update source_filing_date (only if newer)."""
-        async with async_session_maker() as session:
+        async with job_session_maker() as session:
             await session.execute(
                 text('''
                     UPDATE company_cache
@@ -7,17 +7,54 @@ Computes derived credit metrics from extracted data:
 - Maturity profile
 - Structural subordination flags
 - Source filing provenance tracking
+
+recompute_metrics_for_company handles one company (filing refresh,
+extraction). recompute_metrics_bulk recomputes the whole universe, or a
+set of companies, in five set-based queries - instrument and entity
+aggregates via GROUP BY ... FILTER, latest financials via DISTINCT ON and
+the TTM windows in one join - and writes the results with batched
+INSERT ... ON CONFLICT upserts. Both share build_metrics, so they produce
+identical values.
 """
 
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Optional
+from typing import Iterable, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Float, and_, any_, cast, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Company, CompanyMetrics, CompanyFinancials, DebtInstrument, Entity
+from app.core.cache import bump_data_version_on_commit
+from app.models import (
+    Company, CompanyMetrics, CompanyFinancials, CompanyTTMFinancials, DebtInstrument, Entity,
+)
+
+# Rows per upsert statement; keeps bind parameters under asyncpg's 32767 limit
+UPSERT_BATCH = 1000
+
+
+@dataclass
+class DebtProfile:
+    """Instrument and entity aggregates for one company (active instruments only)."""
+
+    instrument_debt: int = 0
+    secured_debt: int = 0
+    nearest_maturity: Optional[date] = None
+    debt_due_1yr: int = 0
+    debt_due_2yr: int = 0
+    debt_due_3yr: int = 0
+    # Sum of outstanding x years to maturity, for the weighted average maturity
+    maturity_weighted: float = 0.0
+    has_holdco_debt: bool = False
+    has_opco_debt: bool = False
+    has_floating_rate: bool = False
+    entity_count: int = 0
+    guarantor_count: int = 0
+    has_unrestricted_subs: bool = False
 
 
 async def get_latest_financials(db: AsyncSession, company_id: UUID) -> Optional[CompanyFinancials]:
@@ -35,159 +72,175 @@ async def get_latest_financials(db: AsyncSession, company_id: UUID) -> Optional[
 
 
 async def get_ttm_financials(db: AsyncSession, company_id: UUID) -> list[CompanyFinancials]:
-    """Get trailing 4 quarters of financial data for TTM calculations."""
+    """
+    Get the quarters in the company's trailing window for TTM calculations.
+
+    The window (latest 4 periods, newest first) is the one materialized in
+    company_ttm_financials, so metrics and the TTM API agree on which
+    filings make up the trailing twelve months.
+    """
     result = await db.execute(
         select(CompanyFinancials)
-        .where(CompanyFinancials.company_id == company_id)
+        .join(
+            CompanyTTMFinancials,
+            and_(
+                CompanyTTMFinancials.company_id == CompanyFinancials.company_id,
+                CompanyFinancials.id == any_(CompanyTTMFinancials.quarter_ids),
+            ),
+        )
+        .where(CompanyTTMFinancials.company_id == company_id)
         .order_by(
+            CompanyFinancials.period_end_date.desc(),
             CompanyFinancials.fiscal_year.desc(),
             CompanyFinancials.fiscal_quarter.desc(),
         )
-        .limit(4)
     )
     return list(result.scalars().all())
 
 
-async def recompute_metrics_for_company(
-    db: AsyncSession,
-    company: Company,
-    dry_run: bool = False,
-) -> dict:
-    """
-    Recompute metrics for a single company.
-
-    Uses balance sheet total_debt as primary source for leverage calculations
-    (more accurate than summing extracted instruments). Tracks provenance
-    of all source filings used in TTM calculations.
-
-    Args:
-        db: Database session
-        company: Company object to compute metrics for
-        dry_run: If True, compute but don't save to database
-
-    Returns:
-        Dict of computed metrics
-    """
-    ticker = company.ticker
-    company_id = company.id
-
-    # Get all entities for this company
-    result = await db.execute(
-        select(Entity).where(Entity.company_id == company_id)
-    )
-    entities = list(result.scalars().all())
-
-    # Build entity lookup by ID
+def debt_profile(
+    entities: list[Entity],
+    debt_instruments: list[DebtInstrument],
+    today: date,
+) -> DebtProfile:
+    """Aggregate one company's loaded entities and active instruments."""
     entity_by_id = {e.id: e for e in entities}
-
-    # Get all debt instruments
-    result = await db.execute(
-        select(DebtInstrument).where(
-            DebtInstrument.company_id == company_id,
-            DebtInstrument.is_active == True,
-        )
-    )
-    debt_instruments = list(result.scalars().all())
-
-    # Get latest financials for balance sheet debt
-    latest_financials = await get_latest_financials(db, company_id)
-
-    # Calculate debt totals
-    # Primary: Use balance sheet total_debt (audited, includes all debt)
-    # Fallback: Sum of extracted instruments (may miss some debt)
-    instrument_debt = sum(d.outstanding or 0 for d in debt_instruments)
-    balance_sheet_debt = latest_financials.total_debt if latest_financials and latest_financials.total_debt else None
-
-    # Use balance sheet debt for leverage calculations, instrument sum for breakdowns
-    total_debt = balance_sheet_debt if balance_sheet_debt else instrument_debt
-    debt_source = "balance_sheet" if balance_sheet_debt else "instruments"
-
-    # Track discrepancy for data quality monitoring
-    debt_discrepancy_pct = None
-    if balance_sheet_debt and instrument_debt and balance_sheet_debt > 0:
-        debt_discrepancy_pct = abs(balance_sheet_debt - instrument_debt) / balance_sheet_debt * 100
-
-    # Seniority breakdown still uses instruments (balance sheet doesn't have this detail)
-    secured_debt = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.seniority == "senior_secured"
-    )
-    unsecured_debt = instrument_debt - secured_debt  # Use instrument total for breakdown
-
-    # Nearest maturity
-    nearest_maturity = min(
-        (d.maturity_date for d in debt_instruments if d.maturity_date),
-        default=None,
-    )
-
-    # Maturity profile
-    today = date.today()
-
-    debt_due_1yr = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.maturity_date and d.maturity_date <= today + timedelta(days=365)
-    )
-    debt_due_2yr = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.maturity_date and today + timedelta(days=365) < d.maturity_date <= today + timedelta(days=730)
-    )
-    debt_due_3yr = sum(
-        d.outstanding or 0 for d in debt_instruments
-        if d.maturity_date and today + timedelta(days=730) < d.maturity_date <= today + timedelta(days=1095)
-    )
-
-    has_near_term_maturity = (debt_due_1yr > 0) or (debt_due_2yr > 0)
-
-    # Weighted average maturity
-    if total_debt > 0:
-        weighted_avg_maturity = sum(
+    issuer_tiers = [
+        entity_by_id[d.issuer_id].structure_tier
+        for d in debt_instruments
+        if entity_by_id.get(d.issuer_id)
+    ]
+    return DebtProfile(
+        instrument_debt=sum(d.outstanding or 0 for d in debt_instruments),
+        # Seniority breakdown uses instruments (balance sheet doesn't have this detail)
+        secured_debt=sum(
+            d.outstanding or 0 for d in debt_instruments
+            if d.seniority == "senior_secured"
+        ),
+        nearest_maturity=min(
+            (d.maturity_date for d in debt_instruments if d.maturity_date),
+            default=None,
+        ),
+        debt_due_1yr=sum(
+            d.outstanding or 0 for d in debt_instruments
+            if d.maturity_date and d.maturity_date <= today + timedelta(days=365)
+        ),
+        debt_due_2yr=sum(
+            d.outstanding or 0 for d in debt_instruments
+            if d.maturity_date and today + timedelta(days=365) < d.maturity_date <= today + timedelta(days=730)
+        ),
+        debt_due_3yr=sum(
+            d.outstanding or 0 for d in debt_instruments
+            if d.maturity_date and today + timedelta(days=730) < d.maturity_date <= today + timedelta(days=1095)
+        ),
+        maturity_weighted=sum(
             (d.outstanding or 0) * max(0, (d.maturity_date - today).days / 365.0)
             for d in debt_instruments
             if d.maturity_date and d.outstanding
-        ) / total_debt
-        # Cap at 999.9 years (Numeric(4,1) max value)
-        if weighted_avg_maturity > 999.9:
-            weighted_avg_maturity = 999.9
-    else:
-        weighted_avg_maturity = None
-
-    # Compute flags
-    has_holdco_debt = any(
-        entity_by_id.get(d.issuer_id) and entity_by_id[d.issuer_id].structure_tier == 1
-        for d in debt_instruments
-    )
-    has_opco_debt = any(
-        entity_by_id.get(d.issuer_id) and entity_by_id[d.issuer_id].structure_tier and entity_by_id[d.issuer_id].structure_tier >= 3
-        for d in debt_instruments
+        ),
+        has_holdco_debt=any(tier == 1 for tier in issuer_tiers),
+        has_opco_debt=any(tier and tier >= 3 for tier in issuer_tiers),
+        has_floating_rate=any(d.rate_type == "floating" for d in debt_instruments),
+        entity_count=len(entities),
+        guarantor_count=sum(1 for e in entities if e.is_guarantor),
+        has_unrestricted_subs=any(e.is_unrestricted for e in entities),
     )
-    has_structural_sub = has_holdco_debt and has_opco_debt
-    has_unrestricted_subs = any(e.is_unrestricted for e in entities)
-    has_floating_rate = any(d.rate_type == "floating" for d in debt_instruments)
 
-    # Subordination score
-    if has_structural_sub:
-        subordination_risk = "moderate"
-        subordination_score = Decimal("5.0")
-    elif has_holdco_debt:
-        subordination_risk = "low"
-        subordination_score = Decimal("2.0")
-    else:
-        subordination_risk = "low"
-        subordination_score = Decimal("1.0")
 
-    # Leverage ratios from financials
-    leverage_ratio = None
-    net_leverage_ratio = None
-    interest_coverage = None
-    secured_leverage = None
-    net_debt = None
+async def load_debt_profiles(
+    db: AsyncSession,
+    company_ids: Optional[list[UUID]] = None,
+    today: Optional[date] = None,
+) -> dict[UUID, DebtProfile]:
+    """
+    Aggregate instruments and entities for many companies in two GROUP BY queries.
 
-    # Get TTM financials for EBITDA calculation
-    # Rule: If latest filing is 10-K, use annual figures directly (already TTM)
-    #       If latest filing is 10-Q, sum trailing 4 quarters
-    ttm_financials = await get_ttm_financials(db, company_id)
+    Mirrors debt_profile; companies without entities or active instruments
+    keep the DebtProfile defaults.
+    """
+    today = today or date.today()
+    outstanding = func.coalesce(DebtInstrument.outstanding, 0)
+    matures = DebtInstrument.maturity_date
+
+    def total(condition=None):
+        summed = func.sum(outstanding)
+        return func.coalesce(summed.filter(condition) if condition is not None else summed, 0)
+
+    def any_of(condition):
+        return func.coalesce(func.bool_or(condition), False)
+
+    years_to_maturity = func.greatest(0, cast(matures - today, Float) / 365.0)
+    instruments = (
+        select(
+            DebtInstrument.company_id,
+            total().label("instrument_debt"),
+            total(DebtInstrument.seniority == "senior_secured").label("secured_debt"),
+            func.min(matures).label("nearest_maturity"),
+            total(matures <= today + timedelta(days=365)).label("debt_due_1yr"),
+            total(and_(
+                matures > today + timedelta(days=365), matures <= today + timedelta(days=730),
+            )).label("debt_due_2yr"),
+            total(and_(
+                matures > today + timedelta(days=730), matures <= today + timedelta(days=1095),
+            )).label("debt_due_3yr"),
+            func.coalesce(
+                func.sum(DebtInstrument.outstanding * years_to_maturity).filter(
+                    DebtInstrument.outstanding != 0
+                ),
+                0,
+            ).label("maturity_weighted"),
+            any_of(Entity.structure_tier == 1).label("has_holdco_debt"),
+            any_of(Entity.structure_tier >= 3).label("has_opco_debt"),
+            any_of(DebtInstrument.rate_type == "floating").label("has_floating_rate"),
+        )
+        .outerjoin(Entity, and_(
+            Entity.id == DebtInstrument.issuer_id,
+            Entity.company_id == DebtInstrument.company_id,
+        ))
+        .where(DebtInstrument.is_active == True)
+        .group_by(DebtInstrument.company_id)
+    )
+    entities = (
+        select(
+            Entity.company_id,
+            func.count().label("entity_count"),
+            func.count().filter(Entity.is_guarantor == True).label("guarantor_count"),
+            any_of(Entity.is_unrestricted == True).label("has_unrestricted_subs"),
+        )
+        .group_by(Entity.company_id)
+    )
+    if company_ids is not None:
+        instruments = instruments.where(DebtInstrument.company_id.in_(company_ids))
+        entities = entities.where(Entity.company_id.in_(company_ids))
+
+    profiles: dict[UUID, DebtProfile] = defaultdict(DebtProfile)
+    for row in (await db.execute(instruments)).all():
+        profile = profiles[row.company_id]
+        profile.instrument_debt = int(row.instrument_debt)
+        profile.secured_debt = int(row.secured_debt)
+        profile.nearest_maturity = row.nearest_maturity
+        profile.debt_due_1yr = int(row.debt_due_1yr)
+        profile.debt_due_2yr = int(row.debt_due_2yr)
+        profile.debt_due_3yr = int(row.debt_due_3yr)
+        profile.maturity_weighted = float(row.maturity_weighted)
+        profile.has_holdco_debt = row.has_holdco_debt
+        profile.has_opco_debt = row.has_opco_debt
+        profile.has_floating_rate = row.has_floating_rate
+    for row in (await db.execute(entities)).all():
+        profile = profiles[row.company_id]
+        profile.entity_count = row.entity_count
+        profile.guarantor_count = row.guarantor_count
+        profile.has_unrestricted_subs = row.has_unrestricted_subs
+    return dict(profiles)
+
+
+def _ttm_ebitda(ttm_financials: list[CompanyFinancials]) -> dict:
+    """
+    TTM EBITDA and interest from the trailing window (newest first).
 
-    # Calculate TTM EBITDA
+    Rule: If latest filing is 10-K, use annual figures directly (already TTM)
+          If latest filing is 10-Q, sum trailing 4 quarters
+    """
     ttm_ebitda = 0
     ttm_interest = 0
     quarters_with_ebitda = 0
@@ -267,6 +320,86 @@ async def recompute_metrics_for_company(
                 ttm_ebitda = int(ttm_ebitda * (4 / quarters_with_ebitda))
                 ttm_interest = int(ttm_interest * (4 / quarters_with_ebitda))
 
+    return {
+        "ttm_ebitda": ttm_ebitda,
+        "ttm_interest": ttm_interest,
+        "quarters_with_ebitda": quarters_with_ebitda,
+        "quarters_with_da": quarters_with_da,
+        "ttm_quarters": ttm_quarters,
+        "ttm_filings": ttm_filings,
+        "ebitda_source": ebitda_source,
+    }
+
+
+def build_metrics(
+    company: Company,
+    profile: DebtProfile,
+    latest_financials: Optional[CompanyFinancials],
+    ttm_financials: list[CompanyFinancials],
+) -> dict:
+    """
+    CompanyMetrics values from a company's aggregates and financials.
+
+    Uses balance sheet total_debt as primary source for leverage calculations
+    (more accurate than summing extracted instruments). Tracks provenance
+    of all source filings used in TTM calculations.
+    """
+    # Calculate debt totals
+    # Primary: Use balance sheet total_debt (audited, includes all debt)
+    # Fallback: Sum of extracted instruments (may miss some debt)
+    instrument_debt = profile.instrument_debt
+    balance_sheet_debt = latest_financials.total_debt if latest_financials and latest_financials.total_debt else None
+
+    # Use balance sheet debt for leverage calculations, instrument sum for breakdowns
+    total_debt = balance_sheet_debt if balance_sheet_debt else instrument_debt
+    debt_source = "balance_sheet" if balance_sheet_debt else "instruments"
+
+    # Track discrepancy for data quality monitoring
+    debt_discrepancy_pct = None
+    if balance_sheet_debt and instrument_debt and balance_sheet_debt > 0:
+        debt_discrepancy_pct = abs(balance_sheet_debt - instrument_debt) / balance_sheet_debt * 100
+
+    secured_debt = profile.secured_debt
+    unsecured_debt = instrument_debt - secured_debt  # Use instrument total for breakdown
+
+    has_near_term_maturity = (profile.debt_due_1yr > 0) or (profile.debt_due_2yr > 0)
+
+    # Weighted average maturity
+    if total_debt > 0:
+        weighted_avg_maturity = profile.maturity_weighted / total_debt
+        # Cap at 999.9 years (Numeric(4,1) max value)
+        if weighted_avg_maturity > 999.9:
+            weighted_avg_maturity = 999.9
+    else:
+        weighted_avg_maturity = None
+
+    has_structural_sub = profile.has_holdco_debt and profile.has_opco_debt
+
+    # Subordination score
+    if has_structural_sub:
+        subordination_risk = "moderate"
+        subordination_score = Decimal("5.0")
+    elif profile.has_holdco_debt:
+        subordination_risk = "low"
+        subordination_score = Decimal("2.0")
+    else:
+        subordination_risk = "low"
+        subordination_score = Decimal("1.0")
+
+    # Leverage ratios from financials
+    leverage_ratio = None
+    net_leverage_ratio = None
+    interest_coverage = None
+    secured_leverage = None
+    net_debt = None
+
+    ttm = _ttm_ebitda(ttm_financials)
+    ttm_ebitda = ttm["ttm_ebitda"]
+    ttm_interest = ttm["ttm_interest"]
+    quarters_with_ebitda = ttm["quarters_with_ebitda"]
+    quarters_with_da = ttm["quarters_with_da"]
+    ebitda_source = ttm["ebitda_source"]
+
     # Get cash from latest quarter
     cash = latest_financials.cash_and_equivalents if latest_financials else 0
     cash = cash or 0
@@ -309,7 +442,7 @@ async def recompute_metrics_for_company(
     source_filings = {
         "debt_source": debt_source,
         "ebitda_source": ebitda_source,  # "annual_10k" or "quarterly_sum"
-        "ttm_quarters": ttm_quarters,
+        "ttm_quarters": ttm["ttm_quarters"],
         "ebitda_quarters": quarters_with_ebitda,  # Number of quarters used for EBITDA
         "ebitda_quarters_with_da": quarters_with_da,  # Quarters where D&A was available
         "is_annualized": ebitda_source == "quarterly_sum" and quarters_with_ebitda < 4 and quarters_with_ebitda > 0,
@@ -320,8 +453,8 @@ async def recompute_metrics_for_company(
     if debt_source == "balance_sheet" and latest_financials and latest_financials.source_filing:
         source_filings["debt_filing"] = latest_financials.source_filing
     # Add TTM filing URLs if available
-    if ttm_filings:
-        source_filings["ttm_filings"] = ttm_filings
+    if ttm["ttm_filings"]:
+        source_filings["ttm_filings"] = ttm["ttm_filings"]
     # Track debt discrepancy for data quality
     if debt_discrepancy_pct is not None:
         source_filings["debt_discrepancy_pct"] = round(debt_discrepancy_pct, 1)
@@ -331,10 +464,9 @@ async def recompute_metrics_for_company(
     if total_debt:
         source_filings["total_debt_used"] = total_debt
 
-    # Build metrics dict
-    metrics_data = {
-        "ticker": ticker,
-        "company_id": company_id,
+    return {
+        "ticker": company.ticker,
+        "company_id": company.id,
         "sector": company.sector,
         "industry": company.industry,
         "total_debt": total_debt,
@@ -345,25 +477,73 @@ async def recompute_metrics_for_company(
         "net_leverage_ratio": net_leverage_ratio,
         "interest_coverage": interest_coverage,
         "secured_leverage": secured_leverage,
-        "entity_count": len(entities),
-        "guarantor_count": sum(1 for e in entities if e.is_guarantor),
-        "nearest_maturity": nearest_maturity,
-        "debt_due_1yr": debt_due_1yr,
-        "debt_due_2yr": debt_due_2yr,
-        "debt_due_3yr": debt_due_3yr,
+        "entity_count": profile.entity_count,
+        "guarantor_count": profile.guarantor_count,
+        "nearest_maturity": profile.nearest_maturity,
+        "debt_due_1yr": profile.debt_due_1yr,
+        "debt_due_2yr": profile.debt_due_2yr,
+        "debt_due_3yr": profile.debt_due_3yr,
         "weighted_avg_maturity": weighted_avg_maturity,
         "has_near_term_maturity": has_near_term_maturity,
         "subordination_risk": subordination_risk,
         "subordination_score": subordination_score,
-        "has_holdco_debt": has_holdco_debt,
-        "has_opco_debt": has_opco_debt,
+        "has_holdco_debt": profile.has_holdco_debt,
+        "has_opco_debt": profile.has_opco_debt,
         "has_structural_sub": has_structural_sub,
-        "has_unrestricted_subs": has_unrestricted_subs,
-        "has_floating_rate": has_floating_rate,
+        "has_unrestricted_subs": profile.has_unrestricted_subs,
+        "has_floating_rate": profile.has_floating_rate,
         "is_leveraged_loan": leverage_ratio is not None and leverage_ratio > 4,
         "source_filings": source_filings,
     }
 
+
+async def recompute_metrics_for_company(
+    db: AsyncSession,
+    company: Company,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Recompute metrics for a single company.
+
+    Args:
+        db: Database session
+        company: Company object to compute metrics for
+        dry_run: If True, compute but don't save to database
+
+    Returns:
+        Dict of computed metrics
+    """
+    ticker = company.ticker
+    company_id = company.id
+
+    # Get all entities for this company
+    result = await db.execute(
+        select(Entity).where(Entity.company_id == company_id)
+    )
+    entities = list(result.scalars().all())
+
+    # Get all debt instruments
+    result = await db.execute(
+        select(DebtInstrument).where(
+            DebtInstrument.company_id == company_id,
+            DebtInstrument.is_active == True,
+        )
+    )
+    debt_instruments = list(result.scalars().all())
+
+    # Get latest financials for balance sheet debt
+    latest_financials = await get_latest_financials(db, company_id)
+
+    # Get TTM financials for EBITDA calculation
+    ttm_financials = await get_ttm_financials(db, company_id)
+
+    metrics_data = build_metrics(
+        company,
+        debt_profile(entities, debt_instruments, date.today()),
+        latest_financials,
+        ttm_financials,
+    )
+
     if not dry_run:
         # Get or create metrics record
         result = await db.execute(
@@ -382,10 +562,99 @@ async def recompute_metrics_for_company(
             db.add(metrics)
 
         await db.flush()
+        bump_data_version_on_commit(db, ticker)
 
     return metrics_data
 
 
+async def upsert_company_metrics(db: AsyncSession, rows: list[dict]) -> int:
+    """Insert or update company_metrics rows, UPSERT_BATCH rows per statement."""
+    for start in range(0, len(rows), UPSERT_BATCH):
+        stmt = pg_insert(CompanyMetrics).values(rows[start:start + UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CompanyMetrics.ticker],
+            set_={
+                **{key: stmt.excluded[key] for key in rows[0] if key != "ticker"},
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+    return len(rows)
+
+
+async def recompute_metrics_bulk(
+    db: AsyncSession,
+    company_ids: Optional[Iterable[UUID]] = None,
+    dry_run: bool = False,
+) -> list[dict]:
+    """
+    Recompute metrics for every company (or `company_ids`) in set-based passes.
+
+    Five queries load companies, instrument and entity aggregates, latest
+    financials and TTM windows for all companies at once; the results are
+    upserted in UPSERT_BATCH-row statements. Flushes but doesn't commit.
+
+    Returns the computed metrics dicts, in ticker order.
+    """
+    ids = list(company_ids) if company_ids is not None else None
+
+    companies_query = select(Company).order_by(Company.ticker)
+    latest_query = (
+        select(CompanyFinancials)
+        .distinct(CompanyFinancials.company_id)
+        .order_by(
+            CompanyFinancials.company_id,
+            CompanyFinancials.fiscal_year.desc(),
+            CompanyFinancials.fiscal_quarter.desc(),
+        )
+    )
+    ttm_query = (
+        select(CompanyFinancials)
+        .join(
+            CompanyTTMFinancials,
+            and_(
+                CompanyTTMFinancials.company_id == CompanyFinancials.company_id,
+                CompanyFinancials.id == any_(CompanyTTMFinancials.quarter_ids),
+            ),
+        )
+        .order_by(
+            CompanyFinancials.company_id,
+            CompanyFinancials.period_end_date.desc(),
+            CompanyFinancials.fiscal_year.desc(),
+            CompanyFinancials.fiscal_quarter.desc(),
+        )
+    )
+    if ids is not None:
+        companies_query = companies_query.where(Company.id.in_(ids))
+        latest_query = latest_query.where(CompanyFinancials.company_id.in_(ids))
+        ttm_query = ttm_query.where(CompanyTTMFinancials.company_id.in_(ids))
+
+    companies = list((await db.execute(companies_query)).scalars().all())
+    profiles = await load_debt_profiles(db, ids)
+    latest_by_company = {
+        fin.company_id: fin for fin in (await db.execute(latest_query)).scalars().all()
+    }
+    ttm_by_company: dict[UUID, list[CompanyFinancials]] = defaultdict(list)
+    for fin in (await db.execute(ttm_query)).scalars().all():
+        ttm_by_company[fin.company_id].append(fin)
+
+    rows = [
+        build_metrics(
+            company,
+            profiles.get(company.id, DebtProfile()),
+            latest_by_company.get(company.id),
+            ttm_by_company.get(company.id, []),
+        )
+        for company in companies
+    ]
+
+    if not dry_run and rows:
+        await upsert_company_metrics(db, rows)
+        bump_data_version_on_commit(db)
+
+    return rows
+
+
 # =============================================================================
 # CLI
 # =============================================================================
@@ -395,8 +664,7 @@ if __name__ == "__main__":
     import asyncio
     import sys
 
-    from sqlalchemy import select
-    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.ext.asyncio import create_async_engine
     from sqlalchemy.orm import sessionmaker
 
     # Fix Windows encoding
@@ -444,22 +712,37 @@ if __name__ == "__main__":
         print(f"Processing {len(companies)} companies")
         total = 0
 
-        for company in companies:
-            if not company:
-                continue
-
+        if args.all:
+            # Whole universe in a few set-based queries and batched upserts
             async with async_session() as db:
-                print(f"[{company.ticker}] {company.name}")
-                metrics = await recompute_metrics_for_company(db, company, dry_run=args.dry_run)
-
-                lev = metrics.get('leverage_ratio')
-                cov = metrics.get('interest_coverage')
-                debt = metrics.get('total_debt', 0) or 0
-                print(f"  Debt: ${debt/100/1e9:.2f}B | Leverage: {lev}x | Coverage: {cov}x")
-
+                rows = await recompute_metrics_bulk(
+                    db, [c.id for c in companies], dry_run=args.dry_run
+                )
+                for metrics in rows:
+                    lev = metrics.get('leverage_ratio')
+                    cov = metrics.get('interest_coverage')
+                    debt = metrics.get('total_debt', 0) or 0
+                    print(f"[{metrics['ticker']}] Debt: ${debt/100/1e9:.2f}B | Leverage: {lev}x | Coverage: {cov}x")
                 if not args.dry_run:
                     await db.commit()
-                total += 1
+                total = len(rows)
+        else:
+            for company in companies:
+                if not company:
+                    continue
+
+                async with async_session() as db:
+                    print(f"[{company.ticker}] {company.name}")
+                    metrics = await recompute_metrics_for_company(db, company, dry_run=args.dry_run)
+
+                    lev = metrics.get('leverage_ratio')
+                    cov = metrics.get('interest_coverage')
+                    debt = metrics.get('total_debt', 0) or 0
+                    print(f"  Debt: ${debt/100/1e9:.2f}B | Leverage: {lev}x | Coverage: {cov}x")
+
+                    if not args.dry_run:
+                        await db.commit()
+                    total += 1
 
         print(f"\nProcessed {total} companies")
         await engine.dispose()
@@ -0,0 +1,137 @@
+"""
+Passage Index Service for Document Search.
+
+Splits each DocumentSection into overlapping passages stored in
+document_passages, each with its own tsvector (computed by trigger) and
+character offsets into the section. Document search ranks passages rather
+than whole sections: ts_rank_cd over a 1,500 character window rewards terms
+that actually occur together, and ts_headline only has to scan the winning
+passage.
+
+Passages break on whitespace, and consecutive passages overlap so a phrase
+cut by one boundary is whole in the neighbouring passage.
+"""
+
+import re
+from typing import Iterable, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DocumentPassage, DocumentSection
+
+
+PASSAGE_SIZE = 1500  # characters
+PASSAGE_OVERLAP = 300  # characters shared with the previous passage
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def split_passages(
+    content: str,
+    size: int = PASSAGE_SIZE,
+    overlap: int = PASSAGE_OVERLAP,
+) -> list[tuple[int, int]]:
+    """
+    Split text into overlapping (start, end) spans of at most `size` characters.
+
+    Ends are pulled back to the last whitespace in the second half of the
+    window and starts pushed forward to the next word, so words aren't cut
+    unless a single token is longer than half a passage.
+    """
+    length = len(content)
+    if not content.strip():
+        return []
+    if length <= size:
+        return [(0, length)]
+
+    spans = []
+    start = 0
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            last_space = None
+            for match in _WHITESPACE.finditer(content, start + size // 2, end):
+                last_space = match
+            if last_space:
+                end = last_space.start()
+        spans.append((start, end))
+        if end >= length:
+            break
+
+        next_start = max(end - overlap, start + 1)
+        word_start = _WHITESPACE.search(content, next_start, end)
+        start = word_start.end() if word_start else next_start
+    return spans
+
+
+def passage_rows(section: DocumentSection) -> list[dict]:
+    """Build document_passages rows for one section."""
+    return [
+        {
+            "id": uuid4(),
+            "document_section_id": section.id,
+            "company_id": section.company_id,
+            "passage_index": index,
+            "start_offset": start,
+            "end_offset": end,
+            "content": section.content[start:end],
+        }
+        for index, (start, end) in enumerate(split_passages(section.content or ""))
+    ]
+
+
+async def index_section_passages(db: AsyncSession, sections: Iterable[DocumentSection]) -> int:
+    """
+    Replace the passages of the given sections.
+
+    Flushes but doesn't commit, so passages land in the same transaction as
+    the sections. Returns the number of passages written.
+    """
+    sections = list(sections)
+    if not sections:
+        return 0
+
+    await db.flush()
+    await db.execute(
+        delete(DocumentPassage).where(
+            DocumentPassage.document_section_id.in_([s.id for s in sections])
+        )
+    )
+    rows = [row for section in sections for row in passage_rows(section)]
+    if rows:
+        await db.execute(insert(DocumentPassage), rows)
+    return len(rows)
+
+
+async def index_unindexed_sections(
+    db: AsyncSession,
+    company_id: Optional[UUID] = None,
+    batch_size: int = 100,
+) -> tuple[int, int]:
+    """
+    Index sections that have no passages yet, in batches, committing each.
+
+    Returns (sections indexed, passages written).
+    """
+    section_count = passage_count = 0
+    last_id = None
+    while True:
+        query = select(DocumentSection).where(
+            ~exists().where(DocumentPassage.document_section_id == DocumentSection.id)
+        )
+        if company_id:
+            query = query.where(DocumentSection.company_id == company_id)
+        # Walk by id so blank sections (which never get passages) aren't re-selected
+        if last_id:
+            query = query.where(DocumentSection.id > last_id)
+        sections = (await db.execute(query.order_by(DocumentSection.id).limit(batch_size))).scalars().all()
+        if not sections:
+            break
+
+        last_id = sections[-1].id
+        passage_count += await index_section_passages(db, sections)
+        await db.commit()
+        section_count += len(sections)
+    return section_count, passage_count
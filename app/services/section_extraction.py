@@ -21,6 +21,7 @@ from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Company, DocumentSection
+from app.services.passage_index import index_section_passages
 
 
 # Section type constants
@@ -395,7 +396,7 @@ async def store_sections(
     if not sections:
         return 0
 
-    stored_count = 0
+    stored = []
 
     for section in sections:
         if replace_existing:
@@ -422,10 +423,13 @@ async def store_sections(
             sec_filing_url=section.sec_filing_url,
         )
         db.add(doc_section)
-        stored_count += 1
+        stored.append(doc_section)
+
+    # Split into search passages in the same transaction
+    await index_section_passages(db, stored)
 
     await db.commit()
-    return stored_count
+    return len(stored)
 
 
 async def extract_and_store_sections(
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Build the passage index used by document search.
+
+Splits document sections that have no passages yet into overlapping
+passages (document_passages). New sections are indexed as they are stored
+and migration 037 backfilled the rest; run this after any bulk section load
+that bypasses store_sections.
+
+Usage:
+    python scripts/build_passage_index.py --all
+    python scripts/build_passage_index.py --ticker CHTR
+    python scripts/build_passage_index.py --all --batch-size 500
+"""
+
+from script_utils import (
+    create_base_parser,
+    get_company_by_ticker,
+    get_db_session,
+    print_header,
+    print_summary,
+    run_async,
+)
+
+from app.services.passage_index import index_unindexed_sections
+
+
+async def main():
+    parser = create_base_parser("Split document sections into search passages")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Sections per transaction (default: 100)")
+    args = parser.parse_args()
+
+    if not args.ticker and not args.all:
+        parser.error("Either --ticker or --all is required")
+
+    print_header("BUILD PASSAGE INDEX")
+
+    async with get_db_session() as session:
+        company_id = None
+        if args.ticker:
+            company = await get_company_by_ticker(session, args.ticker.upper())
+            if not company:
+                print(f"Company not found: {args.ticker}")
+                return
+            company_id = company[0]
+
+        sections, passages = await index_unindexed_sections(
+            session, company_id=company_id, batch_size=args.batch_size
+        )
+
+    print_summary({
+        "Sections indexed": sections,
+        "Passages written": passages,
+    })
+
+
+if __name__ == "__main__":
+    run_async(main())
@@ -28,6 +28,7 @@ from app.models import (
     Company, CompanyMetrics, CompanyFinancials, CompanySnapshot,
     Entity, DebtInstrument
 )
+from app.services.change_log import record_company_changes
 
 
 def serialize_for_json(obj):
@@ -186,9 +187,11 @@ async def create_company_snapshot(
         guarantor_count=guarantor_count,
     )
     session.add(snapshot)
+    change_events = await record_company_changes(session, company.id, company.ticker, source="snapshot")
 
     return {
         "status": "created",
+        "change_events": change_events,
         "ticker": company.ticker,
         "entity_count": len(entities_snapshot),
         "debt_count": len(debt_snapshot),
@@ -22,6 +22,7 @@ from script_utils import get_db_session, print_header, run_async
 from app.core.config import get_settings
 from app.models import Company, Entity, DebtInstrument, Guarantee, DocumentSection
 from app.services.extraction import SecApiClient
+from app.services.passage_index import index_section_passages
 from app.services.utils import clean_filing_html, parse_json_robust
 
 
@@ -391,6 +392,7 @@ async def fetch_and_create_guarantors(
                         content_length=len(exhibit_content_raw),
                     )
                     db.add(doc_section)
+                    await index_section_passages(db, [doc_section])
                     stats["exhibit_stored"] = True
                     if verbose:
                         print(f"  [STORED] {exhibit_type} ({len(exhibit_content_raw)} chars)")
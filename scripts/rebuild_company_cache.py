@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Rebuild company_cache and company_metrics for all companies.
+
+Run after changes to the cached response shapes. Companies are rebuilt
+concurrently, each in its own transaction, and keep their current
+source_filing_date.
+
+Usage:
+    python scripts/rebuild_company_cache.py                    # All companies
+    python scripts/rebuild_company_cache.py --ticker AAPL      # Single company
+    python scripts/rebuild_company_cache.py --concurrency 8    # More companies at once
+    python scripts/rebuild_company_cache.py --slowest 20       # Show the 20 slowest
+    python scripts/rebuild_company_cache.py --dirty            # Only sections with changed inputs
+"""
+
+import argparse
+import time
+
+from sqlalchemy import select
+
+from script_utils import (
+    get_db_session,
+    print_header,
+    print_summary,
+    run_async,
+)
+
+from app.core.database import async_session_maker
+from app.models import Company
+from app.services.company_cache import REBUILD_CONCURRENCY, rebuild_company_caches
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild pre-computed company responses")
+    parser.add_argument("--ticker", help="Single ticker to process")
+    parser.add_argument("--concurrency", type=int, default=REBUILD_CONCURRENCY,
+                        help=f"Companies rebuilt at once (default: {REBUILD_CONCURRENCY})")
+    parser.add_argument("--dirty", action="store_true",
+                        help="Only companies with recorded dirty_sources, and only the affected sections")
+    parser.add_argument("--slowest", type=int, default=10, help="Number of slowest companies to list")
+    args = parser.parse_args()
+
+    company_ids = None
+    if args.ticker:
+        async with get_db_session() as db:
+            company_id = (await db.execute(
+                select(Company.id).where(Company.ticker == args.ticker.upper())
+            )).scalar_one_or_none()
+        if not company_id:
+            print(f"Company {args.ticker} not found")
+            return
+        company_ids = [company_id]
+
+    print_header("REBUILD COMPANY CACHE")
+    started = time.perf_counter()
+    timings = await rebuild_company_caches(
+        company_ids,
+        concurrency=args.concurrency,
+        session_maker=async_session_maker,
+        dirty_only=args.dirty,
+    )
+    elapsed = time.perf_counter() - started
+
+    for t in timings:
+        if t["status"] == "error":
+            print(f"  {t['ticker']:6} | ERROR: {t['error']}")
+
+    print(f"\nSlowest {min(args.slowest, len(timings))}:")
+    for t in sorted(timings, key=lambda t: t["seconds"], reverse=True)[:args.slowest]:
+        print(f"  {t['ticker']:6} | {t['seconds']:7.3f}s | {t['db_queries']:3} queries | "
+              f"db {t['db_ms']:8.1f}ms | {','.join(t['sections']) or '-'}")
+
+    print_summary({
+        "companies": len(timings),
+        "errors": sum(1 for t in timings if t["status"] == "error"),
+        "elapsed_seconds": round(elapsed, 1),
+        "sum_of_company_seconds": round(sum(t["seconds"] for t in timings), 1),
+    })
+
+
+if __name__ == "__main__":
+    run_async(main())
@@ -3,7 +3,9 @@
 Recompute CompanyMetrics for all companies in the database.
 
 This script recalculates derived metrics (maturity profile, flags, etc.)
-from existing data without re-running extraction.
+from existing data without re-running extraction. All companies are
+recomputed in bulk (a few set-based queries and batched upserts); a single
+ticker goes through the per-company path.
 
 Usage:
     python scripts/recompute_metrics.py                    # All companies
@@ -12,6 +14,7 @@ Usage:
 """
 
 import argparse
+import time
 
 from sqlalchemy import select
 
@@ -22,7 +25,31 @@ from script_utils import (
 )
 
 from app.models import Company
-from app.services.metrics import recompute_metrics_for_company
+from app.services.metrics import recompute_metrics_bulk, recompute_metrics_for_company
+
+
+def format_metrics(metrics: dict) -> str:
+    total_debt_b = (metrics["total_debt"] or 0) / 100_000_000_000
+    wam = metrics["weighted_avg_maturity"]
+    wam_str = f"{wam:.1f}y" if wam else "N/A"
+    lev = metrics["leverage_ratio"]
+    lev_str = f"{lev:.1f}x" if lev else "N/A"
+    cov = metrics["interest_coverage"]
+    cov_str = f"{cov:.1f}x" if cov else "N/A"
+
+    flags = []
+    if metrics["has_near_term_maturity"]:
+        flags.append("NEAR_MAT")
+    if metrics["has_structural_sub"]:
+        flags.append("STRUCT_SUB")
+    if metrics["has_floating_rate"]:
+        flags.append("FLOAT")
+    if metrics["is_leveraged_loan"]:
+        flags.append("LEV>4x")
+
+    return (f"  {metrics['ticker']:6} | debt: ${total_debt_b:6.1f}B | "
+            f"lev: {lev_str:5} | cov: {cov_str:5} | "
+            f"WAM: {wam_str:5} | {' '.join(flags)}")
 
 
 async def main():
@@ -32,58 +59,31 @@ async def main():
     args = parser.parse_args()
 
     async with get_db_session() as db:
-        # Get companies to process
+        print_header("RECOMPUTE COMPANY METRICS")
+        if args.dry_run:
+            print("(DRY RUN - no changes will be saved)")
+        print()
+
         if args.ticker:
             result = await db.execute(
                 select(Company).where(Company.ticker == args.ticker.upper())
             )
-            companies = list(result.scalars().all())
-            if not companies:
+            company = result.scalar_one_or_none()
+            if not company:
                 print(f"Company {args.ticker} not found")
                 return
+            rows = [await recompute_metrics_for_company(db, company, args.dry_run)]
         else:
-            result = await db.execute(select(Company).order_by(Company.ticker))
-            companies = list(result.scalars().all())
-
-        print_header("RECOMPUTE COMPANY METRICS")
-        print(f"Processing {len(companies)} companies...")
-        if args.dry_run:
-            print("(DRY RUN - no changes will be saved)")
-        print()
+            started = time.perf_counter()
+            rows = await recompute_metrics_bulk(db, dry_run=args.dry_run)
+            print(f"Computed {len(rows)} companies in {time.perf_counter() - started:.1f}s\n")
 
-        for company in companies:
-            try:
-                metrics = await recompute_metrics_for_company(db, company, args.dry_run)
-
-                # Format output
-                total_debt_b = (metrics["total_debt"] or 0) / 100_000_000_000
-                wam = metrics["weighted_avg_maturity"]
-                wam_str = f"{wam:.1f}y" if wam else "N/A"
-                lev = metrics["leverage_ratio"]
-                lev_str = f"{lev:.1f}x" if lev else "N/A"
-                cov = metrics["interest_coverage"]
-                cov_str = f"{cov:.1f}x" if cov else "N/A"
-
-                flags = []
-                if metrics["has_near_term_maturity"]:
-                    flags.append("NEAR_MAT")
-                if metrics["has_structural_sub"]:
-                    flags.append("STRUCT_SUB")
-                if metrics["has_floating_rate"]:
-                    flags.append("FLOAT")
-                if metrics["is_leveraged_loan"]:
-                    flags.append("LEV>4x")
-
-                print(f"  {company.ticker:6} | debt: ${total_debt_b:6.1f}B | "
-                      f"lev: {lev_str:5} | cov: {cov_str:5} | "
-                      f"WAM: {wam_str:5} | {' '.join(flags)}")
-
-            except Exception as e:
-                print(f"  {company.ticker:6} | ERROR: {e}")
+        for metrics in rows:
+            print(format_metrics(metrics))
 
         if not args.dry_run:
             await db.commit()
-            print(f"\nCommitted changes for {len(companies)} companies")
+            print(f"\nCommitted changes for {len(rows)} companies")
         else:
             print(f"\nDry run complete - no changes saved")
 
@@ -28,6 +28,7 @@ load_dotenv()
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import drain_version_bumps
 from app.core.database import async_session_maker
 
 
@@ -242,8 +243,16 @@ async def process_companies(
 # COMMON PATTERNS
 # =============================================================================
 
+async def _run_and_drain(coro):
+    try:
+        return await coro
+    finally:
+        # Post-commit cache version bumps are tasks; asyncio.run() would cancel them
+        await drain_version_bumps()
+
+
 def run_async(coro):
     """Run async function with proper event loop handling."""
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    return asyncio.run(coro)
+    return asyncio.run(_run_and_drain(coro))
@@ -32,8 +32,11 @@ def get_api_client():
     )
 
 
+NO_HISTORY_CODES = ("NO_SNAPSHOT", "NO_CHANGE_LOG")
+
+
 def _is_no_snapshot(response) -> bool:
-    """Check if a 404 response is a NO_SNAPSHOT error."""
+    """Check if a 404 response means no change history (NO_SNAPSHOT / NO_CHANGE_LOG)."""
     if response.status_code != 404:
         return False
     try:
@@ -41,9 +44,8 @@ def _is_no_snapshot(response) -> bool:
         error = data.get("error", {})
         # The API nests the code in the message string or as a top-level code
         return (
-            error.get("code") == "NO_SNAPSHOT"
-            or "NO_SNAPSHOT" in str(error.get("message", ""))
-            or error.get("code") == "not_found" and "NO_SNAPSHOT" in str(error.get("message", ""))
+            error.get("code") in NO_HISTORY_CODES
+            or any(code in str(error.get("message", "")) for code in NO_HISTORY_CODES)
         )
     except Exception:
         return False
@@ -140,7 +142,7 @@ class TestChangesEndpoint:
 
     @pytest.mark.api
     def test_future_date_handled(self):
-        """Future since date returns 404 NO_SNAPSHOT or valid data."""
+        """Future since date returns 404 (no change history) or valid data."""
         with get_api_client() as client:
             response = client.get("/v1/companies/AAPL/changes", params={"since": "2030-01-01"})
             assert response.status_code in (200, 404)
@@ -25,12 +25,12 @@ PRIMITIVE = "/v1/companies/{ticker}/changes"
 
 @pytest.mark.eval
 def test_changes_response_structure(api_client: httpx.Client):
-    """GET CHTR changes, verify top-level keys. Skip if NO_SNAPSHOT."""
+    """GET CHTR changes, verify top-level keys. Skip if no change history."""
     response = api_client.get("/v1/companies/CHTR/changes", params={"since": "2025-01-01"})
 
     if response.status_code == 404:
         data = response.json()
-        if data.get("error", {}).get("code") == "NO_SNAPSHOT":
+        if data.get("error", {}).get("code") in ("NO_SNAPSHOT", "NO_CHANGE_LOG"):
             pytest.skip("No snapshot data available for CHTR")
         pytest.fail(f"Unexpected 404: {data}")
 
@@ -113,7 +113,7 @@ def test_changes_invalid_ticker(api_client: httpx.Client):
     data = response.json()
     error = data.get("error", data.get("detail", {}))
     if isinstance(error, dict):
-        assert error.get("code") in ("NOT_FOUND", "NO_SNAPSHOT", None)
+        assert error.get("code") in ("NOT_FOUND", "NO_SNAPSHOT", "NO_CHANGE_LOG", None)
 
 
 # =============================================================================
@@ -0,0 +1,101 @@
+"""
+Integration tests for the credit ledger's Lua scripts against a live Redis.
+
+Set TEST_REDIS_URL to a disposable Redis; the tests write credits:* keys
+for random user ids and delete them afterwards.
+"""
+
+import pytest
+import sys
+import os
+from decimal import Decimal
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core import credit_ledger
+from app.core.credit_ledger import DIRTY_KEY, deduct_credits, unflushed_credit_usage
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(not os.getenv("TEST_REDIS_URL"), reason="No TEST_REDIS_URL configured"),
+]
+
+
+class Result:
+    def __init__(self, value):
+        self.value = value
+
+    def first(self):
+        return self.value
+
+
+class CreditsRow:
+    """Answers the seed's user_credits read."""
+
+    def __init__(self, remaining, batch_applied=False):
+        self.row = (remaining, batch_applied)
+
+    async def execute(self, query):
+        return Result(self.row)
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    import redis.asyncio as redis
+
+    client = redis.from_url(os.environ["TEST_REDIS_URL"], encoding="utf-8", decode_responses=True)
+
+    async def get_redis():
+        return client
+    monkeypatch.setattr(credit_ledger, "get_redis", get_redis)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def user_id(client):
+    user_id = uuid4()
+    yield user_id
+    await client.delete(
+        credit_ledger._balance_key(user_id),
+        credit_ledger._pending_key(user_id),
+        credit_ledger._flushing_key(user_id),
+    )
+    await client.srem(DIRTY_KEY, str(user_id))
+
+
+class TestLedgerScripts:
+    """Seed, deduct, claim and complete with the real scripts."""
+
+    @pytest.mark.integration
+    async def test_claim_complete_and_reseed(self, client, user_id):
+        keys = [credit_ledger._pending_key(user_id), credit_ledger._flushing_key(user_id), DIRTY_KEY]
+        claim = client.register_script(credit_ledger._CLAIM_LUA)
+        complete = client.register_script(credit_ledger._COMPLETE_LUA)
+
+        assert await deduct_credits(CreditsRow(Decimal("1.00")), user_id, Decimal("0.20")) == (True, Decimal("0.80"))
+        assert await client.sismember(DIRTY_KEY, str(user_id))
+
+        batch, amount = await claim(keys=keys, args=[str(uuid4())])
+        assert amount == "20"
+        # A second claim hands out the same in-flight batch
+        assert await claim(keys=keys, args=[str(uuid4())]) == [batch, "20"]
+
+        # Reseeding mid-flush counts the unapplied batch and new pending amounts
+        await deduct_credits(CreditsRow(Decimal("1.00")), user_id, Decimal("0.05"))
+        await client.delete(credit_ledger._balance_key(user_id))
+        assert await deduct_credits(
+            CreditsRow(Decimal("1.00"), batch_applied=False), user_id, Decimal("0.05")
+        ) == (True, Decimal("0.70"))
+        assert await unflushed_credit_usage(user_id) == Decimal("0.30")
+
+        # Completing clears the batch but keeps the user dirty while pending remains
+        await complete(keys=keys, args=[batch, str(user_id)])
+        assert not await client.exists(credit_ledger._flushing_key(user_id))
+        assert await client.sismember(DIRTY_KEY, str(user_id))
+
+        batch, amount = await claim(keys=keys, args=[str(uuid4())])
+        assert amount == "10"
+        await complete(keys=keys, args=[batch, str(user_id)])
+        assert not await client.sismember(DIRTY_KEY, str(user_id))
@@ -1,17 +1,23 @@
 """
 Unit tests for BatchOperation and BatchRequest Pydantic model validation.
 
-Tests the request validation rules enforced by the batch endpoint models.
+Tests the request validation rules enforced by the batch endpoint models,
+and concurrent execution: de-duplication, result order, the concurrency
+bound, per-operation timings and failure isolation.
 """
 
+import asyncio
 import pytest
 import sys
 import os
+from contextlib import asynccontextmanager
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from fastapi import HTTPException
 from pydantic import ValidationError
-from app.api.primitives import BatchOperation, BatchRequest
+from app.api import primitives
+from app.api.primitives import BATCH_MAX_CONCURRENCY, BatchOperation, BatchRequest, batch_operations
 
 
 class TestBatchOperationModel:
@@ -67,3 +73,102 @@ class TestBatchRequestModel:
         ops = [BatchOperation(primitive="search.companies") for _ in range(10)]
         req = BatchRequest(operations=ops)
         assert len(req.operations) == 10
+
+
+class TestBatchExecution:
+    """Tests for concurrent batch execution in batch_operations."""
+
+    @pytest.fixture
+    def handlers(self, monkeypatch):
+        """Replace the primitive handlers with scripted ones and record calls."""
+        state = {"calls": [], "in_flight": 0, "peak": 0}
+
+        @asynccontextmanager
+        async def session_maker():
+            yield object()
+
+        def scripted(primitive):
+            async def handler(params, db):
+                state["calls"].append((primitive, params))
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                try:
+                    await asyncio.sleep(params.get("sleep", 0))
+                    if params.get("fail") == "http":
+                        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "nope"})
+                    if params.get("fail") == "crash":
+                        raise ValueError("boom")
+                    return {"primitive": primitive, "params": params}
+                finally:
+                    state["in_flight"] -= 1
+            return handler
+
+        monkeypatch.setattr(primitives, "read_session_maker", session_maker)
+        for name, primitive in (
+            ("_batch_search_companies", "search.companies"),
+            ("_batch_search_bonds", "search.bonds"),
+            ("_batch_resolve_bond", "resolve.bond"),
+        ):
+            monkeypatch.setattr(primitives, name, scripted(primitive))
+        return state
+
+    @staticmethod
+    async def _run(*ops):
+        request = BatchRequest(operations=[BatchOperation(primitive=p, params=params) for p, params in ops])
+        return await batch_operations(request=request)
+
+    @pytest.mark.unit
+    async def test_duplicates_run_once(self, handlers):
+        """Identical operations (any key order) run once and point at the first."""
+        response = await self._run(
+            ("search.companies", {"ticker": "AAPL", "limit": 5}),
+            ("search.bonds", {"ticker": "AAPL"}),
+            ("search.companies", {"limit": 5, "ticker": "AAPL"}),
+        )
+        assert len(handlers["calls"]) == 2
+        assert response["meta"]["unique_operations"] == 2
+        timings = response["meta"]["operations"]
+        assert timings[2]["duplicate_of"] == 0
+        assert "duplicate_of" not in timings[0] and "duplicate_of" not in timings[1]
+        assert response["results"][2]["data"] == response["results"][0]["data"]
+        assert response["results"][2]["operation_id"] == 2
+
+    @pytest.mark.unit
+    async def test_request_order_and_bounded_fan_out(self, handlers):
+        """Results keep request order even when later operations finish first."""
+        ops = [("search.bonds", {"n": i, "sleep": 0.01 * (8 - i)}) for i in range(8)]
+        response = await self._run(*ops)
+
+        assert [r["operation_id"] for r in response["results"]] == list(range(8))
+        assert [r["data"]["params"]["n"] for r in response["results"]] == list(range(8))
+        assert handlers["peak"] == BATCH_MAX_CONCURRENCY == 4
+
+    @pytest.mark.unit
+    async def test_per_operation_timings(self, handlers):
+        """meta.operations has one timing per operation with its primitive."""
+        response = await self._run(
+            ("search.companies", {"sleep": 0.02}),
+            ("resolve.bond", {"q": "RIG 8% 2027"}),
+        )
+        timings = response["meta"]["operations"]
+        assert [(t["operation_id"], t["primitive"]) for t in timings] == [
+            (0, "search.companies"), (1, "resolve.bond"),
+        ]
+        assert timings[0]["duration_ms"] >= 20
+        assert all(isinstance(t["duration_ms"], int) for t in timings)
+
+    @pytest.mark.unit
+    async def test_failure_does_not_cancel_others(self, handlers):
+        """HTTP errors, crashes and unknown primitives fail only their own operation."""
+        response = await self._run(
+            ("search.companies", {"fail": "http"}),
+            ("search.bonds", {"sleep": 0.01}),
+            ("resolve.bond", {"fail": "crash"}),
+            ("search.nothing", {}),
+            ("search.companies", {"ticker": "MSFT", "sleep": 0.02}),
+        )
+        statuses = [r["status"] for r in response["results"]]
+        assert statuses == ["error", "success", "error", "error", "success"]
+        errors = [r["error"]["code"] if r["error"] else None for r in response["results"]]
+        assert errors == ["NOT_FOUND", None, "INTERNAL_ERROR", "INVALID_PRIMITIVE", None]
+        assert (response["meta"]["successful"], response["meta"]["failed"]) == (2, 3)
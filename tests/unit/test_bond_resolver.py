@@ -0,0 +1,195 @@
+"""
+Unit tests for the bond resolution index.
+
+Covers free-text parsing (tickers, coupons, years, identifiers), candidate
+selection through the postings, and ranked confidence scoring.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api.bond_resolver import ResolveIndex, build_resolve_entry, parse_resolve_query, resolve_many
+
+
+def _bond(n, ticker, name, rate_bps, maturity, cusip=None, outstanding=1000):
+    d = SimpleNamespace(
+        id=UUID(int=n), name=name, cusip=cusip, isin=None, interest_rate=rate_bps,
+        maturity_date=maturity, seniority="senior_unsecured", outstanding=outstanding,
+    )
+    c = SimpleNamespace(ticker=ticker, name=f"{ticker} Holdings")
+    issuer = SimpleNamespace(name=f"{ticker} Issuer Inc", entity_type="holdco")
+    return build_resolve_entry(d, c, issuer, guarantor_count=2)
+
+
+@pytest.fixture
+def index():
+    return ResolveIndex([
+        _bond(1, "RIG", "8.000% Senior Notes due 2027", 800, date(2027, 2, 1), cusip="893830BD0"),
+        _bond(2, "RIG", "8.750% Senior Secured Notes due 2030", 875, date(2030, 2, 15), cusip="893830BK4"),
+        _bond(3, "RIG", "7.500% Senior Notes due 2027", 750, date(2027, 4, 15)),
+        _bond(4, "CHTR", "8.000% Senior Notes due 2027", 800, date(2027, 6, 1)),
+    ])
+
+
+class TestParseResolveQuery:
+    """Tests for parse_resolve_query."""
+
+    @pytest.mark.unit
+    def test_trader_description(self):
+        """'RIG 8% 2027' yields ticker, coupon and year."""
+        parsed = parse_resolve_query("RIG 8% 2027", known_tickers={"RIG"})
+        assert (parsed.ticker, parsed.coupon_bps, parsed.year) == ("RIG", 800, 2027)
+        assert parsed.ticker_is_hard
+        assert parsed.tokens == set()
+
+    @pytest.mark.unit
+    def test_unknown_first_word_is_a_name_token(self):
+        """A first word that isn't a covered ticker is matched against names."""
+        parsed = parse_resolve_query("Trans 7.5s '27", known_tickers={"RIG"})
+        assert parsed.ticker is None
+        assert (parsed.coupon_bps, parsed.year) == (750, 2027)
+        assert parsed.tokens == {"trans"}
+
+    @pytest.mark.unit
+    def test_bare_decimal_coupon(self):
+        """A bare 4.75 after a ticker is a soft coupon, the usual trader form."""
+        known = {"CHTR", "T", "BA", "F"}
+        cases = {
+            "CHTR 4.75 '30": ("CHTR", 475, 2030),
+            "T 4.35 2033": ("T", 435, 2033),
+            "BA 5.15 05/01/30": ("BA", 515, 2030),
+            "F 4.5 15JAN27": ("F", 450, 2027),
+        }
+        for q, expected in cases.items():
+            parsed = parse_resolve_query(q, known_tickers=known)
+            assert (parsed.ticker, parsed.coupon_bps, parsed.year) == expected, q
+            assert not parsed.coupon_is_hard
+            assert parsed.coupon_tolerance_bps == 25
+
+        # Without a ticker or name a bare number isn't read as a coupon
+        assert parse_resolve_query("4.75 2030", known_tickers=known).coupon_bps is None
+        assert parse_resolve_query("CHTR 45.5 2030", known_tickers=known).coupon_bps is None
+
+    @pytest.mark.unit
+    def test_identifier_shapes(self):
+        """Full CUSIPs are exact; mixed 6-8 char tokens are prefixes."""
+        assert parse_resolve_query("893830BD0").cusip == "893830BD0"
+        assert parse_resolve_query("893830B").cusip_prefix == "893830B"
+        assert parse_resolve_query("US893830BD05").isin == "US893830BD05"
+
+    @pytest.mark.unit
+    def test_month_dates_are_maturities_not_prefixes(self):
+        """15JAN27 / JAN27 are maturity dates, never CUSIP prefixes."""
+        for q in ("F 4.5 15JAN27", "F 4.5% JAN27", "F 15JAN2027"):
+            parsed = parse_resolve_query(q, known_tickers={"F"})
+            assert parsed.cusip_prefix is None
+            assert parsed.year == 2027
+            assert parsed.tokens == set()
+
+    @pytest.mark.unit
+    def test_free_text_prefix_is_soft(self):
+        """Only CUSIP-shaped free-text tokens are prefixes, and they don't filter."""
+        parsed = parse_resolve_query("RIG 893830B 2027", known_tickers={"RIG"})
+        assert parsed.cusip_prefix == "893830B"
+        assert not parsed.prefix_is_hard
+        assert parse_resolve_query(cusip="893830B").prefix_is_hard
+        assert parse_resolve_query("COVID19 bonds").cusip_prefix is None
+
+
+class TestResolveIndex:
+    """Tests for ResolveIndex candidate selection and ranking."""
+
+    @pytest.mark.unit
+    def test_exact_cusip(self, index):
+        """A CUSIP hit is a single match at full confidence."""
+        matches = index.resolve(parse_resolve_query(cusip="893830bd0"), 5)
+        assert len(matches) == 1
+        assert matches[0]["confidence"] == 1.0
+        assert matches[0]["bond"]["guarantor_count"] == 2
+
+    @pytest.mark.unit
+    def test_ranked_fuzzy_match(self, index):
+        """The bond matching every component ranks first; other RIG bonds follow."""
+        query = parse_resolve_query("RIG 8% 2027", known_tickers=index.tickers)
+        matches = index.resolve(query, 5)
+        names = [m["bond"]["name"] for m in matches]
+        assert names[0] == "8.000% Senior Notes due 2027"
+        assert all(m["bond"]["company_ticker"] == "RIG" for m in matches)
+        assert matches[0]["confidence"] == 0.95
+        assert matches[0]["confidence"] > matches[1]["confidence"]
+
+    @pytest.mark.unit
+    def test_exact_mode_filters_coupon(self, index):
+        """In exact mode a parsed coupon must match exactly."""
+        query = parse_resolve_query("RIG 7.5% 2027", match_mode="exact", known_tickers=index.tickers)
+        assert [m["bond"]["id"] for m in index.resolve(query, 5)] == [str(UUID(int=3))]
+
+    @pytest.mark.unit
+    def test_cusip_prefix(self, index):
+        """A partial CUSIP narrows to instruments with that prefix."""
+        matches = index.resolve(parse_resolve_query(cusip="893830B"), 5)
+        assert {m["bond"]["cusip"] for m in matches} == {"893830BD0", "893830BK4"}
+
+    @pytest.mark.unit
+    def test_free_text_prefix_scores_without_filtering(self, index):
+        """A matching free-text prefix ranks its bond first; a wrong one drops nothing."""
+        matches = index.resolve(parse_resolve_query("RIG 893830BK 2030", known_tickers=index.tickers), 5)
+        assert matches[0]["bond"]["cusip"] == "893830BK4"
+        assert "cusip_prefix" in matches[0]["matched_on"]
+
+        matches = index.resolve(parse_resolve_query("RIG 999999X 2027", known_tickers=index.tickers), 5)
+        assert {m["bond"]["id"] for m in matches} == {str(UUID(int=n)) for n in (1, 2, 3)}
+
+    @pytest.mark.unit
+    def test_month_date_maturity_resolves(self):
+        """'F 4.5% 15JAN27' finds the January 2027 bond instead of coming back unmatched."""
+        index = ResolveIndex([
+            _bond(1, "F", "4.500% Notes due 2027", 450, date(2027, 1, 15)),
+            _bond(2, "F", "4.500% Notes due 2032", 450, date(2032, 1, 15)),
+        ])
+        (result,) = resolve_many(index, ["F 4.5% 15JAN27"])
+        assert result["status"] == "matched"
+        assert result["best"]["bond"]["id"] == str(UUID(int=1))
+
+    @pytest.mark.unit
+    def test_name_tokens_without_ticker(self, index):
+        """Name tokens find instruments when no ticker is given."""
+        query = parse_resolve_query("secured 2030", known_tickers=index.tickers)
+        assert index.resolve(query, 1)[0]["bond"]["id"] == str(UUID(int=2))
+
+
+class TestResolveMany:
+    """Tests for resolve_many."""
+
+    @pytest.mark.unit
+    def test_statuses_in_input_order(self, index):
+        """Lines keep input order and get matched/ambiguous/unmatched statuses."""
+        results = resolve_many(index, ["893830BD0", "RIG 8% 2027", "8% 2027", "XYZ 3% 2040"])
+        assert [r["line"] for r in results] == [0, 1, 2, 3]
+        assert [r["status"] for r in results] == ["matched", "matched", "ambiguous", "unmatched"]
+        assert results[0]["best"]["confidence"] == 1.0
+
+    @pytest.mark.unit
+    def test_bare_coupon_picks_the_bond(self):
+        """'CHTR 4.75 '30' matches the 4.75% 2030 rather than any CHTR 2030."""
+        index = ResolveIndex([
+            _bond(1, "CHTR", "4.500% Senior Notes due 2030", 450, date(2030, 8, 15), outstanding=5000),
+            _bond(2, "CHTR", "4.750% Senior Notes due 2030", 475, date(2030, 3, 1)),
+            _bond(3, "CHTR", "5.125% Senior Notes due 2030", 512, date(2030, 5, 1)),
+        ])
+        (result,) = resolve_many(index, ["CHTR 4.75 '30"])
+        assert result["status"] == "matched"
+        assert result["best"]["bond"]["id"] == str(UUID(int=2))
+        assert "coupon" in result["best"]["matched_on"]
+
+    @pytest.mark.unit
+    def test_duplicate_lines_share_matches(self, index):
+        """Normalized duplicates are resolved once."""
+        first, second = resolve_many(index, ["rig 8%  2027", "RIG 8% 2027"])
+        assert first["matches"] is second["matches"]
@@ -0,0 +1,230 @@
+"""
+Unit tests for the company change log.
+
+Covers diffing observed states into events (thresholds, baselines that only
+advance on a recorded move), diffing a snapshot for windows before the log,
+folding an event run into the netted /companies/{ticker}/changes sections and
+paging the /v1/changes feed by commit sequence.
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.primitives import get_changes_feed
+from app.api.primitives_helpers import decode_cursor
+from app.services.change_log import (
+    DEBT_ADDED, DEBT_REMOVED, METRIC_CHANGED, PRICING_MOVED, SNAPSHOT_SECTIONS,
+    diff_states, snapshot_state, summarize_changes,
+)
+
+BOND = {
+    "name": "5.5% Senior Notes due 2030",
+    "cusip": "123456AB1",
+    "instrument_type": "senior_notes",
+    "seniority": "senior_unsecured",
+    "principal": 100_000_000_00,
+    "interest_rate": 550,
+    "maturity_date": "2030-06-01",
+    "issue_date": "2020-06-01",
+}
+METRICS = {"total_debt": 500_000_000_00, "leverage_ratio": 3.0, "subordination_risk": "low"}
+
+
+def _state(debt=None, metrics=None, pricing=None) -> dict:
+    return {"debt": debt or {}, "entities": {}, "metrics": metrics, "pricing": pricing or {}}
+
+
+def _priced(ytm_bps: int) -> dict:
+    return {"name": BOND["name"], "cusip": BOND["cusip"], "ytm_bps": ytm_bps, "price": 98.5}
+
+
+def _events(*events) -> list:
+    return [SimpleNamespace(event_type=t, subject=s, payload=p) for t, s, p in events]
+
+
+class TestDiffStates:
+    """Tests for diff_states."""
+
+    @pytest.mark.unit
+    def test_debt_added_and_removed(self):
+        """New and missing debt ids become events with the response payloads."""
+        events, baseline = diff_states(_state(debt={"old": BOND}), _state(debt={"new": BOND}))
+        by_type = {e["event_type"]: e for e in events}
+        assert by_type[DEBT_ADDED]["payload"]["interest_rate"] == 5.5
+        assert by_type[DEBT_REMOVED]["subject"] == "old"
+        assert set(baseline["debt"]) == {"new"}
+
+    @pytest.mark.unit
+    def test_unchanged_state_has_no_events(self):
+        """Diffing a state against itself records nothing."""
+        state = _state(debt={"a": BOND}, metrics=METRICS, pricing={"a": _priced(600)})
+        events, baseline = diff_states(state, state)
+        assert events == []
+        assert baseline == state
+
+    @pytest.mark.unit
+    def test_small_metric_moves_accumulate(self):
+        """Leverage drift below the threshold keeps the old baseline until it crosses."""
+        events, baseline = diff_states(_state(metrics=METRICS), _state(metrics={**METRICS, "leverage_ratio": 3.3}))
+        assert events == []
+        assert baseline["metrics"]["leverage_ratio"] == 3.0
+
+        events, baseline = diff_states(baseline, _state(metrics={**METRICS, "leverage_ratio": 3.6}))
+        assert [e["event_type"] for e in events] == [METRIC_CHANGED]
+        assert events[0]["payload"]["previous"] == 3.0
+        assert baseline["metrics"]["leverage_ratio"] == 3.6
+
+    @pytest.mark.unit
+    def test_pricing_move_threshold(self):
+        """YTM moves of 50bps or more are recorded against the last reported yield."""
+        previous = _state(pricing={"a": _priced(600)})
+        events, baseline = diff_states(previous, _state(pricing={"a": _priced(640)}), sections=("pricing",))
+        assert events == []
+        assert baseline["pricing"]["a"]["ytm_bps"] == 600
+
+        events, _ = diff_states(baseline, _state(pricing={"a": _priced(655)}), sections=("pricing",))
+        assert events[0]["event_type"] == PRICING_MOVED
+        assert events[0]["payload"]["change_bps"] == 55
+
+    @pytest.mark.unit
+    def test_unlisted_sections_keep_baseline(self):
+        """A pricing-only observation doesn't read debt as removed."""
+        previous = _state(debt={"a": BOND}, pricing={"a": _priced(600)})
+        events, baseline = diff_states(previous, {"pricing": {"a": _priced(600)}}, sections=("pricing",))
+        assert events == []
+        assert baseline["debt"] == {"a": BOND}
+
+
+class TestSnapshotState:
+    """Tests for snapshot_state."""
+
+    @pytest.mark.unit
+    def test_snapshot_diff_against_current(self):
+        """A snapshot's JSON lists diff like a recorded baseline."""
+        snapshot = SimpleNamespace(
+            debt_snapshot=[{"id": "old", **BOND, "outstanding": BOND["principal"]}],
+            entities_snapshot=[{"id": "e1", "name": "Opco LLC", "entity_type": "subsidiary"}],
+            metrics_snapshot={**METRICS, "net_debt": 0},
+        )
+        current = _state(
+            debt={"new": BOND},
+            metrics={**METRICS, "total_debt": METRICS["total_debt"] + 200_000_000_00},
+            pricing={"new": _priced(600)},
+        )
+        events, _ = diff_states(snapshot_state(snapshot), current, SNAPSHOT_SECTIONS)
+        changes = summarize_changes(_events(*((e["event_type"], e["subject"], e["payload"]) for e in events)))
+
+        assert [d["id"] for d in changes["new_debt"]] == ["new"]
+        assert changes["removed_debt"][0]["cusip"] == BOND["cusip"]
+        assert changes["entity_changes"]["removed"] == [{"id": "e1", "name": "Opco LLC", "entity_type": "subsidiary"}]
+        assert [m["metric"] for m in changes["metric_changes"]] == ["total_debt"]
+        assert changes["pricing_changes"] == []
+
+    @pytest.mark.unit
+    def test_empty_snapshot(self):
+        assert snapshot_state(SimpleNamespace(
+            debt_snapshot=None, entities_snapshot=None, metrics_snapshot=None,
+        )) == _state()
+
+
+class TestSummarizeChanges:
+    """Tests for summarize_changes."""
+
+    @pytest.mark.unit
+    def test_added_then_removed_nets_out(self):
+        """Debt added and removed again inside the window is not reported."""
+        changes = summarize_changes(_events(
+            (DEBT_ADDED, "a", {"id": "a"}),
+            (DEBT_REMOVED, "a", {"id": "a"}),
+            (DEBT_ADDED, "b", {"id": "b"}),
+        ))
+        assert changes["new_debt"] == [{"id": "b"}]
+        assert changes["removed_debt"] == []
+
+    @pytest.mark.unit
+    def test_metric_moves_span_the_window(self):
+        """Repeated moves collapse to first previous -> latest current."""
+        changes = summarize_changes(_events(
+            (METRIC_CHANGED, "leverage_ratio", {"metric": "leverage_ratio", "previous": 3.0, "current": 3.6, "change": 0.6}),
+            (METRIC_CHANGED, "leverage_ratio", {"metric": "leverage_ratio", "previous": 3.6, "current": 4.5, "change": 0.9}),
+        ))
+        assert changes["metric_changes"] == [
+            {"metric": "leverage_ratio", "previous": 3.0, "current": 4.5, "change": 1.5}
+        ]
+
+    @pytest.mark.unit
+    def test_pricing_round_trip_nets_out(self):
+        """A yield that moves out and back reports no change."""
+        changes = summarize_changes(_events(
+            (PRICING_MOVED, "a", {"previous_ytm": 6.0, "current_ytm": 6.6, "change_bps": 60}),
+            (PRICING_MOVED, "a", {"previous_ytm": 6.6, "current_ytm": 6.0, "change_bps": -60}),
+        ))
+        assert changes["pricing_changes"] == []
+
+
+SINCE = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+class FeedSession:
+    """Answers the feed page query with canned events and the anchor with a max(seq)."""
+
+    def __init__(self, events, anchor=0):
+        self.events = events
+        self.anchor = anchor
+        self.statements = []
+
+    async def execute(self, query):
+        self.statements.append(query)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.events))
+
+    async def scalar(self, query):
+        self.statements.append(query)
+        return self.anchor
+
+
+def _logged(seq: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=UUID(int=seq), seq=seq, ticker="RIG", event_type=DEBT_ADDED, subject=str(seq),
+        occurred_at=SINCE, source="refresh", payload={},
+    )
+
+
+async def _feed(db, cursor=None, limit=2):
+    return await get_changes_feed(
+        since=SINCE, ticker=None, event_type=None, limit=limit, cursor=cursor, db=db,
+    )
+
+
+class TestChangesFeed:
+    """Tests for the /v1/changes resume cursor."""
+
+    @pytest.mark.unit
+    async def test_pages_by_seq(self):
+        db = FeedSession([_logged(5), _logged(6), _logged(7)])
+        page = await _feed(db)
+        assert [e["subject"] for e in page["data"]] == ["5", "6"]
+        assert page["meta"]["has_more"] is True
+        assert decode_cursor(page["meta"]["next_cursor"], "seq")[0] == 6
+        assert "ORDER BY company_change_events.seq" in str(db.statements[0].compile(dialect=postgresql.dialect()))
+
+    @pytest.mark.unit
+    async def test_last_page_still_has_a_cursor(self):
+        page = await _feed(FeedSession([_logged(7)]))
+        assert page["meta"]["has_more"] is False
+        assert decode_cursor(page["meta"]["next_cursor"], "seq")[0] == 7
+
+    @pytest.mark.unit
+    async def test_empty_page_resumes_from_request_or_anchor(self):
+        first = await _feed(FeedSession([], anchor=41))
+        assert decode_cursor(first["meta"]["next_cursor"], "seq")[0] == 41
+
+        again = await _feed(FeedSession([]), cursor=first["meta"]["next_cursor"])
+        assert again["meta"]["next_cursor"] == first["meta"]["next_cursor"]
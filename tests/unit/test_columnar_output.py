@@ -0,0 +1,82 @@
+"""
+Unit tests for Arrow / Parquet output of the primitives.
+
+Round-trips response records through the columnar writers when pyarrow is
+installed, and checks the 501 answer when it isn't.
+"""
+
+import importlib.util
+import io
+import pytest
+import sys
+import os
+from decimal import Decimal
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import HTTPException
+
+from app.api.primitives_helpers import columnar_table, tabular_response, write_columnar
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+RECORDS = [
+    {"ticker": "RIG", "id": UUID(int=1), "leverage": Decimal("4.25"), "metrics": {"total_debt": 100}},
+    {"ticker": "CHTR", "id": UUID(int=2), "leverage": None, "mixed": "x"},
+]
+
+
+class TestTabularResponse:
+    """Tests for tabular_response dispatch."""
+
+    @pytest.mark.unit
+    def test_csv_is_a_file_download(self):
+        """format=csv keeps the CSV download."""
+        response = tabular_response(RECORDS, "CSV", "companies")
+        assert response.media_type == "text/csv"
+        assert "companies.csv" in response.headers["content-disposition"]
+
+    @pytest.mark.unit
+    @pytest.mark.skipif(HAS_PYARROW, reason="pyarrow is installed")
+    def test_columnar_without_pyarrow_is_501(self):
+        """Without the optional dependency arrow/parquet answer 501."""
+        with pytest.raises(HTTPException) as exc:
+            tabular_response(RECORDS, "parquet", "companies")
+        assert exc.value.status_code == 501
+        assert exc.value.detail["code"] == "FORMAT_UNAVAILABLE"
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+class TestColumnarTable:
+    """Tests for columnar_table and write_columnar."""
+
+    @pytest.mark.unit
+    def test_columns_flattened_and_padded(self):
+        """Nested dicts flatten like CSV; missing keys become nulls."""
+        table = columnar_table(RECORDS)
+        assert table.column_names == ["ticker", "id", "leverage", "metrics_total_debt", "mixed"]
+        assert table.column("metrics_total_debt").to_pylist() == [100, None]
+        assert table.column("id").to_pylist() == [str(UUID(int=1)), str(UUID(int=2))]
+        assert table.column("leverage").to_pylist() == [4.25, None]
+
+    @pytest.mark.unit
+    def test_mixed_column_falls_back_to_strings(self):
+        """A column pyarrow can't type as one kind is written as strings."""
+        table = columnar_table([{"value": 1}, {"value": "n/a"}])
+        assert table.column("value").to_pylist() == ["1", "n/a"]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("format", ["arrow", "parquet"])
+    def test_round_trip(self, format):
+        """Both formats read back to the same table."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = columnar_table(RECORDS)
+        body = write_columnar(table, format)
+        if format == "parquet":
+            restored = pq.read_table(io.BytesIO(body))
+        else:
+            restored = pa.ipc.open_stream(body).read_all()
+        assert restored.equals(table)
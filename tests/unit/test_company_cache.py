@@ -0,0 +1,311 @@
+"""
+Unit tests for the company_cache builder.
+
+Builds responses from plain row objects and checks the entity tree, the
+total_debt fallback, metrics flags, dirty-section rebuilds, the change
+tracking listener and the bounded-concurrency rebuild.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.services import company_cache
+from app.services.company_cache import (
+    CompanyCacheData,
+    build_company_responses,
+    compute_company_metrics,
+    compute_total_debt,
+    rebuild_company_caches,
+    refresh_company_cache,
+    response_etag,
+    sections_for_sources,
+)
+
+
+def _id(n: int) -> UUID:
+    return UUID(int=n)
+
+
+def _entity(n, name, parent=None, is_root=False, tier=None, is_guarantor=False):
+    return SimpleNamespace(
+        id=_id(n), name=name, parent_id=_id(parent) if parent else None,
+        entity_type="subsidiary", jurisdiction="Delaware", structure_tier=tier,
+        ownership_pct=None, is_root=is_root, is_guarantor=is_guarantor,
+        is_borrower=False, is_restricted=True, is_unrestricted=False,
+    )
+
+
+def _debt(n, issuer, outstanding, maturity=None, seniority="senior_unsecured"):
+    return SimpleNamespace(
+        id=_id(n), name=f"Note {n}", issuer_id=_id(issuer),
+        instrument_type="senior_notes", seniority=seniority, security_type=None,
+        outstanding=outstanding, principal=outstanding, currency="USD", rate_type="fixed",
+        interest_rate=500, spread_bps=None, benchmark=None, maturity_date=maturity,
+    )
+
+
+@pytest.fixture
+def data():
+    #   1 Parent Inc (root, issuer of note 100)
+    #   ├── 2 Beta OpCo (guarantor of note 100, issuer of note 101)
+    #   │   └── 4 Delta LLC
+    #   └── 3 Alpha Finco
+    #   5 Orphan Sub (no parent)
+    entities = [
+        _entity(1, "Parent Inc", is_root=True, tier=1),
+        _entity(2, "Beta OpCo", parent=1, tier=3, is_guarantor=True),
+        _entity(3, "Alpha Finco", parent=1),
+        _entity(4, "Delta LLC", parent=2),
+        _entity(5, "Orphan Sub"),
+    ]
+    debts = [
+        _debt(100, 1, 1000, date(2030, 1, 1), seniority="senior_secured"),
+        _debt(101, 2, 500, date(2028, 6, 1)),
+    ]
+    return CompanyCacheData(
+        company=SimpleNamespace(name="Parent Inc", sector="Industrials", industry=None, cik="1"),
+        entities=entities,
+        debt_instruments=debts,
+        guarantees_by_debt={_id(100): [_id(2)]},
+    )
+
+
+class TestBuildCompanyResponses:
+    """Tests for build_company_responses."""
+
+    @pytest.mark.unit
+    def test_tree_from_indexes(self, data):
+        """Children and per-entity instruments come from the parent/issuer indexes."""
+        responses = build_company_responses(data, "PRNT", date(2025, 3, 1))
+        root = responses["response_structure"]["structure"]
+
+        assert root["name"] == "Parent Inc"
+        assert root["ownership_confidence"] == "root"
+        assert [c["name"] for c in root["children"]] == ["Beta OpCo", "Alpha Finco"]
+        beta = root["children"][0]
+        assert beta["ownership_confidence"] == "key_entity"
+        assert [c["name"] for c in beta["children"]] == ["Delta LLC"]
+        assert beta["children"][0]["ownership_confidence"] == "verified"
+        assert root["debt_at_entity"]["instruments"][0]["guarantors"] == ["Beta OpCo"]
+        assert beta["debt_at_entity"]["total"] == 500
+
+        coverage = responses["response_structure"]["ownership_coverage"]
+        assert coverage["key_entities"] == 2
+        assert responses["response_structure"]["other_subsidiaries"]["count"] == 2
+        assert responses["response_debt"]["summary"]["nearest_maturity"] == "2028-06-01"
+        assert responses["response_company"]["as_of_date"] == "2025-03-01"
+
+    @pytest.mark.unit
+    def test_cycle_is_cut(self, data):
+        """A parent cycle back to the root is cut instead of recursing forever."""
+        data.entities[0].parent_id = _id(4)  # Parent -> Beta -> Delta -> Parent
+        root = build_company_responses(data, "PRNT")["response_structure"]["structure"]
+        delta = root["children"][0]["children"][0]
+        assert delta["name"] == "Delta LLC"
+        assert delta["children"] == []
+
+    @pytest.mark.unit
+    def test_etag_is_stable(self, data):
+        assert build_company_responses(data, "PRNT")["etag"] == build_company_responses(data, "PRNT")["etag"]
+
+
+class TestTotalDebtAndMetrics:
+    """Tests for the total_debt fallback and metrics values."""
+
+    @pytest.mark.unit
+    def test_total_debt_fallback(self):
+        assert compute_total_debt(0, 1000) == 1000
+        assert compute_total_debt(400, 1000) == 1000
+        assert compute_total_debt(600, 1000) == 600
+        assert compute_total_debt(600, None) == 600
+
+    @pytest.mark.unit
+    def test_metrics_flags(self, data):
+        metrics = compute_company_metrics(data, 1500, today=date(2027, 1, 1))
+        assert metrics["secured_debt"] == 1000
+        assert metrics["unsecured_debt"] == 500
+        assert metrics["has_structural_sub"] is True
+        assert metrics["debt_due_2yr"] == 500
+        assert metrics["has_near_term_maturity"] is True
+        assert metrics["nearest_maturity"] == date(2028, 6, 1)
+
+
+class Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one(self):
+        return self.value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.value)
+
+    def __iter__(self):
+        return iter(self.value)
+
+
+class ScriptedSession:
+    """Answers execute() calls in order with canned results."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.added = []
+        self.info = {}
+
+    async def execute(self, query):
+        return Result(self.results.pop(0))
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        pass
+
+
+@pytest.fixture
+def no_side_effects(monkeypatch):
+    async def record_company_changes(*args, **kwargs):
+        return 0
+    monkeypatch.setattr(company_cache, "record_company_changes", record_company_changes)
+    monkeypatch.setattr(company_cache, "bump_data_version_on_commit", lambda *args: None)
+    monkeypatch.setattr(company_cache, "bump_entity_graph_version_on_commit", lambda *args: None)
+
+
+def _cached(data, dirty_sources=None):
+    responses = build_company_responses(data, "PRNT", date(2025, 3, 1))
+    return SimpleNamespace(
+        **{k: v for k, v in responses.items() if k.startswith("response_")},
+        etag=responses["etag"], total_debt=responses["total_debt"],
+        source_filing_date=date(2025, 3, 1), dirty_sources=dirty_sources,
+        entity_count=len(data.entities), sector="Industrials", computed_at=None,
+    )
+
+
+def _load_results(data, financials=None):
+    guarantees = [(debt_id, g) for debt_id, gids in data.guarantees_by_debt.items() for g in gids]
+    return [data.company, data.entities, data.debt_instruments, financials, guarantees]
+
+
+class TestDirtySections:
+    """Tests for incremental, dirty-section rebuilds."""
+
+    @pytest.mark.unit
+    def test_section_dependencies(self):
+        assert sections_for_sources({"guarantees"}) == {"structure", "debt"}
+        assert sections_for_sources({"entities"}) == {"company", "structure", "debt", "metrics"}
+        assert sections_for_sources({"filing"}) == {"company", "structure", "debt"}
+        # Financials only count once they move total_debt; pricing feeds nothing
+        assert sections_for_sources({"financials", "pricing"}) == set()
+
+    @pytest.mark.unit
+    async def test_guarantee_change_rebuilds_structure_and_debt_only(self, data, no_side_effects):
+        """The company header and metrics are left alone; the ETag follows the new sections."""
+        cache = _cached(data, dirty_sources={"guarantees": True})
+        header = cache.response_company
+        data.guarantees_by_debt[_id(101)] = [_id(3)]
+        db = ScriptedSession(cache, *_load_results(data))
+
+        sections = await refresh_company_cache(db, _id(1000), "PRNT", sources=())
+
+        assert sections == {"structure", "debt"}
+        assert cache.response_company is header
+        assert cache.response_debt["instruments"][1]["guarantors"] == ["Alpha Finco"]
+        assert cache.etag == response_etag(cache.response_structure, cache.response_debt)
+        assert cache.dirty_sources is None
+        assert db.results == [] and db.added == []
+
+    @pytest.mark.unit
+    async def test_pricing_and_unchanged_financials_rebuild_nothing(self, data, no_side_effects):
+        cache = _cached(data, dirty_sources={"pricing": True})
+        db = ScriptedSession(cache)
+        assert await refresh_company_cache(db, _id(1000), "PRNT", sources=()) == set()
+        assert cache.dirty_sources is None
+
+        # Instruments (1500) cover more than half of reported debt: total_debt stays put
+        cache.dirty_sources = {"financials": True}
+        db = ScriptedSession(cache, *_load_results(data, SimpleNamespace(total_debt=2000)))
+        assert await refresh_company_cache(db, _id(1000), "PRNT", sources=()) == set()
+
+        # Instruments cover less than half: total_debt moves and every section follows
+        cache.dirty_sources = {"financials": True}
+        db = ScriptedSession(cache, *_load_results(data, SimpleNamespace(total_debt=9000)), None)
+        assert await refresh_company_cache(db, _id(1000), "PRNT", sources=()) == {"company", "structure", "debt", "metrics"}
+        assert cache.response_company["total_debt"] == 9000
+
+    @pytest.mark.unit
+    async def test_new_filing_date_rebuilds_responses(self, data, no_side_effects):
+        cache = _cached(data)
+        db = ScriptedSession(cache, *_load_results(data))
+        sections = await refresh_company_cache(db, _id(1000), "PRNT", date(2025, 8, 1), sources=())
+        assert sections == {"company", "structure", "debt"}
+        assert cache.response_debt["meta"]["as_of_date"] == "2025-08-01"
+
+    @pytest.mark.unit
+    def test_listener_collects_sources_by_company(self):
+        """Flushed rows are grouped into pending sources per company or entity."""
+        session = SimpleNamespace(
+            info={},
+            new=[SimpleNamespace(__tablename__="guarantees", guarantor_id=_id(2))],
+            dirty=[SimpleNamespace(__tablename__="company_financials", company_id=_id(1000))],
+            deleted=[SimpleNamespace(__tablename__="bond_pricing", debt_instrument_id=_id(100))],
+        )
+        company_cache._collect_company_cache_writes(session, None)
+        pending = session.info[company_cache._PENDING_DIRTY_KEY]
+        assert pending["companies"] == {_id(1000): {"financials"}}
+        assert pending["entities"] == {_id(2): {"guarantees"}}
+
+
+class FakeSession:
+    def __init__(self, companies):
+        self.companies = companies
+
+    async def execute(self, query):
+        return SimpleNamespace(all=lambda: self.companies)
+
+    async def commit(self):
+        pass
+
+
+class TestRebuildCompanyCaches:
+    """Tests for rebuild_company_caches."""
+
+    @pytest.mark.unit
+    async def test_bounded_concurrency_and_timings(self, monkeypatch):
+        """At most `concurrency` companies rebuild at once; failures are reported per company."""
+        companies = [(_id(i), f"T{i}", None) for i in range(10)]
+        in_flight = 0
+        peak = 0
+
+        async def refresh(db, company_id, ticker, filing_date=None, sources=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if ticker == "T3":
+                raise ValueError("bad data")
+            return {"company"}
+
+        @asynccontextmanager
+        async def session_maker():
+            yield FakeSession(companies)
+
+        monkeypatch.setattr(company_cache, "refresh_company_cache", refresh)
+        timings = await rebuild_company_caches(concurrency=3, session_maker=session_maker)
+
+        assert peak == 3
+        assert [t["ticker"] for t in timings] == [f"T{i}" for i in range(10)]
+        assert [t["ticker"] for t in timings if t["status"] == "error"] == ["T3"]
+        assert all(t["seconds"] >= 0.01 and "db_queries" in t for t in timings)
+        assert timings[0]["sections"] == ["company"]
@@ -0,0 +1,353 @@
+"""
+Unit tests for the Redis credit ledger.
+
+The Lua scripts themselves run against a live Redis in
+tests/integration/test_credit_ledger_redis.py. These tests cover cent
+conversion, the database fallback, batch idempotency, and the
+seed/claim/complete sequencing against an in-memory Redis whose scripts
+are Python ports of the Lua.
+"""
+
+import pytest
+import sys
+import os
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.dialects import postgresql
+
+from app.core import auth, credit_ledger
+from app.core.auth import _deduct_credits_in_db, check_and_deduct_credits
+from app.core.credit_ledger import (
+    _apply_batch,
+    deduct_credits,
+    flush_credit_ledger,
+    from_cents,
+    to_cents,
+    unflushed_credit_usage,
+)
+from app.core.principal import Principal
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    async def get_redis():
+        return None
+    monkeypatch.setattr(credit_ledger, "get_redis", get_redis)
+
+
+class TestCents:
+    """Tests for cent conversion."""
+
+    @pytest.mark.unit
+    def test_round_trip(self):
+        """Endpoint costs survive conversion to integer cents and back."""
+        for cost in ("0.05", "0.10", "0.15", "1234.56"):
+            assert from_cents(to_cents(Decimal(cost))) == Decimal(cost)
+
+    @pytest.mark.unit
+    def test_sub_cent_amounts_round_half_up(self):
+        """Ledger balances are whole cents, like user_credits."""
+        assert to_cents(Decimal("0.005")) == 1
+        assert to_cents(Decimal("0.004")) == 0
+
+
+class TestLedgerUnavailable:
+    """Tests for behaviour without Redis."""
+
+    @pytest.mark.unit
+    async def test_deduct_defers_to_database(self, no_redis):
+        """None tells the caller to deduct in the database."""
+        assert await deduct_credits(None, uuid4(), Decimal("0.05")) is None
+
+    @pytest.mark.unit
+    async def test_no_unflushed_usage(self, no_redis):
+        """Displayed balances are the database balances."""
+        assert await unflushed_credit_usage(uuid4()) == Decimal("0")
+
+    @pytest.mark.unit
+    async def test_unlimited_tiers_skip_the_ledger(self, monkeypatch):
+        """Pro and Business are never charged per call."""
+        async def fail(*args, **kwargs):
+            raise AssertionError("ledger should not be called")
+        monkeypatch.setattr("app.core.auth.deduct_credits", fail)
+
+        principal = Principal(id=uuid4(), api_key_hash="h", tier="pro", rate_limit_per_minute=100)
+        assert await check_and_deduct_credits(None, principal, "/v1/companies", Decimal("0.05")) == (True, None)
+
+
+class Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def first(self):
+        return self.value
+
+
+class ScriptedSession:
+    """Answers execute() calls with canned results (a callable gets the statement)."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        value = self.results.pop(0)
+        return Result(value(statement) if callable(value) else value)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeRedis:
+    """Strings, hashes and sets in dicts; registered scripts are ports of the ledger's Lua."""
+
+    def __init__(self):
+        self.strings = {}
+        self.hashes = {}
+        self.sets = {}
+
+    def register_script(self, lua):
+        impl = {
+            credit_ledger._DEDUCT_LUA: self._deduct,
+            credit_ledger._SEED_LUA: self._seed,
+            credit_ledger._CLAIM_LUA: self._claim,
+            credit_ledger._COMPLETE_LUA: self._complete,
+        }[lua]
+
+        async def run(keys, args):
+            return impl(keys, [str(a) for a in args])
+        return run
+
+    def _int(self, key):
+        return int(self.strings.get(key, "0"))
+
+    def _deduct(self, keys, args):
+        if keys[0] not in self.strings:
+            return [0, 0]
+        balance, cost = self._int(keys[0]), int(args[0])
+        if balance < cost:
+            return [-1, balance]
+        self.strings[keys[0]] = str(balance - cost)
+        self.strings[keys[1]] = str(self._int(keys[1]) + cost)
+        self.sets.setdefault(keys[2], set()).add(args[1])
+        return [1, balance - cost]
+
+    def _seed(self, keys, args):
+        if keys[0] in self.strings:
+            return self._int(keys[0])
+        batch = self.hashes.get(keys[2], {}).get("batch", "")
+        if batch != args[1]:
+            return None
+        unflushed = self._int(keys[1])
+        if batch and args[2] == "0":
+            unflushed += int(self.hashes[keys[2]]["amount"])
+        self.strings[keys[0]] = str(int(args[0]) - unflushed)
+        return int(args[0]) - unflushed
+
+    def _claim(self, keys, args):
+        flushing = self.hashes.get(keys[1])
+        if flushing:
+            return [flushing["batch"], flushing["amount"]]
+        amount = self._int(keys[0])
+        if amount <= 0:
+            return None
+        self.strings[keys[0]] = "0"
+        self.hashes[keys[1]] = {"batch": args[0], "amount": str(amount)}
+        return [args[0], str(amount)]
+
+    def _complete(self, keys, args):
+        if args[0] and self.hashes.get(keys[1], {}).get("batch") == args[0]:
+            del self.hashes[keys[1]]
+        if keys[1] not in self.hashes and self._int(keys[0]) <= 0:
+            self.strings.pop(keys[0], None)
+            self.sets.get(keys[2], set()).discard(args[1])
+        return 1
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.reads = []
+
+    def get(self, key):
+        self.reads.append(lambda: self.client.strings.get(key))
+
+    def hget(self, key, field):
+        self.reads.append(lambda: self.client.hashes.get(key, {}).get(field))
+
+    async def execute(self):
+        return [read() for read in self.reads]
+
+
+@pytest.fixture(autouse=True)
+def no_failed_invalidations():
+    credit_ledger._failed_invalidations.clear()
+    yield
+    credit_ledger._failed_invalidations.clear()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+
+    async def get_redis():
+        return client
+    monkeypatch.setattr(credit_ledger, "get_redis", get_redis)
+    return client
+
+
+def _job_sessions(monkeypatch, *sessions):
+    queue = list(sessions)
+
+    @asynccontextmanager
+    async def session_maker():
+        yield queue.pop(0)
+    monkeypatch.setattr(credit_ledger, "job_session_maker", session_maker)
+
+
+class TestApplyBatch:
+    """Tests for _apply_batch."""
+
+    @pytest.mark.unit
+    async def test_batch_applies_once(self):
+        """A batch already in credit_ledger_flushes doesn't touch user_credits again."""
+        user_id, batch_id = uuid4(), uuid4()
+        db = ScriptedSession(batch_id, None)
+        assert await _apply_batch(db, user_id, batch_id, 15) is True
+        assert len(db.statements) == 2
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (batch_id) DO NOTHING" in sql
+
+        retry = ScriptedSession(None)
+        assert await _apply_batch(retry, user_id, batch_id, 15) is False
+        assert len(retry.statements) == 1
+
+
+class TestLedgerSequencing:
+    """Seed, deduct, claim and complete against the in-memory Redis."""
+
+    @pytest.mark.unit
+    async def test_deduct_then_flush(self, fake_redis, monkeypatch):
+        """Deductions seed from user_credits, accumulate as pending and flush as one batch."""
+        user_id = uuid4()
+        db = ScriptedSession((Decimal("1.00"),))
+        assert await deduct_credits(db, user_id, Decimal("0.10")) == (True, Decimal("0.90"))
+        assert await deduct_credits(db, user_id, Decimal("0.05")) == (True, Decimal("0.85"))
+        assert await deduct_credits(db, user_id, Decimal("5.00")) == (False, Decimal("0.85"))
+        assert await unflushed_credit_usage(user_id) == Decimal("0.15")
+
+        session = ScriptedSession(uuid4(), None)
+        _job_sessions(monkeypatch, session)
+        stats = await flush_credit_ledger()
+
+        assert stats["batches_applied"] == 1 and session.commits == 1
+        assert session.statements[0].compile().params["amount"] == Decimal("0.15")
+        assert credit_ledger._pending_key(user_id) not in fake_redis.strings
+        assert fake_redis.hashes == {}
+        assert fake_redis.sets[credit_ledger.DIRTY_KEY] == set()
+
+    @pytest.mark.unit
+    async def test_interrupted_flush_retries_same_batch(self, fake_redis, monkeypatch):
+        """A batch left in flight is counted on reseed and retried under the same id."""
+        user_id = uuid4()
+        await deduct_credits(ScriptedSession((Decimal("1.00"),)), user_id, Decimal("0.20"))
+
+        def database_down(statement):
+            raise RuntimeError("db down")
+
+        failing = ScriptedSession(database_down)
+        _job_sessions(monkeypatch, failing)
+        assert (await flush_credit_ledger())["errors"] == 1
+        batch = fake_redis.hashes[credit_ledger._flushing_key(user_id)]["batch"]
+
+        # Balance expires; user_credits doesn't reflect the in-flight batch yet
+        fake_redis.strings.pop(credit_ledger._balance_key(user_id))
+        reseed = ScriptedSession((Decimal("1.00"), False))
+        assert await deduct_credits(reseed, user_id, Decimal("0.05")) == (True, Decimal("0.75"))
+
+        # The retry claims the same batch; the new 0.05 waits for the next flush
+        session = ScriptedSession(lambda stmt: UUID(batch), None)
+        _job_sessions(monkeypatch, session)
+        assert (await flush_credit_ledger())["batches_applied"] == 1
+        assert str(session.statements[0].compile().params["batch_id"]) == batch
+        assert session.statements[0].compile().params["amount"] == Decimal("0.20")
+        assert fake_redis.strings[credit_ledger._pending_key(user_id)] == "5"
+        assert await unflushed_credit_usage(user_id) == Decimal("0.05")
+
+
+class TestDatabaseFallback:
+    """Tests for _deduct_credits_in_db."""
+
+    @pytest.fixture
+    def invalidated(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(auth, "schedule_credit_balance_invalidation", calls.append)
+
+        async def unflushed(user_id):
+            return Decimal("0.40")
+        monkeypatch.setattr(auth, "unflushed_credit_usage", unflushed)
+        return calls
+
+    @pytest.mark.unit
+    async def test_unflushed_usage_counts_against_balance(self, invalidated):
+        user_id = uuid4()
+        db = ScriptedSession(None, Decimal("0.50"))
+        assert await _deduct_credits_in_db(db, user_id, Decimal("0.15")) == (False, Decimal("0.10"))
+        assert invalidated == []
+
+    @pytest.mark.unit
+    async def test_deduction_invalidates_ledger_balance(self, invalidated):
+        user_id = uuid4()
+        db = ScriptedSession(Decimal("1.00"))
+        assert await _deduct_credits_in_db(db, user_id, Decimal("0.15")) == (True, Decimal("0.60"))
+        assert db.commits == 1
+        assert invalidated == [[user_id]]
+
+    @pytest.mark.unit
+    async def test_failed_invalidation_is_retried_by_flush(self, monkeypatch):
+        """Invalidations that fail while Redis errors are retried on the next flush."""
+        client = FakeRedis()
+        client.strings[credit_ledger._balance_key("u1")] = "100"
+
+        async def broken_delete(*keys):
+            raise ConnectionError("redis down")
+
+        async def get_redis():
+            return client
+        monkeypatch.setattr(credit_ledger, "get_redis", get_redis)
+        monkeypatch.setattr(client, "delete", broken_delete)
+        await credit_ledger.invalidate_credit_balances(["u1"])
+        assert credit_ledger._failed_invalidations == {"u1"}
+
+        monkeypatch.undo()
+        monkeypatch.setattr(credit_ledger, "get_redis", get_redis)
+        _job_sessions(monkeypatch, ScriptedSession())
+        await flush_credit_ledger()
+        assert credit_ledger._balance_key("u1") not in client.strings
+        assert credit_ledger._failed_invalidations == set()
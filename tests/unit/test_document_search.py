@@ -0,0 +1,63 @@
+"""
+Unit tests for the document search query shape.
+
+Checks that sections are ranked before any headline is built (one
+plainto_tsquery, ts_headline only on the page, best passage per section)
+and that the capped count tells a total of exactly the cap from a larger one.
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api.primitives import (
+    DOCUMENT_COUNT_CAP,
+    _cap_total,
+    _capped_count_sql,
+    _matching_sections_sql,
+    _passage_search_sql,
+)
+
+ORDER = "ORDER BY relevance_score DESC, id ASC"
+
+
+class TestRankedSearchSql:
+    """Tests for the ranked CTE and page-only headlines."""
+
+    @pytest.mark.unit
+    def test_rank_then_headline_page(self):
+        sql = _passage_search_sql("", "", ORDER, "MaxWords=30")
+        best, outer = sql.split("SELECT\n            page.*")
+        page = outer.split("FROM (", 1)[1].split(") page")[0]
+        assert sql.count("plainto_tsquery") == 1
+        assert "SELECT DISTINCT ON (p.document_section_id)" in best
+        assert "ORDER BY p.document_section_id, relevance_score DESC, p.passage_index" in best
+        assert "LIMIT :limit OFFSET :offset" in page
+        assert "ts_headline" not in best and "ts_headline" not in page
+        assert "ts_headline('english', p.content, q.query, 'MaxWords=30')" in outer
+
+    @pytest.mark.unit
+    def test_content_read_only_when_requested(self):
+        assert "ds.content," not in _passage_search_sql("", "", ORDER, "MaxWords=30")
+        with_content = _passage_search_sql("", "", ORDER, "MaxWords=30", include_content=True)
+        assert "JOIN document_sections ds ON ds.id = page.id" in with_content.split(") page")[1]
+        assert "ds.content," not in with_content.split(") page")[0].split("FROM (", 1)[1]
+
+
+class TestCappedCount:
+    """Tests for the capped total."""
+
+    @pytest.mark.unit
+    def test_count_stops_at_bound(self):
+        sql = _capped_count_sql(_matching_sections_sql(" AND p.company_id = :company", ""))
+        assert sql.startswith("SELECT COUNT(*) FROM (")
+        assert sql.endswith("LIMIT :count_cap) capped")
+        assert "SELECT DISTINCT p.document_section_id" in sql
+
+    @pytest.mark.unit
+    def test_exactly_cap_is_not_capped(self):
+        assert _cap_total(DOCUMENT_COUNT_CAP) == (DOCUMENT_COUNT_CAP, False)
+        assert _cap_total(DOCUMENT_COUNT_CAP + 1) == (DOCUMENT_COUNT_CAP, True)
+        assert _cap_total(3) == (3, False)
@@ -0,0 +1,162 @@
+"""
+Unit tests for the cached per-company entity graph.
+
+Builds small graphs from plain row objects and checks CSR adjacency, the
+filtered breadth-first walk, debt totals, guarantor lookups and the
+memoized hierarchy/structure views.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api.entity_traversal import graph_debt, graph_guarantors, graph_subsidiaries
+from app.services.entity_graph import build_entity_graph
+
+COMPANY = UUID(int=1000)
+
+
+def _id(n: int) -> UUID:
+    return UUID(int=n)
+
+
+def _entity(n, name, parent=None, entity_type="subsidiary", **flags):
+    return SimpleNamespace(
+        id=_id(n), name=name, parent_id=_id(parent) if parent else None,
+        entity_type=entity_type, jurisdiction=flags.pop("jurisdiction", "Delaware"),
+        structure_tier=None, ownership_pct=None,
+        is_root=flags.pop("is_root", False), is_guarantor=flags.pop("is_guarantor", False),
+        is_borrower=False, is_vie=flags.pop("is_vie", False),
+        is_restricted=True, is_unrestricted=False,
+    )
+
+
+def _debt(n, issuer, outstanding, maturity, is_active=True):
+    return SimpleNamespace(
+        id=_id(n), name=f"Note {n}", cusip=None, issuer_id=_id(issuer),
+        instrument_type="senior_notes", seniority="senior_unsecured", security_type=None,
+        outstanding=outstanding, principal=outstanding, currency="USD", rate_type="fixed",
+        interest_rate=500, spread_bps=None, benchmark=None, maturity_date=maturity,
+        is_active=is_active,
+    )
+
+
+@pytest.fixture
+def graph():
+    #   1 Parent Inc (root)
+    #   ├── 2 Beta OpCo (guarantor)
+    #   │   └── 4 Delta LLC (Cayman)
+    #   └── 3 Alpha Finco (issuer)
+    #   5 Orphan Sub (no parent)
+    entities = [
+        _entity(1, "Parent Inc", entity_type="holdco", is_root=True),
+        _entity(2, "Beta OpCo", parent=1, is_guarantor=True),
+        _entity(3, "Alpha Finco", parent=1, entity_type="finco"),
+        _entity(4, "Delta LLC", parent=2, jurisdiction="Cayman Islands"),
+        _entity(5, "Orphan Sub"),
+    ]
+    instruments = [
+        _debt(101, 3, 500, date(2027, 1, 1)),
+        _debt(102, 1, 250, date(2029, 1, 1)),
+        _debt(103, 3, None, date(2031, 1, 1), is_active=False),
+    ]
+    guarantees = [(_id(101), _id(2), "full"), (_id(101), _id(1), "full")]
+    return build_entity_graph(COMPANY, entities, instruments, guarantees, [])
+
+
+class TestAdjacency:
+    """Tests for CSR children and debt totals."""
+
+    @pytest.mark.unit
+    def test_children_sorted_by_name(self, graph):
+        """Children of the root come back in name order."""
+        kids = [graph.nodes[i]["name"] for i in graph.children(graph.index[_id(1)])]
+        assert kids == ["Alpha Finco", "Beta OpCo"]
+
+    @pytest.mark.unit
+    def test_debt_totals_and_issuer_bitset(self, graph):
+        """Outstanding is summed per issuer, NULL as 0."""
+        finco = graph.index[_id(3)]
+        assert graph.debt_total[finco] == 500
+        assert graph.debt_count[finco] == 2
+        assert graph.is_issuer.sum() == 2
+        assert graph.guarantees_debt[graph.index[_id(2)]]
+
+
+class TestSubsidiaryWalk:
+    """Tests for graph_subsidiaries."""
+
+    @pytest.mark.unit
+    def test_breadth_first_from_roots(self, graph):
+        """Roots are start nodes; descendants come level by level in name order."""
+        entities, depth_reached = graph_subsidiaries(graph, 10, include_start=True)
+        assert [(e["name"], e["depth"]) for e in entities] == [
+            ("Orphan Sub", 0), ("Parent Inc", 0),
+            ("Alpha Finco", 1), ("Beta OpCo", 1),
+            ("Delta LLC", 2),
+        ]
+        assert depth_reached == 3
+
+    @pytest.mark.unit
+    def test_filter_prunes_subtree(self, graph):
+        """A child failing the filter hides its own descendants too."""
+        entities, _ = graph_subsidiaries(graph, 10, filters={"entity_type": "finco"})
+        assert [e["name"] for e in entities] == ["Alpha Finco"]
+
+    @pytest.mark.unit
+    def test_depth_limit(self, graph):
+        """depth caps the walk and depth_reached."""
+        entities, depth_reached = graph_subsidiaries(graph, 1, start_ids=[_id(1)])
+        assert [e["name"] for e in entities] == ["Alpha Finco", "Beta OpCo"]
+        assert depth_reached == 1
+
+    @pytest.mark.unit
+    def test_debt_at_entity(self, graph):
+        """debt_at_entity comes from the precomputed totals."""
+        entities, _ = graph_subsidiaries(graph, 1, start_ids=[_id(1)], include_debt=True)
+        assert entities[0]["debt_at_entity"] == {"total_outstanding": 500, "instrument_count": 2}
+
+
+class TestGuaranteesAndDebt:
+    """Tests for graph_guarantors and graph_debt."""
+
+    @pytest.mark.unit
+    def test_guarantor_filter(self, graph):
+        """Filters apply to guarantors."""
+        names = [g["name"] for g in graph_guarantors(graph, _id(101), {"is_guarantor": True})]
+        assert names == ["Beta OpCo"]
+
+    @pytest.mark.unit
+    def test_active_debt_in_maturity_order(self, graph):
+        """Only active instruments, earliest maturity first."""
+        instruments = graph_debt(graph)
+        assert [d["id"] for d in instruments] == [str(_id(101)), str(_id(102))]
+
+
+class TestViews:
+    """Tests for the memoized hierarchy and structure views."""
+
+    @pytest.mark.unit
+    def test_hierarchy_summary(self, graph):
+        """Holdco roots sort first; max_depth is the deepest level."""
+        view = graph.hierarchy_view()
+        assert [n["name"] for n in view["hierarchy"]] == ["Parent Inc", "Orphan Sub"]
+        assert view["summary"]["max_depth"] == 2
+        assert view["summary"]["total_debt"] == 750
+        assert graph.hierarchy_view() is view
+
+    @pytest.mark.unit
+    def test_structure_confidence(self, graph):
+        """Key entities under the root are known; others are listed as unknown."""
+        view = graph.structure_view()
+        coverage = view["ownership_coverage"]
+        assert coverage["known_relationships"] == 3  # Beta, Alpha (key) and Delta (intermediate parent)
+        assert [e["name"] for e in view["other_subsidiaries"]["entities"]] == ["Orphan Sub"]
+        finco = view["structure"]["children"][0]
+        assert finco["ownership_confidence"] == "key_entity"
+        assert finco["debt_at_entity"]["instruments"][0]["guarantors"] == ["Beta OpCo", "Parent Inc"]
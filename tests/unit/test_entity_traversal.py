@@ -0,0 +1,70 @@
+"""
+Unit tests for the recursive-CTE entity traversal.
+
+Compiles the traversal SQL against the PostgreSQL dialect and checks that
+filters land in the recursive term and the walk is depth-bounded.
+"""
+
+import pytest
+import sys
+import os
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.entity_traversal import entity_filter_clauses, subsidiary_tree_cte
+from app.models import Entity
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True},
+    ))
+
+
+class TestEntityFilterClauses:
+    """Tests for entity_filter_clauses."""
+
+    @pytest.mark.unit
+    def test_no_filters(self):
+        """No filters means no predicates."""
+        assert entity_filter_clauses(None) == []
+        assert entity_filter_clauses({}) == []
+
+    @pytest.mark.unit
+    def test_string_entity_type_is_listified(self):
+        """A single entity_type string becomes an IN list, not a substring match."""
+        (clause,) = entity_filter_clauses({"entity_type": "LLC"})
+        sql = _sql(select(Entity.id).where(clause))
+        assert "entities.entity_type IN ('LLC')" in sql
+
+    @pytest.mark.unit
+    def test_jurisdiction_is_case_insensitive(self):
+        """jurisdiction matches as ILIKE substring."""
+        (clause,) = entity_filter_clauses({"jurisdiction": "Delaware"})
+        assert "jurisdiction ILIKE" in _sql(select(Entity.id).where(clause))
+
+
+class TestSubsidiaryTreeCte:
+    """Tests for subsidiary_tree_cte."""
+
+    @pytest.mark.unit
+    def test_single_recursive_statement(self):
+        """The whole walk compiles to one WITH RECURSIVE statement."""
+        tree = subsidiary_tree_cte(uuid4(), 10)
+        sql = _sql(select(tree.c.id))
+        assert sql.startswith("WITH RECURSIVE entity_tree")
+        assert "entity_tree.depth < 10" in sql
+        assert "entities.parent_id IS NULL" in sql
+
+    @pytest.mark.unit
+    def test_filters_prune_in_recursive_term(self):
+        """Filters apply to descendants, not to the start rows."""
+        tree = subsidiary_tree_cte(uuid4(), 3, start_ids=[uuid4()], filters={"is_guarantor": True})
+        sql = _sql(select(tree.c.id))
+        anchor, recursive = sql.split("UNION ALL")
+        assert "is_guarantor" not in anchor
+        assert "child.is_guarantor = true" in recursive
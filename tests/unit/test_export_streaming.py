@@ -0,0 +1,100 @@
+"""
+Unit tests for the streaming bulk export encoders.
+
+Feeds row batches through the CSV / NDJSON / JSON chunk encoders and checks
+that each export type's declared columns match the rows it builds.
+"""
+
+import csv
+import io
+import json
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api.export import EXPORTS, csv_chunks, json_chunks, ndjson_chunks
+
+BATCHES = [
+    [{"ticker": "RIG", "revenue": 100}, {"ticker": "CHTR", "revenue": None}],
+    [],
+    [{"ticker": "AAPL", "revenue": 300}],
+]
+
+
+async def _batches(batches):
+    for batch in batches:
+        yield batch
+
+
+async def _collect(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+
+class _AnyRow:
+    """Stands in for an ORM row: every attribute is None."""
+
+    def __getattr__(self, name):
+        return None
+
+
+class TestEncoders:
+    """Tests for csv_chunks, ndjson_chunks and json_chunks."""
+
+    @pytest.mark.unit
+    async def test_csv_header_goes_out_first(self):
+        """The header is the first chunk, before any rows are read."""
+        chunks = await _collect(csv_chunks(("ticker", "revenue"), _batches(BATCHES)))
+        assert chunks[0] == "revenue,ticker\r\n"
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        assert [r["ticker"] for r in rows] == ["RIG", "CHTR", "AAPL"]
+        assert rows[1]["revenue"] == ""
+
+    @pytest.mark.unit
+    async def test_csv_empty_export_is_header_only(self):
+        """No rows still yields a parseable CSV."""
+        assert await _collect(csv_chunks(("ticker",), _batches([]))) == ["ticker\r\n"]
+
+    @pytest.mark.unit
+    async def test_ndjson_one_object_per_line(self):
+        """Each row is one line; empty batches emit nothing."""
+        body = b"".join(await _collect(ndjson_chunks(_batches(BATCHES))))
+        lines = body.decode().splitlines()
+        assert [json.loads(line)["ticker"] for line in lines] == ["RIG", "CHTR", "AAPL"]
+
+    @pytest.mark.unit
+    async def test_json_document_with_trailing_count(self):
+        """Streamed JSON parses as one document with the envelope and count."""
+        body = b"".join(await _collect(json_chunks(_batches(BATCHES), {"data_type": "financials"})))
+        doc = json.loads(body)
+        assert doc["data_type"] == "financials"
+        assert doc["record_count"] == 3
+        assert [r["ticker"] for r in doc["data"]] == ["RIG", "CHTR", "AAPL"]
+
+    @pytest.mark.unit
+    async def test_json_empty_export(self):
+        """No rows gives an empty data list."""
+        doc = json.loads(b"".join(await _collect(json_chunks(_batches([]), {"data_type": "bonds"}))))
+        assert (doc["data"], doc["record_count"]) == ([], 0)
+
+
+class TestExportSpecs:
+    """Tests for the per-type export specs."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("data_type", sorted(EXPORTS))
+    def test_columns_match_rows(self, data_type):
+        """Declared CSV columns are exactly the keys each row carries."""
+        spec = EXPORTS[data_type]
+        arity = spec.build_row.__code__.co_argcount
+        row = spec.build_row(*[_AnyRow() for _ in range(arity)])
+        assert set(row) == set(spec.columns)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("data_type", sorted(EXPORTS))
+    def test_arrow_types_name_real_columns(self, data_type):
+        """Typed columns exist and use the aliases the Arrow writer expects."""
+        spec = EXPORTS[data_type]
+        assert set(spec.types) <= set(spec.columns)
+        assert set(spec.types.values()) <= {"int64", "float64", "bool"}
@@ -0,0 +1,160 @@
+"""
+Unit tests for per-route latency histograms and Prometheus rendering.
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.metrics import (
+    LATENCY_BUCKETS,
+    Histogram,
+    MetricsRegistry,
+    RequestStats,
+    current_request_stats,
+    route_label,
+    statement_shape,
+    track_queries,
+)
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    @pytest.mark.unit
+    def test_quantiles_within_bucket_precision(self):
+        """p50/p95/p99 of 1..1000ms land within ~10% of the true values."""
+        histogram = Histogram()
+        for ms in range(1, 1001):
+            histogram.observe(ms / 1000)
+        for q, expected in ((0.50, 0.500), (0.95, 0.950), (0.99, 0.990)):
+            assert histogram.quantile(q) == pytest.approx(expected, rel=0.1)
+
+    @pytest.mark.unit
+    def test_empty_and_overflow(self):
+        """Empty histograms have no quantiles; huge values go to +Inf."""
+        histogram = Histogram()
+        assert histogram.quantile(0.5) is None
+        histogram.observe(LATENCY_BUCKETS[-1] * 10)
+        assert histogram.counts[-1] == 1
+        assert histogram.quantile(0.99) == LATENCY_BUCKETS[-1]
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry."""
+
+    @pytest.mark.unit
+    def test_prometheus_histogram_is_cumulative(self):
+        """Buckets are cumulative and end with +Inf equal to _count."""
+        registry = MetricsRegistry()
+        for seconds in (0.001, 0.010, 0.100):
+            registry.observe_request("GET", "/v1/bonds", 200, seconds, seconds / 2)
+        text = registry.render_prometheus()
+
+        buckets = [
+            int(line.rsplit(" ", 1)[1])
+            for line in text.splitlines()
+            if line.startswith('debtstack_http_request_duration_seconds_bucket{method="GET",route="/v1/bonds"')
+        ]
+        assert len(buckets) == len(LATENCY_BUCKETS) + 1
+        assert buckets == sorted(buckets) and buckets[-1] == 3
+        assert 'le="+Inf"} 3' in text
+        assert 'debtstack_http_request_duration_seconds_count{method="GET",route="/v1/bonds"} 3' in text
+        assert 'debtstack_http_requests_total{method="GET",route="/v1/bonds",status="200"} 3' in text
+
+    @pytest.mark.unit
+    def test_cache_lookups_and_gauges(self):
+        """Cache results are counted; gauges are read at render time."""
+        registry = MetricsRegistry()
+        registry.record_cache_lookup("response:bonds", True)
+        registry.record_cache_lookup("response:bonds", False)
+        depth = [7]
+        registry.register_gauge("debtstack_test_queue", "Test queue", lambda: depth[0])
+        depth[0] = 9
+
+        text = registry.render_prometheus()
+        assert 'debtstack_cache_lookups_total{cache="response:bonds",result="hit"} 1' in text
+        assert "debtstack_test_queue 9" in text
+
+    @pytest.mark.unit
+    def test_labeled_gauges_and_pool_wait(self):
+        """Gauges registered per pool render as separate labeled series."""
+        registry = MetricsRegistry()
+        registry.register_gauge("debtstack_test_pool", "Test pool", lambda: 3, labels={"pool": "primary"})
+        registry.register_gauge("debtstack_test_pool", "Test pool", lambda: 1, labels={"pool": "read"})
+        registry.observe_pool_wait(0.002, pool="read")
+
+        text = registry.render_prometheus()
+        assert text.count("# TYPE debtstack_test_pool gauge") == 1
+        assert 'debtstack_test_pool{pool="primary"} 3' in text
+        assert 'debtstack_test_pool{pool="read"} 1' in text
+        assert 'debtstack_db_pool_wait_seconds_count{pool="read"} 1' in text
+
+    @pytest.mark.unit
+    def test_route_summary_includes_db_time(self):
+        """The JSON summary reports latency and DB percentiles in ms."""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", None, 404, 0.002, 0.0)
+        registry.observe_request("POST", "/v1/entities/traverse", 200, 0.800, 0.600)
+        slowest = registry.route_latency_summary()[0]
+        assert slowest["route"] == "/v1/entities/traverse"
+        assert slowest["p99_ms"] == pytest.approx(800, rel=0.1)
+        assert slowest["avg_db_ms"] == 600.0
+        assert registry.route_latency_summary()[1]["route"] == "unmatched"
+
+
+class TestRouteLabel:
+    """Tests for route_label."""
+
+    @pytest.mark.unit
+    def test_path_params_become_placeholders(self):
+        scope = {"route": object(), "path": "/v1/companies/AAPL/changes", "path_params": {"ticker": "AAPL"}}
+        assert route_label(scope) == "/v1/companies/{ticker}/changes"
+
+    @pytest.mark.unit
+    def test_unmatched(self):
+        assert route_label({"path": "/nope"}) is None
+
+
+class TestRequestStats:
+    """Tests for per-request SQL stats and N+1 detection."""
+
+    @pytest.mark.unit
+    def test_statement_shape_strips_values(self):
+        """Bind params, literals and IN list lengths don't change the shape."""
+        a = statement_shape("SELECT * FROM guarantees WHERE debt_instrument_id = $1::UUID LIMIT 5")
+        b = statement_shape("SELECT  *  FROM guarantees\nWHERE debt_instrument_id = $7::UUID LIMIT 50")
+        assert a == b == "SELECT * FROM guarantees WHERE debt_instrument_id = ?::UUID LIMIT ?"
+        assert statement_shape("WHERE id IN ($1, $2, $3)") == statement_shape("WHERE id IN ($1)")
+        assert statement_shape("WHERE name = 'O''Brien'") == "WHERE name = ?"
+
+    @pytest.mark.unit
+    def test_repeated_shapes_flag_n_plus_one(self):
+        """Per-row queries with different params group into one repeated shape."""
+        stats = RequestStats()
+        stats.record_query("SELECT * FROM debt_instruments WHERE company_id = $1", 0.002)
+        for i in range(12):
+            stats.record_query(f"SELECT count(*) FROM guarantees WHERE debt_instrument_id = '{i}'", 0.001)
+
+        assert stats.query_count == 13
+        assert stats.db_seconds == pytest.approx(0.014)
+        repeated = stats.repeated_shapes(threshold=10)
+        assert repeated == [("SELECT count(*) FROM guarantees WHERE debt_instrument_id = ?", 12)]
+        assert stats.repeated_shapes(threshold=20) == []
+
+    @pytest.mark.unit
+    def test_server_timing_header(self):
+        """db carries the query count; app is the remainder of total."""
+        stats = RequestStats()
+        stats.record_query("SELECT 1", 0.010)
+        assert stats.server_timing(0.025) == 'db;dur=10.0;desc="1 queries", app;dur=15.0, total;dur=25.0'
+
+    @pytest.mark.unit
+    def test_track_queries_scopes_stats(self):
+        """track_queries installs fresh stats and restores the previous ones."""
+        assert current_request_stats.get() is None
+        with track_queries("test.sql") as stats:
+            assert current_request_stats.get() is stats
+        assert current_request_stats.get() is None
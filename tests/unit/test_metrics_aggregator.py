@@ -0,0 +1,102 @@
+"""
+Unit tests for the in-process request metrics aggregator.
+
+Tests that requests are merged in memory and that a flush sends one
+pipeline of merged deltas, whatever the request count.
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core import monitoring
+from app.core.monitoring import DAILY_PREFIX, HOURLY_PREFIX, MetricsAggregator
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, *args))
+
+    def __len__(self):
+        return len(self.commands)
+
+    async def execute(self):
+        self.client.executed.append(self.commands)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = FakeRedis()
+
+    async def get_redis():
+        return client
+    monkeypatch.setattr(monitoring, "get_redis", get_redis)
+    return client
+
+
+def hincrbys(commands, prefix):
+    return {
+        field: delta
+        for name, key, *rest in commands
+        if name == "hincrby" and key.startswith(prefix)
+        for field, delta in [rest]
+    }
+
+
+class TestMetricsAggregator:
+    """Tests for MetricsAggregator."""
+
+    @pytest.mark.unit
+    def test_requests_merge_in_memory(self):
+        """Counters accumulate per key; IPs are deduplicated."""
+        metrics = MetricsAggregator()
+        for status in (200, 200, 404, 503):
+            metrics.record_request("/v1/companies/AAPL", "GET", status, 42.0, "1.2.3.4")
+        metrics.record_rate_limit_hit("1.2.3.4")
+
+        hourly = next(v for k, v in metrics.counters.items() if k.startswith(HOURLY_PREFIX))
+        assert hourly["total_requests"] == 4
+        assert hourly["path:/v1/companies/{ticker}"] == 4
+        assert hourly["status:200"] == 2
+        assert hourly["errors_4xx"] == 1 and hourly["errors_5xx"] == 1
+        assert hourly["latency:0-50ms"] == 4
+        assert hourly["rate_limit_hits"] == 1
+        assert [len(ips) for ips in metrics.sets.values()] == [1]
+
+    @pytest.mark.unit
+    async def test_flush_sends_one_pipeline_of_deltas(self, redis_client):
+        """Many requests become one pipeline with summed increments."""
+        metrics = MetricsAggregator()
+        for _ in range(500):
+            metrics.record_request("/v1/bonds", "GET", 200, 120.0, "1.2.3.4")
+
+        sent = await metrics.flush()
+        assert len(redis_client.executed) == 1
+        commands = redis_client.executed[0]
+        assert sent == len(commands) < 20
+        assert hincrbys(commands, DAILY_PREFIX)["total_requests"] == 500
+        assert hincrbys(commands, HOURLY_PREFIX)["latency:100-250ms"] == 500
+        assert {name for name, *_ in commands} >= {"hincrby", "hincrbyfloat", "sadd", "expire"}
+
+    @pytest.mark.unit
+    async def test_flush_resets_and_skips_when_idle(self, redis_client):
+        """A second flush with no new requests sends nothing."""
+        metrics = MetricsAggregator()
+        metrics.record_request("/v1/bonds", "GET", 200, 10.0, "1.2.3.4")
+        await metrics.flush()
+        assert await metrics.flush() == 0
+        assert len(redis_client.executed) == 1
@@ -0,0 +1,209 @@
+"""
+Unit tests for company metrics recomputation.
+
+Checks the debt profile aggregation, that the bulk path produces the same
+values as the per-company path, the shape of the set-based aggregate query
+and the batched upsert.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+from uuid import UUID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import metrics as metrics_service
+from app.services.metrics import (
+    DebtProfile,
+    build_metrics,
+    debt_profile,
+    load_debt_profiles,
+    recompute_metrics_bulk,
+    recompute_metrics_for_company,
+    upsert_company_metrics,
+)
+
+TODAY = date.today()
+
+
+def _id(n: int) -> UUID:
+    return UUID(int=n)
+
+
+def _entity(n, company, tier=None, is_guarantor=False, is_unrestricted=False):
+    return SimpleNamespace(
+        id=_id(n), company_id=_id(company), structure_tier=tier,
+        is_guarantor=is_guarantor, is_unrestricted=is_unrestricted,
+    )
+
+
+def _debt(issuer, outstanding, maturity_days=None, seniority="senior_unsecured", rate_type="fixed"):
+    return SimpleNamespace(
+        issuer_id=_id(issuer), outstanding=outstanding, seniority=seniority, rate_type=rate_type,
+        maturity_date=TODAY.fromordinal(TODAY.toordinal() + maturity_days) if maturity_days is not None else None,
+    )
+
+
+def _quarter(company, year, quarter, ebitda, interest=100, filing_type="10-Q"):
+    return SimpleNamespace(
+        company_id=_id(company), fiscal_year=year, fiscal_quarter=quarter, filing_type=filing_type,
+        ebitda=ebitda, operating_income=None, depreciation_amortization=None,
+        interest_expense=interest, source_filing=f"https://sec.gov/{company}/{year}q{quarter}",
+        total_debt=None, cash_and_equivalents=500,
+    )
+
+
+@pytest.fixture
+def universe():
+    """Two companies: one with holdco/opco debt and quarters, one with nothing."""
+    acme = SimpleNamespace(id=_id(1), ticker="ACME", sector="Industrials", industry="Machinery")
+    bare = SimpleNamespace(id=_id(2), ticker="BARE", sector=None, industry=None)
+    entities = [
+        _entity(10, 1, tier=1),
+        _entity(11, 1, tier=3, is_guarantor=True),
+        _entity(12, 1, is_unrestricted=True),
+    ]
+    debts = [
+        _debt(10, 6000, 200, seniority="senior_secured"),
+        _debt(11, 3000, 500, rate_type="floating"),
+        _debt(11, 1000, 900),
+        _debt(12, 500),
+    ]
+    ttm = [_quarter(1, 2025, q, 1000) for q in (3, 2, 1)]
+    latest = SimpleNamespace(**{**vars(ttm[0]), "total_debt": 12000})
+    return SimpleNamespace(
+        companies=[acme, bare], entities=entities, debts=debts, ttm=ttm, latest=latest,
+    )
+
+
+class Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.value)
+
+    def all(self):
+        return self.value
+
+
+class ScriptedSession:
+    """Answers execute() calls in order with canned results."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    async def execute(self, query):
+        self.statements.append(query)
+        return Result(self.results.pop(0))
+
+
+class TestDebtProfile:
+    """Tests for debt_profile."""
+
+    @pytest.mark.unit
+    def test_buckets_and_flags(self, universe):
+        profile = debt_profile(universe.entities, universe.debts, TODAY)
+        assert profile.instrument_debt == 10500
+        assert profile.secured_debt == 6000
+        assert profile.debt_due_1yr == 6000
+        assert profile.debt_due_2yr == 3000
+        assert profile.debt_due_3yr == 1000
+        assert profile.nearest_maturity == universe.debts[0].maturity_date
+        assert profile.maturity_weighted == pytest.approx((6000 * 200 + 3000 * 500 + 1000 * 900) / 365.0)
+        assert profile.has_holdco_debt and profile.has_opco_debt and profile.has_floating_rate
+        assert (profile.entity_count, profile.guarantor_count) == (3, 1)
+        assert profile.has_unrestricted_subs
+
+    @pytest.mark.unit
+    def test_empty_company_matches_defaults(self):
+        assert debt_profile([], [], TODAY) == DebtProfile()
+
+
+class TestBuildMetrics:
+    """Tests for build_metrics."""
+
+    @pytest.mark.unit
+    def test_leverage_from_annualized_quarters(self, universe):
+        acme = universe.companies[0]
+        profile = debt_profile(universe.entities, universe.debts, TODAY)
+        metrics = build_metrics(acme, profile, universe.latest, universe.ttm)
+
+        # Balance sheet debt (12000) over 3 quarters annualized to 4000
+        assert metrics["total_debt"] == 12000
+        assert str(metrics["leverage_ratio"]) == "3.0"
+        assert str(metrics["interest_coverage"]) == "10.0"
+        assert metrics["source_filings"]["is_annualized"] is True
+        assert metrics["source_filings"]["debt_discrepancy_pct"] == 12.5
+        assert metrics["has_structural_sub"] is True
+        assert metrics["is_leveraged_loan"] is False
+
+
+class TestRecomputeMetricsBulk:
+    """Tests for recompute_metrics_bulk."""
+
+    @pytest.mark.unit
+    async def test_bulk_matches_per_company(self, universe):
+        """Set-based aggregates give the same metrics as loading each company."""
+        acme, bare = universe.companies
+        profile = debt_profile(universe.entities, universe.debts, TODAY)
+        entity_part = {k: getattr(profile, k) for k in ("entity_count", "guarantor_count", "has_unrestricted_subs")}
+        instrument_part = {k: v for k, v in vars(profile).items() if k not in entity_part}
+
+        db = ScriptedSession(
+            universe.companies,
+            [SimpleNamespace(company_id=acme.id, **instrument_part)],
+            [SimpleNamespace(company_id=acme.id, **entity_part)],
+            [universe.latest],
+            universe.ttm,
+        )
+        bulk = await recompute_metrics_bulk(db, dry_run=True)
+        assert db.results == []
+
+        single = ScriptedSession(universe.entities, universe.debts, universe.latest, universe.ttm)
+        expected = await recompute_metrics_for_company(single, acme, dry_run=True)
+
+        strip = lambda m: {**m, "source_filings": {**m["source_filings"], "computed_at": None}}
+        assert [m["ticker"] for m in bulk] == ["ACME", "BARE"]
+        assert strip(bulk[0]) == strip(expected)
+
+        empty = await recompute_metrics_for_company(ScriptedSession([], [], None, []), bare, dry_run=True)
+        assert strip(bulk[1]) == strip(empty)
+
+    @pytest.mark.unit
+    async def test_aggregates_use_group_by_filter(self):
+        db = ScriptedSession([], [])
+        assert await load_debt_profiles(db, [_id(1)], today=date(2026, 1, 1)) == {}
+
+        instruments, entities = (
+            str(stmt.compile(dialect=postgresql.dialect())) for stmt in db.statements
+        )
+        assert "FILTER (WHERE debt_instruments.seniority" in instruments
+        assert "bool_or(entities.structure_tier" in instruments
+        assert "GROUP BY debt_instruments.company_id" in instruments
+        assert "count(*) FILTER (WHERE entities.is_guarantor" in entities
+
+    @pytest.mark.unit
+    async def test_upsert_batches(self, universe, monkeypatch):
+        """Rows are written UPSERT_BATCH per statement with ON CONFLICT on ticker."""
+        monkeypatch.setattr(metrics_service, "UPSERT_BATCH", 2)
+        acme = universe.companies[0]
+        row = build_metrics(acme, DebtProfile(), None, [])
+        rows = [{**row, "ticker": f"T{i}"} for i in range(5)]
+        db = ScriptedSession(None, None, None)
+
+        assert await upsert_company_metrics(db, rows) == 5
+        assert len(db.statements) == 3
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (ticker) DO UPDATE SET" in sql
+        assert "leverage_ratio = excluded.leverage_ratio" in sql
+        assert "updated_at = now()" in sql
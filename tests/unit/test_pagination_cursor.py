@@ -0,0 +1,75 @@
+"""
+Unit tests for keyset pagination cursors and the total-count mode.
+
+Tests cursor round-tripping for each sort key type and validation errors.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import HTTPException
+from app.api.primitives_helpers import (
+    encode_cursor, decode_cursor, page_rows, validate_total_mode,
+)
+
+
+class TestCursorRoundTrip:
+    """Tests for encode_cursor / decode_cursor."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("value", ["AAPL", 425, 0.0123, Decimal("4.25"), date(2027, 6, 15), None])
+    def test_round_trip(self, value):
+        """Sort values keep their type through a cursor."""
+        row_id = uuid4()
+        cursor = encode_cursor("maturity_date", value, row_id)
+        assert decode_cursor(cursor, "maturity_date") == (value, row_id)
+
+    @pytest.mark.unit
+    def test_malformed_cursor_raises_400(self):
+        """Garbage cursors are rejected with INVALID_CURSOR."""
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("not-a-cursor", "ticker")
+        assert exc.value.status_code == 400
+        assert exc.value.detail["code"] == "INVALID_CURSOR"
+
+    @pytest.mark.unit
+    def test_cursor_for_other_sort_raises_400(self):
+        """A cursor is only valid for the sort it was issued under."""
+        cursor = encode_cursor("ticker", "AAPL", uuid4())
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(cursor, "-net_leverage_ratio")
+        assert exc.value.status_code == 400
+
+
+class TestPageRows:
+    """Tests for page_rows."""
+
+    @pytest.mark.unit
+    def test_last_page_has_no_cursor(self):
+        """A short fetch means there is no next page."""
+        page, next_cursor = page_rows([1, 2], 2, "ticker", None, lambda row: row)
+        assert page == [1, 2]
+        assert next_cursor is None
+
+
+class TestTotalMode:
+    """Tests for validate_total_mode."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("mode", ["exact", "estimate", "none", "NONE"])
+    def test_valid_modes(self, mode):
+        """Known modes are accepted case-insensitively."""
+        assert validate_total_mode(mode) == mode.lower()
+
+    @pytest.mark.unit
+    def test_invalid_mode_raises_400(self):
+        """Unknown modes are rejected."""
+        with pytest.raises(HTTPException) as exc:
+            validate_total_mode("approx")
+        assert exc.value.detail["code"] == "INVALID_TOTAL_MODE"
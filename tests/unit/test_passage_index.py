@@ -0,0 +1,89 @@
+"""
+Unit tests for splitting document sections into search passages, and for
+the passage-level search SQL.
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api.primitives import _passage_search_sql
+from app.services.passage_index import passage_rows, split_passages
+
+TEXT = " ".join(f"word{i:04d}" for i in range(2000))  # 9 chars per word + space
+
+
+class TestSplitPassages:
+    """Tests for split_passages."""
+
+    @pytest.mark.unit
+    def test_short_and_blank_content(self):
+        """Short text is one passage; blank text has none."""
+        assert split_passages("Senior notes due 2030") == [(0, 21)]
+        assert split_passages("  \n ") == []
+
+    @pytest.mark.unit
+    def test_passages_cover_text_with_overlap(self):
+        """Spans are bounded, overlap their neighbour and reach the end."""
+        spans = split_passages(TEXT, size=500, overlap=100)
+        assert spans[0][0] == 0
+        assert spans[-1][1] == len(TEXT)
+        for (start, end), (next_start, next_end) in zip(spans, spans[1:]):
+            assert end - start <= 500
+            assert next_start < end  # overlap
+            assert next_start > start  # progress
+
+    @pytest.mark.unit
+    def test_passages_break_on_whitespace(self):
+        """No passage starts or ends inside a word."""
+        for start, end in split_passages(TEXT, size=500, overlap=100):
+            passage = TEXT[start:end]
+            assert passage.split() == [w for w in passage.split() if len(w) == 8]
+
+    @pytest.mark.unit
+    def test_unbroken_token_still_progresses(self):
+        """Text without whitespace is split at the size limit."""
+        spans = split_passages("x" * 1200, size=500, overlap=100)
+        assert spans[-1][1] == 1200
+        assert all(end - start <= 500 for start, end in spans)
+
+
+class TestPassageRows:
+    """Tests for passage_rows."""
+
+    @pytest.mark.unit
+    def test_rows_slice_section_content(self):
+        """Each row's content is the section text at its offsets."""
+        section = SimpleNamespace(id=uuid4(), company_id=uuid4(), content=TEXT)
+        rows = passage_rows(section)
+        assert [r["passage_index"] for r in rows] == list(range(len(rows)))
+        for row in rows:
+            assert row["content"] == TEXT[row["start_offset"]:row["end_offset"]]
+            assert row["document_section_id"] == section.id
+
+
+class TestPassageSearchSql:
+    """Tests for _passage_search_sql."""
+
+    @pytest.mark.unit
+    def test_section_filters_apply_before_ranking(self):
+        """Section filters sit inside the best-passage CTE; the seek stays on the page."""
+        sql = _passage_search_sql(
+            "", " AND ds.section_type = ANY(:section_types)", "ORDER BY relevance_score DESC, id ASC",
+            "MaxWords=30", seek_where=" AND ds.id > :cursor_id",
+        )
+        best, page = sql.split("SELECT\n            page.*")
+        assert "JOIN document_sections ds ON ds.id = p.document_section_id" in best
+        assert "ds.section_type = ANY(:section_types)" in best
+        assert ":section_types" not in page
+        assert "ds.id > :cursor_id" in page and ":cursor_id" not in best
+
+    @pytest.mark.unit
+    def test_unfiltered_search_skips_section_join(self):
+        sql = _passage_search_sql("", "", "ORDER BY relevance_score DESC, id ASC", "MaxWords=30")
+        best = sql.split("SELECT\n            page.*")[0]
+        assert "document_sections" not in best
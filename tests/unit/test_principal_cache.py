@@ -0,0 +1,149 @@
+"""
+Unit tests for the authenticated principal cache.
+
+Tests the in-process TTL LRU, Principal serialization, and that repeat
+lookups for the same API key don't reach the database.
+"""
+
+import pytest
+import sys
+import os
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core import principal as principal_module
+from app.core.principal import LocalPrincipalCache, Principal, get_principal
+
+
+def make_principal(**overrides) -> Principal:
+    values = dict(
+        id=uuid4(),
+        api_key_hash="hash-a",
+        tier="pay_as_you_go",
+        rate_limit_per_minute=60,
+        credits_remaining=Decimal("12.50"),
+        credits_monthly_limit=None,
+    )
+    values.update(overrides)
+    return Principal(**values)
+
+
+class TestPrincipal:
+    """Tests for Principal serialization."""
+
+    @pytest.mark.unit
+    def test_json_round_trip(self):
+        """UUID and Decimal survive the Redis representation."""
+        principal = make_principal()
+        assert Principal.from_json(principal.to_json()) == principal
+
+    @pytest.mark.unit
+    def test_json_round_trip_without_credits(self):
+        """Users with no credits row round-trip with None balances."""
+        principal = make_principal(tier="pro", credits_remaining=None)
+        assert Principal.from_json(principal.to_json()) == principal
+
+
+class TestLocalPrincipalCache:
+    """Tests for LocalPrincipalCache."""
+
+    @pytest.mark.unit
+    def test_miss_hit_and_negative_entry(self):
+        """Unknown keys miss; a cached None is a hit, not a miss."""
+        cache = LocalPrincipalCache()
+        principal = make_principal()
+        assert cache.get("hash-a") is LocalPrincipalCache._MISS
+
+        cache.set("hash-a", principal)
+        cache.set("bad-key", None)
+        assert cache.get("hash-a") == principal
+        assert cache.get("bad-key") is None
+
+    @pytest.mark.unit
+    def test_entries_expire(self, monkeypatch):
+        """Entries are dropped once their TTL has passed."""
+        now = [1000.0]
+        monkeypatch.setattr(principal_module.time, "monotonic", lambda: now[0])
+        cache = LocalPrincipalCache(ttl=15)
+        cache.set("hash-a", make_principal())
+
+        now[0] += 14
+        assert cache.get("hash-a") is not LocalPrincipalCache._MISS
+        now[0] += 2
+        assert cache.get("hash-a") is LocalPrincipalCache._MISS
+
+    @pytest.mark.unit
+    def test_evicts_least_recently_used(self):
+        """Over max_size, the least recently read entry goes first."""
+        cache = LocalPrincipalCache(max_size=2)
+        cache.set("a", make_principal(api_key_hash="a"))
+        cache.set("b", make_principal(api_key_hash="b"))
+        cache.get("a")
+        cache.set("c", make_principal(api_key_hash="c"))
+
+        assert cache.get("b") is LocalPrincipalCache._MISS
+        assert cache.get("a") is not LocalPrincipalCache._MISS
+        assert cache.get("c") is not LocalPrincipalCache._MISS
+
+    @pytest.mark.unit
+    def test_discard_users(self):
+        """discard_users drops every key belonging to the given users."""
+        cache = LocalPrincipalCache()
+        kept, dropped = make_principal(), make_principal()
+        cache.set("kept", kept)
+        cache.set("dropped", dropped)
+        cache.set("bad-key", None)
+
+        cache.discard_users([dropped.id])
+        assert cache.get("dropped") is LocalPrincipalCache._MISS
+        assert cache.get("kept") == kept
+        assert cache.get("bad-key") is None
+
+
+class FakeSession:
+    """Session stub returning one users/user_credits row (or none)."""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return SimpleNamespace(first=lambda: self.row)
+
+
+class TestGetPrincipal:
+    """Tests for get_principal without Redis."""
+
+    @pytest.fixture(autouse=True)
+    def no_redis(self, monkeypatch):
+        async def get_redis():
+            return None
+        monkeypatch.setattr(principal_module, "get_redis", get_redis)
+        monkeypatch.setattr(principal_module, "local_principals", LocalPrincipalCache())
+
+    @pytest.mark.unit
+    async def test_second_lookup_is_served_in_process(self):
+        """Only the first lookup for a key queries the database."""
+        user_id = uuid4()
+        db = FakeSession(SimpleNamespace(
+            id=user_id, tier="pro", rate_limit_per_minute=100,
+            credits_remaining=None, credits_monthly_limit=None,
+        ))
+
+        first = await get_principal("hash-a", db)
+        second = await get_principal("hash-a", db)
+        assert first == second
+        assert first.id == user_id and first.rate_limit_per_minute == 100
+        assert db.queries == 1
+
+    @pytest.mark.unit
+    async def test_unknown_key_is_cached_as_none(self):
+        """Bad keys are remembered so they don't query every time."""
+        db = FakeSession(None)
+        assert await get_principal("bad-key", db) is None
+        assert await get_principal("bad-key", db) is None
+        assert db.queries == 1
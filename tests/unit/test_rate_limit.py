@@ -0,0 +1,93 @@
+"""
+Unit tests for the GCRA rate limiter.
+
+Tests the algorithm shared by the Redis script and the in-process
+fallback, and that check_rate_limit still limits without Redis.
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core import cache
+from app.core.cache import LocalRateLimiter, check_rate_limit, gcra
+
+
+def drain(limit: int, window: float, now: float = 1000.0):
+    """Send requests at one instant until denied; return the allowed results."""
+    tat, results = None, []
+    while True:
+        allowed, new_tat, remaining, wait = gcra(tat, now, limit, window)
+        if not allowed:
+            return results, wait
+        tat = new_tat
+        results.append((remaining, wait))
+
+
+class TestGCRA:
+    """Tests for the gcra step function."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("limit", [1, 7, 60, 100, 1000])
+    def test_burst_equals_limit(self, limit):
+        """A burst gets exactly `limit` requests, counting remaining down to 0."""
+        results, _ = drain(limit, 60)
+        assert [remaining for remaining, _ in results] == list(range(limit - 1, -1, -1))
+
+    @pytest.mark.unit
+    def test_denied_wait_is_one_interval(self):
+        """After a burst, the next request is allowed one interval later."""
+        _, wait = drain(60, 60)
+        assert wait == pytest.approx(1.0)
+
+    @pytest.mark.unit
+    def test_capacity_refills_evenly(self):
+        """Half a window after a full burst, half the limit is available."""
+        now = 1000.0
+        tat = None
+        for _ in range(100):
+            _, tat, _, _ = gcra(tat, now, 100, 60)
+        allowed, _, remaining, _ = gcra(tat, now + 30, 100, 60)
+        assert allowed
+        assert remaining == 49
+
+    @pytest.mark.unit
+    def test_idle_key_starts_full(self):
+        """A TAT in the past counts as a fresh key."""
+        allowed, _, remaining, reset = gcra(500.0, 1000.0, 10, 60)
+        assert allowed and remaining == 9
+        assert reset == pytest.approx(6.0)
+
+
+class TestLocalRateLimiter:
+    """Tests for the in-process fallback."""
+
+    @pytest.mark.unit
+    def test_limits_per_identifier(self):
+        """Identifiers are limited independently."""
+        limiter = LocalRateLimiter()
+        assert all(limiter.check("a", 3, 60)[0] for _ in range(3))
+        allowed, remaining, retry_after = limiter.check("a", 3, 60)
+        assert not allowed and remaining == 0 and retry_after >= 1
+        assert limiter.check("b", 3, 60)[0]
+
+    @pytest.mark.unit
+    def test_bounded_size(self):
+        """Least recently used identifiers are dropped past max_keys."""
+        limiter = LocalRateLimiter(max_keys=2)
+        for identifier in ("a", "b", "c"):
+            limiter.check(identifier, 10, 60)
+        assert list(limiter._tats) == ["b", "c"]
+
+    @pytest.mark.unit
+    async def test_check_rate_limit_without_redis(self, monkeypatch):
+        """No Redis means the local limiter, not unlimited."""
+        async def get_redis():
+            return None
+        monkeypatch.setattr(cache, "get_redis", get_redis)
+        monkeypatch.setattr(cache, "local_rate_limiter", LocalRateLimiter())
+
+        results = [await check_rate_limit("ip:1", limit=2, window=60) for _ in range(3)]
+        assert [allowed for allowed, _, _ in results] == [True, True, False]
@@ -0,0 +1,226 @@
+"""
+Unit tests for response cache key construction.
+
+Tests that equivalent primitive requests share a cache key, that a data
+version bump produces a different key, that version ETags are honored,
+that the ETag stamps cover each endpoint's own source tables, that
+replica-built bodies are not cached past a version bump and that
+post-commit version bumps are drained, not dropped.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.dialects import postgresql
+
+from app.api import primitives_helpers
+from app.api.primitives_helpers import (
+    cache_response, canonical_cache_params, data_version_etag, etag_response, response_cache_version,
+)
+from app.core import cache
+from app.core.cache import build_response_cache_key, bump_data_version_on_commit, drain_version_bumps
+from app.models import Collateral, Covenant
+
+
+class StampSession:
+    """Records the stamp statement and answers it with fixed values."""
+
+    def __init__(self, *values):
+        self.values = values
+        self.statements = []
+
+    async def execute(self, query):
+        self.statements.append(query)
+        return SimpleNamespace(one=lambda: self.values[:len(query.selected_columns)])
+
+
+class TestCanonicalCacheParams:
+    """Tests for canonical_cache_params normalization."""
+
+    @pytest.mark.unit
+    def test_drops_request_only_and_unset_params(self):
+        """db, if_none_match and None values are not part of the key."""
+        params = canonical_cache_params({
+            "ticker": "AAPL", "sector": None, "db": object(), "if_none_match": '"abc"',
+        })
+        assert params == {"ticker": ["AAPL"]}
+
+    @pytest.mark.unit
+    def test_ticker_order_and_case_ignored(self):
+        """Ticker lists are uppercased, deduped and sorted."""
+        a = canonical_cache_params({"ticker": "msft, AAPL,aapl"})
+        b = canonical_cache_params({"ticker": "AAPL,MSFT"})
+        assert a == b == {"ticker": ["AAPL", "MSFT"]}
+
+    @pytest.mark.unit
+    def test_fields_keep_case(self):
+        """Field names are sorted but not uppercased."""
+        params = canonical_cache_params({"fields": "name,ticker"})
+        assert params == {"fields": ["name", "ticker"]}
+
+
+class TestBuildResponseCacheKey:
+    """Tests for build_response_cache_key."""
+
+    @pytest.mark.unit
+    def test_same_params_same_key(self):
+        """Param dict ordering does not change the key."""
+        k1 = build_response_cache_key("bonds", {"a": 1, "b": 2}, "g=1")
+        k2 = build_response_cache_key("bonds", {"b": 2, "a": 1}, "g=1")
+        assert k1 == k2
+        assert k1.startswith("resp:bonds:")
+
+    @pytest.mark.unit
+    def test_version_bump_changes_key(self):
+        """A new data version yields a new key."""
+        k1 = build_response_cache_key("bonds", {"a": 1}, "AAPL=1")
+        k2 = build_response_cache_key("bonds", {"a": 1}, "AAPL=2")
+        assert k1 != k2
+
+
+class TestVersionEtagResponse:
+    """Tests for etag_response with a precomputed version ETag."""
+
+    @pytest.mark.unit
+    def test_uses_supplied_etag(self):
+        """The supplied ETag is sent instead of a body hash."""
+        response = etag_response({"data": []}, None, etag="v1")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"v1"'
+
+    @pytest.mark.unit
+    def test_matching_etag_returns_304(self):
+        """A matching If-None-Match returns 304."""
+        response = etag_response({"data": []}, '"v1"', etag="v1")
+        assert response.status_code == 304
+
+
+class TestDataVersionEtag:
+    """Tests for data_version_etag source stamps and response_cache_version."""
+
+    @pytest.mark.unit
+    async def test_source_stamps_scoped_to_tickers(self):
+        """Each source adds max(stamp), joined through to the ticker, and no row counts."""
+        db = StampSession("t1", 2, "c1", "k1")
+        await data_version_etag(
+            db, "collateral", {}, ["AAPL"], sources=(Covenant.updated_at, Collateral.updated_at)
+        )
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "max(covenants.updated_at)" in sql
+        assert "max(collateral.updated_at)" in sql
+        assert "JOIN debt_instruments ON collateral.debt_instrument_id = debt_instruments.id" in sql
+        assert sql.count("count(*)") == 1  # only the covered company count
+        assert len(db.statements[0].selected_columns) == 4
+
+    @pytest.mark.unit
+    async def test_source_change_changes_etag(self):
+        """A covenant write without a cache refresh still changes the ETag."""
+        before = await data_version_etag(StampSession("t1", 2, "c1"), "covenants", {}, sources=(Covenant.updated_at,))
+        after = await data_version_etag(StampSession("t1", 2, "c2"), "covenants", {}, sources=(Covenant.updated_at,))
+        assert before != after
+
+    @pytest.mark.unit
+    async def test_cache_version_follows_etag(self, monkeypatch):
+        """A stamp change without a version bump moves the response cache key too."""
+        async def version(tickers=None):
+            return "g=1"
+
+        monkeypatch.setattr(primitives_helpers, "get_data_version", version)
+        assert await response_cache_version(None, "e1") != await response_cache_version(None, "e2")
+        assert await response_cache_version(None, None) == "g=1"
+
+
+@pytest.fixture
+def cache_writes(monkeypatch):
+    """Record response cache writes and serve a settable data version."""
+    state = SimpleNamespace(version="g=1", writes=[])
+
+    async def version(tickers=None):
+        return state.version
+
+    async def write(namespace, params, version, value, ttl_seconds=cache.RESPONSE_CACHE_TTL):
+        state.writes.append((version, ttl_seconds))
+        return True
+
+    monkeypatch.setattr(primitives_helpers, "get_data_version", version)
+    monkeypatch.setattr(primitives_helpers, "response_cache_set", write)
+    return state
+
+
+class TestCacheResponse:
+    """Tests for cache_response with and without a read replica."""
+
+    @pytest.mark.unit
+    async def test_primary_writes_full_ttl(self, monkeypatch, cache_writes):
+        monkeypatch.setattr(primitives_helpers, "READ_REPLICA", False)
+        cache_writes.version = "g=2"
+        assert await cache_response("companies", {}, "g=1|e1", {})
+        assert cache_writes.writes == [("g=1|e1", cache.RESPONSE_CACHE_TTL)]
+
+    @pytest.mark.unit
+    async def test_replica_write_capped(self, monkeypatch, cache_writes):
+        monkeypatch.setattr(primitives_helpers, "READ_REPLICA", True)
+        assert await cache_response("companies", {}, "g=1|e1", {})
+        assert cache_writes.writes == [("g=1|e1", cache.REPLICA_RESPONSE_CACHE_TTL)]
+
+    @pytest.mark.unit
+    async def test_replica_skips_after_bump(self, monkeypatch, cache_writes):
+        """A bump during the request means the replica may not have the write yet."""
+        monkeypatch.setattr(primitives_helpers, "READ_REPLICA", True)
+        cache_writes.version = "g=2"
+        assert not await cache_response("companies", {}, "g=1|e1", {})
+        assert cache_writes.writes == []
+
+
+@pytest.fixture
+def bumps(monkeypatch):
+    """Record data version bumps instead of talking to Redis."""
+    done = []
+
+    async def bump(ticker=None):
+        await asyncio.sleep(0.01)
+        done.append(ticker)
+        return True
+
+    monkeypatch.setattr(cache, "bump_data_version", bump)
+    return done
+
+
+class TestPostCommitBumps:
+    """Tests for bump_data_version_on_commit and drain_version_bumps."""
+
+    @pytest.mark.unit
+    async def test_commit_bump_is_drained(self, bumps):
+        session = SimpleNamespace(info={})
+        bump_data_version_on_commit(session, "aapl")
+        cache._run_pending_version_bumps(session)
+        assert bumps == []
+        assert await drain_version_bumps() == 0
+        assert bumps == ["AAPL"]
+
+    @pytest.mark.unit
+    async def test_rollback_discards_pending(self, bumps):
+        session = SimpleNamespace(info={})
+        bump_data_version_on_commit(session, "AAPL")
+        cache._discard_pending_bumps(session)
+        cache._run_pending_version_bumps(session)
+        await drain_version_bumps()
+        assert bumps == []
+
+    @pytest.mark.unit
+    def test_run_async_drains_before_loop_closes(self, bumps):
+        """Scripts that commit and return still land their bumps."""
+        from scripts.script_utils import run_async
+
+        async def main():
+            session = SimpleNamespace(info={})
+            bump_data_version_on_commit(session, "AAPL")
+            cache._run_pending_version_bumps(session)
+
+        run_async(main())
+        assert bumps == ["AAPL"]
@@ -0,0 +1,56 @@
+"""
+Unit tests for the materialized TTM financials read path.
+
+Checks how company_ttm_financials rows are shaped for /v1/financials?period=TTM
+for both annual (10-K) and summed-quarter rollups.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.api.primitives import ttm_financials_dict
+
+COMPANY = SimpleNamespace(ticker="RIG", name="Transocean Ltd.")
+
+
+def _ttm(**overrides):
+    row = dict(
+        ttm_source="4_quarters", ttm_quarters=4, period_end_date=date(2025, 9, 30),
+        revenue=400, ebitda=120, operating_income=80, net_income=20, interest_expense=30,
+        depreciation_amortization=40, cash_and_equivalents=50, total_assets=1000,
+        total_debt=600, total_liabilities=700, stockholders_equity=300,
+        operating_cash_flow=90, capex=-35, source_filing="https://sec.gov/q3",
+    )
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+class TestTTMFinancialsDict:
+    """Tests for ttm_financials_dict."""
+
+    @pytest.mark.unit
+    def test_quarterly_rollup(self):
+        """Summed-quarter rollups report their quarter count and free cash flow."""
+        data = ttm_financials_dict(_ttm(), COMPANY)
+        assert data["period"] == "TTM"
+        assert (data["ttm_source"], data["ttm_quarters"]) == ("4_quarters", 4)
+        assert data["period_end_date"] == "2025-09-30"
+        assert data["cash"] == 50
+        assert data["free_cash_flow"] == 55
+
+    @pytest.mark.unit
+    def test_annual_rollup_has_no_quarter_count(self):
+        """10-K rollups omit ttm_quarters."""
+        data = ttm_financials_dict(_ttm(ttm_source="10-K", ttm_quarters=None), COMPANY)
+        assert data["ttm_source"] == "10-K"
+        assert "ttm_quarters" not in data
+
+    @pytest.mark.unit
+    def test_no_free_cash_flow_without_capex(self):
+        """free_cash_flow is only present when both inputs are."""
+        assert "free_cash_flow" not in ttm_financials_dict(_ttm(capex=None), COMPANY)
@@ -0,0 +1,235 @@
+"""
+Unit tests for the in-memory universe store screens.
+
+Builds small snapshots by hand and checks filter semantics (including NULL
+handling), NULLS LAST ordering with id tie-breaks, and cursor continuation.
+"""
+
+import pytest
+import sys
+import os
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from app.api import universe_store as universe_store_module
+from app.api.universe_store import (
+    ColumnTable, UniverseSnapshot, UniverseStore, date_column, num_column, text_column,
+    screen_bonds, screen_companies, COMPANY_FLAG_FILTERS, EXPIRE_SECONDS, MAX_AGE_SECONDS,
+)
+
+
+def _id(n: int) -> str:
+    return f"00000000-0000-0000-0000-{n:012d}"
+
+
+def _companies(rows):
+    """rows: list of (ticker, sector, leverage_ratio, has_structural_sub)."""
+    return ColumnTable(
+        ids=np.array([_id(i) for i in range(len(rows))], dtype=str),
+        columns={
+            "ticker": text_column([r[0] for r in rows]),
+            "name": text_column([r[0] for r in rows]),
+            "sector": text_column([r[1] for r in rows]),
+            "industry": text_column([None for _ in rows]),
+            "rating_bucket": text_column([None for _ in rows]),
+            "total_debt": num_column([None for _ in rows]),
+            "leverage_ratio": num_column([r[2] for r in rows]),
+            "net_leverage_ratio": num_column([None for _ in rows]),
+            "interest_coverage": num_column([None for _ in rows]),
+            "entity_count": num_column([None for _ in rows]),
+            "subordination_score": num_column([None for _ in rows]),
+            "nearest_maturity": date_column([None for _ in rows]),
+            **{flag: num_column([r[3] if flag == "has_structural_sub" else None for r in rows])
+               for flag in COMPANY_FLAG_FILTERS},
+        },
+        records=[{"ticker": r[0]} for r in rows],
+    )
+
+
+def _bonds(rows):
+    """rows: list of (ticker, maturity_date, ytm_bps, has_trace_price[, spread_bps, last_price])."""
+    n = len(rows)
+    return ColumnTable(
+        ids=np.array([_id(i) for i in range(n)], dtype=str),
+        columns={
+            "ticker": text_column([r[0] for r in rows]),
+            "cusip": text_column([None] * n),
+            "name": text_column([r[0] for r in rows]),
+            "company_sector": text_column([None] * n),
+            "seniority": text_column([None] * n),
+            "security_type": text_column([None] * n),
+            "instrument_type": text_column([None] * n),
+            "issuer_type": text_column([None] * n),
+            "rate_type": text_column([None] * n),
+            "currency": text_column(["USD"] * n),
+            "interest_rate": num_column([None] * n),
+            "outstanding": num_column([None] * n),
+            "maturity_date": date_column([r[1] for r in rows]),
+            "is_active": num_column([True] * n),
+            "ytm_bps": num_column([r[2] for r in rows]),
+            "spread_bps": num_column([r[4] if len(r) > 4 else None for r in rows]),
+            "last_price": num_column([r[5] if len(r) > 5 else None for r in rows]),
+            "has_trace_price": num_column([r[3] for r in rows]),
+            "guarantor_count": num_column([0] * n),
+        },
+        records=[{"id": _id(i), "ticker": r[0]} for i, r in enumerate(rows)],
+    )
+
+
+def _snapshot(companies=None, bonds=None):
+    return UniverseSnapshot(
+        version="g=1",
+        loaded_at=0.0,
+        companies=companies or _companies([]),
+        bonds=bonds or _bonds([]),
+    )
+
+
+class TestScreenCompanies:
+    """Tests for screen_companies."""
+
+    @pytest.fixture
+    def snapshot(self):
+        return _snapshot(companies=_companies([
+            ("AAPL", "Technology", Decimal("1.2"), False),
+            ("CHTR", "Communication Services", Decimal("4.8"), True),
+            ("RIG", "Energy", None, True),
+            ("MSFT", "Technology", Decimal("0.4"), None),
+        ]))
+
+    @pytest.mark.unit
+    def test_sector_is_case_insensitive_substring(self, snapshot):
+        """sector behaves like ILIKE '%value%'."""
+        result = screen_companies(snapshot, {"sector": "tech", "sort": "ticker", "limit": 50, "offset": 0})
+        assert [r["ticker"] for r in result.records] == ["AAPL", "MSFT"]
+
+    @pytest.mark.unit
+    def test_range_filter_excludes_nulls(self, snapshot):
+        """Leverage filters drop companies without a ratio, like SQL comparisons."""
+        result = screen_companies(snapshot, {"max_leverage": 5.0, "sort": "ticker", "limit": 50, "offset": 0})
+        assert [r["ticker"] for r in result.records] == ["AAPL", "CHTR", "MSFT"]
+
+    @pytest.mark.unit
+    def test_boolean_filter(self, snapshot):
+        """Boolean flags match exactly and exclude NULLs."""
+        result = screen_companies(snapshot, {"has_structural_sub": True, "sort": "ticker", "limit": 50, "offset": 0})
+        assert [r["ticker"] for r in result.records] == ["CHTR", "RIG"]
+
+    @pytest.mark.unit
+    def test_descending_sort_puts_nulls_last(self, snapshot):
+        """-leverage_ratio sorts high to low with NULL at the end."""
+        result = screen_companies(snapshot, {"sort": "-leverage_ratio", "limit": 50, "offset": 0})
+        assert [r["ticker"] for r in result.records] == ["CHTR", "AAPL", "MSFT", "RIG"]
+        assert result.total == 4
+
+
+class TestScreenBonds:
+    """Tests for screen_bonds."""
+
+    @pytest.fixture
+    def snapshot(self):
+        return _snapshot(bonds=_bonds([
+            ("RIG", date(2027, 1, 15), 950, True),
+            ("CHTR", date(2030, 6, 1), 610, True),
+            ("AAPL", date(2027, 1, 15), None, False),
+            ("CHTR", date(2029, 3, 1), 720, True),
+        ]))
+
+    @pytest.mark.unit
+    def test_has_pricing_and_ytm_sort(self, snapshot):
+        """Priced bonds ranked by yield, highest first."""
+        result = screen_bonds(snapshot, {
+            "is_active": True, "has_pricing": True, "sort": "-pricing.ytm", "limit": 50, "offset": 0,
+        })
+        assert [r["ticker"] for r in result.records] == ["RIG", "CHTR", "CHTR"]
+
+    @pytest.mark.unit
+    def test_ties_break_on_id(self, snapshot):
+        """Bonds with the same maturity are ordered by id."""
+        result = screen_bonds(snapshot, {"is_active": True, "sort": "maturity_date", "limit": 2, "offset": 0})
+        assert [r["id"] for r in result.records] == [_id(0), _id(2)]
+
+    @pytest.mark.unit
+    def test_cursor_walks_all_pages(self, snapshot):
+        """Following next_cursor visits every bond exactly once."""
+        params = {"is_active": True, "sort": "-pricing.ytm", "limit": 1, "offset": 0}
+        seen = []
+        while True:
+            result = screen_bonds(snapshot, params)
+            seen.extend(r["id"] for r in result.records)
+            if not result.next_cursor:
+                break
+            params = {**params, "cursor": result.next_cursor}
+        assert seen == [_id(0), _id(3), _id(1), _id(2)]
+
+    @pytest.mark.unit
+    def test_has_pricing_false_matches_sql(self):
+        """has_pricing=false keeps bonds whose pricing row has no last_price, like the SQL path."""
+        rows = [
+            ("TRACE", date(2027, 1, 15), 900, True, 400, 98.5),
+            ("ESTIMATED", date(2027, 2, 15), 800, False, 300, 97.0),
+            ("NO_PRICE", date(2027, 3, 15), 700, False, 200, None),
+            ("NO_ROW", date(2027, 4, 15), None, False, None, None),
+        ]
+        snapshot = _snapshot(bonds=_bonds(rows))
+        params = {"has_pricing": False, "min_spread": 100, "sort": "maturity_date", "limit": 50, "offset": 0}
+
+        # SQL: spread_to_treasury_bps >= 100 AND (last_price IS NULL OR no pricing row)
+        expected = [r[0] for r in rows if r[4] is not None and r[4] >= 100 and r[5] is None]
+        result = screen_bonds(snapshot, params)
+        assert [r["ticker"] for r in result.records] == expected == ["NO_PRICE"]
+
+        # Without another pricing filter has_pricing=false is ignored, as in SQL
+        result = screen_bonds(snapshot, {**params, "min_spread": None})
+        assert len(result.records) == 4
+
+
+class TestSnapshotFreshness:
+    """Tests for UniverseStore.get_snapshot staleness checks."""
+
+    @pytest.fixture
+    def store(self, monkeypatch):
+        async def version():
+            return "g=1"
+
+        store = UniverseStore()
+        store.reloads = 0
+
+        def schedule_reload():
+            store.reloads += 1
+
+        monkeypatch.setattr(universe_store_module, "get_data_version", version)
+        monkeypatch.setattr(type(store), "enabled", property(lambda self: True))
+        monkeypatch.setattr(store, "schedule_reload", schedule_reload)
+        return store
+
+    def _loaded(self, store, age):
+        store._snapshot = UniverseSnapshot(
+            version="g=1", loaded_at=time.time() - age, companies=_companies([]), bonds=_bonds([]),
+        )
+        store._checked_at = 0.0
+        return store._snapshot
+
+    @pytest.mark.unit
+    async def test_current_version_within_max_age(self, store):
+        snapshot = self._loaded(store, 10)
+        assert await store.get_snapshot() is snapshot
+        assert store.reloads == 0
+
+    @pytest.mark.unit
+    async def test_max_age_applies_with_redis(self, store):
+        """An unchanged version doesn't keep an old snapshot forever (lost bumps)."""
+        snapshot = self._loaded(store, MAX_AGE_SECONDS + 1)
+        assert await store.get_snapshot() is snapshot
+        assert store.reloads == 1
+
+    @pytest.mark.unit
+    async def test_expired_snapshot_not_served(self, store):
+        self._loaded(store, EXPIRE_SECONDS + 1)
+        assert await store.get_snapshot() is None
+        assert store.reloads == 1